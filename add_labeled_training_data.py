@@ -235,7 +235,8 @@ class LabeledDataManager:
         feature_cols = [col for col in labeled_df.columns 
                        if col not in ['user_id', 'label', 'label_type', 'attack_type']]
         
-        X = labeled_df[feature_cols].values
+        # Unscaled features: the trainer fits the feature pipeline on the training split
+        X = labeled_df[feature_cols]
         y = labeled_df['label'].values
         
         self.logger.info(f"Training data shape: X={X.shape}, y={y.shape}")
@@ -254,7 +255,8 @@ class LabeledDataManager:
             y=y,
             isolation_forest_params={'contamination': 0.1, 'n_estimators': 100},
             autoencoder_params={'encoding_dim': 10, 'epochs': 50},
-            random_forest_params={'n_estimators': 100, 'max_depth': 10}
+            random_forest_params={'n_estimators': 100, 'max_depth': 10},
+            feature_pipeline=self.feature_extractor.create_pipeline()
         )
         
         # Evaluate models
@@ -348,6 +348,67 @@ def test_batch_save_with_deduplication():
     print("✓ Batch save with deduplication test passed")
 
 
+def test_dedup_cache_history_and_expiry():
+    """Test cache keeps every alert per key and expires old ones"""
+    print("\n=== Testing Dedup Cache History and Expiry ===")
+    
+    manager = AlertManager(deduplication_window_hours=1)
+    
+    # Two alerts for the same user/pattern with disjoint trades
+    first = manager.generate_alert(
+        user_id="user_hist",
+        trade_ids=["trade_1", "trade_2"],
+        anomaly_score=70.0,
+        risk_level=RiskLevel.MEDIUM,
+        pattern_type=PatternType.WASH_TRADING,
+        explanation="Wash trading detected",
+        recommended_action="Monitor"
+    )
+    second = manager.generate_alert(
+        user_id="user_hist",
+        trade_ids=["trade_8", "trade_9"],
+        anomaly_score=72.0,
+        risk_level=RiskLevel.MEDIUM,
+        pattern_type=PatternType.WASH_TRADING,
+        explanation="Wash trading detected",
+        recommended_action="Monitor"
+    )
+    manager._add_to_cache(first)
+    manager._add_to_cache(second)
+    
+    # A repeat of the first alert is still caught after the second was cached
+    repeat = manager.generate_alert(
+        user_id="user_hist",
+        trade_ids=["trade_1", "trade_2", "trade_3"],
+        anomaly_score=71.0,
+        risk_level=RiskLevel.MEDIUM,
+        pattern_type=PatternType.WASH_TRADING,
+        explanation="Wash trading detected",
+        recommended_action="Monitor"
+    )
+    assert manager._is_duplicate(repeat), "History should keep the first alert"
+    assert manager.cache_size() == 2
+    
+    # Old alert expires from the cache
+    stale = manager.generate_alert(
+        user_id="user_old",
+        trade_ids=["trade_50"],
+        anomaly_score=60.0,
+        risk_level=RiskLevel.MEDIUM,
+        pattern_type=PatternType.WASH_TRADING,
+        explanation="Wash trading detected",
+        recommended_action="Monitor"
+    )
+    stale.timestamp = datetime.now() - timedelta(hours=2)
+    manager._add_to_cache(stale)
+    manager._clean_cache()
+    
+    print(f"Cache size after expiry: {manager.cache_size()}")
+    assert manager.cache_size() == 2
+    
+    print("✓ Dedup cache history and expiry test passed")
+
+
 def main():
     """Run all tests"""
     print("=" * 60)
@@ -361,6 +422,7 @@ def main():
         test_alert_statistics()
         test_alert_review()
         test_batch_save_with_deduplication()
+        test_dedup_cache_history_and_expiry()
         
         print("\n" + "=" * 60)
         print("✓ All tests passed successfully!")
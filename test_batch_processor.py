@@ -7,10 +7,13 @@ Tests batch processing functionality with progress tracking and memory optimizat
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+import os
+import tempfile
 
 from trade_risk_analyzer.detection.engine import DetectionEngine, DetectionConfig
 from trade_risk_analyzer.detection.batch_processor import BatchProcessor, BatchProgress
 from trade_risk_analyzer.data_ingestion.storage import DatabaseStorage
+from trade_risk_analyzer.data_ingestion.parquet_storage import ParquetStorage
 from trade_risk_analyzer.core.base import TradeType
 
 
@@ -309,6 +312,169 @@ def test_memory_optimization():
     print("✓ Memory optimization test passed")
 
 
+def test_entity_partitioned_batches():
+    """Test that every entity lands in exactly one batch"""
+    print("\n=== Testing Entity-Partitioned Batches ===")
+    
+    # Uneven users so positional slicing would split them
+    trades_df = generate_test_trades(num_trades=700, num_users=7)
+    trades_df = trades_df.sample(frac=1.0, random_state=0).reset_index(drop=True)
+    
+    config = DetectionConfig(use_ml_models=False, use_rule_based=True)
+    engine = DetectionEngine(config=config)
+    processor = BatchProcessor(detection_engine=engine, batch_size=250)
+    
+    batches = processor._split_into_batches(trades_df, group_by='user_id')
+    
+    print(f"Split {len(trades_df)} trades into {len(batches)} batches")
+    
+    seen_users = set()
+    for batch in batches:
+        batch_users = set(batch['user_id'].unique())
+        assert not (batch_users & seen_users), "User split across batches"
+        seen_users |= batch_users
+    
+    assert sum(len(b) for b in batches) == len(trades_df)
+    assert seen_users == set(trades_df['user_id'].unique())
+    
+    print("✓ Entity-partitioned batches test passed")
+
+
+def test_batch_processing_parallel():
+    """Test process-pool batch processing matches sequential results"""
+    print("\n=== Testing Parallel Batch Processing ===")
+    
+    trades_df = generate_test_trades(num_trades=600, num_users=6)
+    
+    config = DetectionConfig(use_ml_models=False, use_rule_based=True)
+    engine = DetectionEngine(config=config)
+    
+    sequential = BatchProcessor(detection_engine=engine, batch_size=200)
+    parallel = BatchProcessor(
+        detection_engine=engine,
+        batch_size=200,
+        max_workers=2,
+        use_parallel=True
+    )
+    
+    progress_updates = []
+    parallel.add_progress_callback(lambda p: progress_updates.append(p.to_dict()))
+    
+    sequential_results = sequential.process_dataframe(trades_df, save_alerts=False)
+    parallel_results = parallel.process_dataframe(trades_df, save_alerts=False)
+    
+    print(f"  Sequential alerts: {sequential_results['total_alerts']}")
+    print(f"  Parallel alerts: {parallel_results['total_alerts']}")
+    print(f"  Parallel speedup: {parallel_results['parallel_speedup']:.2f}x")
+    
+    assert parallel_results['errors'] == 0
+    assert parallel_results['total_batches'] == sequential_results['total_batches']
+    assert parallel_results['total_alerts'] == sequential_results['total_alerts']
+    assert progress_updates[-1]['workers'] == 2
+    assert progress_updates[-1]['processed_trades'] == 600
+    
+    print("✓ Parallel batch processing test passed")
+
+
+def test_batch_processing_streaming():
+    """Test chunked out-of-core processing from database"""
+    print("\n=== Testing Streaming Batch Processing ===")
+    
+    # File-backed database so chunk reads and alert writes share data
+    db_dir = tempfile.mkdtemp()
+    storage = DatabaseStorage(f"sqlite:///{os.path.join(db_dir, 'stream.db')}")
+    storage.connect()
+    
+    trades_df = generate_test_trades(num_trades=1000, num_users=10)
+    storage.save_trades_from_dataframe(trades_df)
+    
+    config = DetectionConfig(use_ml_models=False, use_rule_based=True)
+    engine = DetectionEngine(config=config, storage=storage)
+    
+    # Record which users each detection call sees
+    seen_batches = []
+    original_detect = engine.detect
+    
+    def recording_detect(trades, group_by='user_id', market_data=None):
+        seen_batches.append(set(trades[group_by].unique()))
+        return original_detect(trades, group_by=group_by, market_data=market_data)
+    
+    engine.detect = recording_detect
+    
+    processor = BatchProcessor(
+        detection_engine=engine,
+        storage=storage,
+        batch_size=200,
+        chunk_size=150  # Not aligned with user boundaries
+    )
+    
+    results = processor.process_from_database(
+        group_by='user_id',
+        save_alerts=True,
+        streaming=True
+    )
+    
+    print(f"\nResults:")
+    print(f"  Total trades: {results['total_trades']}")
+    print(f"  Total chunks: {results['total_chunks']}")
+    print(f"  Total batches: {results['total_batches']}")
+    print(f"  Alerts saved: {results['alerts_saved']}")
+    
+    all_users = [user for batch in seen_batches for user in batch]
+    
+    assert results['total_trades'] == 1000
+    assert results['total_chunks'] == 7
+    assert results['errors'] == 0
+    assert len(all_users) == len(set(all_users)) == 10, "User split across batches"
+    assert results['progress']['progress_percentage'] == 100.0
+    
+    storage.disconnect()
+    
+    print("✓ Streaming batch processing test passed")
+
+
+def test_batch_processing_parquet_storage():
+    """Test streaming batch processing from a Parquet trade lake"""
+    print("\n=== Testing Batch Processing from Parquet Storage ===")
+    
+    storage = ParquetStorage(tempfile.mkdtemp())
+    storage.connect()
+    
+    trades_df = generate_test_trades(num_trades=1000, num_users=10)
+    storage.save_trades_from_dataframe(trades_df)
+    
+    config = DetectionConfig(use_ml_models=False, use_rule_based=True)
+    engine = DetectionEngine(config=config, storage=storage)
+    
+    processor = BatchProcessor(
+        detection_engine=engine,
+        storage=storage,
+        batch_size=200,
+        chunk_size=150
+    )
+    
+    results = processor.process_from_database(
+        group_by='user_id',
+        save_alerts=True,
+        streaming=True
+    )
+    
+    print(f"\nResults:")
+    print(f"  Total trades: {results['total_trades']}")
+    print(f"  Total chunks: {results['total_chunks']}")
+    print(f"  Alerts saved: {results['alerts_saved']}")
+    
+    assert results['total_trades'] == 1000
+    assert results['total_chunks'] == 7
+    assert results['errors'] == 0
+    # Alerts with the same ID from different batches are upserted
+    assert 0 < len(storage.get_alerts()) <= results['alerts_saved']
+    
+    storage.disconnect()
+    
+    print("✓ Parquet storage batch processing test passed")
+
+
 def main():
     """Run all tests"""
     print("=" * 60)
@@ -321,6 +487,10 @@ def main():
         test_batch_processing_date_range()
         test_progress_tracking()
         test_memory_optimization()
+        test_entity_partitioned_batches()
+        test_batch_processing_parallel()
+        test_batch_processing_streaming()
+        test_batch_processing_parquet_storage()
         
         print("\n" + "=" * 60)
         print("✓ All tests passed successfully!")
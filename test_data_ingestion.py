@@ -5,9 +5,18 @@ Simple test script to verify data ingestion module implementation
 import pandas as pd
 from datetime import datetime
 import tempfile
+import json
 import os
 
-from trade_risk_analyzer.data_ingestion import TradeDataImporter, TradeDataValidator, DatabaseStorage
+from trade_risk_analyzer.data_ingestion import (
+    TradeDataImporter, TradeDataValidator, DatabaseStorage, ParquetStorage, TradeImportPipeline
+)
+from trade_risk_analyzer.reporting.generator import ReportGenerator
+from trade_risk_analyzer.core.base import Alert, RiskLevel, PatternType
+from trade_risk_analyzer.core.schema import (
+    to_trade_frame, is_trade_frame, trade_frame_memory,
+    trade_frame_to_arrow, trade_frame_from_arrow, PYARROW_AVAILABLE
+)
 
 
 def test_csv_import():
@@ -117,9 +126,33 @@ def test_validation():
         for error in result.errors[:3]:
             print(f"    - {error.field}: {error.message}")
     
+    assert result.valid_mask.tolist() == [True, True, False, False]
+    assert result.error_counts == {
+        'user_id_null': 1, 'timestamp_null': 1, 'price_negative': 1,
+        'volume_not_positive': 1, 'trade_type_invalid': 1
+    }
+    
     # Get valid records
     valid_df = validator.get_valid_records(df, result)
     print(f"\n  Valid records extracted: {len(valid_df)}")
+    assert valid_df['user_id'].tolist() == ['user_001', 'user_002']
+    
+    # A systematic problem is counted in full but sampled in the errors
+    n = 10000
+    bulk = pd.DataFrame({
+        'user_id': [f'user_{i % 50:03d}' for i in range(n)],
+        'timestamp': [f'2024-01-01 10:{i // 60 % 60:02d}:{i % 60:02d}' if i % 4 else 'not a date'
+                      for i in range(n)],
+        'symbol': 'BTC/USDT',
+        'price': [45000.0 + i for i in range(n)],
+        'volume': 1.0,
+        'trade_type': ['buy' if i % 2 else 'SELL' for i in range(n)]
+    })
+    result = TradeDataValidator(max_error_samples=5).validate(bulk)
+    assert result.error_counts == {'timestamp_invalid': n // 4}
+    assert result.valid_records == n - n // 4
+    assert len(result.errors) == 5 and result.errors[1].message == 'Row 4: invalid timestamp format'
+    print(f"✓ {result.error_counts['timestamp_invalid']} bad timestamps counted, {len(result.errors)} sampled")
     
     return valid_df
 
@@ -174,6 +207,336 @@ def test_database_storage():
     return True
 
 
+def test_trade_schema():
+    """Test categorical/Arrow-backed trade frame"""
+    print("\nTesting trade schema...")
+    
+    n = 5000
+    data = {
+        'trade_id': [f'trade_{i:06d}' for i in range(n)],
+        'user_id': [f'user_{i % 50:03d}' for i in range(n)],
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='min'),
+        'symbol': ['BTC/USDT' if i % 3 else 'ETH/USDT' for i in range(n)],
+        'price': [45000.0 + i for i in range(n)],
+        'volume': [1.0 + (i % 7) for i in range(n)],
+        'trade_type': ['buy' if i % 2 else 'SELL' for i in range(n)],
+        'order_id': [f'order_{i:06d}' if i % 10 else None for i in range(n)]
+    }
+    raw_df = pd.DataFrame(data)
+    
+    df = to_trade_frame(raw_df)
+    assert is_trade_frame(df)
+    assert not is_trade_frame(raw_df)
+    for col in ['user_id', 'symbol', 'trade_type']:
+        assert isinstance(df[col].dtype, pd.CategoricalDtype), col
+    assert set(df['trade_type'].cat.categories) == {'BUY', 'SELL'}
+    assert df['order_id'].isna().sum() == n // 10
+    print("✓ Categorical and identifier dtypes applied")
+    
+    # Values are unchanged
+    pd.testing.assert_series_equal(
+        df['user_id'].astype(object), raw_df['user_id'], check_names=False
+    )
+    assert (df[df['user_id'] == 'user_007']['price'] == raw_df[raw_df['user_id'] == 'user_007']['price']).all()
+    
+    raw_memory = trade_frame_memory(raw_df)['total']
+    memory = trade_frame_memory(df)['total']
+    assert memory < raw_memory / 2
+    print(f"✓ Memory: {raw_memory / 1024:.0f} KiB -> {memory / 1024:.0f} KiB")
+    
+    # Converting a conforming frame is a no-op
+    assert to_trade_frame(df)['user_id'].cat.categories.equals(df['user_id'].cat.categories)
+    
+    if PYARROW_AVAILABLE:
+        table = trade_frame_to_arrow(df)
+        assert str(table.schema.field('user_id').type) == 'dictionary<values=string, indices=int32, ordered=0>'
+        restored = trade_frame_from_arrow(table)
+        pd.testing.assert_frame_equal(restored, df, check_categorical=False)
+        print("✓ Arrow round trip preserved values and dtypes")
+    
+    # Importer and database read back the canonical schema
+    storage = DatabaseStorage("sqlite:///:memory:")
+    storage.connect()
+    storage.save_trades_from_dataframe(df.head(100))
+    retrieved_df = storage.get_trades_as_dataframe()
+    storage.disconnect()
+    
+    assert is_trade_frame(retrieved_df[[col for col in df.columns if col in retrieved_df.columns]])
+    assert retrieved_df['order_id'].isna().sum() == 10
+    print(f"✓ Database read returned {len(retrieved_df)} trades in the canonical schema")
+    
+    return df
+
+
+def test_parquet_storage():
+    """Test Parquet trade lake storage"""
+    print("\nTesting Parquet storage...")
+    
+    if not PYARROW_AVAILABLE:
+        print("  pyarrow not installed, skipping")
+        return None
+    
+    n = 3000
+    data = {
+        'trade_id': [f'trade_{i:05d}' for i in range(n)],
+        'user_id': [f'user_{i % 30:03d}' for i in range(n)],
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='7min'),
+        'symbol': ['BTC/USDT' if i % 3 else 'ETH/USDT' for i in range(n)],
+        'price': [45000.0 + i for i in range(n)],
+        'volume': [1.0 + (i % 7) for i in range(n)],
+        'trade_type': ['BUY' if i % 2 else 'SELL' for i in range(n)],
+        'order_id': [f'order_{i:05d}' if i % 10 else None for i in range(n)]
+    }
+    df = pd.DataFrame(data)
+    
+    storage = ParquetStorage(tempfile.mkdtemp(), row_group_size=100)
+    storage.connect()
+    assert storage.save_trades_from_dataframe(df.iloc[:2000])
+    assert storage.save_trades_from_dataframe(df.iloc[2000:])
+    assert storage.get_trade_count() == n
+    print(f"✓ Saved {n} trades in two appends")
+    
+    # Re-saved trade IDs fail the save or are skipped, never duplicated
+    assert not storage.save_trades_from_dataframe(df.iloc[1990:2010])
+    assert storage.save_trades_from_dataframe(
+        pd.concat([df.iloc[1990:2010], df.iloc[1995:2000]]), on_conflict='ignore'
+    )
+    assert storage.get_trade_count() == n
+    try:
+        storage.save_trades_from_dataframe(df.iloc[:10], on_conflict='update')
+        assert False, "append-only lake should reject on_conflict='update'"
+    except ValueError:
+        pass
+    print("✓ Existing trade IDs rejected or skipped")
+    
+    # Partition and row-group pruning
+    filters = {
+        'user_id': 'user_004',
+        'symbol': 'BTC/USDT',
+        'start_date': datetime(2024, 1, 3),
+        'end_date': datetime(2024, 1, 4, 12)
+    }
+    stats = storage.get_scan_stats(filters)
+    assert stats['selected_files'] < stats['total_files']
+    assert stats['selected_row_groups'] < stats['total_row_groups']
+    print(f"✓ Scan touches {stats['selected_files']}/{stats['total_files']} files, "
+          f"{stats['selected_row_groups']}/{stats['total_row_groups']} row groups")
+    
+    table = storage.get_trades_as_arrow(filters)
+    expected = df[
+        (df['user_id'] == 'user_004') & (df['symbol'] == 'BTC/USDT') &
+        (df['timestamp'] >= filters['start_date']) & (df['timestamp'] <= filters['end_date'])
+    ]
+    assert table.num_rows == len(expected) > 0
+    assert sorted(table.column('trade_id').to_pylist()) == sorted(expected['trade_id'])
+    assert storage.get_trade_count(filters) == len(expected)
+    
+    # Same rows and values as the database backend
+    database = DatabaseStorage("sqlite:///:memory:")
+    database.connect()
+    database.save_trades_from_dataframe(df)
+    lake_df = storage.get_trades_as_dataframe({'symbol': 'ETH/USDT'})
+    db_df = database.get_trades_as_dataframe({'symbol': 'ETH/USDT'})[lake_df.columns]
+    database.disconnect()
+    
+    assert is_trade_frame(lake_df)
+    pd.testing.assert_frame_equal(
+        lake_df.sort_values('trade_id').reset_index(drop=True),
+        db_df.sort_values('trade_id').reset_index(drop=True),
+        check_categorical=False
+    )
+    print(f"✓ Filtered read matches database backend ({len(lake_df)} trades)")
+    
+    chunks = list(storage.iter_trades_dataframe(chunk_size=700))
+    streamed = pd.concat([chunk['user_id'].astype(object) for chunk in chunks])
+    assert len(streamed) == n and streamed.is_monotonic_increasing
+    
+    deleted = storage.delete_trades({'symbol': 'ETH/USDT', 'start_date': datetime(2024, 1, 2)})
+    assert deleted == int(((df['symbol'] == 'ETH/USDT') & (df['timestamp'] >= datetime(2024, 1, 2))).sum())
+    assert storage.get_trade_count() == n - deleted
+    print(f"✓ Deleted {deleted} trades")
+    
+    # Alerts are upserted by ID and readable by the report generator
+    alert = Alert(
+        alert_id='alert_001', timestamp=datetime(2024, 1, 2, 10), user_id='user_004',
+        trade_ids=['trade_00001'], anomaly_score=85.0, risk_level=RiskLevel.HIGH,
+        pattern_type=PatternType.WASH_TRADING, explanation='Test', recommended_action='Review'
+    )
+    assert storage.save_alert(alert)
+    alert.is_reviewed = True
+    alert.is_true_positive = True
+    assert storage.save_alert(alert)
+    alerts = storage.get_alerts({'user_id': 'user_004'})
+    assert len(alerts) == 1 and alerts[0].is_true_positive is True
+    
+    report = ReportGenerator(storage=storage).generate_daily_summary(date=datetime(2024, 1, 2))
+    assert report.total_alerts == 1
+    assert report.total_trades == storage.get_trade_count({
+        'start_date': datetime(2024, 1, 2), 'end_date': datetime(2024, 1, 3)
+    })
+    print(f"✓ Report generated from Parquet storage ({report.total_trades} trades)")
+    
+    storage.disconnect()
+    
+    return lake_df
+
+
+def test_bulk_insert():
+    """Test chunked bulk loading and conflict handling"""
+    print("\nTesting bulk insert...")
+    
+    db_dir = tempfile.mkdtemp()
+    storage = DatabaseStorage(f"sqlite:///{os.path.join(db_dir, 'bulk.db')}")
+    storage.connect()
+    
+    def connection_pragmas():
+        raw_connection = storage.engine.raw_connection()
+        try:
+            cursor = raw_connection.cursor()
+            return {
+                name: cursor.execute(f"PRAGMA {name}").fetchone()[0]
+                for name in ('journal_mode', 'synchronous', 'cache_size', 'temp_store')
+            }
+        finally:
+            raw_connection.close()
+    
+    default_pragmas = connection_pragmas()
+    
+    n = 2500
+    df = pd.DataFrame({
+        'trade_id': [f'trade_{i:05d}' for i in range(n)],
+        'user_id': [f'user_{i % 20:03d}' for i in range(n)],
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='37s'),
+        'symbol': ['BTC/USDT' if i % 3 else 'ETH/USDT' for i in range(n)],
+        'price': [45000.125 + i for i in range(n)],
+        'volume': [1.5 + (i % 7) for i in range(n)],
+        'trade_type': ['buy' if i % 2 else 'SELL' for i in range(n)],
+        'order_id': [f'order_{i:05d}' if i % 10 else None for i in range(n)]
+    })
+    
+    assert storage.save_trades_from_dataframe(df, chunk_size=1000)
+    assert storage.get_trade_count() == n
+    
+    stored = storage.get_trades_as_dataframe().sort_values('trade_id').reset_index(drop=True)
+    assert (stored['timestamp'] == df['timestamp']).all()
+    assert (stored['price'] == df['price']).all()
+    assert set(stored['trade_type'].astype(str)) == {'BUY', 'SELL'}
+    assert stored['order_id'].isna().sum() == n // 10
+    assert stored['created_at'].notna().all()
+    print(f"✓ Loaded {n} trades in chunks")
+    
+    # Pooled connections get their settings back after the bulk load
+    assert connection_pragmas() == default_pragmas
+    print(f"✓ Bulk-load PRAGMAs restored: {default_pragmas}")
+    
+    # Re-upload with changed prices
+    reupload = df.iloc[:500].copy()
+    reupload['price'] = -1.0
+    
+    assert not storage.save_trades_from_dataframe(reupload)
+    assert storage.get_trade_count() == n
+    assert connection_pragmas() == default_pragmas
+    print("✓ Duplicate trade IDs rejected by default")
+    
+    assert storage.save_trades_from_dataframe(reupload, on_conflict='ignore')
+    assert (storage.get_trades_as_dataframe()['price'] < 0).sum() == 0
+    
+    assert storage.save_trades_from_dataframe(reupload, on_conflict='update')
+    assert (storage.get_trades_as_dataframe()['price'] < 0).sum() == 500
+    assert storage.get_trade_count() == n
+    print("✓ Re-upload skipped with 'ignore' and applied with 'update'")
+    
+    storage.disconnect()
+    
+    return True
+
+
+def test_chunked_import():
+    """Test streaming chunked import and the import pipeline"""
+    print("\nTesting chunked import...")
+    
+    tmp_dir = tempfile.mkdtemp()
+    n = 2500
+    records = [
+        {
+            'user_id': f'user_{i % 20:03d}',
+            'timestamp': f'2024-01-01 {10 + i // 3600:02d}:{i // 60 % 60:02d}:{i % 60:02d}',
+            'symbol': 'BTC/USDT' if i % 3 else 'ETH/USDT',
+            'price': 45000.5 + i,
+            'volume': 1.5 + (i % 7),
+            'trade_type': 'buy' if i % 2 else 'SELL'
+        }
+        for i in range(n)
+    ]
+    records[7]['price'] = -1.0
+    records[1500]['user_id'] = None
+    
+    csv_path = os.path.join(tmp_dir, 'trades.csv')
+    pd.DataFrame(records).to_csv(csv_path, index=False)
+    json_path = os.path.join(tmp_dir, 'trades.json')
+    with open(json_path, 'w') as f:
+        json.dump({'trades': records}, f)
+    jsonl_path = os.path.join(tmp_dir, 'trades.jsonl')
+    with open(jsonl_path, 'w') as f:
+        f.write('\n'.join(json.dumps(record) for record in records))
+    
+    importer = TradeDataImporter()
+    whole = importer.import_csv(csv_path)
+    columns = ['user_id', 'timestamp', 'symbol', 'price', 'volume', 'trade_type']
+    
+    for path in [csv_path, json_path, jsonl_path]:
+        chunks = list(importer.iter_chunks(path, chunk_size=1000))
+        assert [len(chunk) for chunk in chunks] == [1000, 1000, 500]
+        
+        streamed = pd.concat(chunks, ignore_index=True)
+        assert streamed['trade_id'].is_unique
+        assert streamed['user_id'].isna().sum() == 1
+        pd.testing.assert_frame_equal(
+            streamed[columns].astype(str), whole[columns].astype(str)
+        )
+        print(f"✓ Streamed {os.path.basename(path)} in {len(chunks)} chunks")
+    
+    storage = DatabaseStorage(f"sqlite:///{os.path.join(tmp_dir, 'chunked.db')}")
+    storage.connect()
+    
+    updates = []
+    pipeline = TradeImportPipeline(storage=storage, chunk_size=1000, on_conflict='ignore')
+    pipeline.add_progress_callback(lambda progress: updates.append(progress.to_dict()))
+    progress = pipeline.run(csv_path)
+    
+    assert progress.chunks_processed == 3
+    assert progress.total_records == n
+    assert progress.valid_records == n - 2
+    assert progress.invalid_records == 2
+    assert storage.get_trade_count() == n - 2
+    assert [update['chunks_processed'] for update in updates] == [1, 2, 3, 3]
+    assert updates[-1]['completed'] and updates[-1]['progress_percentage'] == 100.0
+    assert len(progress.errors) == 2
+    print(f"✓ Pipeline stored {progress.stored_records} trades, skipped {progress.invalid_records}")
+    
+    # File objects are accepted and storage is optional
+    with open(jsonl_path, 'rb') as f:
+        progress = TradeImportPipeline(chunk_size=1000).run(f, file_type='jsonl')
+    assert progress.valid_records == n - 2 and progress.stored_records == 0
+    print("✓ Pipeline validated a file object without storage")
+    
+    # Re-importing a file with trade IDs into the Parquet lake skips them
+    if PYARROW_AVAILABLE:
+        lake = ParquetStorage(os.path.join(tmp_dir, 'lake'))
+        lake.connect()
+        with_ids = pd.DataFrame(records).assign(trade_id=[f'trade_{i:05d}' for i in range(n)])
+        ids_path = os.path.join(tmp_dir, 'trades_with_ids.csv')
+        with_ids.to_csv(ids_path, index=False)
+        for _ in range(2):
+            TradeImportPipeline(storage=lake, chunk_size=1000, on_conflict='ignore').run(ids_path)
+        assert lake.get_trade_count() == n - 2
+        print("✓ Parquet re-import skipped existing trade IDs")
+    
+    storage.disconnect()
+    
+    return True
+
+
 def main():
     """Run all tests"""
     print("=" * 60)
@@ -193,6 +556,18 @@ def main():
         # Test database storage
         test_database_storage()
         
+        # Test bulk insert
+        test_bulk_insert()
+        
+        # Test chunked import
+        test_chunked_import()
+        
+        # Test trade schema
+        test_trade_schema()
+        
+        # Test Parquet storage
+        test_parquet_storage()
+        
         print("\n" + "=" * 60)
         print("✓ All tests passed successfully!")
         print("=" * 60)
@@ -2,6 +2,7 @@
 Test script for feature engineering module
 """
 
+import os
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -191,6 +192,343 @@ def test_specific_features():
     print("\n✓ Specific feature tests completed")
 
 
+def test_feature_kernel_parity():
+    """Test the single-pass kernel matches the per-calculator features"""
+    print("\n" + "=" * 60)
+    print("Testing Feature Kernel Parity")
+    print("=" * 60)
+    
+    trades_df = create_sample_trades(num_users=4, trades_per_user=60)
+    
+    # Small groups hit the minimum-size branches of each calculator
+    small_groups = create_sample_trades(num_users=3, trades_per_user=3)
+    small_groups['user_id'] = ['small_1'] + ['small_2'] * 2 + ['small_3'] * 6
+    
+    # A burst of sub-second trades
+    burst = create_sample_trades(num_users=1, trades_per_user=150)
+    burst['user_id'] = 'burst_user'
+    burst['timestamp'] = datetime(2024, 1, 2, 9, 0, 0) + pd.to_timedelta(
+        np.cumsum(np.random.randint(50, 2000, size=len(burst))), unit='ms'
+    )
+    
+    trades_df = pd.concat([trades_df, small_groups, burst], ignore_index=True)
+    
+    # The calculators sort with an unstable sort, so keep timestamps unique
+    trades_df['timestamp'] += pd.to_timedelta(np.arange(len(trades_df)), unit='us')
+    trades_df = trades_df.sample(frac=1, random_state=42).reset_index(drop=True)
+    
+    for group_by in ['user_id', 'symbol']:
+        kernel_features = FeatureExtractor(use_kernel=True).extract_features(trades_df, group_by)
+        legacy_features = FeatureExtractor(use_kernel=False).extract_features(trades_df, group_by)
+        
+        print(f"\n   {group_by}: {kernel_features.shape[1] - 1} features for {len(kernel_features)} groups")
+        
+        assert list(kernel_features.columns) == list(legacy_features.columns)
+        pd.testing.assert_frame_equal(
+            kernel_features, legacy_features,
+            check_dtype=False, rtol=1e-6, atol=1e-9
+        )
+    
+    print("\n✓ Feature kernel parity test passed")
+
+
+def test_position_tracking():
+    """Test holding time, win/loss and spread impact on known positions"""
+    print("\n" + "=" * 60)
+    print("Testing Position Tracking")
+    print("=" * 60)
+    
+    base_time = datetime(2024, 1, 1, 10, 0, 0)
+    rows = [
+        # user_a BTC: two buys averaging 105, then two closing sells
+        ('user_a', 'BTC/USDT', 0, 'BUY', 100.0, 1.0),
+        ('user_a', 'BTC/USDT', 60, 'BUY', 110.0, 1.0),
+        ('user_a', 'BTC/USDT', 120, 'SELL', 120.0, 1.0),
+        ('user_a', 'BTC/USDT', 180, 'SELL', 100.0, 2.0),
+        # user_a ETH: a sell without a position is ignored
+        ('user_a', 'ETH/USDT', 0, 'SELL', 50.0, 1.0),
+        ('user_a', 'ETH/USDT', 30, 'BUY', 50.0, 2.0),
+        ('user_a', 'ETH/USDT', 60, 'sell', 60.0, 1.0),
+        # user_b never closes a position
+        ('user_b', 'BTC/USDT', 0, 'BUY', 100.0, 1.0),
+    ]
+    trades_df = pd.DataFrame([
+        {
+            'user_id': user_id,
+            'symbol': symbol,
+            'timestamp': base_time + timedelta(minutes=minutes),
+            'trade_type': trade_type,
+            'price': price,
+            'volume': volume
+        }
+        for user_id, symbol, minutes, trade_type, price, volume in rows
+    ]).sample(frac=1, random_state=0)
+    
+    extractor = FeatureExtractor()
+    holding = extractor.behavioral_calculator.calculate_holding_time_statistics(trades_df).set_index('user_id')
+    win_loss = extractor.behavioral_calculator.calculate_win_loss_ratio(trades_df).set_index('user_id')
+    
+    print(f"   Positions closed: {holding['position_count'].to_dict()}")
+    print(f"   Net PnL: {win_loss['net_pnl'].to_dict()}")
+    
+    # Holding times of 2h and 3h (BTC) and 0.5h (ETH)
+    assert holding.loc['user_a', 'position_count'] == 3
+    assert np.isclose(holding.loc['user_a', 'mean_holding_time_hours'], 5.5 / 3)
+    assert np.isclose(holding.loc['user_a', 'short_term_holds_ratio'], 1 / 3)
+    assert holding.loc['user_b', 'position_count'] == 0
+    
+    # PnL of +15 and -5 against the 105 average entry (BTC) and +10 (ETH)
+    assert win_loss.loc['user_a', 'win_count'] == 2
+    assert win_loss.loc['user_a', 'loss_count'] == 1
+    assert np.isclose(win_loss.loc['user_a', 'profit_factor'], 5.0)
+    assert np.isclose(win_loss.loc['user_a', 'net_pnl'], 20.0)
+    assert win_loss.loc['user_b', 'net_pnl'] == 0
+    
+    # Each trade uses the latest quote at or before it
+    market_data = pd.DataFrame({
+        'symbol': ['BTC/USDT', 'BTC/USDT', 'ETH/USDT'],
+        'timestamp': [base_time, base_time + timedelta(minutes=100), base_time],
+        'bid': [99.0, 118.0, 49.0],
+        'ask': [101.0, 122.0, 51.0]
+    })
+    spread = extractor.price_calculator.analyze_spread_impact(
+        trades_df, market_data
+    ).set_index('user_id')
+    
+    print(f"   Mean spread impact: {spread['mean_spread_impact'].to_dict()}")
+    
+    assert np.isclose(spread.loc['user_b', 'mean_spread_impact'], 0.0)
+    assert np.isclose(spread.loc['user_b', 'max_spread_impact'], 0.0)
+    assert np.isclose(spread.loc['user_a', 'max_spread_impact'], 5.0)
+    
+    print("\n✓ Position tracking test passed")
+
+
+def test_feature_pipeline():
+    """Test the persisted feature pipeline is reused without refitting"""
+    print("\n" + "=" * 60)
+    print("Testing Feature Pipeline")
+    print("=" * 60)
+    
+    import tempfile
+    from sklearn.preprocessing import StandardScaler
+    from trade_risk_analyzer.models.trainer import ModelTrainer
+    from trade_risk_analyzer.detection.engine import DetectionEngine, DetectionConfig
+    
+    extractor = FeatureExtractor()
+    train_features = extractor.extract_features(create_sample_trades(num_users=5, trades_per_user=40))
+    batch_features = extractor.extract_features(create_sample_trades(num_users=3, trades_per_user=30))
+    
+    pipeline = extractor.fit_pipeline(train_features, exclude_columns=['user_id'])
+    print(f"   Pipeline {pipeline.version}: {len(pipeline.feature_columns)} features")
+    
+    # Transform matches a scaler fitted on the training batch
+    scaler = StandardScaler().fit(train_features[pipeline.feature_columns])
+    expected = scaler.transform(
+        batch_features.reindex(columns=pipeline.feature_columns, fill_value=0)
+    )
+    np.testing.assert_allclose(pipeline.transform(batch_features), expected, rtol=1e-9, atol=1e-9)
+    
+    # Columns missing from a batch are filled with zero before scaling
+    partial = batch_features.drop(columns=[pipeline.feature_columns[0]])
+    assert np.allclose(
+        pipeline.transform(partial)[:, 0],
+        (0 - pipeline.offset[0]) * pipeline.multiplier[0]
+    )
+    
+    with tempfile.TemporaryDirectory() as model_dir:
+        trainer = ModelTrainer()
+        trainer.save_models(model_dir, feature_pipeline=pipeline)
+        
+        engine = DetectionEngine(DetectionConfig(use_rule_based=False))
+        engine.load_models(model_dir)
+    
+    assert engine.feature_pipeline is not None
+    assert engine.feature_pipeline.version == pipeline.version
+    np.testing.assert_allclose(
+        engine.feature_pipeline.transform(batch_features), expected, rtol=1e-9, atol=1e-9
+    )
+    print(f"   Engine loaded pipeline {engine.feature_pipeline.version}")
+    
+    # Training on a feature DataFrame fits the pipeline on the training split only
+    from trade_risk_analyzer.models.drift import DriftBaseline, DRIFT_BASELINE_FILE
+    from trade_risk_analyzer.feature_engineering.pipeline import FEATURE_PIPELINE_FILE
+    
+    features = extractor.extract_features(create_sample_trades(num_users=40, trades_per_user=20))
+    labels = np.arange(len(features)) % 2
+    with tempfile.TemporaryDirectory() as model_dir:
+        trainer = ModelTrainer()
+        trainer.split_data(features, labels)
+        train_rows = trainer.X_train.copy()
+        fitted = trainer.fit_feature_pipeline(extractor.create_pipeline())
+        assert fitted.n_samples == len(train_rows)
+        np.testing.assert_allclose(trainer.X_train, fitted.transform(train_rows))
+        trainer.train_isolation_forest(n_estimators=10)
+        trainer.save_models(model_dir)
+        
+        assert os.path.exists(os.path.join(model_dir, FEATURE_PIPELINE_FILE))
+        baseline = DriftBaseline.load(os.path.join(model_dir, DRIFT_BASELINE_FILE))
+        assert baseline.feature_names == fitted.feature_columns
+    print(f"   Trainer fitted pipeline {fitted.version} on {fitted.n_samples} training rows")
+    
+    print("\n✓ Feature pipeline test passed")
+
+
+def test_feature_store():
+    """Test incremental feature store updates, reads and persistence"""
+    print("\n" + "=" * 60)
+    print("Testing Feature Store")
+    print("=" * 60)
+    
+    import os
+    import tempfile
+    from trade_risk_analyzer.feature_engineering import FeatureStore
+    
+    trades_df = create_sample_trades(num_users=4, trades_per_user=120)
+    extractor = FeatureExtractor()
+    reference = extractor.extract_features(trades_df).set_index('user_id')
+    
+    # Folding batches matches a single update for the exact aggregates
+    store = FeatureStore(time_windows=extractor.time_windows)
+    for batch in np.array_split(trades_df.sample(frac=1, random_state=0), 4):
+        store.update(batch)
+    single = FeatureStore(time_windows=extractor.time_windows).update(trades_df)
+    
+    features = extractor.extract_from_store(store).set_index('user_id').sort_index()
+    single_features = single.get_features().set_index('user_id').sort_index()
+    print(f"   Store: {store.n_entities} entities, {len(features.columns)} features")
+    
+    exact_columns = [
+        'total_trades', 'first_trade', 'last_trade', 'avg_trades_per_day',
+        'volume_mean', 'volume_std', 'volume_min', 'volume_max', 'volume_sum',
+        'volume_cv', 'buy_count', 'sell_count', 'buy_sell_ratio',
+        'peak_trading_hour', 'hour_entropy', 'business_hours_ratio',
+        'peak_trading_day', 'day_entropy', 'weekday_ratio', 'trades_count_7D'
+    ]
+    for column in exact_columns:
+        pd.testing.assert_series_equal(
+            features[column], reference.loc[features.index, column],
+            check_dtype=False, check_exact=False, rtol=1e-9
+        )
+        pd.testing.assert_series_equal(
+            features[column], single_features[column], check_dtype=False, check_exact=False, rtol=1e-9
+        )
+    
+    # Windowed counts are bucket-granular, percentiles come from a t-digest
+    assert (features['trades_count_1H'] >= reference['trades_count_1H']).all()
+    volumes = trades_df.groupby('user_id')['volume']
+    for percentile in [25, 50, 75, 90, 99]:
+        estimate = features[f'volume_p{percentile}']
+        rank = volumes.apply(lambda values: (values <= estimate[values.name]).mean())
+        assert (np.abs(rank - percentile / 100) <= 0.03).all(), percentile
+    print("   Exact aggregates match the extractor, percentile ranks within 3%")
+    
+    # Updates append the batch buckets; stored rows are not rebuilt
+    probe = FeatureStore(time_windows=extractor.time_windows).update(trades_df)
+    rows_before = probe.n_bucket_rows
+    stored_before = {name: values.copy() for name, values in probe._bucket_rows().items()}
+    batch = trades_df.iloc[:10]
+    probe.update(batch)
+    batch_buckets = (pd.to_datetime(batch['timestamp']).astype('int64') // probe.bucket_ns)
+    n_new = len(batch.assign(bucket=batch_buckets).groupby(['user_id', 'bucket']))
+    assert probe.n_bucket_rows == rows_before + n_new
+    for name, values in stored_before.items():
+        assert np.array_equal(probe._bucket_rows()[name][:rows_before], values)
+    
+    # Compaction merges the duplicate rows without changing the features
+    appended = probe.get_features()
+    probe._compact_buckets()
+    assert probe.n_bucket_rows == rows_before
+    pd.testing.assert_frame_equal(probe.get_features(), appended)
+    print(f"   Update appended {n_new} bucket rows to {rows_before}, compaction merged them")
+    
+    # Save/load round trip in both formats
+    with tempfile.TemporaryDirectory() as store_dir:
+        for path in [os.path.join(store_dir, 'features.db'), os.path.join(store_dir, 'features')]:
+            store.save(path)
+            loaded = FeatureStore.load(path)
+            loaded_features = extractor.extract_from_store(loaded).set_index('user_id').sort_index()
+            pd.testing.assert_frame_equal(loaded_features, features)
+            
+            loaded.update(trades_df.iloc[:10])
+            assert loaded.get_features(['user_000'])['total_trades'].iloc[0] == (
+                features.loc['user_000', 'total_trades'] + (trades_df['user_id'].iloc[:10] == 'user_000').sum()
+            )
+            print(f"   Round trip through {os.path.basename(path)}")
+    
+    print("\n✓ Feature store test passed")
+
+
+def test_frequency_metrics_config():
+    """Test combined frequency metrics and configuration of windows"""
+    print("\n" + "=" * 60)
+    print("Testing Frequency Metrics Configuration")
+    print("=" * 60)
+    
+    from trade_risk_analyzer.core.config import DetectionConfig, DetectionThresholds
+    from trade_risk_analyzer.feature_engineering import FrequencyMetricsCalculator
+    
+    detection_config = DetectionConfig(
+        thresholds=DetectionThresholds(burst_window='10min', quote_stuffing_per_minute=2),
+        feature_windows=['30M', '6H']
+    )
+    calculator = FrequencyMetricsCalculator.from_config(detection_config)
+    assert calculator.time_windows == ['30M', '6H']
+    
+    trades_df = create_sample_trades(num_users=4, trades_per_user=60)
+    combined = calculator.calculate_frequency_metrics(trades_df)
+    assert 'trades_count_30M' in combined.columns and 'trades_count_6H' in combined.columns
+    
+    # One pass gives the same result as the individual calculations
+    merged = calculator.calculate_trades_per_window(trades_df).merge(
+        calculator.calculate_burst_metrics(trades_df), on='user_id'
+    ).merge(
+        calculator.detect_quote_stuffing(trades_df), on='user_id'
+    )
+    pd.testing.assert_frame_equal(combined, merged, check_dtype=False)
+    
+    # Window counts match a direct count per user
+    for user_id, group in trades_df.groupby('user_id'):
+        row = combined[combined['user_id'] == user_id].iloc[0]
+        latest = group['timestamp'].max()
+        assert row['trades_count_6H'] == (group['timestamp'] >= latest - pd.Timedelta(hours=6)).sum()
+        minute_counts = group['timestamp'].dt.floor('1min').value_counts()
+        assert row['quote_stuffing_minutes'] == (minute_counts >= 2).sum()
+    print(f"   Windows {calculator.time_windows}, burst window {calculator.burst_window}")
+    
+    # The extractor and the detection engine use the configured burst settings
+    from trade_risk_analyzer.core.config import Config
+    from trade_risk_analyzer.detection.engine import DetectionEngine, DetectionConfig as EngineConfig
+    
+    detection_config.feature_windows = ['1H', '6H']
+    extractor = FeatureExtractor.from_config(detection_config)
+    engine = DetectionEngine(EngineConfig.from_app_config(Config(detection=detection_config)))
+    for configured in (extractor, engine.feature_extractor):
+        assert configured.time_windows == ['1H', '6H']
+        assert configured.frequency_calculator.burst_window == '10min'
+        assert configured.frequency_calculator.quote_stuffing_threshold == 2
+        assert configured.kernel.frequency_calculator is configured.frequency_calculator
+    
+    # Three trades in one minute count as quote stuffing only with the configured threshold
+    stuffed = trades_df[trades_df['user_id'] == 'user_000'].tail(1)
+    stuffed = pd.concat([stuffed] * 3, ignore_index=True)
+    stuffed['trade_id'] = [f'stuffed_{i}' for i in range(3)]
+    stuffed_df = pd.concat([trades_df, stuffed], ignore_index=True)
+    
+    configured_features = extractor.extract_features(stuffed_df)
+    default_features = FeatureExtractor(time_windows=['1H', '6H']).extract_features(stuffed_df)
+    pd.testing.assert_series_equal(
+        configured_features['quote_stuffing_minutes'],
+        calculator.detect_quote_stuffing(stuffed_df)['quote_stuffing_minutes'],
+        check_dtype=False, check_index=False
+    )
+    assert (default_features['quote_stuffing_minutes'] == 0).all()
+    assert configured_features.loc[configured_features['user_id'] == 'user_000', 'quote_stuffing_minutes'].iloc[0] > 0
+    print(f"   Extractor and engine burst window {engine.feature_extractor.frequency_calculator.burst_window}")
+    
+    print("\n✓ Frequency metrics configuration test passed")
+
+
 if __name__ == "__main__":
     try:
         # Run main test
@@ -199,6 +537,21 @@ if __name__ == "__main__":
         # Run specific feature tests
         test_specific_features()
         
+        # Run kernel parity test
+        test_feature_kernel_parity()
+        
+        # Run position tracking test
+        test_position_tracking()
+        
+        # Run feature pipeline test
+        test_feature_pipeline()
+        
+        # Run feature store test
+        test_feature_store()
+        
+        # Run frequency metrics configuration test
+        test_frequency_metrics_config()
+        
         print("\n" + "=" * 60)
         print("All feature engineering tests completed successfully!")
         print("=" * 60)
@@ -5,12 +5,25 @@ Tests feedback collection and model retraining functionality.
 """
 
 from datetime import datetime, timedelta
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import event
 
 from trade_risk_analyzer.core.base import Alert, RiskLevel, PatternType
 from trade_risk_analyzer.feedback.collector import (
     FeedbackCollector, Feedback, FeedbackType, FeedbackStatus
 )
-from trade_risk_analyzer.feedback.retraining import RetrainingPipeline
+from trade_risk_analyzer.feedback.retraining import RetrainingPipeline, PerformanceMetrics
+from trade_risk_analyzer.feedback.job_queue import RetrainingJobQueue, JobStatus
+from trade_risk_analyzer.feedback.worker import RetrainingWorker
+from trade_risk_analyzer.detection.engine import DetectionEngine, DetectionConfig
+from trade_risk_analyzer.data_ingestion.storage import DatabaseStorage
+from trade_risk_analyzer.data_ingestion.parquet_storage import ParquetStorage
+from trade_risk_analyzer.models.random_forest import RandomForestModel
+from trade_risk_analyzer.models.isolation_forest import IsolationForestModel
 
 
 def create_test_alert(alert_id: str, user_id: str) -> Alert:
@@ -272,6 +285,485 @@ def test_feedback_workflow():
     print(f"   Incorporated at: {feedback.incorporated_at.isoformat()}")
 
 
+def test_labeled_trade_fetch():
+    """Test that labeled alerts fetch their trades in a single query"""
+    print("\n=== Testing Labeled Trade Fetch ===")
+    
+    tmp_dir = tempfile.mkdtemp()
+    storage = DatabaseStorage(f"sqlite:///{os.path.join(tmp_dir, 'feedback.db')}")
+    storage.connect()
+    
+    n_trades = 20000
+    trades_df = pd.DataFrame({
+        'trade_id': [f'trade_{i:05d}' for i in range(n_trades)],
+        'user_id': [f'user_{i % 40:02d}' for i in range(n_trades)],
+        'timestamp': pd.date_range('2024-01-01', periods=n_trades, freq='30s'),
+        'symbol': ['BTC/USDT' if i % 2 else 'ETH/USDT' for i in range(n_trades)],
+        'price': [45000.0 + (i % 100) for i in range(n_trades)],
+        'volume': [1.0 + (i % 5) for i in range(n_trades)],
+        'trade_type': ['BUY' if i % 3 else 'SELL' for i in range(n_trades)]
+    })
+    assert storage.save_trades_from_dataframe(trades_df)
+    
+    # 10k labeled alerts, each referencing three (overlapping) trades of one user
+    n_alerts = 10000
+    labeled_df = pd.DataFrame({
+        'alert_id': [f'alert_{i}' for i in range(n_alerts)],
+        'user_id': [f'user_{i % 40:02d}' for i in range(n_alerts)],
+        'trade_ids': [
+            ','.join(f'trade_{(i + 40 * k) % n_trades:05d}' for k in range(3))
+            for i in range(n_alerts)
+        ],
+        'is_true_positive': [i % 2 == 0 for i in range(n_alerts)]
+    })
+    labeled_df.loc[0, 'trade_ids'] = ''
+    
+    pipeline = RetrainingPipeline(
+        storage=storage,
+        model_dir=os.path.join(tmp_dir, 'models'),
+        version_dir=os.path.join(tmp_dir, 'versions')
+    )
+    
+    statements = []
+    
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+    
+    event.listen(storage.engine, 'before_cursor_execute', count_statement)
+    features_df = pipeline._extract_features_for_labeled_data(labeled_df)
+    event.remove(storage.engine, 'before_cursor_execute', count_statement)
+    
+    referenced = set(pipeline._collect_trade_ids(labeled_df))
+    assert len(referenced) == n_alerts - 1 + 2 * 40
+    assert len(statements) == 1
+    assert len(features_df) == 40
+    print(f"✓ {len(referenced)} distinct trades of {n_alerts} alerts fetched with {len(statements)} query")
+    
+    fetched = storage.get_trades_by_ids(list(referenced) + ['missing_trade'])
+    assert set(fetched['trade_id']) == referenced
+    small = storage.get_trades_by_ids(['trade_00001', 'trade_00002', 'trade_00001'])
+    assert sorted(small['trade_id']) == ['trade_00001', 'trade_00002']
+    assert len(storage.get_trades_as_dataframe({'trade_ids': ['trade_00003']})) == 1
+    print("✓ Trade ID lookups return each requested trade once")
+    
+    lake = ParquetStorage(os.path.join(tmp_dir, 'lake'))
+    lake.connect()
+    assert lake.save_trades_from_dataframe(trades_df)
+    lake_fetched = lake.get_trades_by_ids(list(referenced))
+    assert set(lake_fetched['trade_id']) == referenced
+    print("✓ Parquet storage returns the same trades")
+    
+    storage.disconnect()
+
+
+def test_incremental_model_updates():
+    """Test warm-start and partial-refit model updates"""
+    print("\n=== Testing Incremental Model Updates ===")
+    
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2000, 8))
+    y = (X[:, 0] + X[:, 1] > 1.5).astype(int)
+    
+    rf = RandomForestModel(n_estimators=50)
+    rf.train(X[:1500], y[:1500])
+    old_trees = list(rf.model.estimators_)
+    rf.update(X[1500:], y[1500:], n_new_estimators=10)
+    assert len(rf.model.estimators_) == 60
+    assert rf.model.estimators_[:50] == old_trees
+    assert rf.training_metadata['incremental_updates'] == 1
+    assert (rf.predict(X) == y).mean() > 0.9
+    rf.update(X[1500:], y[1500:], n_new_estimators=10, max_estimators=55)
+    assert len(rf.model.estimators_) == 55
+    print(f"✓ Random Forest keeps its trees and adds new ones ({rf.n_estimators} trees)")
+    
+    try:
+        rf.update(X[:10], np.zeros(10, dtype=int))
+        assert False, "single-class update should be rejected"
+    except ValueError:
+        print("✓ Update without all model classes rejected")
+    
+    iso = IsolationForestModel(n_estimators=50, reservoir_size=1000)
+    iso.train(X[:1500])
+    assert len(iso.reservoir) == 1000 and iso.samples_seen == 1500
+    old_trees = list(iso.model.estimators_)
+    iso.update(X[1500:], replace_fraction=0.2)
+    assert len(iso.model.estimators_) == 50
+    assert iso.model.estimators_[:40] == old_trees[10:]
+    assert iso.samples_seen == 2000
+    outliers = rng.normal(loc=6.0, size=(20, 8))
+    assert (iso.predict(outliers) == -1).all()
+    print("✓ Isolation Forest replaces its oldest trees")
+    
+    # Scores match a forest computed from the updated trees alone
+    from trade_risk_analyzer.models.flat_forest import FlatIsolationForest
+    
+    probe = np.vstack([X[:200], outliers])
+    reference = FlatIsolationForest.from_model(iso)
+    np.testing.assert_allclose(iso.model.score_samples(probe), reference.score_samples(probe))
+    expected_offset = np.percentile(reference.score_samples(iso.reservoir), 100.0 * iso.contamination)
+    assert np.isclose(iso.model.offset_, expected_offset)
+    assert not iso.model.warm_start and iso.model.max_samples == 'auto'
+    print("✓ Updated Isolation Forest scores match its trees")
+    
+    tmp_dir = tempfile.mkdtemp()
+    path = os.path.join(tmp_dir, 'isolation_forest.joblib')
+    iso.save(path)
+    loaded = IsolationForestModel()
+    loaded.load(path)
+    assert loaded.samples_seen == 2000
+    assert np.array_equal(loaded.reservoir, iso.reservoir)
+    print("✓ Reservoir persisted with the model")
+
+
+def test_retraining_worker():
+    """Test the retraining job queue, worker and model hot-swap"""
+    print("\n=== Testing Retraining Worker ===")
+    
+    tmp_dir = tempfile.mkdtemp()
+    queue = RetrainingJobQueue(os.path.join(tmp_dir, 'queue.db'))
+    
+    first = queue.enqueue(model_types=['random_forest'])
+    second = queue.enqueue(model_types=['gradient_boosting'])
+    assert queue.claim_next('worker-a').job_id == first.job_id
+    assert queue.claim_next('worker-b').job_id == second.job_id
+    assert queue.claim_next('worker-c') is None
+    assert queue.requeue_stale(timeout=0) == 2
+    assert queue.get_job(first.job_id).status == JobStatus.QUEUED
+    print("✓ Jobs claimed once each, oldest first; stale jobs requeued")
+    
+    storage = DatabaseStorage(f"sqlite:///{os.path.join(tmp_dir, 'feedback.db')}")
+    storage.connect()
+    pipeline = RetrainingPipeline(
+        storage=storage,
+        model_dir=os.path.join(tmp_dir, 'models'),
+        version_dir=os.path.join(tmp_dir, 'versions')
+    )
+    worker = RetrainingWorker(queue, pipeline, poll_interval=0.1)
+    
+    assert worker.run(max_jobs=2) == 2
+    done = queue.get_job(first.job_id)
+    assert done.status == JobStatus.COMPLETED and done.progress == 100.0
+    assert "not enough feedback" in done.message
+    failed = queue.get_job(second.job_id)
+    assert failed.status == JobStatus.FAILED
+    assert "Unsupported model type" in failed.message
+    print(f"✓ Worker finished jobs: {done.message!r}, {failed.message!r}")
+    
+    # Options the worker cannot run are rejected before queuing
+    import asyncio
+    from fastapi import HTTPException
+    from trade_risk_analyzer.feedback.worker import validate_job_options
+    from trade_risk_analyzer.api.routers.feedback import trigger_retraining, RetrainingRequest
+    
+    validate_job_options(['random_forest'], {'random_forest': {'min_feedback_samples': 20}})
+    for model_types, params in [
+        (['gradient_boosting'], None),
+        (['random_forest'], {'random_forest': {'n_trees': 10}}),
+        (['random_forest'], {'isolation_forest': {'contamination': 0.05}}),
+        (None, {'isolation_forest': {'n_new_estimators': 10}})
+    ]:
+        try:
+            validate_job_options(model_types, params)
+            assert False, f"{model_types} {params} should be rejected"
+        except ValueError:
+            pass
+    
+    try:
+        asyncio.run(trigger_retraining(RetrainingRequest(model_types=['gradient_boosting'])))
+        assert False, "unsupported model type should be rejected"
+    except HTTPException as e:
+        assert e.status_code == 422 and 'gradient_boosting' in e.detail
+    print("✓ Unsupported model types and params rejected with 422")
+    
+    # Activating a version bumps the generation that engines poll
+    rng = np.random.default_rng(0)
+    
+    def activate_new_version(seed):
+        model = IsolationForestModel(n_estimators=20, random_state=seed)
+        model.train(rng.normal(size=(300, 5)))
+        metrics = PerformanceMetrics(version="", timestamp=datetime.now(), accuracy=0.0,
+                                     precision=0.0, recall=0.0, f1_score=0.0)
+        version = pipeline._create_model_version("isolation_forest", model, metrics, incremental=False)
+        version.version = f"isolation_forest_v{seed}"
+        version.model_path = str(pipeline.version_dir / version.version / "isolation_forest.joblib")
+        os.makedirs(os.path.dirname(version.model_path))
+        pipeline._save_model_version(version, model)
+        assert pipeline.activate_model_version(version.version)
+        return version
+    
+    activate_new_version(1)
+    engine = DetectionEngine(DetectionConfig(use_rule_based=False, ml_memory_mapped_models=True))
+    engine.load_models(str(pipeline.model_dir))
+    assert engine.model_generation == 1
+    assert not engine.reload_models_if_changed()
+    old_model = engine.ml_ensemble.models['isolation_forest']
+    
+    new_version = activate_new_version(2)
+    assert engine.reload_models_if_changed()
+    assert engine.model_generation == 2
+    assert engine.ml_ensemble.models['isolation_forest'] is not old_model
+    assert engine.ml_ensemble.models['isolation_forest'].digest == new_version.artifact
+    active = {v.version for v in pipeline.get_model_versions() if v.is_active}
+    assert active == {"isolation_forest_v2"}
+    
+    # Versions are readable without a pipeline, which would create directories
+    from trade_risk_analyzer.feedback.retraining import read_model_versions
+    
+    assert [v.to_dict() for v in read_model_versions(str(pipeline.version_dir))] == [
+        v.to_dict() for v in pipeline.get_model_versions()
+    ]
+    missing_dir = os.path.join(tmp_dir, 'missing_versions')
+    assert read_model_versions(missing_dir) == [] and not os.path.exists(missing_dir)
+    print("✓ Detection engine hot-swapped the activated model (generation 2)")
+    
+    storage.disconnect()
+
+
+def test_retraining_feature_pipeline():
+    """Test retraining scales features with the served feature pipeline"""
+    print("\n=== Testing Retraining Feature Pipeline ===")
+    
+    from trade_risk_analyzer.feature_engineering.pipeline import FEATURE_PIPELINE_FILE
+    
+    tmp_dir = tempfile.mkdtemp()
+    storage = DatabaseStorage(f"sqlite:///{os.path.join(tmp_dir, 'feedback.db')}")
+    storage.connect()
+    n_trades = 1200
+    trades_df = pd.DataFrame({
+        'trade_id': [f'trade_{i:05d}' for i in range(n_trades)],
+        'user_id': [f'user_{i % 30:02d}' for i in range(n_trades)],
+        'timestamp': pd.date_range('2024-01-01', periods=n_trades, freq='30s'),
+        'symbol': ['BTC/USDT' if i % 2 else 'ETH/USDT' for i in range(n_trades)],
+        'price': [45000.0 + (i % 7) * (i % 30) for i in range(n_trades)],
+        'volume': [1.0 + (i % 5) * (i % 30) for i in range(n_trades)],
+        'trade_type': ['BUY' if i % 3 else 'SELL' for i in range(n_trades)]
+    })
+    assert storage.save_trades_from_dataframe(trades_df)
+    
+    def labeled_batch(users):
+        return pd.DataFrame({
+            'alert_id': [f'alert_{u}' for u in users],
+            'user_id': [f'user_{u:02d}' for u in users],
+            'trade_ids': [','.join(f'trade_{u + 30 * k:05d}' for k in range(10)) for u in users],
+            'is_true_positive': [u % 2 == 0 for u in users]
+        })
+    
+    pipeline = RetrainingPipeline(
+        storage=storage,
+        model_dir=os.path.join(tmp_dir, 'models'),
+        version_dir=os.path.join(tmp_dir, 'versions')
+    )
+    
+    # First version: no pipeline is served yet, so one is fitted and saved with it
+    assert pipeline._active_feature_pipeline() is None
+    first_df = labeled_batch(range(20))
+    features_df = pipeline._extract_features_for_labeled_data(first_df)
+    feature_pipeline = pipeline._fit_feature_pipeline(features_df)
+    X, y = pipeline._prepare_training_data(features_df, first_df, feature_pipeline)
+    assert X.shape == (20, len(feature_pipeline.feature_columns))
+    
+    model = RandomForestModel(n_estimators=10)
+    model.train(X, y)
+    metrics = PerformanceMetrics(version="", timestamp=datetime.now(), accuracy=0.0,
+                                 precision=0.0, recall=0.0, f1_score=0.0)
+    version = pipeline._create_model_version("random_forest", model, metrics, incremental=False)
+    pipeline._save_model_version(version, model, feature_pipeline)
+    assert version.feature_version == feature_pipeline.version
+    assert pipeline.activate_model_version(version.version)
+    assert os.path.exists(os.path.join(pipeline.model_dir, FEATURE_PIPELINE_FILE))
+    assert pipeline.get_model_versions()[0].feature_version == feature_pipeline.version
+    
+    # Later batches are transformed with the served statistics, not refitted
+    active = pipeline._active_feature_pipeline()
+    assert active.version == feature_pipeline.version
+    second_df = labeled_batch(range(20, 30))
+    second_features = pipeline._extract_features_for_labeled_data(second_df)
+    X_second, _ = pipeline._prepare_training_data(second_features, second_df, active)
+    merged = second_features.merge(second_df[['user_id']], on='user_id')
+    np.testing.assert_allclose(X_second, feature_pipeline.transform(merged))
+    assert not np.allclose(X_second.mean(axis=0), 0.0)
+    
+    engine = DetectionEngine(DetectionConfig(use_rule_based=False))
+    engine.load_models(str(pipeline.model_dir))
+    assert engine.feature_pipeline.version == feature_pipeline.version
+    print(f"✓ Version served with its feature pipeline {feature_pipeline.version}; "
+          f"feedback batches transformed, not refitted")
+    
+    storage.disconnect()
+
+
+def test_active_learning_queue():
+    """Test ranking unreviewed alerts by model uncertainty and diversity"""
+    print("\n=== Testing Active Learning Queue ===")
+    
+    from trade_risk_analyzer.feedback.active_learning import ActiveLearningSampler
+    from trade_risk_analyzer.models.ensemble import ModelEnsemble
+    
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(1000, 6))
+    y = (X[:, 0] + X[:, 1] > 1.0).astype(int)
+    rf = RandomForestModel(n_estimators=30)
+    rf.train(X, y)
+    iso = IsolationForestModel(n_estimators=30)
+    iso.train(X)
+    ensemble = ModelEnsemble(weights={'isolation_forest': 0.5, 'random_forest': 0.5})
+    ensemble.add_model('isolation_forest', iso)
+    ensemble.add_model('random_forest', rf)
+    
+    # Twenty copies of the most uncertain candidate among other candidates
+    pool = rng.normal(size=(200, 6))
+    sampler = ActiveLearningSampler(ensemble, diversity_weight=0.0)
+    uncertainty = sampler.score_uncertainty(pool)['uncertainty']
+    assert ((uncertainty >= 0) & (uncertainty <= 1)).all()
+    pool = np.vstack([pool, np.repeat(pool[[np.argmax(uncertainty)]], 20, axis=0)])
+    alert_ids = [f'alert_{i}' for i in range(len(pool))]
+    
+    by_uncertainty = sampler.rank(pool, alert_ids, n=10)
+    assert [c.rank for c in by_uncertainty] == list(range(1, 11))
+    assert all(a.uncertainty >= b.uncertainty for a, b in zip(by_uncertainty, by_uncertainty[1:]))
+    duplicates = {f'alert_{i}' for i in range(200, 220)}
+    assert sum(c.alert_id in duplicates for c in by_uncertainty) >= 9
+    
+    diverse = ActiveLearningSampler(ensemble, diversity_weight=0.3).rank(pool, alert_ids, n=10)
+    assert sum(c.alert_id in duplicates for c in diverse) <= 1
+    assert len({c.alert_id for c in diverse}) == 10
+    assert set(diverse[0].model_scores) == {'isolation_forest', 'random_forest'}
+    print(f"✓ Queue spreads over feature space ({sum(c.alert_id in duplicates for c in diverse)} "
+          f"of 20 near-duplicates queued, vs {sum(c.alert_id in duplicates for c in by_uncertainty)})")
+    
+    # Queue built from stored alerts, with the features retraining uses
+    tmp_dir = tempfile.mkdtemp()
+    storage = DatabaseStorage(f"sqlite:///{os.path.join(tmp_dir, 'feedback.db')}")
+    storage.connect()
+    n_trades = 2000
+    trades_df = pd.DataFrame({
+        'trade_id': [f'trade_{i:05d}' for i in range(n_trades)],
+        'user_id': [f'user_{i % 20:02d}' for i in range(n_trades)],
+        'timestamp': pd.date_range('2024-01-01', periods=n_trades, freq='30s'),
+        'symbol': ['BTC/USDT' if i % 2 else 'ETH/USDT' for i in range(n_trades)],
+        'price': [45000.0 + (i % 7) * (i % 20) for i in range(n_trades)],
+        'volume': [1.0 + (i % 5) * (i % 20) for i in range(n_trades)],
+        'trade_type': ['BUY' if i % 3 else 'SELL' for i in range(n_trades)]
+    })
+    assert storage.save_trades_from_dataframe(trades_df)
+    alerts = []
+    for i in range(40):
+        alert = create_test_alert(f'alert_{i}', f'user_{i % 20:02d}')
+        alert.trade_ids = [f'trade_{i % 20 + 20 * k:05d}' for k in range(5)]
+        alert.is_reviewed = i < 10
+        alerts.append(alert)
+    
+    # An alert on several users (e.g. wash trading between two accounts)
+    alerts[39].user_id = 'user_18, user_19'
+    alerts[39].trade_ids = [f'trade_{u + 20 * k:05d}' for u in (18, 19) for k in range(5)]
+    for alert in alerts:
+        storage.save_alert(alert)
+    
+    pipeline = RetrainingPipeline(
+        storage=storage,
+        model_dir=os.path.join(tmp_dir, 'models'),
+        version_dir=os.path.join(tmp_dir, 'versions')
+    )
+    features_df = pipeline._extract_features_for_labeled_data(pd.DataFrame({
+        'user_id': [alert.user_id for alert in alerts[:20]],
+        'trade_ids': [','.join(alert.trade_ids) for alert in alerts[:20]]
+    }))
+    feature_pipeline = pipeline.feature_extractor.fit_pipeline(features_df, exclude_columns=['user_id'])
+    X_users = feature_pipeline.transform(features_df)
+    user_rf = RandomForestModel(n_estimators=20)
+    user_rf.train(X_users, (np.arange(len(X_users)) % 2).astype(int))
+    user_ensemble = ModelEnsemble(weights={'random_forest': 1.0})
+    user_ensemble.add_model('random_forest', user_rf)
+    
+    try:
+        pipeline.get_labeling_queue(user_ensemble, n=5)
+        assert False, "queue without a feature pipeline should be rejected"
+    except ValueError:
+        pass
+    
+    queue = pipeline.get_labeling_queue(user_ensemble, feature_pipeline=feature_pipeline, n=30)
+    assert len(queue) == 30
+    assert {c.alert_id for c in queue} == {f'alert_{i}' for i in range(10, 40)}
+    assert queue[0].to_dict()['rank'] == 1
+    
+    # Candidates are scored in the served feature space, not rescaled per batch
+    sampler = ActiveLearningSampler(user_ensemble, diversity_weight=0.0)
+    expected = sampler.score_uncertainty(X_users)['uncertainty']
+    by_user = dict(zip(features_df['user_id'], expected))
+    assert all(np.isclose(c.uncertainty, by_user[c.user_id]) for c in queue)
+    multi = next(c for c in queue if c.alert_id == 'alert_39')
+    assert np.isclose(multi.uncertainty, max(by_user['user_18'], by_user['user_19']))
+    print(f"✓ Labeling queue of unreviewed alerts (multi-user alert kept): {[c.alert_id for c in queue[:5]]}")
+    
+    storage.disconnect()
+
+
+def test_memory_mapped_artifacts():
+    """Test the content-addressed artifact store and memory-mapped forests"""
+    print("\n=== Testing Memory-Mapped Model Artifacts ===")
+    
+    from trade_risk_analyzer.models.artifact_store import ArtifactStore, artifact_ref_path
+    from trade_risk_analyzer.models.flat_forest import FlatRandomForest, FlatIsolationForest
+    
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(1500, 8))
+    y = (X[:, 0] + X[:, 1] ** 2 > 1.5).astype(int)
+    X_test = rng.normal(size=(300, 8))
+    X_test[::30, 2] = np.nan
+    
+    rf = RandomForestModel(n_estimators=30)
+    rf.train(X, y)
+    iso = IsolationForestModel(n_estimators=30, max_features=0.5)
+    iso.train(X)
+    
+    flat_rf = FlatRandomForest.from_model(rf)
+    flat_iso = FlatIsolationForest.from_model(iso)
+    assert np.array_equal(flat_rf.predict_proba(X_test), rf.predict_proba(X_test))
+    assert np.array_equal(flat_rf.predict(X_test), rf.model.predict(X_test))
+    assert np.allclose(flat_iso.predict_anomaly_score(X_test), iso.predict_anomaly_score(X_test))
+    assert np.array_equal(flat_iso.predict(X_test), iso.model.predict(X_test))
+    print("✓ Flat forests match scikit-learn predictions (including missing values)")
+    
+    tmp_dir = tempfile.mkdtemp()
+    store = ArtifactStore(os.path.join(tmp_dir, 'store'))
+    digest = flat_rf.save_to_store(store)
+    n_objects = len(list(store.objects_dir.glob('*.npy')))
+    assert FlatRandomForest.from_model(rf).save_to_store(store) == digest
+    assert store.list_artifacts() == [digest]
+    assert len(list(store.objects_dir.glob('*.npy'))) == n_objects
+    
+    loaded = FlatRandomForest()
+    loaded.load_from_store(store, digest)
+    assert isinstance(loaded.forest.threshold, np.memmap)
+    assert np.array_equal(loaded.predict_proba(X_test), rf.predict_proba(X_test))
+    print(f"✓ Identical artifacts stored once ({n_objects} objects), loaded memory-mapped")
+    
+    # Retraining versions are served from the artifact store
+    pipeline = RetrainingPipeline(
+        model_dir=os.path.join(tmp_dir, 'models'),
+        version_dir=os.path.join(tmp_dir, 'versions')
+    )
+    metrics = PerformanceMetrics(version="", timestamp=datetime.now(), accuracy=0.0,
+                                 precision=0.0, recall=0.0, f1_score=0.0)
+    version = pipeline._create_model_version("random_forest", rf, metrics, incremental=False)
+    pipeline._save_model_version(version, rf)
+    assert version.artifact and pipeline.artifact_store.exists(version.artifact)
+    assert pipeline.activate_model_version(version.version)
+    assert artifact_ref_path(pipeline.model_dir, 'random_forest').exists()
+    
+    engine = DetectionEngine(DetectionConfig(use_rule_based=False, ml_memory_mapped_models=True))
+    engine.load_models(str(pipeline.model_dir))
+    served = engine.ml_ensemble.models['random_forest']
+    assert isinstance(served, FlatRandomForest) and served.digest == version.artifact
+    assert np.array_equal(served.predict_proba(X_test), rf.predict_proba(X_test))
+    
+    engine = DetectionEngine(DetectionConfig(use_rule_based=False))
+    engine.load_models(str(pipeline.model_dir))
+    assert isinstance(engine.ml_ensemble.models['random_forest'], RandomForestModel)
+    print("✓ Activated version served memory-mapped when enabled (joblib model by default)")
+
+
 def main():
     """Run all tests"""
     print("=" * 60)
@@ -283,6 +775,12 @@ def main():
         test_feedback_types()
         test_feedback_statistics()
         test_retraining_pipeline()
+        test_labeled_trade_fetch()
+        test_incremental_model_updates()
+        test_retraining_worker()
+        test_retraining_feature_pipeline()
+        test_active_learning_queue()
+        test_memory_mapped_artifacts()
         test_model_versioning()
         test_feedback_workflow()
         
@@ -207,6 +207,65 @@ def test_ensemble_simple(if_model, rf_model, X, user_ids):
     return ensemble_scores
 
 
+def test_successive_halving_tuning():
+    """Test halving/Hyperband tuning on shared folds with a resumable trial store"""
+    print(f"\n{'=' * 60}")
+    print("Testing Successive Halving Tuning")
+    print(f"{'=' * 60}")
+    
+    import tempfile
+    from trade_risk_analyzer.models.tuning import CachedFolds, HyperparameterTuner, TrialStore
+    
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 6))
+    y = (X[:, 0] + 0.5 * rng.normal(size=400) > 1.2).astype(int)
+    
+    param_grids = {
+        'random_forest': {'n_estimators': [10, 30], 'max_depth': [2, None], 'min_samples_leaf': [1, 5]},
+        'isolation_forest': {'n_estimators': [20, 50], 'max_features': [0.5, 1.0]}
+    }
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store_path = f"{tmp_dir}/trials.db"
+        
+        trainer = ModelTrainer()
+        results = trainer.tune_models(X, y, param_grids=param_grids, cv=3,
+                                      trial_store_path=store_path, n_jobs=2)
+        
+        rf_result = results['random_forest']
+        print(f"\n✓ Random Forest: {rf_result.best_params} (F1 {rf_result.best_score:.4f})")
+        print(f"  Rungs: {[(r['n_candidates'], r['budget']) for r in rf_result.rungs]}")
+        assert rf_result.rungs[0]['n_candidates'] == 8
+        assert rf_result.rungs[-1]['n_candidates'] < 8
+        assert rf_result.rungs[-1]['budget'] > rf_result.rungs[0]['budget']
+        assert len(rf_result.cv_scores) == 3
+        assert results['isolation_forest'].best_score > 0.5
+        
+        # Repeating the search resumes from the trial store
+        resumed = ModelTrainer().tune_models(X, y, param_grids=param_grids, cv=3,
+                                             trial_store_path=store_path, n_jobs=2)
+        assert resumed['random_forest'].n_trials == 0
+        assert resumed['random_forest'].n_cached_trials == rf_result.n_trials
+        assert resumed['random_forest'].best_params == rf_result.best_params
+        print(f"✓ Resumed search reused {rf_result.n_trials} stored trials")
+        
+        # Hyperband over the same cached folds
+        folds = CachedFolds(X, y, cv=3)
+        try:
+            tuner = HyperparameterTuner(folds, trial_store=TrialStore(store_path), n_jobs=2)
+            hb_result = tuner.hyperband('random_forest', param_grids['random_forest'])
+        finally:
+            folds.cleanup()
+        assert hb_result.best_params
+        print(f"✓ Hyperband: {hb_result.best_params} ({len(hb_result.rungs)} rungs)")
+        
+        # Tuned parameters are used when training
+        model = trainer.train_random_forest(X, y, **trainer._tuned_params('random_forest'))
+        assert model.n_estimators == rf_result.best_params['n_estimators']
+    
+    print("\n✓ Tuning test passed")
+
+
 def main():
     """Main test function"""
     try:
@@ -255,3 +314,4 @@ def main():
 
 if __name__ == "__main__":
     main()
+    test_successive_halving_tuning()
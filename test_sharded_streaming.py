@@ -0,0 +1,162 @@
+"""
+Test Sharded Streaming Processor
+
+Tests multi-process streaming analysis partitioned by symbol.
+"""
+
+from datetime import datetime, timedelta
+
+from trade_risk_analyzer.detection.engine import DetectionConfig
+from trade_risk_analyzer.detection.streaming_processor import StreamingConfig
+from trade_risk_analyzer.detection.sharded_streaming import (
+    ShardedStreamingProcessor, ShardedStreamingConfig, partition_for
+)
+from trade_risk_analyzer.core.base import Trade, TradeType, Alert
+
+
+def create_test_trade(trade_id: str, user_id: str, timestamp: datetime,
+                     symbol: str = "BTC/USDT", price: float = 50000.0,
+                     volume: float = 1.0, trade_type: str = "BUY") -> Trade:
+    """Create a test trade"""
+    return Trade(
+        trade_id=trade_id,
+        user_id=user_id,
+        timestamp=timestamp,
+        symbol=symbol,
+        price=price,
+        volume=volume,
+        trade_type=TradeType.BUY if trade_type == "BUY" else TradeType.SELL,
+        order_id=f"order_{trade_id}"
+    )
+
+
+def create_sharded_config(num_shards: int = 2) -> ShardedStreamingConfig:
+    """Create a small sharded config for tests"""
+    return ShardedStreamingConfig(
+        num_shards=num_shards,
+        partition_key='symbol',
+        ingest_batch_size=10,
+        streaming=StreamingConfig(
+            window_size_minutes=5,
+            slide_interval_seconds=0,
+            min_trades_for_analysis=5,
+            enable_redis=False,
+            alert_threshold_score=0.0
+        ),
+        detection=DetectionConfig(use_ml_models=False, use_rule_based=True)
+    )
+
+
+def test_partitioning_is_stable():
+    """Test symbol partitioning is deterministic and in range"""
+    print("\n=== Testing Shard Partitioning ===")
+    
+    symbols = ['BTC/USDT', 'ETH/USDT', 'BNB/USDT', 'SOL/USDT']
+    first = [partition_for(s, 3) for s in symbols]
+    second = [partition_for(s, 3) for s in symbols]
+    
+    print(f"Shard assignment: {dict(zip(symbols, first))}")
+    
+    assert first == second
+    assert all(0 <= shard < 3 for shard in first)
+    
+    print("✓ Shard partitioning test passed")
+
+
+def test_sharded_processing():
+    """Test trades are processed by shards and alerts merged back"""
+    print("\n=== Testing Sharded Processing ===")
+    
+    received_alerts = []
+    
+    def alert_callback(alert: Alert):
+        received_alerts.append(alert)
+    
+    processor = ShardedStreamingProcessor(config=create_sharded_config())
+    processor.add_alert_callback(alert_callback)
+    
+    base_time = datetime.now()
+    trades = []
+    
+    # Wash trading pattern on two symbols
+    for symbol in ['BTC/USDT', 'ETH/USDT']:
+        for i in range(10):
+            trade_time = base_time + timedelta(seconds=i)
+            trades.append(create_test_trade(
+                f"{symbol}_buy_{i}", "user_1", trade_time,
+                symbol=symbol, trade_type="BUY"
+            ))
+            trades.append(create_test_trade(
+                f"{symbol}_sell_{i}", "user_1", trade_time + timedelta(seconds=1),
+                symbol=symbol, trade_type="SELL"
+            ))
+    
+    with processor:
+        processor.submit_trades(trades)
+        assert processor.flush(timeout=60)
+        stats = processor.get_statistics()
+    
+    print(f"Statistics: trades={stats['trades_processed']}, "
+          f"alerts={stats['alerts_generated']}, max lag={stats['max_lag_ms']:.1f}ms")
+    for shard in stats['shards']:
+        print(f"  Shard {shard['shard_id']}: {shard['trades_processed']} trades, "
+              f"{shard['pending_batches']} pending")
+    
+    assert stats['trades_processed'] == len(trades)
+    assert stats['pending_batches'] == 0
+    assert stats['errors'] == 0
+    assert len(received_alerts) == stats['alerts_generated']
+    
+    print("✓ Sharded processing test passed")
+
+
+def test_dead_shard():
+    """Test a shard process dying does not hang or break the other shards"""
+    print("\n=== Testing Dead Shard ===")
+    
+    import threading
+    
+    processor = ShardedStreamingProcessor(config=create_sharded_config())
+    base_time = datetime.now()
+    
+    # BTC/USDT and BNB/USDT land on different shards
+    trades = [
+        create_test_trade(f"{symbol}_{i}", "user_1", base_time + timedelta(seconds=i), symbol=symbol)
+        for symbol in ['BTC/USDT', 'BNB/USDT'] for i in range(30)
+    ]
+    victim = partition_for('BTC/USDT', 2)
+    survivor = partition_for('BNB/USDT', 2)
+    assert victim != survivor
+    
+    processor.start()
+    try:
+        processor._processes[victim].kill()
+        processor._processes[victim].join()
+        
+        processor.submit_trades(trades)
+        assert processor.flush(timeout=60)
+        
+        # Waiting without a timeout returns too
+        waiter = threading.Thread(target=processor.wait_until_idle)
+        waiter.start()
+        waiter.join(timeout=10)
+        assert not waiter.is_alive()
+        
+        stats = processor.get_statistics()
+    finally:
+        processor.stop()
+    
+    dead, alive = stats['shards'][victim], stats['shards'][survivor]
+    print(f"  Dead shard: {dead['batches_failed']} batches failed, {dead['trades_dropped']} trades dropped")
+    assert not dead['alive'] and dead['pending_batches'] == 0
+    assert dead['trades_dropped'] == 30 and dead['errors'] == 1
+    assert alive['alive'] and alive['trades_processed'] == 30
+    assert not any(p.is_alive() for p in processor._processes)
+    
+    print("✓ Dead shard test passed")
+
+
+if __name__ == "__main__":
+    test_partitioning_is_stable()
+    test_sharded_processing()
+    test_dead_shard()
@@ -8,16 +8,19 @@ from fastapi import APIRouter, HTTPException, BackgroundTasks, Query
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime, timedelta
+from pathlib import Path
 import uuid
 
+from trade_risk_analyzer.core.config import get_config
 from trade_risk_analyzer.core.logger import get_logger
 
 # Placeholder imports - these will be implemented when modules are complete
 try:
-    from trade_risk_analyzer.detection.engine import DetectionEngine
+    from trade_risk_analyzer.detection.engine import DetectionEngine, DetectionConfig
     from trade_risk_analyzer.data_ingestion.storage import DatabaseStorage
 except ImportError:
     DetectionEngine = None
+    DetectionConfig = None
     DatabaseStorage = None
 
 router = APIRouter()
@@ -26,6 +29,42 @@ logger = get_logger(__name__)
 # In-memory job tracking
 analysis_jobs = {}
 
+# Detection engine shared by analysis jobs
+_detection_engine = None
+
+
+def get_detection_engine():
+    """
+    Get the shared detection engine
+    
+    Models are loaded from the retraining model directory once and
+    hot-swapped when the retraining worker activates a new version.
+    """
+    global _detection_engine
+    if _detection_engine is None:
+        engine = DetectionEngine(DetectionConfig.from_app_config())
+        model_dir = get_config().retraining.model_dir
+        if Path(model_dir).exists():
+            engine.load_models(model_dir)
+        if engine.drift_monitor is not None and get_config().retraining.drift_triggered:
+            engine.drift_monitor.on_drift = _queue_drift_retraining
+        _detection_engine = engine
+    else:
+        _detection_engine.reload_models_if_changed()
+    return _detection_engine
+
+
+def _queue_drift_retraining(report) -> None:
+    """Queue a retraining job when the engine's drift monitor detects drift"""
+    from trade_risk_analyzer.feedback.job_queue import RetrainingJobQueue
+    
+    queue = RetrainingJobQueue(get_config().retraining.queue_path)
+    job = queue.enqueue_if_idle(
+        message=f"Drift detected for {report.model_version}: {'; '.join(report.reasons)}"
+    )
+    if job is not None:
+        logger.info(f"Queued retraining job {job.job_id} after drift of {report.model_version}")
+
 
 class AnalysisJob:
     def __init__(self, job_id: str, start_date: Optional[datetime], end_date: Optional[datetime], user_ids: Optional[List[str]]):
@@ -68,7 +107,7 @@ async def process_analysis(job_id: str, start_date: Optional[datetime], end_date
         
         # Initialize components
         storage = DatabaseStorage()
-        engine = DetectionEngine()
+        engine = get_detection_engine()
         
         # Fetch trades from database
         trades_df = storage.get_trades(
@@ -4,13 +4,14 @@ Feedback Router
 Endpoints for submitting feedback and triggering model retraining.
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
-import uuid
+from typing import Optional, List, Dict, Any
 
+from trade_risk_analyzer.core.config import get_config
 from trade_risk_analyzer.core.logger import get_logger
+from trade_risk_analyzer.feedback.job_queue import RetrainingJobQueue
+from trade_risk_analyzer.feedback.worker import validate_job_options
 
 # Placeholder imports - these will be implemented when feedback module is complete
 try:
@@ -23,8 +24,16 @@ except ImportError:
 router = APIRouter()
 logger = get_logger(__name__)
 
-# In-memory job tracking
-retraining_jobs = {}
+# Retraining jobs are run by worker processes (trade_risk_analyzer.feedback.worker)
+_job_queue: Optional[RetrainingJobQueue] = None
+
+
+def get_job_queue() -> RetrainingJobQueue:
+    """Get the retraining job queue shared with the worker processes"""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = RetrainingJobQueue(get_config().retraining.queue_path)
+    return _job_queue
 
 
 class FeedbackSubmission(BaseModel):
@@ -35,44 +44,10 @@ class FeedbackSubmission(BaseModel):
     user_id: Optional[str] = None
 
 
-class RetrainingJob:
-    def __init__(self, job_id: str):
-        self.job_id = job_id
-        self.status = "pending"
-        self.message = "Retraining queued"
-        self.model_version = None
-        self.metrics = None
-        self.created_at = datetime.now()
-        self.completed_at = None
-
-
-async def process_retraining(job_id: str):
-    """Background task to retrain models"""
-    job = retraining_jobs[job_id]
-    
-    try:
-        job.status = "processing"
-        job.message = "Retraining models..."
-        
-        # Initialize retrainer
-        retrainer = ModelRetrainer()
-        
-        # Retrain models
-        result = retrainer.retrain_with_feedback()
-        
-        job.model_version = result.get("version")
-        job.metrics = result.get("metrics")
-        job.status = "completed"
-        job.message = f"Retraining completed. New model version: {job.model_version}"
-        job.completed_at = datetime.now()
-        
-        logger.info(f"Retraining job {job_id} completed: version {job.model_version}")
-        
-    except Exception as e:
-        logger.error(f"Retraining job {job_id} failed: {e}", exc_info=True)
-        job.status = "failed"
-        job.message = f"Error: {str(e)}"
-        job.completed_at = datetime.now()
+class RetrainingRequest(BaseModel):
+    """Retraining options"""
+    model_types: Optional[List[str]] = None
+    params: Optional[Dict[str, Dict[str, Any]]] = None
 
 
 @router.post("")
@@ -138,28 +113,101 @@ async def get_feedback_stats():
         raise HTTPException(status_code=500, detail=f"Failed to retrieve statistics: {str(e)}")
 
 
+@router.get("/queue")
+def get_labeling_queue(
+    limit: int = Query(50, ge=1, le=500, description="Number of alerts to return"),
+    max_candidates: int = Query(1000, ge=1, le=10000, description="Most recent unreviewed alerts considered"),
+    diversity_weight: float = Query(0.3, ge=0.0, le=1.0, description="Share of feature-space diversity in the priority")
+):
+    """
+    Get the active-learning labeling queue
+    
+    Ranks unreviewed alerts by how informative their labels would be for
+    the next retraining: alerts the ensemble's models disagree on, alerts
+    scored near the decision threshold, and alerts unlike those already
+    reviewed come first. Reviewing in this order gets the most useful
+    labels for the least reviewer time.
+    
+    - **limit**: Number of alerts to return
+    - **max_candidates**: Most recent unreviewed alerts considered
+    - **diversity_weight**: 0 ranks by model uncertainty alone
+    """
+    from trade_risk_analyzer.api.routers.analysis import get_detection_engine
+    from trade_risk_analyzer.data_ingestion.storage import DatabaseStorage
+    from trade_risk_analyzer.feedback.retraining import RetrainingPipeline
+    
+    engine = get_detection_engine()
+    ensemble, feature_pipeline = engine.ml_ensemble, engine.feature_pipeline
+    if ensemble is None or not ensemble.models:
+        raise HTTPException(status_code=503, detail="No trained models loaded")
+    if feature_pipeline is None:
+        raise HTTPException(status_code=503, detail="No feature pipeline loaded")
+    
+    config = get_config()
+    storage = DatabaseStorage(config.database.url, config.database.pool_size, config.database.max_overflow)
+    
+    try:
+        storage.connect()
+        pipeline = RetrainingPipeline(
+            storage=storage,
+            model_dir=config.retraining.model_dir,
+            version_dir=config.retraining.version_dir
+        )
+        candidates = pipeline.get_labeling_queue(
+            ensemble,
+            feature_pipeline=feature_pipeline,
+            n=limit,
+            max_candidates=max_candidates,
+            diversity_weight=diversity_weight
+        )
+        
+        return {
+            "count": len(candidates),
+            "alerts": [candidate.to_dict() for candidate in candidates]
+        }
+    
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error building labeling queue: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to build labeling queue: {str(e)}")
+    finally:
+        storage.disconnect()
+
+
 @router.post("/models/retrain")
-async def trigger_retraining(background_tasks: BackgroundTasks):
+async def trigger_retraining(request: Optional[RetrainingRequest] = None):
     """
     Trigger model retraining with feedback data
     
-    This will retrain all models using the accumulated feedback.
+    Queues a job for the retraining worker process, which retrains the
+    models using the accumulated feedback and activates the new versions;
+    detection engines pick them up without a restart.
     Returns a job ID for tracking the retraining progress.
+    
+    - **model_types**: Models to retrain (default: random_forest, isolation_forest)
+    - **params**: Retraining options per model type
+    
+    Unsupported model types and unknown options are rejected with 422.
     """
+    request = request or RetrainingRequest()
+    
     try:
-        # Create job
-        job_id = str(uuid.uuid4())
-        job = RetrainingJob(job_id)
-        retraining_jobs[job_id] = job
-        
-        # Queue background processing
-        background_tasks.add_task(process_retraining, job_id)
+        validate_job_options(request.model_types, request.params)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    try:
+        job = get_job_queue().enqueue(
+            model_types=request.model_types,
+            params=request.params
+        )
         
-        logger.info(f"Retraining job {job_id} created")
+        logger.info(f"Retraining job {job.job_id} created")
         
         return {
-            "job_id": job_id,
-            "status": "queued",
+            "job_id": job.job_id,
+            "status": job.status.value,
             "message": "Model retraining queued successfully"
         }
         
@@ -175,18 +223,22 @@ async def get_retraining_status(job_id: str):
     
     - **job_id**: Job ID returned from retrain endpoint
     """
-    if job_id not in retraining_jobs:
+    job = get_job_queue().get_job(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job = retraining_jobs[job_id]
-    
     return {
         "job_id": job.job_id,
-        "status": job.status,
+        "status": job.status.value,
         "message": job.message,
-        "model_version": job.model_version,
+        "progress_percentage": job.progress,
+        "model_types": job.model_types,
+        "model_versions": job.model_versions,
         "metrics": job.metrics,
+        "worker_id": job.worker_id,
         "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "heartbeat_at": job.heartbeat_at.isoformat() if job.heartbeat_at else None,
         "completed_at": job.completed_at.isoformat() if job.completed_at else None
     }
 
@@ -213,20 +265,47 @@ async def get_model_versions():
 
 
 @router.get("/models/performance")
-async def get_model_performance():
+def get_model_performance(
+    check: bool = Query(False, description="Run a drift check now (may queue retraining)")
+):
     """
-    Get current model performance metrics
+    Get current model performance and drift metrics
+    
+    Returns the evaluation metrics of the active model versions and the
+    drift of live features and ensemble scores against the training
+    baseline (PSI and KS), computed from the detection engine's streaming
+    sketches. Drift is checked on a schedule; a check that crosses the
+    thresholds queues a retraining job.
     
-    Returns performance metrics for the currently active models.
+    - **check**: Run the drift check now instead of reporting without triggering
     """
+    from trade_risk_analyzer.api.routers.analysis import get_detection_engine
+    from trade_risk_analyzer.feedback.retraining import read_model_versions
+    
     try:
-        retrainer = ModelRetrainer()
-        performance = retrainer.get_current_performance()
+        # Read-only: version metadata is read in place, drift comes from the engine
+        config = get_config()
+        active_versions = [v for v in read_model_versions(config.retraining.version_dir) if v.is_active]
+        last_updated = max((v.created_at for v in active_versions), default=None)
+        
+        engine = get_detection_engine()
+        monitor = engine.drift_monitor
+        drift = None
+        if monitor is not None:
+            drift = monitor.check() if check else monitor.report()
         
         return {
-            "model_version": performance.get("version"),
-            "metrics": performance.get("metrics"),
-            "last_updated": performance.get("last_updated")
+            "model_version": engine.model_version,
+            "metrics": {
+                version.model_type: {
+                    "version": version.version,
+                    **version.performance_metrics.to_dict()
+                }
+                for version in active_versions
+            },
+            "last_updated": last_updated.isoformat() if last_updated else None,
+            "drift": drift.to_dict() if drift is not None else None,
+            "drift_monitor": monitor.get_status() if monitor is not None else None
         }
         
     except Exception as e:
@@ -6,19 +6,20 @@ Endpoints for trade data upload and management.
 
 from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
 from typing import Optional
-import pandas as pd
-import io
+import os
+import tempfile
 import uuid
 from datetime import datetime
 
+from trade_risk_analyzer.core.config import get_config
 from trade_risk_analyzer.core.logger import get_logger
 
 # Placeholder imports
 try:
-    from trade_risk_analyzer.data_ingestion.importer import TradeDataImporter
+    from trade_risk_analyzer.data_ingestion.import_pipeline import TradeImportPipeline
     from trade_risk_analyzer.data_ingestion.storage import DatabaseStorage
 except ImportError:
-    TradeDataImporter = None
+    TradeImportPipeline = None
     DatabaseStorage = None
 
 router = APIRouter()
@@ -27,6 +28,12 @@ logger = get_logger(__name__)
 # In-memory job tracking (in production, use Redis or database)
 upload_jobs = {}
 
+# Bytes copied per read when spooling an upload to disk
+UPLOAD_READ_SIZE = 1 << 20
+
+# Rows imported, validated and stored per chunk
+UPLOAD_CHUNK_SIZE = 50000
+
 
 class UploadJob:
     def __init__(self, job_id: str):
@@ -36,17 +43,29 @@ class UploadJob:
         self.total_records = 0
         self.valid_records = 0
         self.invalid_records = 0
+        self.chunks_processed = 0
+        self.bytes_processed = 0
+        self.total_bytes = 0
+        self.progress_percentage = 0.0
         self.errors = []
+        self.error_counts = {}
         self.created_at = datetime.now()
         self.completed_at = None
 
 
-async def process_upload(job_id: str, file_content: bytes, filename: str, file_type: str):
-    """Background task to process uploaded file"""
+def process_upload(job_id: str, file_path: str, filename: str, file_type: str):
+    """
+    Background task to process an uploaded file
+    
+    The spooled file is streamed through import, validation and storage one
+    chunk at a time; job progress is updated after every chunk. Runs in the
+    threadpool, so parsing does not block the event loop.
+    """
     job = upload_jobs[job_id]
+    storage = None
     
     try:
-        if TradeDataImporter is None or DatabaseStorage is None:
+        if TradeImportPipeline is None or DatabaseStorage is None:
             job.status = "failed"
             job.message = "Data ingestion module not yet fully implemented"
             job.completed_at = datetime.now()
@@ -55,41 +74,39 @@ async def process_upload(job_id: str, file_content: bytes, filename: str, file_t
         job.status = "processing"
         job.message = "Processing file..."
         
-        # Initialize importer and storage
-        importer = TradeDataImporter()
-        storage = DatabaseStorage()
+        # Initialize storage and pipeline
+        database = get_config().database
+        storage = DatabaseStorage(database.url, database.pool_size, database.max_overflow)
+        storage.connect()
         
-        # Parse file based on type
-        if file_type == "csv":
-            df = pd.read_csv(io.BytesIO(file_content))
-        elif file_type == "json":
-            df = pd.read_json(io.BytesIO(file_content))
-        elif file_type in ["xlsx", "xls"]:
-            df = pd.read_excel(io.BytesIO(file_content))
-        else:
-            raise ValueError(f"Unsupported file type: {file_type}")
+        # Re-uploaded trades are skipped rather than failing the chunk
+        pipeline = TradeImportPipeline(
+            storage=storage,
+            chunk_size=UPLOAD_CHUNK_SIZE,
+            on_conflict='ignore'
+        )
         
-        job.total_records = len(df)
+        def update_job(progress):
+            job.total_records = progress.total_records
+            job.valid_records = progress.valid_records
+            job.invalid_records = progress.invalid_records
+            job.chunks_processed = progress.chunks_processed
+            job.bytes_processed = progress.bytes_read
+            job.total_bytes = progress.total_bytes
+            job.progress_percentage = progress.progress_percentage
+            job.errors = progress.errors
+            job.error_counts = progress.error_counts
+            job.message = f"Processed {progress.total_records} records ({progress.chunks_processed} chunks)"
         
-        # Validate data
-        validation_result = importer.validate_data(df)
+        pipeline.add_progress_callback(update_job)
+        progress = pipeline.run(file_path, file_type=file_type)
         
-        if not validation_result.is_valid:
+        if progress.valid_records == 0:
             job.status = "failed"
             job.message = "Validation failed"
-            job.errors = validation_result.errors
-            job.invalid_records = len(validation_result.errors)
-            job.completed_at = datetime.now()
-            return
-        
-        # Store valid records
-        valid_df = df[validation_result.valid_indices]
-        storage.store_trades(valid_df)
-        
-        job.valid_records = len(valid_df)
-        job.invalid_records = job.total_records - job.valid_records
-        job.status = "completed"
-        job.message = f"Successfully imported {job.valid_records} records"
+        else:
+            job.status = "completed"
+            job.message = f"Successfully imported {job.valid_records} records"
         job.completed_at = datetime.now()
         
         logger.info(f"Upload job {job_id} completed: {job.valid_records}/{job.total_records} records imported")
@@ -100,6 +117,14 @@ async def process_upload(job_id: str, file_content: bytes, filename: str, file_t
         job.message = f"Error: {str(e)}"
         job.errors = [str(e)]
         job.completed_at = datetime.now()
+    
+    finally:
+        if storage is not None:
+            storage.disconnect()
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
 
 
 @router.post("/upload")
@@ -110,10 +135,10 @@ async def upload_trades(
     """
     Upload trade data file
     
-    Supports CSV, JSON, and Excel formats.
+    Supports CSV, JSON, JSON Lines, and Excel formats.
     Returns a job ID for tracking upload status.
     
-    - **file**: Trade data file (CSV, JSON, or Excel)
+    - **file**: Trade data file (CSV, JSON, JSON Lines, or Excel)
     """
     # Validate file type
     filename = file.filename.lower()
@@ -121,6 +146,8 @@ async def upload_trades(
         file_type = 'csv'
     elif filename.endswith('.json'):
         file_type = 'json'
+    elif filename.endswith(('.jsonl', '.ndjson')):
+        file_type = 'jsonl'
     elif filename.endswith(('.xlsx', '.xls')):
         file_type = 'xlsx'
     else:
@@ -129,29 +156,46 @@ async def upload_trades(
             detail="Unsupported file type. Please upload CSV, JSON, or Excel file."
         )
     
-    # Validate file size (max 50MB)
-    content = await file.read()
-    if len(content) > 50 * 1024 * 1024:
-        raise HTTPException(
-            status_code=400,
-            detail="File too large. Maximum size is 50MB."
-        )
+    # Spool to disk block by block, enforcing the size limit as we go
+    max_upload_size = get_config().api.max_upload_size
+    max_bytes = max_upload_size * 1024 * 1024
+    suffix = os.path.splitext(filename)[1]
+    fd, file_path = tempfile.mkstemp(prefix="trade_upload_", suffix=suffix)
+    size = 0
+    
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                block = await file.read(UPLOAD_READ_SIZE)
+                if not block:
+                    break
+                size += len(block)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"File too large. Maximum size is {max_upload_size}MB."
+                    )
+                out.write(block)
+    except BaseException:
+        os.remove(file_path)
+        raise
     
     # Create job
     job_id = str(uuid.uuid4())
     job = UploadJob(job_id)
+    job.total_bytes = size
     upload_jobs[job_id] = job
     
     # Queue background processing
     background_tasks.add_task(
         process_upload,
         job_id,
-        content,
+        file_path,
         file.filename,
         file_type
     )
     
-    logger.info(f"Upload job {job_id} created for file: {file.filename}")
+    logger.info(f"Upload job {job_id} created for file: {file.filename} ({size} bytes)")
     
     return {
         "job_id": job_id,
@@ -179,7 +223,12 @@ async def get_upload_status(job_id: str):
         "total_records": job.total_records,
         "valid_records": job.valid_records,
         "invalid_records": job.invalid_records,
+        "chunks_processed": job.chunks_processed,
+        "bytes_processed": job.bytes_processed,
+        "total_bytes": job.total_bytes,
+        "progress_percentage": job.progress_percentage,
         "errors": job.errors[:10] if job.errors else [],  # Limit to first 10 errors
+        "error_counts": job.error_counts,
         "created_at": job.created_at.isoformat(),
         "completed_at": job.completed_at.isoformat() if job.completed_at else None
     }
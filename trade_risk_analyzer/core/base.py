@@ -3,8 +3,8 @@ Base Classes and Interfaces for Extensibility
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
-from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 
@@ -61,6 +61,8 @@ class ValidationResult:
     warnings: List[str]
     valid_records: int
     invalid_records: int
+    error_counts: Dict[str, int] = field(default_factory=dict)  # Violations per rule
+    valid_mask: Optional[Any] = None  # Boolean array, one entry per row
 
 
 @dataclass
@@ -94,10 +96,11 @@ class ModelMetrics:
 @dataclass
 class DetectionResult:
     """Detection result"""
-    anomaly_scores: List[float]
-    risk_flags: List[RiskLevel]
+    anomaly_scores: Sequence[float]
+    risk_flags: Sequence[RiskLevel]
     alerts: List[Alert]
     model_metrics: Optional[ModelMetrics] = None
+    entity_ids: Optional[Sequence[str]] = None  # Entity for each score/flag
 
 
 class BaseDataImporter(ABC):
@@ -18,6 +18,8 @@ class DetectionThresholds:
     wash_trading_time_window: int = 300  # seconds
     pump_dump_volume_spike: float = 3.0  # multiplier
     pump_dump_price_change: float = 0.5  # 50%
+    burst_window: str = "5min"
+    quote_stuffing_per_minute: int = 100
 
 
 @dataclass
@@ -59,6 +61,20 @@ class APIConfig:
     cors_origins: list = field(default_factory=lambda: ["*"])
 
 
+@dataclass
+class RetrainingConfig:
+    """Background retraining worker configuration"""
+    queue_path: str = "retraining_queue.db"
+    model_dir: str = "models"
+    version_dir: str = "model_versions"
+    poll_interval: float = 5.0  # seconds between queue polls
+    max_memory_mb: int = 4096  # address space limit of the worker process
+    cpu_threads: int = 2  # threads used by numerical libraries
+    nice: int = 10  # scheduling priority increment
+    stale_job_timeout: int = 3600  # seconds before a silent running job is requeued
+    drift_triggered: bool = True  # queue retraining when the drift monitor detects drift
+
+
 @dataclass
 class LoggingConfig:
     """Logging configuration"""
@@ -74,6 +90,7 @@ class Config:
     database: DatabaseConfig = field(default_factory=DatabaseConfig)
     redis: RedisConfig = field(default_factory=RedisConfig)
     api: APIConfig = field(default_factory=APIConfig)
+    retraining: RetrainingConfig = field(default_factory=RetrainingConfig)
     logging: LoggingConfig = field(default_factory=LoggingConfig)
 
 
@@ -197,6 +214,8 @@ class ConfigManager:
                     'wash_trading_time_window': 300,
                     'pump_dump_volume_spike': 3.0,
                     'pump_dump_price_change': 0.5,
+                    'burst_window': '5min',
+                    'quote_stuffing_per_minute': 100,
                 },
                 'model_weights': {
                     'isolation_forest': 0.3,
@@ -219,6 +238,17 @@ class ConfigManager:
                 'max_upload_size': 100,
                 'cors_origins': ['*'],
             },
+            'retraining': {
+                'queue_path': 'retraining_queue.db',
+                'model_dir': 'models',
+                'version_dir': 'model_versions',
+                'poll_interval': 5.0,
+                'max_memory_mb': 4096,
+                'cpu_threads': 2,
+                'nice': 10,
+                'stale_job_timeout': 3600,
+                'drift_triggered': True,
+            },
             'logging': {
                 'level': 'INFO',
                 'format': 'json',
@@ -285,6 +315,11 @@ class ConfigManager:
             config_dict.get('api', {})
         )
         
+        retraining_config = self._dict_to_dataclass(
+            RetrainingConfig,
+            config_dict.get('retraining', {})
+        )
+        
         logging_config = self._dict_to_dataclass(
             LoggingConfig,
             config_dict.get('logging', {})
@@ -295,6 +330,7 @@ class ConfigManager:
             database=database_config,
             redis=redis_config,
             api=api_config,
+            retraining=retraining_config,
             logging=logging_config
         )
     
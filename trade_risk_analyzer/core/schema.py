@@ -0,0 +1,222 @@
+"""
+Trade Schema
+
+Canonical in-memory layout of trade data. Low-cardinality string columns
+(user, symbol, trade type) are categorical, so equality tests and grouping
+work on integer codes; identifier columns are Arrow-backed strings;
+timestamps are datetime64[ns] (int64 nanoseconds) and prices and volumes
+float64. The schema is enforced when trades are imported, read from the
+database and handed to detection.
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List
+
+from trade_risk_analyzer.core.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+# Dictionary-encoded (categorical) columns
+CATEGORICAL_COLUMNS = ['user_id', 'symbol', 'trade_type']
+
+# High-cardinality identifier columns
+IDENTIFIER_COLUMNS = ['trade_id', 'order_id']
+
+# Numeric columns
+FLOAT_COLUMNS = ['price', 'volume']
+
+TRADE_COLUMNS = ['trade_id', 'user_id', 'timestamp', 'symbol', 'price', 'volume', 'trade_type', 'order_id']
+
+
+def identifier_dtype():
+    """Dtype of identifier columns: Arrow-backed strings when available"""
+    return pd.StringDtype('pyarrow') if PYARROW_AVAILABLE else object
+
+
+def _is_timestamp(series: pd.Series) -> bool:
+    return pd.api.types.is_datetime64_any_dtype(series.dtype)
+
+
+def _to_categorical(series: pd.Series, upper: bool = False) -> pd.Series:
+    """Dictionary-encode a string column, optionally upper-casing values"""
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype('category')
+    
+    if upper:
+        categories = series.cat.categories
+        if categories.dtype == object and len(categories) > 0:
+            upper_categories = categories.str.upper()
+            if not upper_categories.equals(categories):
+                if upper_categories.is_unique:
+                    series = series.cat.rename_categories(upper_categories)
+                else:
+                    # Several spellings collapse onto one category
+                    series = series.astype(object).str.upper().astype('category')
+    
+    return series
+
+
+def to_trade_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert a trade DataFrame to the canonical schema
+    
+    Only the trade columns present are converted; other columns are kept as
+    they are. Columns that already have the canonical dtype are not copied,
+    so calling this on a conforming frame is cheap.
+    
+    Args:
+        df: Trade data
+    
+    Returns:
+        DataFrame with canonical dtypes (a new frame; the input is unchanged)
+    """
+    df = df.copy(deep=False)
+    
+    if 'timestamp' in df.columns and not _is_timestamp(df['timestamp']):
+        df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+    
+    for col in FLOAT_COLUMNS:
+        if col in df.columns and df[col].dtype != np.float64:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(np.float64)
+    
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = _to_categorical(df[col], upper=(col == 'trade_type'))
+    
+    target = identifier_dtype()
+    for col in IDENTIFIER_COLUMNS:
+        if col in df.columns and df[col].dtype != target:
+            df[col] = df[col].astype(target)
+    
+    return df
+
+
+def is_trade_frame(df: pd.DataFrame) -> bool:
+    """
+    Check whether the trade columns present already use the canonical dtypes
+    
+    Args:
+        df: Trade data
+    
+    Returns:
+        True if no conversion is needed
+    """
+    if 'timestamp' in df.columns and not _is_timestamp(df['timestamp']):
+        return False
+    if any(col in df.columns and df[col].dtype != np.float64 for col in FLOAT_COLUMNS):
+        return False
+    if any(col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype)
+           for col in CATEGORICAL_COLUMNS):
+        return False
+    target = identifier_dtype()
+    return all(col not in df.columns or df[col].dtype == target for col in IDENTIFIER_COLUMNS)
+
+
+def trade_frame_memory(df: pd.DataFrame) -> Dict[str, int]:
+    """
+    Memory used by each column in bytes (including string contents)
+    
+    Args:
+        df: Trade data
+    
+    Returns:
+        Dictionary of column name to bytes, plus 'total'
+    """
+    usage = df.memory_usage(deep=True, index=False)
+    memory = {col: int(usage[col]) for col in df.columns}
+    memory['total'] = int(usage.sum())
+    return memory
+
+
+def trade_arrow_schema(tz=None):
+    """
+    Arrow schema of the canonical trade columns
+    
+    Args:
+        tz: Timezone of the timestamp column (None for naive timestamps)
+    
+    Returns:
+        pyarrow.Schema with dictionary-encoded categorical columns
+    """
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow is required for Arrow trade tables")
+    
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    types = {
+        'trade_id': pa.string(),
+        'user_id': dictionary,
+        'timestamp': pa.timestamp('ns', tz=tz),
+        'symbol': dictionary,
+        'price': pa.float64(),
+        'volume': pa.float64(),
+        'trade_type': dictionary,
+        'order_id': pa.string()
+    }
+    return pa.schema([(name, types[name]) for name in TRADE_COLUMNS])
+
+
+def trade_frame_to_arrow(df: pd.DataFrame):
+    """
+    Convert a trade DataFrame to an Arrow table with the canonical schema
+    
+    Args:
+        df: Trade data
+    
+    Returns:
+        pyarrow.Table; columns outside the trade schema keep inferred types
+    """
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow is required for Arrow trade tables")
+    
+    df = to_trade_frame(df)
+    tz = df['timestamp'].dt.tz if 'timestamp' in df.columns else None
+    tz = str(tz) if tz is not None else None
+    schema = trade_arrow_schema(tz)
+    
+    fields: List = [schema.field(name) for name in df.columns if name in schema.names]
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for field in fields:
+        index = table.schema.get_field_index(field.name)
+        table = table.set_column(index, field, table.column(index).cast(field.type))
+    
+    return table
+
+
+def trade_frame_from_arrow(table) -> pd.DataFrame:
+    """
+    Convert an Arrow table to a trade DataFrame with the canonical schema
+    
+    Args:
+        table: pyarrow.Table
+    
+    Returns:
+        DataFrame with canonical dtypes
+    """
+    # Dictionary-encode in Arrow so pandas receives categoricals directly
+    # instead of materializing a Python string per row
+    for name in CATEGORICAL_COLUMNS:
+        if name in table.column_names and pa.types.is_string(table.schema.field(name).type):
+            index = table.schema.get_field_index(name)
+            table = table.set_column(index, name, pc.dictionary_encode(table.column(name)))
+    
+    df = table.to_pandas(types_mapper={pa.string(): identifier_dtype()}.get)
+    
+    # Lexical category order, as astype('category') produces
+    for name in CATEGORICAL_COLUMNS:
+        if name in df.columns and isinstance(df[name].dtype, pd.CategoricalDtype):
+            categories = df[name].cat.categories
+            if not categories.is_monotonic_increasing:
+                df[name] = df[name].cat.reorder_categories(categories.sort_values())
+    
+    return to_trade_frame(df)
@@ -7,6 +7,8 @@ Handles importing, validating, and storing trade data from various sources.
 from trade_risk_analyzer.data_ingestion.importer import TradeDataImporter
 from trade_risk_analyzer.data_ingestion.validator import TradeDataValidator
 from trade_risk_analyzer.data_ingestion.storage import DatabaseStorage
+from trade_risk_analyzer.data_ingestion.parquet_storage import ParquetStorage
+from trade_risk_analyzer.data_ingestion.import_pipeline import TradeImportPipeline, ImportProgress
 from trade_risk_analyzer.data_ingestion.models import (
     TradeModel,
     AlertModel,
@@ -20,6 +22,9 @@ __all__ = [
     'TradeDataImporter',
     'TradeDataValidator',
     'DatabaseStorage',
+    'ParquetStorage',
+    'TradeImportPipeline',
+    'ImportProgress',
     'TradeModel',
     'AlertModel',
     'FeedbackModel',
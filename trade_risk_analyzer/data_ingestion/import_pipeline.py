@@ -0,0 +1,252 @@
+"""
+Import Pipeline
+
+Streams a trade file through import, validation and storage one chunk at a
+time, so memory use is bounded by the chunk size rather than the file size.
+Progress (bytes read, records stored, errors) is reported after every chunk.
+"""
+
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable, Union, BinaryIO
+
+from trade_risk_analyzer.core.base import BaseStorage
+from trade_risk_analyzer.core.logger import get_logger
+from trade_risk_analyzer.data_ingestion.importer import TradeDataImporter
+from trade_risk_analyzer.data_ingestion.validator import TradeDataValidator
+
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class ImportProgress:
+    """
+    Chunked import progress information
+    """
+    total_bytes: int
+    start_time: datetime
+    bytes_read: int = 0
+    chunks_processed: int = 0
+    total_records: int = 0
+    valid_records: int = 0
+    invalid_records: int = 0
+    stored_records: int = 0
+    errors: List[str] = field(default_factory=list)
+    error_counts: Dict[str, int] = field(default_factory=dict)
+    completed: bool = False
+    
+    @property
+    def progress_percentage(self) -> float:
+        """Calculate progress percentage from bytes read"""
+        if self.completed:
+            return 100.0
+        if self.total_bytes == 0:
+            return 0.0
+        return min(self.bytes_read / self.total_bytes, 1.0) * 100
+    
+    @property
+    def elapsed_time(self) -> float:
+        """Calculate elapsed time in seconds"""
+        return (datetime.now() - self.start_time).total_seconds()
+    
+    @property
+    def processing_rate(self) -> float:
+        """Calculate records per second"""
+        if self.elapsed_time == 0:
+            return 0.0
+        return self.total_records / self.elapsed_time
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return {
+            'total_bytes': self.total_bytes,
+            'bytes_read': self.bytes_read,
+            'chunks_processed': self.chunks_processed,
+            'total_records': self.total_records,
+            'valid_records': self.valid_records,
+            'invalid_records': self.invalid_records,
+            'stored_records': self.stored_records,
+            'errors': list(self.errors),
+            'error_counts': dict(self.error_counts),
+            'completed': self.completed,
+            'progress_percentage': self.progress_percentage,
+            'elapsed_time': self.elapsed_time,
+            'processing_rate': self.processing_rate
+        }
+
+
+class TradeImportPipeline:
+    """
+    Chunked import -> validate -> store pipeline for trade files
+    """
+    
+    def __init__(
+        self,
+        storage: Optional[BaseStorage] = None,
+        importer: Optional[TradeDataImporter] = None,
+        validator: Optional[TradeDataValidator] = None,
+        chunk_size: int = 50000,
+        on_conflict: Optional[str] = None,
+        max_errors: int = 100
+    ):
+        """
+        Initialize import pipeline
+        
+        Args:
+            storage: Trade storage (DatabaseStorage or ParquetStorage);
+                None validates without storing
+            importer: Trade data importer (default: new TradeDataImporter)
+            validator: Trade data validator (default: new TradeDataValidator)
+            chunk_size: Rows per chunk
+            on_conflict: Duplicate trade ID handling passed to the storage's
+                save_trades_from_dataframe (None = storage default);
+                ParquetStorage supports 'error' and 'ignore'
+            max_errors: Maximum number of validation errors kept in progress
+        """
+        self.storage = storage
+        self.importer = importer or TradeDataImporter()
+        self.validator = validator or TradeDataValidator()
+        self.chunk_size = chunk_size
+        self.on_conflict = on_conflict
+        self.max_errors = max_errors
+        self.logger = logger
+        
+        # Progress tracking
+        self.progress: Optional[ImportProgress] = None
+        self.progress_callbacks: List[Callable[[ImportProgress], None]] = []
+    
+    def add_progress_callback(self, callback: Callable[[ImportProgress], None]) -> None:
+        """
+        Add callback function for progress updates
+        
+        Args:
+            callback: Function to call after each chunk
+        """
+        self.progress_callbacks.append(callback)
+    
+    def run(self, source: Union[str, Path, BinaryIO], file_type: Optional[str] = None) -> ImportProgress:
+        """
+        Import a trade file chunk by chunk
+        
+        Invalid records are skipped and counted; valid records of each chunk
+        are stored before the next chunk is read.
+        
+        Args:
+            source: File path or binary file object
+            file_type: File format (default: detected from the file extension)
+        
+        Returns:
+            Final ImportProgress
+        
+        Raises:
+            ValueError: If the file cannot be parsed or lacks required columns
+            RuntimeError: If storing a chunk fails
+        """
+        if isinstance(source, (str, Path)):
+            if file_type is None:
+                file_type = Path(source).suffix.lower().lstrip('.')
+            with open(source, 'rb') as stream:
+                return self._run_stream(stream, file_type, os.path.getsize(source))
+        
+        if file_type is None:
+            raise ValueError("file_type is required for file objects")
+        return self._run_stream(source, file_type, self._stream_size(source))
+    
+    def _run_stream(self, stream: BinaryIO, file_type: str, total_bytes: int) -> ImportProgress:
+        """Run the pipeline over an open binary stream"""
+        self.logger.info(f"Starting chunked import ({file_type}, {total_bytes} bytes, "
+                         f"chunk_size={self.chunk_size})")
+        
+        self.progress = ImportProgress(total_bytes=total_bytes, start_time=datetime.now())
+        save_kwargs = {'on_conflict': self.on_conflict} if self.on_conflict else {}
+        
+        for chunk in self.importer.iter_chunks(stream, file_type=file_type, chunk_size=self.chunk_size):
+            # Every chunk has the same columns, so fail on the first one
+            missing = [col for col in self.validator.REQUIRED_COLUMNS if col not in chunk.columns]
+            if missing:
+                raise ValueError(f"Missing required columns: {missing}")
+            
+            result = self.validator.validate(chunk)
+            self._record_errors(result.errors)
+            for rule, count in result.error_counts.items():
+                self.progress.error_counts[rule] = self.progress.error_counts.get(rule, 0) + count
+            
+            stored = 0
+            if result.valid_records > 0:
+                valid = self.validator.get_valid_records(chunk, result)
+                if self.storage is not None:
+                    if not self.storage.save_trades_from_dataframe(valid, **save_kwargs):
+                        raise RuntimeError(
+                            f"Failed to store chunk {self.progress.chunks_processed + 1}"
+                        )
+                    stored = len(valid)
+            
+            self._update_progress(stream, len(chunk), result.valid_records,
+                                  len(chunk) - result.valid_records, stored)
+        
+        self.progress.completed = True
+        self.progress.bytes_read = self.progress.total_bytes
+        self._notify_progress()
+        
+        self.logger.info(
+            f"Chunked import complete: {self.progress.total_records} records in "
+            f"{self.progress.chunks_processed} chunks, {self.progress.valid_records} valid, "
+            f"{self.progress.stored_records} stored"
+        )
+        
+        return self.progress
+    
+    def _stream_size(self, stream: BinaryIO) -> int:
+        """Remaining bytes of a seekable stream (0 if unknown)"""
+        try:
+            position = stream.tell()
+            size = stream.seek(0, os.SEEK_END)
+            stream.seek(position)
+            return size - position
+        except (AttributeError, OSError, ValueError):
+            return 0
+    
+    def _record_errors(self, errors: List[Any]) -> None:
+        """Keep validation errors up to max_errors (row numbers are per chunk)"""
+        chunk = self.progress.chunks_processed + 1
+        room = self.max_errors - len(self.progress.errors)
+        for error in errors[:max(room, 0)]:
+            self.progress.errors.append(f"Chunk {chunk}: {error.field}: {error.message}")
+    
+    def _update_progress(self, stream: BinaryIO, records: int, valid: int, invalid: int,
+                         stored: int) -> None:
+        """
+        Update progress after a chunk completes and notify callbacks
+        
+        Args:
+            stream: Source stream (its position gives the bytes read)
+            records: Records in the chunk
+            valid: Valid records in the chunk
+            invalid: Invalid records in the chunk
+            stored: Records stored from the chunk
+        """
+        progress = self.progress
+        progress.chunks_processed += 1
+        progress.total_records += records
+        progress.valid_records += valid
+        progress.invalid_records += invalid
+        progress.stored_records += stored
+        
+        try:
+            # Readers buffer ahead, so this is an upper bound on bytes parsed
+            progress.bytes_read = min(stream.tell(), progress.total_bytes)
+        except (OSError, ValueError):
+            pass
+        
+        self._notify_progress()
+    
+    def _notify_progress(self) -> None:
+        """Notify all progress callbacks"""
+        for callback in self.progress_callbacks:
+            try:
+                callback(self.progress)
+            except Exception as e:
+                self.logger.error(f"Error in progress callback: {str(e)}")
@@ -6,18 +6,105 @@ type conversion and date/time normalization.
 """
 
 import pandas as pd
-from typing import Optional, Union
+from typing import Optional, Union, Iterator, List, Dict, Any, BinaryIO
 from pathlib import Path
 from datetime import datetime
+import csv
+import io
 import json
 
 from trade_risk_analyzer.core.base import BaseDataImporter, ValidationResult, Trade, TradeType
 from trade_risk_analyzer.core.logger import get_logger
+from trade_risk_analyzer.core.schema import PYARROW_AVAILABLE, to_trade_frame
+
+if PYARROW_AVAILABLE:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
 
 
 logger = get_logger(__name__)
 
 
+# Keys of an object wrapping the trade array, e.g. {"trades": [...]}
+JSON_RECORD_KEYS = ['trades', 'data', 'records']
+
+# Text read per step when scanning JSON without ijson
+JSON_READ_SIZE = 1 << 20
+
+# Bytes parsed per block by the Arrow CSV reader
+CSV_BLOCK_SIZE = 1 << 22
+
+
+def _iter_json_values(stream: io.TextIOBase, read_size: int = JSON_READ_SIZE) -> Iterator[Any]:
+    """
+    Decode the elements of a top-level JSON array, or consecutive JSON
+    values (JSON Lines), holding only a window of the text in memory
+    
+    Args:
+        stream: Text stream
+        read_size: Characters read per step
+    
+    Yields:
+        Decoded values
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    in_array = None
+    
+    def refill() -> bool:
+        nonlocal buffer, pos
+        chunk = stream.read(read_size)
+        if chunk:
+            buffer = buffer[pos:] + chunk
+            pos = 0
+        return bool(chunk)
+    
+    while True:
+        # Skip separators between values
+        while pos < len(buffer) and (buffer[pos].isspace() or (in_array and buffer[pos] == ',')):
+            pos += 1
+        
+        if pos >= len(buffer):
+            if not refill():
+                break
+            continue
+        
+        if in_array is None:
+            in_array = buffer[pos] == '['
+            if in_array:
+                pos += 1
+            continue
+        
+        if in_array and buffer[pos] == ']':
+            break
+        
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # The value may continue past the window
+            if not refill():
+                raise
+            continue
+        
+        # A number at the end of the window may be cut short
+        if end == len(buffer) and not isinstance(value, (dict, list, str)) and refill():
+            continue
+        
+        yield value
+        pos = end
+        
+        if pos > read_size:
+            buffer = buffer[pos:]
+            pos = 0
+
+
 class TradeDataImporter(BaseDataImporter):
     """
     Handles importing trade data from various file formats
@@ -101,21 +188,9 @@ class TradeDataImporter(BaseDataImporter):
             raise FileNotFoundError(f"File not found: {file_path}")
         
         try:
-            # Read JSON file
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-            
-            # Handle both array of objects and object with array
-            if isinstance(data, dict):
-                # Try common keys for trade data
-                for key in ['trades', 'data', 'records']:
-                    if key in data and isinstance(data[key], list):
-                        data = data[key]
-                        break
-                else:
-                    # If no array found, wrap single object
-                    if not isinstance(data, list):
-                        data = [data]
+            # Decode records incrementally instead of loading the whole text
+            with open(file_path, 'rb') as f:
+                data = list(self._iter_json_records(f))
             
             # Convert to DataFrame
             df = pd.DataFrame(data)
@@ -191,12 +266,185 @@ class TradeDataImporter(BaseDataImporter):
         else:
             raise ValueError(f"Unsupported file format: {extension}")
     
-    def _normalize_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
+    def iter_chunks(self, source: Union[str, Path, BinaryIO], file_type: Optional[str] = None,
+                    chunk_size: int = 50000) -> Iterator[pd.DataFrame]:
+        """
+        Stream trade data as normalized DataFrame chunks
+        
+        CSV is parsed block by block (Arrow CSV reader, or pandas chunks
+        without pyarrow), JSON arrays and JSON Lines are decoded record by
+        record (ijson when installed), so memory use depends on the chunk
+        size rather than the file size. Excel files are read whole and then
+        split into chunks.
+        
+        Args:
+            source: File path or binary file object
+            file_type: 'csv', 'json', 'jsonl', 'xlsx' or 'xls' (default:
+                detected from the file extension)
+            chunk_size: Rows per chunk
+        
+        Yields:
+            Normalized DataFrames of at most chunk_size rows
+        """
+        if file_type is None:
+            if not isinstance(source, (str, Path)):
+                raise ValueError("file_type is required for file objects")
+            file_type = Path(source).suffix.lower().lstrip('.')
+        file_type = file_type.lower()
+        
+        if file_type == 'csv':
+            read_frames = self._iter_csv_frames
+        elif file_type in ['json', 'jsonl', 'ndjson']:
+            read_frames = self._iter_json_frames
+        elif file_type in ['xlsx', 'xls']:
+            read_frames = self._iter_excel_frames
+        else:
+            raise ValueError(f"Unsupported file format: {file_type}")
+        
+        stream = open(source, 'rb') if isinstance(source, (str, Path)) else source
+        import_time = int(datetime.now().timestamp())
+        row_offset = 0
+        
+        try:
+            for frame in read_frames(stream, chunk_size):
+                yield self._normalize_dataframe(frame, row_offset=row_offset, import_time=import_time)
+                row_offset += len(frame)
+        finally:
+            if stream is not source:
+                stream.close()
+        
+        self.logger.info(f"Streamed {row_offset} records in chunks of {chunk_size}")
+    
+    def _iter_csv_frames(self, stream: BinaryIO, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """Read a CSV stream as raw string-typed frames of chunk_size rows"""
+        # Header names, so every column can be read as text; typing is left
+        # to normalization, as for whole-file imports
+        position = stream.tell()
+        header = stream.readline().decode('utf-8-sig')
+        stream.seek(position)
+        names = next(csv.reader([header]), [])
+        
+        if not PYARROW_AVAILABLE:
+            yield from pd.read_csv(stream, chunksize=chunk_size, dtype=str)
+            return
+        
+        reader = pa_csv.open_csv(
+            stream,
+            read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_SIZE),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={name: pa.string() for name in names},
+                strings_can_be_null=True
+            )
+        )
+        
+        pending: List = []
+        pending_rows = 0
+        for batch in reader:
+            pending.append(batch)
+            pending_rows += batch.num_rows
+            
+            while pending_rows >= chunk_size:
+                table = pa.Table.from_batches(pending)
+                yield table.slice(0, chunk_size).to_pandas()
+                rest = table.slice(chunk_size)
+                pending = rest.to_batches()
+                pending_rows = rest.num_rows
+        
+        if pending_rows:
+            yield pa.Table.from_batches(pending).to_pandas()
+    
+    def _iter_json_frames(self, stream: BinaryIO, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """Read a JSON or JSON Lines stream as raw frames of chunk_size rows"""
+        records: List[Dict[str, Any]] = []
+        for record in self._iter_json_records(stream):
+            records.append(record)
+            if len(records) >= chunk_size:
+                yield pd.DataFrame(records)
+                records = []
+        
+        if records:
+            yield pd.DataFrame(records)
+    
+    def _iter_excel_frames(self, stream: BinaryIO, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """Read an Excel stream (whole workbook) as frames of chunk_size rows"""
+        df = pd.read_excel(stream)
+        for offset in range(0, len(df), chunk_size):
+            yield df.iloc[offset:offset + chunk_size].reset_index(drop=True)
+    
+    def _iter_json_records(self, stream: BinaryIO) -> Iterator[Dict[str, Any]]:
+        """
+        Decode trade records from a JSON stream
+        
+        Accepts a top-level array, an object wrapping the array under one of
+        JSON_RECORD_KEYS, a single object, or JSON Lines.
+        
+        Args:
+            stream: Binary stream
+        
+        Yields:
+            Trade records
+        """
+        if IJSON_AVAILABLE:
+            prefix = self._json_records_prefix(stream)
+            if prefix is not None:
+                yield from ijson.items(stream, prefix, use_float=True)
+                return
+        
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig')
+        try:
+            for value in _iter_json_values(text):
+                if isinstance(value, dict):
+                    for key in JSON_RECORD_KEYS:
+                        if isinstance(value.get(key), list):
+                            yield from value[key]
+                            break
+                    else:
+                        yield value
+                elif isinstance(value, list):
+                    yield from value
+                else:
+                    raise ValueError(f"Unexpected JSON value: {value!r}")
+        finally:
+            # Leave the caller's stream open
+            text.detach()
+    
+    def _json_records_prefix(self, stream: BinaryIO) -> Optional[str]:
+        """
+        Find the ijson prefix of the trade array
+        
+        Args:
+            stream: Binary stream (rewound afterwards)
+        
+        Returns:
+            'item' for a top-level array, '<key>.item' for a wrapping object,
+            None for JSON Lines or a single object
+        """
+        position = stream.tell()
+        try:
+            for prefix, event, value in ijson.parse(stream):
+                if event == 'start_array' and prefix == '':
+                    return 'item'
+                if event == 'start_array' and prefix in JSON_RECORD_KEYS:
+                    return f"{prefix}.item"
+                if event == 'end_map' and prefix == '':
+                    return None
+        except ijson.JSONError:
+            return None
+        finally:
+            stream.seek(position)
+        return None
+    
+    def _normalize_dataframe(self, df: pd.DataFrame, row_offset: int = 0,
+                             import_time: Optional[int] = None) -> pd.DataFrame:
         """
         Normalize DataFrame with proper type conversion and date handling
         
         Args:
             df: Input DataFrame
+            row_offset: Position of the first row in the whole import, used
+                for generated trade IDs when importing in chunks
+            import_time: Import timestamp used in generated trade IDs
+                (default: now)
             
         Returns:
             Normalized DataFrame
@@ -221,18 +469,20 @@ class TradeDataImporter(BaseDataImporter):
             if col in df.columns:
                 df[col] = pd.to_numeric(df[col], errors='coerce')
         
-        # Convert string columns
+        # Convert string columns (missing values stay missing for validation)
         string_columns = ['user_id', 'symbol', 'order_id', 'trade_id']
         for col in string_columns:
             if col in df.columns:
-                df[col] = df[col].astype(str)
+                df[col] = df[col].where(df[col].isna(), df[col].astype(str))
         
         # Generate trade_id if not present
         if 'trade_id' not in df.columns:
-            df['trade_id'] = [f"trade_{i}_{int(datetime.now().timestamp())}" 
+            import_time = import_time if import_time is not None else int(datetime.now().timestamp())
+            df['trade_id'] = [f"trade_{row_offset + i}_{import_time}"
                              for i in range(len(df))]
         
-        return df
+        # Categorical/Arrow-backed canonical dtypes
+        return to_trade_frame(df)
     
     def _normalize_timestamp(self, timestamp_series: pd.Series) -> pd.Series:
         """
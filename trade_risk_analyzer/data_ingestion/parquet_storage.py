@@ -0,0 +1,693 @@
+"""
+Parquet Storage Layer
+
+Columnar trade lake on local disk. Trades are written as zstd-compressed
+Parquet files partitioned by trade date and symbol (hive layout), sorted by
+user and time within each file so row-group statistics are selective. Reads
+prune partitions and row groups from the filters and return Arrow tables.
+"""
+
+import os
+import uuid
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterator, Iterable
+import pandas as pd
+import numpy as np
+
+from trade_risk_analyzer.core.base import BaseStorage, Trade, Alert, TradeType, RiskLevel, PatternType
+from trade_risk_analyzer.core.logger import get_logger
+from trade_risk_analyzer.core.schema import (
+    PYARROW_AVAILABLE, TRADE_COLUMNS, to_trade_frame, trade_frame_from_arrow
+)
+
+if PYARROW_AVAILABLE:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+
+logger = get_logger(__name__)
+
+
+TRADES_DIR = 'trades'
+ALERTS_FILE = 'alerts.parquet'
+
+# Handling of existing trade IDs (files are append-only, so no 'update')
+CONFLICT_ACTIONS = ('error', 'ignore')
+
+ALERT_COLUMNS = [
+    'alert_id', 'timestamp', 'user_id', 'trade_ids', 'anomaly_score', 'risk_level',
+    'pattern_type', 'explanation', 'recommended_action', 'is_reviewed',
+    'is_true_positive', 'reviewer_notes'
+]
+
+
+def _naive_utc(value) -> pd.Timestamp:
+    """Convert a timestamp to naive UTC, as stored in the lake"""
+    value = pd.Timestamp(value)
+    if value.tzinfo is not None:
+        value = value.tz_convert('UTC').tz_localize(None)
+    return value
+
+
+class ParquetStorage(BaseStorage):
+    """
+    Parquet trade lake implementation
+    
+    Layout under the root directory:
+        trades/date=YYYY-MM-DD/symbol=<symbol>/part-<id>-<n>.parquet
+        alerts.parquet
+    
+    Trade files are append-only; each save adds new files to the affected
+    partitions. Trade IDs are kept unique within a (date, symbol) partition,
+    which is where a re-imported trade lands. Timestamps are stored as
+    naive UTC.
+    """
+    
+    def __init__(self, root_path: str, compression: str = 'zstd',
+                 row_group_size: int = 65536):
+        """
+        Initialize Parquet storage
+        
+        Args:
+            root_path: Root directory of the lake
+            compression: Parquet compression codec
+            row_group_size: Maximum rows per row group
+        """
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is required for ParquetStorage")
+        
+        self.root_path = Path(root_path)
+        self.trades_path = self.root_path / TRADES_DIR
+        self.alerts_path = self.root_path / ALERTS_FILE
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self.partitioning = ds.partitioning(
+            pa.schema([('date', pa.string()), ('symbol', pa.string())]),
+            flavor='hive'
+        )
+        self.schema = pa.schema([
+            ('trade_id', pa.string()),
+            ('user_id', pa.string()),
+            ('timestamp', pa.timestamp('ns')),
+            ('price', pa.float64()),
+            ('volume', pa.float64()),
+            ('trade_type', pa.string()),
+            ('order_id', pa.string()),
+            ('date', pa.string()),
+            ('symbol', pa.string())
+        ])
+        self.connected = False
+        self.logger = logger
+    
+    def connect(self) -> None:
+        """
+        Create the lake directories
+        """
+        self.logger.info(f"Opening Parquet trade lake: {self.root_path}")
+        self.trades_path.mkdir(parents=True, exist_ok=True)
+        self.connected = True
+    
+    def disconnect(self) -> None:
+        """
+        Close the lake (no open handles are kept between calls)
+        """
+        self.connected = False
+        self.logger.info("Parquet trade lake closed")
+    
+    def _check_connected(self) -> None:
+        if not self.connected:
+            raise RuntimeError("Storage not connected. Call connect() first.")
+    
+    def _dataset(self):
+        """Open the trades dataset"""
+        return ds.dataset(
+            str(self.trades_path),
+            schema=self.schema,
+            format='parquet',
+            partitioning=self.partitioning
+        )
+    
+    def _filter_expression(self, filters: Dict[str, Any]):
+        """
+        Build a dataset filter expression
+        
+        Partition columns (date, symbol) prune directories; user_id,
+        timestamp and trade_type prune row groups through their statistics.
+        trade_ids is a set-membership test evaluated during the scan.
+        """
+        expression = None
+        
+        def combine(condition):
+            nonlocal expression
+            expression = condition if expression is None else expression & condition
+        
+        if 'symbol' in filters:
+            combine(pc.field('symbol') == str(filters['symbol']))
+        
+        if 'start_date' in filters:
+            start = _naive_utc(filters['start_date'])
+            combine(pc.field('date') >= start.strftime('%Y-%m-%d'))
+            combine(pc.field('timestamp') >= pa.scalar(start.value, pa.timestamp('ns')))
+        
+        if 'end_date' in filters:
+            end = _naive_utc(filters['end_date'])
+            combine(pc.field('date') <= end.strftime('%Y-%m-%d'))
+            combine(pc.field('timestamp') <= pa.scalar(end.value, pa.timestamp('ns')))
+        
+        if 'user_id' in filters:
+            combine(pc.field('user_id') == str(filters['user_id']))
+        
+        if 'trade_type' in filters:
+            trade_type = filters['trade_type']
+            trade_type = trade_type.value if isinstance(trade_type, TradeType) else str(trade_type).upper()
+            combine(pc.field('trade_type') == trade_type)
+        
+        if 'trade_ids' in filters:
+            trade_ids = pa.array([str(trade_id) for trade_id in filters['trade_ids']], pa.string())
+            combine(pc.field('trade_id').isin(trade_ids))
+        
+        return expression
+    
+    def save_trades(self, trades: List[Trade], on_conflict: str = 'error') -> bool:
+        """
+        Save trades to the lake
+        
+        Args:
+            trades: List of Trade objects
+            on_conflict: Handling of existing trade IDs ('error', 'ignore')
+        
+        Returns:
+            Success status
+        """
+        if not trades:
+            self.logger.warning("No trades to save")
+            return True
+        
+        df = pd.DataFrame([{
+            'trade_id': trade.trade_id,
+            'user_id': trade.user_id,
+            'timestamp': trade.timestamp,
+            'symbol': trade.symbol,
+            'price': trade.price,
+            'volume': trade.volume,
+            'trade_type': trade.trade_type.value if isinstance(trade.trade_type, TradeType) else trade.trade_type,
+            'order_id': trade.order_id
+        } for trade in trades])
+        
+        return self.save_trades_from_dataframe(df, on_conflict=on_conflict)
+    
+    def save_trades_from_dataframe(self, df: pd.DataFrame, on_conflict: str = 'error') -> bool:
+        """
+        Save trades from DataFrame to the lake
+        
+        Args:
+            df: DataFrame containing trade data
+            on_conflict: Handling of trade IDs already in their partition or
+                repeated in the DataFrame: 'error' fails the save and
+                'ignore' skips them. Stored trades are never overwritten.
+        
+        Returns:
+            Success status
+        """
+        if on_conflict not in CONFLICT_ACTIONS:
+            raise ValueError(
+                f"on_conflict must be one of {CONFLICT_ACTIONS} for ParquetStorage, got '{on_conflict}'"
+            )
+        
+        if df.empty:
+            self.logger.warning("Empty DataFrame, no trades to save")
+            return True
+        
+        self.logger.info(f"Saving {len(df)} trades to Parquet lake")
+        
+        try:
+            self._check_connected()
+            
+            df = to_trade_frame(df[[col for col in TRADE_COLUMNS if col in df.columns]])
+            if 'order_id' not in df.columns:
+                df['order_id'] = None
+            
+            timestamps = df['timestamp']
+            if timestamps.dt.tz is not None:
+                timestamps = timestamps.dt.tz_convert('UTC').dt.tz_localize(None)
+            
+            frame = pd.DataFrame({
+                'trade_id': df['trade_id'].astype(object),
+                'user_id': df['user_id'].astype(object),
+                'timestamp': timestamps,
+                'price': df['price'],
+                'volume': df['volume'],
+                'trade_type': df['trade_type'].astype(object),
+                'order_id': df['order_id'].astype(object),
+                'date': timestamps.dt.strftime('%Y-%m-%d'),
+                'symbol': df['symbol'].astype(object)
+            })
+            
+            # Existing trade IDs
+            duplicated = frame['trade_id'].duplicated()
+            existing = frame['trade_id'].isin(self._existing_trade_ids(frame))
+            conflicts = duplicated | existing
+            if conflicts.any():
+                if on_conflict == 'error':
+                    raise ValueError(
+                        f"{int(conflicts.sum())} trade IDs already stored or repeated, "
+                        f"e.g. {frame.loc[conflicts, 'trade_id'].iloc[0]}"
+                    )
+                frame = frame[~conflicts]
+                self.logger.info(f"Skipping {int(conflicts.sum())} existing trade IDs")
+                if frame.empty:
+                    return True
+            
+            # Sorting within partitions keeps user_id and timestamp
+            # row-group statistics narrow
+            frame = frame.sort_values(['date', 'symbol', 'user_id', 'timestamp'], kind='stable')
+            table = pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False)
+            
+            file_format = ds.ParquetFileFormat()
+            ds.write_dataset(
+                table,
+                str(self.trades_path),
+                format=file_format,
+                partitioning=self.partitioning,
+                basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+                file_options=file_format.make_write_options(
+                    compression=self.compression,
+                    write_statistics=True
+                ),
+                max_rows_per_group=self.row_group_size,
+                min_rows_per_group=min(self.row_group_size, len(table)),
+                preserve_order=True,
+                existing_data_behavior='overwrite_or_ignore'
+            )
+            
+            self.logger.info(f"Successfully saved {len(frame)} trades to Parquet lake")
+            return True
+        
+        except Exception as e:
+            self.logger.error(f"Failed to save trades to Parquet lake: {str(e)}")
+            return False
+    
+    def _existing_trade_ids(self, frame: pd.DataFrame) -> set:
+        """
+        Trade IDs of a save that are already stored in its partitions
+        
+        Only the trade_id column of the (date, symbol) partitions the
+        rows are written to is scanned.
+        
+        Args:
+            frame: Trades to save, with 'date' and 'symbol' partition columns
+        
+        Returns:
+            Set of stored trade IDs
+        """
+        if not any(self.trades_path.iterdir()):
+            return set()
+        
+        expression = (
+            pc.field('date').isin(pa.array(frame['date'].unique().tolist(), pa.string())) &
+            pc.field('symbol').isin(pa.array(frame['symbol'].unique().tolist(), pa.string())) &
+            pc.field('trade_id').isin(pa.array(frame['trade_id'].unique().tolist(), pa.string()))
+        )
+        table = self._dataset().to_table(columns=['trade_id'], filter=expression)
+        
+        return set(table.column('trade_id').to_pylist())
+    
+    def get_trades_as_arrow(self, filters: Optional[Dict[str, Any]] = None,
+                            columns: Optional[List[str]] = None):
+        """
+        Retrieve trades as an Arrow table
+        
+        Args:
+            filters: Optional filters (user_id, symbol, start_date, end_date,
+                trade_type, trade_ids, limit)
+            columns: Optional subset of trade columns to read
+        
+        Returns:
+            pyarrow.Table ordered by timestamp descending
+        """
+        self._check_connected()
+        filters = filters or {}
+        
+        columns = list(columns or TRADE_COLUMNS)
+        if 'limit' in filters and 'timestamp' not in columns:
+            columns.append('timestamp')
+        
+        table = self._dataset().to_table(
+            columns=columns,
+            filter=self._filter_expression(filters)
+        )
+        
+        if 'timestamp' in columns:
+            table = table.sort_by([('timestamp', 'descending')])
+        
+        if 'limit' in filters:
+            table = table.slice(0, filters['limit'])
+        
+        return table
+    
+    def get_trades_as_dataframe(self, filters: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        """
+        Retrieve trades as DataFrame
+        
+        Args:
+            filters: Optional filters
+        
+        Returns:
+            DataFrame containing trade data
+        """
+        try:
+            df = trade_frame_from_arrow(self.get_trades_as_arrow(filters))
+            
+            self.logger.info(f"Retrieved {len(df)} trades as DataFrame")
+            return df
+        
+        except Exception as e:
+            self.logger.error(f"Failed to retrieve trades as DataFrame: {str(e)}")
+            return pd.DataFrame()
+    
+    def get_trades_by_ids(self, trade_ids: Iterable[str]) -> pd.DataFrame:
+        """
+        Retrieve the trades with the given IDs in a single scan
+        
+        Args:
+            trade_ids: Trade IDs (deduplicated)
+        
+        Returns:
+            DataFrame of the matching trades (unknown IDs are skipped)
+        """
+        ids = pd.Series(list(trade_ids), dtype=object).dropna().astype(str).unique().tolist()
+        if not ids:
+            return pd.DataFrame()
+        
+        return self.get_trades_as_dataframe({'trade_ids': ids})
+    
+    def get_trades(self, filters: Optional[Dict[str, Any]] = None) -> List[Trade]:
+        """
+        Retrieve trades from the lake
+        
+        Args:
+            filters: Optional filters (user_id, symbol, start_date, end_date, limit)
+        
+        Returns:
+            List of Trade objects
+        """
+        self.logger.info(f"Retrieving trades with filters: {filters or {}}")
+        
+        try:
+            table = self.get_trades_as_arrow(filters)
+        except Exception as e:
+            self.logger.error(f"Failed to retrieve trades: {str(e)}")
+            return []
+        
+        trades = [
+            Trade(
+                trade_id=row['trade_id'],
+                user_id=row['user_id'],
+                timestamp=row['timestamp'],
+                symbol=row['symbol'],
+                price=row['price'],
+                volume=row['volume'],
+                trade_type=TradeType[row['trade_type']],
+                order_id=row['order_id']
+            )
+            for row in table.to_pylist()
+        ]
+        
+        self.logger.info(f"Retrieved {len(trades)} trades")
+        return trades
+    
+    def iter_trades_dataframe(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        chunk_size: int = 50000,
+        order_by: str = 'user_id'
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Retrieve trades as a sequence of DataFrame chunks
+        
+        The pruned scan is held as one Arrow table, sorted by (order_by,
+        timestamp, trade_id); only one chunk at a time is converted to
+        pandas.
+        
+        Args:
+            filters: Optional filters (user_id, symbol, start_date, end_date, trade_type)
+            chunk_size: Maximum number of trades per chunk
+            order_by: Entity column to order by before timestamp
+        
+        Yields:
+            DataFrame chunks in (order_by, timestamp) order
+        """
+        if order_by not in TRADE_COLUMNS:
+            raise ValueError(f"Unknown trade column: {order_by}")
+        
+        filters = {key: value for key, value in (filters or {}).items() if key != 'limit'}
+        table = self.get_trades_as_arrow(filters).sort_by([
+            (order_by, 'ascending'),
+            ('timestamp', 'ascending'),
+            ('trade_id', 'ascending')
+        ])
+        
+        for offset in range(0, table.num_rows, chunk_size):
+            yield trade_frame_from_arrow(table.slice(offset, chunk_size))
+        
+        self.logger.info(f"Streamed {table.num_rows} trades in chunks of {chunk_size}")
+    
+    def get_trade_count(self, filters: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Get count of trades matching filters
+        
+        Args:
+            filters: Optional filters
+        
+        Returns:
+            Count of matching trades
+        """
+        try:
+            self._check_connected()
+            return self._dataset().count_rows(filter=self._filter_expression(filters or {}))
+        except Exception as e:
+            self.logger.error(f"Failed to get trade count: {str(e)}")
+            return 0
+    
+    def get_scan_stats(self, filters: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+        """
+        Report how much of the lake a filtered read touches
+        
+        Args:
+            filters: Optional filters
+        
+        Returns:
+            Dictionary with total and selected file and row group counts
+        """
+        self._check_connected()
+        dataset = self._dataset()
+        expression = self._filter_expression(filters or {})
+        
+        fragments = list(dataset.get_fragments())
+        selected = list(dataset.get_fragments(filter=expression)) if expression is not None else fragments
+        
+        return {
+            'total_files': len(fragments),
+            'total_row_groups': sum(fragment.num_row_groups for fragment in fragments),
+            'selected_files': len(selected),
+            'selected_row_groups': sum(
+                len(fragment.split_by_row_group(filter=expression, schema=dataset.schema))
+                if expression is not None else fragment.num_row_groups
+                for fragment in selected
+            )
+        }
+    
+    def delete_trades(self, filters: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Delete trades from the lake
+        
+        Only files in matching partitions are rewritten.
+        
+        Args:
+            filters: Filters to identify trades to delete
+        
+        Returns:
+            Number of deleted records
+        """
+        filters = filters or {}
+        
+        self.logger.info(f"Deleting trades with filters: {filters}")
+        
+        try:
+            self._check_connected()
+            dataset = self._dataset()
+            expression = self._filter_expression(filters)
+            file_columns = [name for name in self.schema.names if name not in ('date', 'symbol')]
+            
+            count = 0
+            for fragment in dataset.get_fragments(filter=expression):
+                table = fragment.to_table(schema=dataset.schema)
+                keep = table.filter(~expression) if expression is not None else table.slice(0, 0)
+                removed = table.num_rows - keep.num_rows
+                if removed == 0:
+                    continue
+                
+                count += removed
+                if keep.num_rows == 0:
+                    os.remove(fragment.path)
+                else:
+                    pq.write_table(
+                        keep.select(file_columns),
+                        fragment.path,
+                        compression=self.compression,
+                        row_group_size=self.row_group_size
+                    )
+            
+            self.logger.info(f"Deleted {count} trades")
+            return count
+        
+        except Exception as e:
+            self.logger.error(f"Failed to delete trades: {str(e)}")
+            return 0
+    
+    def _read_alerts(self) -> pd.DataFrame:
+        """Read the alerts file"""
+        if not self.alerts_path.exists():
+            return pd.DataFrame(columns=ALERT_COLUMNS)
+        return pd.read_parquet(self.alerts_path)
+    
+    def _write_alerts(self, alerts_df: pd.DataFrame) -> None:
+        """Replace the alerts file atomically"""
+        temp_path = self.alerts_path.with_suffix('.parquet.tmp')
+        alerts_df.to_parquet(temp_path, index=False, compression=self.compression)
+        os.replace(temp_path, self.alerts_path)
+    
+    @staticmethod
+    def _alert_record(alert: Alert) -> Dict[str, Any]:
+        return {
+            'alert_id': alert.alert_id,
+            'timestamp': alert.timestamp,
+            'user_id': alert.user_id,
+            'trade_ids': [str(trade_id) for trade_id in alert.trade_ids or []],
+            'anomaly_score': float(alert.anomaly_score),
+            'risk_level': alert.risk_level.value if isinstance(alert.risk_level, RiskLevel) else alert.risk_level,
+            'pattern_type': alert.pattern_type.value if isinstance(alert.pattern_type, PatternType) else alert.pattern_type,
+            'explanation': alert.explanation,
+            'recommended_action': alert.recommended_action,
+            'is_reviewed': bool(alert.is_reviewed),
+            'is_true_positive': alert.is_true_positive,
+            'reviewer_notes': alert.reviewer_notes
+        }
+    
+    def save_alert(self, alert: Alert) -> bool:
+        """
+        Save or update alert
+        
+        Args:
+            alert: Alert object
+        
+        Returns:
+            Success status
+        """
+        self.logger.info(f"Saving alert: {alert.alert_id}")
+        return self.save_alerts_batch([alert])
+    
+    def save_alerts_batch(self, alerts: List[Alert]) -> bool:
+        """
+        Save multiple alerts, replacing alerts with the same ID
+        
+        Args:
+            alerts: List of Alert objects
+        
+        Returns:
+            Success status
+        """
+        if not alerts:
+            self.logger.warning("No alerts to save")
+            return True
+        
+        try:
+            self._check_connected()
+            
+            new_df = pd.DataFrame([self._alert_record(alert) for alert in alerts], columns=ALERT_COLUMNS)
+            new_df = new_df.drop_duplicates('alert_id', keep='last')
+            new_df['timestamp'] = pd.to_datetime(new_df['timestamp'])
+            new_df['is_true_positive'] = new_df['is_true_positive'].astype('boolean')
+            
+            alerts_df = self._read_alerts()
+            if not alerts_df.empty:
+                alerts_df = alerts_df[~alerts_df['alert_id'].isin(new_df['alert_id'])]
+                alerts_df = pd.concat([alerts_df, new_df], ignore_index=True)
+            else:
+                alerts_df = new_df
+            
+            self._write_alerts(alerts_df)
+            
+            self.logger.info(f"Successfully saved {len(new_df)} alerts")
+            return True
+        
+        except Exception as e:
+            self.logger.error(f"Failed to save alerts batch: {str(e)}")
+            return False
+    
+    def get_alerts(self, filters: Optional[Dict[str, Any]] = None) -> List[Alert]:
+        """
+        Retrieve alerts
+        
+        Args:
+            filters: Optional filters (alert_id, user_id, risk_level, pattern_type,
+                start_date, end_date, is_reviewed, limit)
+        
+        Returns:
+            List of Alert objects
+        """
+        filters = filters or {}
+        
+        self.logger.info(f"Retrieving alerts with filters: {filters}")
+        
+        try:
+            self._check_connected()
+            alerts_df = self._read_alerts()
+            if alerts_df.empty:
+                return []
+            
+            mask = np.ones(len(alerts_df), dtype=bool)
+            for key in ['alert_id', 'user_id', 'risk_level', 'pattern_type', 'is_reviewed']:
+                if key in filters:
+                    value = filters[key]
+                    if isinstance(value, (RiskLevel, PatternType)):
+                        value = value.value
+                    mask &= (alerts_df[key] == value).to_numpy()
+            
+            if 'start_date' in filters:
+                mask &= (alerts_df['timestamp'] >= pd.Timestamp(filters['start_date'])).to_numpy()
+            
+            if 'end_date' in filters:
+                mask &= (alerts_df['timestamp'] <= pd.Timestamp(filters['end_date'])).to_numpy()
+            
+            alerts_df = alerts_df[mask].sort_values('timestamp', ascending=False, kind='stable')
+            
+            if 'limit' in filters:
+                alerts_df = alerts_df.head(filters['limit'])
+            
+            alerts = [
+                Alert(
+                    alert_id=row['alert_id'],
+                    timestamp=row['timestamp'].to_pydatetime(),
+                    user_id=row['user_id'],
+                    trade_ids=list(row['trade_ids']) if row['trade_ids'] is not None else [],
+                    anomaly_score=row['anomaly_score'],
+                    risk_level=RiskLevel[row['risk_level']],
+                    pattern_type=PatternType[row['pattern_type']],
+                    explanation=row['explanation'] or "",
+                    recommended_action=row['recommended_action'] or "",
+                    is_reviewed=bool(row['is_reviewed']),
+                    is_true_positive=None if pd.isna(row['is_true_positive']) else bool(row['is_true_positive']),
+                    reviewer_notes=row['reviewer_notes']
+                )
+                for row in alerts_df.to_dict('records')
+            ]
+            
+            self.logger.info(f"Retrieved {len(alerts)} alerts")
+            return alerts
+        
+        except Exception as e:
+            self.logger.error(f"Failed to retrieve alerts: {str(e)}")
+            return []
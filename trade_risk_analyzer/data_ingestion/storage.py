@@ -5,22 +5,93 @@ Handles database connection management, connection pooling, and CRUD operations
 for trade data with batch insert optimization.
 """
 
-from sqlalchemy import create_engine, and_, or_
+from sqlalchemy import create_engine, and_, or_, tuple_, select, Table, MetaData, Column, String
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
 from contextlib import contextmanager
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Iterable
 from datetime import datetime
+import io
 import pandas as pd
+import numpy as np
 
 from trade_risk_analyzer.core.base import BaseStorage, Trade, Alert, TradeType, RiskLevel, PatternType
 from trade_risk_analyzer.core.logger import get_logger
+from trade_risk_analyzer.core.schema import TRADE_COLUMNS, to_trade_frame
 from trade_risk_analyzer.data_ingestion.models import Base, TradeModel, AlertModel, FeedbackModel, ModelVersionModel
 
 
 logger = get_logger(__name__)
 
 
+CONFLICT_ACTIONS = ('error', 'ignore', 'update')
+
+# Bulk-load tuning, restored afterwards since connections are pooled
+SQLITE_BULK_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -262144,  # 256 MiB
+    'temp_store': 'MEMORY'
+}
+
+# Trade IDs bound as IN parameters before switching to a temporary table join
+TRADE_ID_IN_LIMIT = 500
+
+
+def _conflict_clause(on_conflict: str) -> str:
+    """ON CONFLICT clause for the trades primary key (SQLite and PostgreSQL)"""
+    if on_conflict == 'ignore':
+        return " ON CONFLICT (trade_id) DO NOTHING"
+    if on_conflict == 'update':
+        updates = ', '.join(
+            f"{col} = excluded.{col}" for col in TRADE_COLUMNS if col != 'trade_id'
+        )
+        return f" ON CONFLICT (trade_id) DO UPDATE SET {updates}"
+    return ""
+
+
+def _trade_load_frame(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert a trade chunk to driver-ready column values
+    
+    Timestamps are formatted as SQLAlchemy stores DateTime on SQLite
+    ('YYYY-MM-DD HH:MM:SS.ffffff', wall-clock time), strings are plain
+    Python objects and missing values are None.
+    
+    Args:
+        chunk: Trade rows
+    
+    Returns:
+        DataFrame with columns in TRADE_COLUMNS order
+    """
+    frame = pd.DataFrame(index=range(len(chunk)))
+    
+    for col in ['trade_id', 'user_id', 'symbol', 'order_id']:
+        if col in chunk.columns:
+            values = chunk[col].astype(object).to_numpy()
+            frame[col] = np.where(pd.isna(values), None, values)
+        else:
+            frame[col] = None
+    
+    timestamps = pd.to_datetime(chunk['timestamp'])
+    if timestamps.dt.tz is not None:
+        timestamps = timestamps.dt.tz_localize(None)
+    formatted = np.char.replace(
+        np.datetime_as_string(timestamps.to_numpy(dtype='datetime64[us]'), unit='us'), 'T', ' '
+    ).astype(object)
+    frame['timestamp'] = np.where(timestamps.isna().to_numpy(), None, formatted)
+    
+    for col in ['price', 'volume']:
+        frame[col] = pd.to_numeric(chunk[col], errors='coerce').to_numpy(dtype=np.float64)
+    
+    trade_type = chunk['trade_type'].astype(object).to_numpy()
+    frame['trade_type'] = np.where(
+        pd.isna(trade_type), None, pd.Series(trade_type, dtype=object).str.upper().to_numpy()
+    )
+    
+    return frame[TRADE_COLUMNS]
+
+
 class DatabaseStorage(BaseStorage):
     """
     Database storage implementation using SQLAlchemy
@@ -105,12 +176,13 @@ class DatabaseStorage(BaseStorage):
         finally:
             session.close()
     
-    def save_trades(self, trades: List[Trade]) -> bool:
+    def save_trades(self, trades: List[Trade], on_conflict: str = 'error') -> bool:
         """
-        Save trades to database with batch insert optimization
+        Save trades to database with the bulk loader
         
         Args:
             trades: List of Trade objects
+            on_conflict: Handling of existing trade IDs ('error', 'ignore', 'update')
             
         Returns:
             Success status
@@ -119,87 +191,219 @@ class DatabaseStorage(BaseStorage):
             self.logger.warning("No trades to save")
             return True
         
-        self.logger.info(f"Saving {len(trades)} trades to database")
+        df = pd.DataFrame([{
+            'trade_id': trade.trade_id,
+            'user_id': trade.user_id,
+            'timestamp': trade.timestamp,
+            'symbol': trade.symbol,
+            'price': trade.price,
+            'volume': trade.volume,
+            'trade_type': trade.trade_type.value if isinstance(trade.trade_type, TradeType) else trade.trade_type,
+            'order_id': trade.order_id
+        } for trade in trades])
         
-        try:
-            with self.get_session() as session:
-                # Convert Trade objects to TradeModel objects
-                trade_models = []
-                for trade in trades:
-                    trade_model = TradeModel(
-                        trade_id=trade.trade_id,
-                        user_id=trade.user_id,
-                        timestamp=trade.timestamp,
-                        symbol=trade.symbol,
-                        price=trade.price,
-                        volume=trade.volume,
-                        trade_type=trade.trade_type.value if isinstance(trade.trade_type, TradeType) else trade.trade_type,
-                        order_id=trade.order_id
-                    )
-                    trade_models.append(trade_model)
-                
-                # Batch insert
-                session.bulk_save_objects(trade_models)
-                
-            self.logger.info(f"Successfully saved {len(trades)} trades")
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"Failed to save trades: {str(e)}")
-            return False
+        return self.save_trades_from_dataframe(df, on_conflict=on_conflict)
     
-    def save_trades_from_dataframe(self, df: pd.DataFrame) -> bool:
+    def save_trades_from_dataframe(self, df: pd.DataFrame, chunk_size: int = 50000,
+                                   on_conflict: str = 'error') -> bool:
         """
-        Save trades from DataFrame with batch insert optimization
+        Save trades from DataFrame with a dialect-aware bulk loader
+        
+        Rows are streamed to the database in chunks inside a single
+        transaction: COPY through a staging table on PostgreSQL, executemany
+        with bulk-load PRAGMAs on SQLite and a Core executemany elsewhere.
         
         Args:
             df: DataFrame containing trade data
+            chunk_size: Rows converted and sent per chunk
+            on_conflict: Handling of existing trade IDs: 'error' fails the
+                load, 'ignore' skips them and 'update' overwrites them
             
         Returns:
             Success status
         """
+        if on_conflict not in CONFLICT_ACTIONS:
+            raise ValueError(f"on_conflict must be one of {CONFLICT_ACTIONS}, got '{on_conflict}'")
+        
         if df.empty:
             self.logger.warning("Empty DataFrame, nothing to save")
             return True
         
+        if self.engine is None:
+            raise RuntimeError("Database not connected. Call connect() first.")
+        
         self.logger.info(f"Saving {len(df)} trades from DataFrame")
         
+        chunks = (
+            _trade_load_frame(df.iloc[offset:offset + chunk_size])
+            for offset in range(0, len(df), chunk_size)
+        )
+        dialect = self.engine.dialect.name
+        
         try:
-            with self.get_session() as session:
-                # Convert DataFrame to list of dictionaries
-                records = df.to_dict('records')
-                
-                # Prepare records for bulk insert
-                trade_records = []
-                for record in records:
-                    trade_record = {
-                        'trade_id': record.get('trade_id'),
-                        'user_id': record.get('user_id'),
-                        'timestamp': record.get('timestamp'),
-                        'symbol': record.get('symbol'),
-                        'price': float(record.get('price')),
-                        'volume': float(record.get('volume')),
-                        'trade_type': str(record.get('trade_type')).upper(),
-                        'order_id': record.get('order_id'),
-                    }
-                    trade_records.append(trade_record)
-                
-                # Batch insert using bulk_insert_mappings for better performance
-                session.bulk_insert_mappings(TradeModel, trade_records)
-                
-            self.logger.info(f"Successfully saved {len(df)} trades from DataFrame")
+            if dialect == 'postgresql':
+                saved = self._copy_trades_postgresql(chunks, on_conflict)
+            elif dialect == 'sqlite':
+                saved = self._executemany_trades_sqlite(chunks, on_conflict)
+            else:
+                saved = self._insert_trades_generic(chunks, on_conflict)
+            
+            skipped = len(df) - saved if on_conflict == 'ignore' else 0
+            self.logger.info(
+                f"Successfully saved {saved} trades from DataFrame"
+                + (f" ({skipped} existing trade IDs skipped)" if skipped else "")
+            )
             return True
             
         except Exception as e:
             self.logger.error(f"Failed to save trades from DataFrame: {str(e)}")
             return False
     
+    def _executemany_trades_sqlite(self, chunks: Iterator[pd.DataFrame], on_conflict: str) -> int:
+        """
+        Load trade chunks with executemany in one SQLite transaction
+        
+        Args:
+            chunks: Prepared trade chunks
+            on_conflict: Conflict action
+        
+        Returns:
+            Number of rows inserted or updated
+        """
+        columns = ', '.join(TRADE_COLUMNS)
+        placeholders = ', '.join('?' for _ in TRADE_COLUMNS)
+        sql = (
+            f"INSERT INTO trades ({columns}, created_at) "
+            f"VALUES ({placeholders}, CURRENT_TIMESTAMP){_conflict_clause(on_conflict)}"
+        )
+        
+        raw_connection = self.engine.raw_connection()
+        previous_pragmas = {}
+        try:
+            cursor = raw_connection.cursor()
+            
+            for name, value in SQLITE_BULK_PRAGMAS.items():
+                previous_pragmas[name] = cursor.execute(f"PRAGMA {name}").fetchone()[0]
+                cursor.execute(f"PRAGMA {name}={value}")
+            
+            saved = 0
+            for chunk in chunks:
+                cursor.executemany(sql, chunk.itertuples(index=False, name=None))
+                saved += max(cursor.rowcount, 0)
+            
+            raw_connection.commit()
+            return saved
+        except Exception:
+            raw_connection.rollback()
+            raise
+        finally:
+            self._restore_sqlite_pragmas(raw_connection, previous_pragmas)
+            raw_connection.close()
+    
+    def _restore_sqlite_pragmas(self, raw_connection, pragmas: Dict[str, Any]) -> None:
+        """
+        Reset PRAGMAs changed for a bulk load before the connection returns to the pool
+        
+        Args:
+            raw_connection: DBAPI connection
+            pragmas: Previous PRAGMA values by name
+        """
+        cursor = raw_connection.cursor()
+        for name, value in pragmas.items():
+            try:
+                cursor.execute(f"PRAGMA {name}={value}")
+            except Exception as e:
+                # journal_mode cannot leave WAL while another connection holds the database
+                self.logger.warning(f"Failed to restore PRAGMA {name}={value}: {str(e)}")
+    
+    def _copy_trades_postgresql(self, chunks: Iterator[pd.DataFrame], on_conflict: str) -> int:
+        """
+        Load trade chunks with COPY FROM STDIN into a staging table
+        
+        COPY cannot resolve conflicts itself, so rows are copied into a
+        temporary table and moved with a single INSERT ... SELECT.
+        
+        Args:
+            chunks: Prepared trade chunks
+            on_conflict: Conflict action
+        
+        Returns:
+            Number of rows inserted or updated
+        """
+        columns = ', '.join(TRADE_COLUMNS)
+        copy_sql = f"COPY trades_staging ({columns}) FROM STDIN WITH (FORMAT csv)"
+        
+        # DO UPDATE may not touch the same row twice in one statement
+        select = f"SELECT {columns}, now() FROM trades_staging"
+        if on_conflict == 'update':
+            select = f"SELECT DISTINCT ON (trade_id) {columns}, now() FROM trades_staging"
+        
+        raw_connection = self.engine.raw_connection()
+        try:
+            cursor = raw_connection.cursor()
+            cursor.execute(
+                "CREATE TEMP TABLE trades_staging "
+                "(LIKE trades INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+            
+            for chunk in chunks:
+                buffer = io.StringIO()
+                chunk.to_csv(buffer, index=False, header=False)
+                buffer.seek(0)
+                
+                if hasattr(cursor, 'copy_expert'):
+                    # psycopg2
+                    cursor.copy_expert(copy_sql, buffer)
+                else:
+                    # psycopg 3
+                    with cursor.copy(copy_sql) as copy:
+                        copy.write(buffer.getvalue())
+            
+            cursor.execute(
+                f"INSERT INTO trades ({columns}, created_at) {select}"
+                f"{_conflict_clause(on_conflict)}"
+            )
+            saved = max(cursor.rowcount, 0)
+            
+            raw_connection.commit()
+            return saved
+        except Exception:
+            raw_connection.rollback()
+            raise
+        finally:
+            raw_connection.close()
+    
+    def _insert_trades_generic(self, chunks: Iterator[pd.DataFrame], on_conflict: str) -> int:
+        """
+        Load trade chunks with a Core executemany in one transaction
+        
+        Args:
+            chunks: Prepared trade chunks
+            on_conflict: Conflict action (only 'error' is portable)
+        
+        Returns:
+            Number of rows inserted
+        """
+        if on_conflict != 'error':
+            raise ValueError(
+                f"on_conflict='{on_conflict}' is not supported for {self.engine.dialect.name}"
+            )
+        
+        saved = 0
+        with self.engine.begin() as connection:
+            for chunk in chunks:
+                connection.execute(TradeModel.__table__.insert(), chunk.to_dict('records'))
+                saved += len(chunk)
+        
+        return saved
+    
     def get_trades(self, filters: Optional[Dict[str, Any]] = None) -> List[Trade]:
         """
         Retrieve trades from database
         
         Args:
-            filters: Optional filters (user_id, symbol, start_date, end_date, limit)
+            filters: Optional filters (user_id, symbol, start_date, end_date,
+                trade_type, trade_ids, limit)
             
         Returns:
             List of Trade objects
@@ -228,6 +432,9 @@ class DatabaseStorage(BaseStorage):
                 if 'trade_type' in filters:
                     query = query.filter(TradeModel.trade_type == filters['trade_type'])
                 
+                if 'trade_ids' in filters:
+                    query = query.filter(TradeModel.trade_id.in_(list(filters['trade_ids'])))
+                
                 # Apply ordering
                 query = query.order_by(TradeModel.timestamp.desc())
                 
@@ -292,13 +499,16 @@ class DatabaseStorage(BaseStorage):
                 if 'trade_type' in filters:
                     query = query.filter(TradeModel.trade_type == filters['trade_type'])
                 
+                if 'trade_ids' in filters:
+                    query = query.filter(TradeModel.trade_id.in_(list(filters['trade_ids'])))
+                
                 query = query.order_by(TradeModel.timestamp.desc())
                 
                 if 'limit' in filters:
                     query = query.limit(filters['limit'])
                 
                 # Convert to DataFrame using pandas
-                df = pd.read_sql(query.statement, session.bind)
+                df = to_trade_frame(pd.read_sql(query.statement, session.bind))
                 
                 self.logger.info(f"Retrieved {len(df)} trades as DataFrame")
                 return df
@@ -307,6 +517,139 @@ class DatabaseStorage(BaseStorage):
             self.logger.error(f"Failed to retrieve trades as DataFrame: {str(e)}")
             return pd.DataFrame()
     
+    def get_trades_by_ids(self, trade_ids: Iterable[str]) -> pd.DataFrame:
+        """
+        Retrieve the trades with the given IDs in a single query
+        
+        IDs are deduplicated. Small sets are bound as an IN list; larger ones
+        are loaded into a temporary table and joined, which avoids bind
+        parameter limits and lets the primary key index drive the lookup.
+        
+        Args:
+            trade_ids: Trade IDs
+        
+        Returns:
+            DataFrame of the matching trades (unknown IDs are skipped)
+        """
+        ids = pd.Series(list(trade_ids), dtype=object).dropna().astype(str).unique().tolist()
+        if not ids:
+            return pd.DataFrame()
+        
+        if len(ids) <= TRADE_ID_IN_LIMIT:
+            return self.get_trades_as_dataframe({'trade_ids': ids})
+        
+        try:
+            id_table = Table(
+                'tmp_trade_ids', MetaData(),
+                Column('trade_id', String(255), primary_key=True),
+                prefixes=['TEMPORARY']
+            )
+            query = (
+                select(TradeModel)
+                .join(id_table, id_table.c.trade_id == TradeModel.trade_id)
+                .order_by(TradeModel.timestamp.desc())
+            )
+            
+            # One transaction on one connection: the table is private to it
+            # and dropped (or rolled back) before the connection is returned
+            with self.engine.begin() as connection:
+                id_table.create(connection)
+                connection.execute(id_table.insert(), [{'trade_id': trade_id} for trade_id in ids])
+                df = to_trade_frame(pd.read_sql(query, connection))
+                id_table.drop(connection)
+            
+            self.logger.info(f"Retrieved {len(df)} of {len(ids)} requested trades")
+            return df
+        
+        except Exception as e:
+            self.logger.error(f"Failed to retrieve trades by ID: {str(e)}")
+            return pd.DataFrame()
+    
+    def iter_trades_dataframe(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        chunk_size: int = 50000,
+        order_by: str = 'user_id'
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Retrieve trades as a sequence of DataFrame chunks
+        
+        Trades are ordered by (order_by, timestamp, trade_id) and fetched with
+        keyset pagination, so only one chunk is held in memory at a time and
+        no cursor or read lock is kept open between chunks.
+        
+        Args:
+            filters: Optional filters (user_id, symbol, start_date, end_date, trade_type)
+            chunk_size: Maximum number of trades per chunk
+            order_by: Entity column to order by before timestamp
+        
+        Yields:
+            DataFrame chunks in (order_by, timestamp) order
+        """
+        filters = filters or {}
+        
+        if order_by not in TradeModel.__table__.columns:
+            raise ValueError(f"Unknown trade column: {order_by}")
+        
+        key_columns = [
+            TradeModel.__table__.columns[order_by],
+            TradeModel.timestamp,
+            TradeModel.trade_id
+        ]
+        key_names = [column.name for column in key_columns]
+        last_key = None
+        total = 0
+        
+        while True:
+            try:
+                with self.get_session() as session:
+                    query = session.query(TradeModel)
+                    
+                    # Apply filters (same as get_trades)
+                    if 'user_id' in filters:
+                        query = query.filter(TradeModel.user_id == filters['user_id'])
+                    
+                    if 'symbol' in filters:
+                        query = query.filter(TradeModel.symbol == filters['symbol'])
+                    
+                    if 'start_date' in filters:
+                        query = query.filter(TradeModel.timestamp >= filters['start_date'])
+                    
+                    if 'end_date' in filters:
+                        query = query.filter(TradeModel.timestamp <= filters['end_date'])
+                    
+                    if 'trade_type' in filters:
+                        query = query.filter(TradeModel.trade_type == filters['trade_type'])
+                    
+                    # Resume after the last row of the previous chunk
+                    if last_key is not None:
+                        query = query.filter(tuple_(*key_columns) > tuple_(*last_key))
+                    
+                    query = query.order_by(*key_columns).limit(chunk_size)
+                    
+                    chunk = to_trade_frame(pd.read_sql(query.statement, session.bind))
+            except Exception as e:
+                self.logger.error(f"Failed to retrieve trade chunk: {str(e)}")
+                raise
+            
+            if chunk.empty:
+                break
+            
+            total += len(chunk)
+            yield chunk
+            
+            if len(chunk) < chunk_size:
+                break
+            
+            last_row = chunk.iloc[-1]
+            last_key = [
+                last_row[name].to_pydatetime() if isinstance(last_row[name], pd.Timestamp)
+                else last_row[name]
+                for name in key_names
+            ]
+        
+        self.logger.info(f"Streamed {total} trades in chunks of {chunk_size}")
+    
     def save_alert(self, alert: Alert) -> bool:
         """
         Save or update alert in database
@@ -3,20 +3,29 @@ Trade Data Validator Module
 
 Validates imported trade data for required fields, data types, and value ranges.
 Provides detailed error reporting and supports partial imports.
+
+Every rule is evaluated as a column-wise boolean mask, so validation cost is
+a handful of vectorized passes regardless of how many rows are bad. Results
+carry a validity vector, a violation count per rule and a capped sample of
+example errors rather than one error object per bad row.
 """
 
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from pandas.tseries.api import guess_datetime_format
+from typing import List, Dict, Any, Optional, Tuple
 
-from trade_risk_analyzer.core.base import ValidationResult, ValidationError, TradeType
+from trade_risk_analyzer.core.base import ValidationResult, ValidationError
 from trade_risk_analyzer.core.logger import get_logger
 
 
 logger = get_logger(__name__)
 
 
+# A rule outcome: (rule name, field, message, violation mask, report value)
+RuleCheck = Tuple[str, str, str, np.ndarray, bool]
+
+
 class TradeDataValidator:
     """
     Validates trade data and provides detailed error reporting
@@ -34,8 +43,15 @@ class TradeDataValidator:
     MIN_VOLUME = 0.0
     MAX_VOLUME = 1e12  # 1 trillion
     
-    def __init__(self):
-        """Initialize the validator"""
+    def __init__(self, max_error_samples: int = 20):
+        """
+        Initialize the validator
+        
+        Args:
+            max_error_samples: Example errors reported per rule; the number of
+                violations is always counted in full
+        """
+        self.max_error_samples = max_error_samples
         self.logger = logger
     
     def validate(self, df: pd.DataFrame, strict: bool = False) -> ValidationResult:
@@ -48,7 +64,9 @@ class TradeDataValidator:
                    If False, allows partial imports (skip invalid records)
             
         Returns:
-            ValidationResult with validation details
+            ValidationResult with validation details; errors holds up to
+            max_error_samples examples per rule, error_counts the number of
+            violations per rule and valid_mask the validity of each row
         """
         self.logger.info(f"Validating {len(df)} trade records (strict={strict})")
         
@@ -67,7 +85,8 @@ class TradeDataValidator:
                 errors=errors,
                 warnings=warnings,
                 valid_records=0,
-                invalid_records=0
+                invalid_records=0,
+                valid_mask=np.zeros(0, dtype=bool)
             )
         
         # Validate required columns
@@ -86,30 +105,35 @@ class TradeDataValidator:
                 errors=errors,
                 warnings=warnings,
                 valid_records=0,
-                invalid_records=len(df)
+                invalid_records=len(df),
+                error_counts={f'{col}_missing': len(df) for col in missing_columns},
+                valid_mask=np.zeros(len(df), dtype=bool)
             )
         
-        # Track valid/invalid record indices
-        valid_indices = set(range(len(df)))
+        # Evaluate every rule as a mask over the rows
+        timestamps = self._parse_timestamps(df['timestamp'])
+        checks = self._run_checks(df, timestamps)
         
-        # Validate each field
-        errors.extend(self._validate_user_ids(df, valid_indices))
-        errors.extend(self._validate_timestamps(df, valid_indices))
-        errors.extend(self._validate_symbols(df, valid_indices))
-        errors.extend(self._validate_prices(df, valid_indices))
-        errors.extend(self._validate_volumes(df, valid_indices))
-        errors.extend(self._validate_trade_types(df, valid_indices))
+        valid_mask = np.ones(len(df), dtype=bool)
+        error_counts: Dict[str, int] = {}
+        for rule, field, message, mask, report_value in checks:
+            count = int(np.count_nonzero(mask))
+            if count == 0:
+                continue
+            error_counts[rule] = count
+            valid_mask &= ~mask
+            errors.extend(self._sample_errors(df, field, message, mask, report_value))
         
         # Check for warnings
-        warnings.extend(self._check_warnings(df))
+        warnings.extend(self._check_warnings(df, timestamps))
         
         # Calculate valid/invalid counts
-        invalid_records = len(df) - len(valid_indices)
-        valid_records = len(valid_indices)
+        valid_records = int(np.count_nonzero(valid_mask))
+        invalid_records = len(df) - valid_records
         
         # Determine if validation passed
         if strict:
-            is_valid = len(errors) == 0
+            is_valid = len(error_counts) == 0
         else:
             # In non-strict mode, valid if at least some records are valid
             is_valid = valid_records > 0
@@ -123,7 +147,9 @@ class TradeDataValidator:
             errors=errors,
             warnings=warnings,
             valid_records=valid_records,
-            invalid_records=invalid_records
+            invalid_records=invalid_records,
+            error_counts=error_counts,
+            valid_mask=valid_mask
         )
     
     def _validate_required_columns(self, df: pd.DataFrame) -> List[str]:
@@ -141,274 +167,266 @@ class TradeDataValidator:
         missing = required - df_columns
         return list(missing)
     
-    def _validate_user_ids(self, df: pd.DataFrame, valid_indices: set) -> List[ValidationError]:
+    def _run_checks(self, df: pd.DataFrame, timestamps: pd.Series) -> List[RuleCheck]:
+        """
+        Evaluate all field rules
+        
+        Args:
+            df: DataFrame with the required columns
+            timestamps: Parsed timestamp column (NaT where unparseable)
+        
+        Returns:
+            List of (rule, field, message, violation mask, report value)
+        """
+        checks: List[RuleCheck] = []
+        checks.extend(self._validate_user_ids(df))
+        checks.extend(self._validate_timestamps(df, timestamps))
+        checks.extend(self._validate_symbols(df))
+        checks.extend(self._validate_prices(df))
+        checks.extend(self._validate_volumes(df))
+        checks.extend(self._validate_trade_types(df))
+        return checks
+    
+    def _sample_errors(self, df: pd.DataFrame, field: str, message: str,
+                       mask: np.ndarray, report_value: bool) -> List[ValidationError]:
+        """
+        Build example errors for the first violating rows of a rule
+        
+        Args:
+            df: Validated DataFrame
+            field: Field the rule checks
+            message: Error message (prefixed with the row label)
+            mask: Violation mask
+            report_value: Whether to include the offending value
+        
+        Returns:
+            Up to max_error_samples validation errors
+        """
+        positions = np.flatnonzero(mask)[:self.max_error_samples]
+        labels = df.index[positions]
+        values = df[field].iloc[positions] if report_value else [None] * len(positions)
+        
+        return [
+            ValidationError(
+                field=field,
+                message=f'Row {label}: {message}',
+                value=None if value is None else (value if isinstance(value, (int, float, np.number)) else str(value))
+            )
+            for label, value in zip(labels, values)
+        ]
+    
+    def _distinct_mask(self, series: pd.Series, rule: Any, missing: bool) -> np.ndarray:
+        """
+        Evaluate a rule once per distinct value and broadcast it to the rows
+        
+        Args:
+            series: Low-cardinality column
+            rule: Function mapping an Index of distinct values to a boolean array
+            missing: Mask value for null rows
+        
+        Returns:
+            Boolean mask, one entry per row
+        """
+        codes, uniques = pd.factorize(series)
+        lookup = np.append(np.asarray(rule(pd.Index(uniques)), dtype=bool), missing)
+        return lookup[codes]
+    
+    def _missing_text(self, series: pd.Series) -> np.ndarray:
+        """Mask of null, empty or 'nan' text values"""
+        return self._distinct_mask(series, lambda values: values.isin(['', 'nan']), missing=True)
+    
+    def _validate_user_ids(self, df: pd.DataFrame) -> List[RuleCheck]:
         """
         Validate user_id field
         
         Args:
             df: DataFrame to validate
-            valid_indices: Set of valid record indices (modified in place)
             
         Returns:
-            List of validation errors
+            Rule outcomes
+        """
+        return [('user_id_null', 'user_id', 'user_id is null or empty',
+                 self._missing_text(df['user_id']), False)]
+    
+    def _parse_timestamps(self, series: pd.Series) -> pd.Series:
         """
-        errors = []
+        Parse a timestamp column, leaving NaT where a value cannot be parsed
         
-        # Check for null/empty user_ids
-        null_mask = df['user_id'].isna() | (df['user_id'] == '') | (df['user_id'] == 'nan')
-        null_indices = df[null_mask].index.tolist()
+        Values are first parsed with the format guessed from a sample of the
+        column; those that do not match it are retried one by one, so columns
+        that mix formats are accepted as a per-value parse would accept them.
         
-        for idx in null_indices:
-            errors.append(ValidationError(
-                field='user_id',
-                message=f'Row {idx}: user_id is null or empty',
-                value=None
-            ))
-            valid_indices.discard(idx)
+        Args:
+            series: Timestamp column
         
-        return errors
+        Returns:
+            Parsed timestamps
+        """
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            return series
+        
+        try:
+            parsed = pd.to_datetime(series, errors='coerce', format=self._guess_timestamp_format(series))
+        except (TypeError, ValueError):
+            # Mixed timezones: compare everything in UTC
+            parsed = pd.to_datetime(series, errors='coerce', utc=True, format='mixed')
+        
+        retry = (parsed.isna() & series.notna()).to_numpy(dtype=bool)
+        if retry.any():
+            reparsed = pd.to_datetime(series[retry], errors='coerce', utc=True, format='mixed')
+            reparsed = reparsed.dt.tz_convert(parsed.dt.tz)
+            if reparsed.notna().any():
+                parsed = parsed.copy()
+                parsed[retry] = reparsed
+        
+        return parsed
     
-    def _validate_timestamps(self, df: pd.DataFrame, valid_indices: set) -> List[ValidationError]:
+    def _guess_timestamp_format(self, series: pd.Series, sample_size: int = 20) -> Optional[str]:
+        """
+        Guess the strftime format of a text timestamp column
+        
+        Args:
+            series: Timestamp column
+            sample_size: Non-null values inspected
+        
+        Returns:
+            Format shared by most sampled values, or 'mixed' if none is found
+            (or None for non-text columns, letting pandas decide)
+        """
+        sample = series.dropna().head(sample_size)
+        if sample.empty or not all(isinstance(value, str) for value in sample):
+            return None
+        
+        guesses = pd.Series([guess_datetime_format(value) for value in sample]).dropna()
+        return guesses.mode().iloc[0] if not guesses.empty else 'mixed'
+    
+    def _validate_timestamps(self, df: pd.DataFrame, timestamps: pd.Series) -> List[RuleCheck]:
         """
         Validate timestamp field
         
         Args:
             df: DataFrame to validate
-            valid_indices: Set of valid record indices (modified in place)
+            timestamps: Parsed timestamp column
             
         Returns:
-            List of validation errors
+            Rule outcomes
         """
-        errors = []
-        
-        # Check for null timestamps
-        null_mask = df['timestamp'].isna()
-        null_indices = df[null_mask].index.tolist()
-        
-        for idx in null_indices:
-            errors.append(ValidationError(
-                field='timestamp',
-                message=f'Row {idx}: timestamp is null',
-                value=None
-            ))
-            valid_indices.discard(idx)
+        null_mask = df['timestamp'].isna().to_numpy(dtype=bool)
+        invalid_mask = timestamps.isna().to_numpy(dtype=bool) & ~null_mask
         
-        # Check for invalid datetime objects
-        for idx in df.index:
-            if idx in null_indices:
-                continue
-            
-            ts = df.loc[idx, 'timestamp']
-            
-            # Check if it's a valid datetime
-            if not isinstance(ts, (pd.Timestamp, datetime)):
-                try:
-                    pd.to_datetime(ts)
-                except Exception:
-                    errors.append(ValidationError(
-                        field='timestamp',
-                        message=f'Row {idx}: invalid timestamp format',
-                        value=str(ts)
-                    ))
-                    valid_indices.discard(idx)
-        
-        return errors
+        return [
+            ('timestamp_null', 'timestamp', 'timestamp is null', null_mask, False),
+            ('timestamp_invalid', 'timestamp', 'invalid timestamp format', invalid_mask, True)
+        ]
     
-    def _validate_symbols(self, df: pd.DataFrame, valid_indices: set) -> List[ValidationError]:
+    def _validate_symbols(self, df: pd.DataFrame) -> List[RuleCheck]:
         """
         Validate symbol field
         
         Args:
             df: DataFrame to validate
-            valid_indices: Set of valid record indices (modified in place)
             
         Returns:
-            List of validation errors
+            Rule outcomes
         """
-        errors = []
+        return [('symbol_null', 'symbol', 'symbol is null or empty',
+                 self._missing_text(df['symbol']), False)]
+    
+    def _validate_range(self, df: pd.DataFrame, field: str, minimum: float, maximum: float,
+                        allow_minimum: bool) -> List[RuleCheck]:
+        """
+        Validate a numeric field: present, numeric and within range
         
-        # Check for null/empty symbols
-        null_mask = df['symbol'].isna() | (df['symbol'] == '') | (df['symbol'] == 'nan')
-        null_indices = df[null_mask].index.tolist()
+        Args:
+            df: DataFrame to validate
+            field: Column to check
+            minimum: Lower bound
+            maximum: Upper bound (inclusive)
+            allow_minimum: Whether the lower bound itself is valid
         
-        for idx in null_indices:
-            errors.append(ValidationError(
-                field='symbol',
-                message=f'Row {idx}: symbol is null or empty',
-                value=None
-            ))
-            valid_indices.discard(idx)
+        Returns:
+            Rule outcomes
+        """
+        series = df[field]
+        null_mask = series.isna().to_numpy(dtype=bool)
+        
+        if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        not_numeric = np.isnan(values) & ~null_mask
+        
+        with np.errstate(invalid='ignore'):
+            below = values < minimum if allow_minimum else values <= minimum
+            above = values > maximum
         
-        return errors
+        if allow_minimum:
+            below_rule = (f'{field}_negative', f'{field} is negative')
+        else:
+            below_rule = (f'{field}_not_positive', f'{field} must be greater than zero')
+        
+        return [
+            (f'{field}_null', field, f'{field} is null', null_mask, False),
+            (f'{field}_not_numeric', field, f'{field} is not numeric', not_numeric, True),
+            (below_rule[0], field, below_rule[1], below, True),
+            (f'{field}_too_large', field, f'{field} exceeds maximum allowed value', above, True)
+        ]
     
-    def _validate_prices(self, df: pd.DataFrame, valid_indices: set) -> List[ValidationError]:
+    def _validate_prices(self, df: pd.DataFrame) -> List[RuleCheck]:
         """
         Validate price field
         
         Args:
             df: DataFrame to validate
-            valid_indices: Set of valid record indices (modified in place)
             
         Returns:
-            List of validation errors
+            Rule outcomes
         """
-        errors = []
-        
-        # Check for null prices
-        null_mask = df['price'].isna()
-        null_indices = df[null_mask].index.tolist()
-        
-        for idx in null_indices:
-            errors.append(ValidationError(
-                field='price',
-                message=f'Row {idx}: price is null',
-                value=None
-            ))
-            valid_indices.discard(idx)
-        
-        # Check for non-numeric prices
-        for idx in df.index:
-            if idx in null_indices:
-                continue
-            
-            price = df.loc[idx, 'price']
-            
-            # Check if numeric
-            if not isinstance(price, (int, float, np.number)):
-                errors.append(ValidationError(
-                    field='price',
-                    message=f'Row {idx}: price is not numeric',
-                    value=str(price)
-                ))
-                valid_indices.discard(idx)
-                continue
-            
-            # Check range
-            if price < self.MIN_PRICE:
-                errors.append(ValidationError(
-                    field='price',
-                    message=f'Row {idx}: price is negative',
-                    value=price
-                ))
-                valid_indices.discard(idx)
-            elif price > self.MAX_PRICE:
-                errors.append(ValidationError(
-                    field='price',
-                    message=f'Row {idx}: price exceeds maximum allowed value',
-                    value=price
-                ))
-                valid_indices.discard(idx)
-        
-        return errors
+        return self._validate_range(df, 'price', self.MIN_PRICE, self.MAX_PRICE, allow_minimum=True)
     
-    def _validate_volumes(self, df: pd.DataFrame, valid_indices: set) -> List[ValidationError]:
+    def _validate_volumes(self, df: pd.DataFrame) -> List[RuleCheck]:
         """
         Validate volume field
         
         Args:
             df: DataFrame to validate
-            valid_indices: Set of valid record indices (modified in place)
             
         Returns:
-            List of validation errors
+            Rule outcomes
         """
-        errors = []
-        
-        # Check for null volumes
-        null_mask = df['volume'].isna()
-        null_indices = df[null_mask].index.tolist()
-        
-        for idx in null_indices:
-            errors.append(ValidationError(
-                field='volume',
-                message=f'Row {idx}: volume is null',
-                value=None
-            ))
-            valid_indices.discard(idx)
-        
-        # Check for non-numeric volumes
-        for idx in df.index:
-            if idx in null_indices:
-                continue
-            
-            volume = df.loc[idx, 'volume']
-            
-            # Check if numeric
-            if not isinstance(volume, (int, float, np.number)):
-                errors.append(ValidationError(
-                    field='volume',
-                    message=f'Row {idx}: volume is not numeric',
-                    value=str(volume)
-                ))
-                valid_indices.discard(idx)
-                continue
-            
-            # Check range
-            if volume <= self.MIN_VOLUME:
-                errors.append(ValidationError(
-                    field='volume',
-                    message=f'Row {idx}: volume must be greater than zero',
-                    value=volume
-                ))
-                valid_indices.discard(idx)
-            elif volume > self.MAX_VOLUME:
-                errors.append(ValidationError(
-                    field='volume',
-                    message=f'Row {idx}: volume exceeds maximum allowed value',
-                    value=volume
-                ))
-                valid_indices.discard(idx)
-        
-        return errors
+        return self._validate_range(df, 'volume', self.MIN_VOLUME, self.MAX_VOLUME, allow_minimum=False)
     
-    def _validate_trade_types(self, df: pd.DataFrame, valid_indices: set) -> List[ValidationError]:
+    def _validate_trade_types(self, df: pd.DataFrame) -> List[RuleCheck]:
         """
         Validate trade_type field
         
         Args:
             df: DataFrame to validate
-            valid_indices: Set of valid record indices (modified in place)
             
         Returns:
-            List of validation errors
+            Rule outcomes
         """
-        errors = []
-        
-        # Check for null trade_types
-        null_mask = df['trade_type'].isna() | (df['trade_type'] == '')
-        null_indices = df[null_mask].index.tolist()
-        
-        for idx in null_indices:
-            errors.append(ValidationError(
-                field='trade_type',
-                message=f'Row {idx}: trade_type is null or empty',
-                value=None
-            ))
-            valid_indices.discard(idx)
-        
-        # Check for invalid trade_types
-        for idx in df.index:
-            if idx in null_indices:
-                continue
-            
-            trade_type = str(df.loc[idx, 'trade_type']).upper()
-            
-            if trade_type not in self.VALID_TRADE_TYPES:
-                errors.append(ValidationError(
-                    field='trade_type',
-                    message=f'Row {idx}: invalid trade_type (must be BUY or SELL)',
-                    value=trade_type
-                ))
-                valid_indices.discard(idx)
+        series = df['trade_type']
+        null_mask = self._distinct_mask(series, lambda values: values == '', missing=True)
+        invalid_mask = self._distinct_mask(
+            series,
+            lambda values: ~values.astype(str).str.upper().isin(self.VALID_TRADE_TYPES) & (values != ''),
+            missing=False
+        )
         
-        return errors
+        return [
+            ('trade_type_null', 'trade_type', 'trade_type is null or empty', null_mask, False),
+            ('trade_type_invalid', 'trade_type', 'invalid trade_type (must be BUY or SELL)',
+             invalid_mask, True)
+        ]
     
-    def _check_warnings(self, df: pd.DataFrame) -> List[str]:
+    def _check_warnings(self, df: pd.DataFrame, timestamps: Optional[pd.Series] = None) -> List[str]:
         """
         Check for potential issues that don't invalidate data
         
         Args:
             df: DataFrame to check
+            timestamps: Parsed timestamp column (parsed here if not given)
             
         Returns:
             List of warning messages
@@ -424,8 +442,10 @@ class TradeDataValidator:
         # Check for very old timestamps
         if 'timestamp' in df.columns:
             try:
-                min_date = pd.to_datetime(df['timestamp']).min()
-                if min_date < pd.Timestamp('2010-01-01'):
+                if timestamps is None:
+                    timestamps = self._parse_timestamps(df['timestamp'])
+                min_date = timestamps.min()
+                if min_date < pd.Timestamp('2010-01-01', tz=getattr(min_date, 'tz', None)):
                     warnings.append(f'Found timestamps before 2010: {min_date}')
             except Exception:
                 pass
@@ -452,19 +472,13 @@ class TradeDataValidator:
         if validation_result.valid_records == len(df):
             return df.copy()
         
-        # Re-run validation to get valid indices
-        valid_indices = set(range(len(df)))
-        
-        # Apply same validation logic
-        self._validate_user_ids(df, valid_indices)
-        self._validate_timestamps(df, valid_indices)
-        self._validate_symbols(df, valid_indices)
-        self._validate_prices(df, valid_indices)
-        self._validate_volumes(df, valid_indices)
-        self._validate_trade_types(df, valid_indices)
+        valid_mask = validation_result.valid_mask
+        if valid_mask is None or len(valid_mask) != len(df):
+            # Result without a validity vector: evaluate the rules again
+            valid_mask = self.validate(df).valid_mask
         
         # Return only valid rows
-        valid_df = df.iloc[list(valid_indices)].copy()
+        valid_df = df[valid_mask].copy()
         
         self.logger.info(f"Extracted {len(valid_df)} valid records from {len(df)} total")
         
@@ -20,6 +20,11 @@ from trade_risk_analyzer.detection.streaming_processor import (
     SlidingWindow,
     RedisCache,
 )
+from trade_risk_analyzer.detection.sharded_streaming import (
+    ShardedStreamingProcessor,
+    ShardedStreamingConfig,
+    ShardStatistics,
+)
 
 __all__ = [
     "WashTradingDetector",
@@ -38,4 +43,7 @@ __all__ = [
     "StreamingStatistics",
     "SlidingWindow",
     "RedisCache",
+    "ShardedStreamingProcessor",
+    "ShardedStreamingConfig",
+    "ShardStatistics",
 ]
@@ -6,9 +6,12 @@ Handles alert generation, deduplication, storage, and retrieval with detailed ex
 
 import pandas as pd
 import hashlib
-from typing import List, Dict, Any, Optional, Set
+import heapq
+import itertools
+from collections import deque
+from typing import List, Dict, Any, Optional, Set, Tuple, Deque, FrozenSet
 from datetime import datetime, timedelta
-from dataclasses import asdict
+from dataclasses import asdict, dataclass
 
 from trade_risk_analyzer.core.base import Alert, RiskLevel, PatternType
 from trade_risk_analyzer.core.logger import get_logger
@@ -18,6 +21,16 @@ from trade_risk_analyzer.data_ingestion.storage import DatabaseStorage
 logger = get_logger(__name__)
 
 
+@dataclass
+class _CachedAlert:
+    """
+    Cached alert with its trade ID set precomputed for overlap checks
+    """
+    alert: Alert
+    trade_ids: FrozenSet[str]
+    expiry: datetime
+
+
 class AlertManager:
     """
     Manages alert generation, deduplication, and storage
@@ -36,9 +49,13 @@ class AlertManager:
         self.deduplication_window_hours = deduplication_window_hours
         self.logger = logger
         
-        # Cache for recent alerts (for deduplication)
-        self._alert_cache: Dict[str, Alert] = {}
-        self._cache_expiry: Dict[str, datetime] = {}
+        # Cache for recent alerts (for deduplication), indexed by
+        # (user_id, pattern_type) with a time-ordered history per key
+        self._alert_index: Dict[str, Deque[_CachedAlert]] = {}
+        
+        # Min-heap of (expiry, seq, key, entry) for cheap expiry
+        self._expiry_heap: List[Tuple[datetime, int, str, _CachedAlert]] = []
+        self._expiry_seq = itertools.count()
     
     def generate_alert(
         self,
@@ -152,15 +169,45 @@ class AlertManager:
         
         self.logger.info(f"Saving batch of {len(alerts)} alerts")
         
-        for alert in alerts:
-            if check_duplicates and self._is_duplicate(alert):
-                results['duplicates'] += 1
-                continue
+        # Deduplicate the whole batch up front: against the cache and
+        # against alerts accepted earlier in the same batch
+        if check_duplicates:
+            self._clean_cache()
+            unique_alerts = []
+            batch_index: Dict[str, Deque[_CachedAlert]] = {}
             
-            if self.save_alert(alert, check_duplicate=False):
-                results['saved'] += 1
-            else:
-                results['errors'] += 1
+            for alert in alerts:
+                trade_set = frozenset(alert.trade_ids or ())
+                key = self._generate_dedup_key(alert)
+                
+                if (self._find_similar(alert, trade_set, self._alert_index.get(key)) or
+                        self._find_similar(alert, trade_set, batch_index.get(key))):
+                    results['duplicates'] += 1
+                    continue
+                
+                batch_index.setdefault(key, deque()).append(
+                    _CachedAlert(alert=alert, trade_ids=trade_set, expiry=alert.timestamp)
+                )
+                unique_alerts.append(alert)
+        else:
+            unique_alerts = list(alerts)
+        
+        if unique_alerts and not self.storage:
+            self.logger.warning("No storage configured, alerts not saved")
+            results['errors'] += len(unique_alerts)
+        elif (unique_alerts and hasattr(self.storage, 'save_alerts_batch') and
+              self.storage.save_alerts_batch(unique_alerts)):
+            # Single bulk insert succeeded
+            for alert in unique_alerts:
+                self._add_to_cache(alert)
+            results['saved'] += len(unique_alerts)
+        elif unique_alerts:
+            # Fall back to per-alert upserts (e.g. some alert IDs already exist)
+            for alert in unique_alerts:
+                if self.save_alert(alert, check_duplicate=False):
+                    results['saved'] += 1
+                else:
+                    results['errors'] += 1
         
         self.logger.info(
             f"Batch save complete: {results['saved']} saved, "
@@ -430,6 +477,9 @@ class AlertManager:
         """
         Check if alert is a duplicate
         
+        Only cached alerts with the same (user_id, pattern_type) key are
+        compared, so the check is O(candidates) rather than O(cache).
+        
         Args:
             alert: Alert to check
             
@@ -439,20 +489,51 @@ class AlertManager:
         # Clean expired cache entries
         self._clean_cache()
         
-        # Generate deduplication key
-        dedup_key = self._generate_dedup_key(alert)
+        candidates = self._alert_index.get(self._generate_dedup_key(alert))
+        trade_set = frozenset(alert.trade_ids or ())
         
-        # Check cache - look for all alerts with same key
-        for cached_key, cached_alert in self._alert_cache.items():
-            # Check if alerts are similar enough to be considered duplicates
-            if self._are_alerts_similar(alert, cached_alert):
-                self.logger.debug(
-                    f"Alert is duplicate of {cached_alert.alert_id}"
-                )
-                return True
+        cached = self._find_similar(alert, trade_set, candidates)
+        if cached is not None:
+            self.logger.debug(
+                f"Alert is duplicate of {cached.alert.alert_id}"
+            )
+            return True
         
         return False
     
+    def _find_similar(
+        self,
+        alert: Alert,
+        trade_set: FrozenSet[str],
+        candidates: Optional[Deque[_CachedAlert]]
+    ) -> Optional[_CachedAlert]:
+        """
+        Find a cached alert similar enough to be a duplicate
+        
+        Args:
+            alert: Alert to check
+            trade_set: Precomputed trade ID set of the alert
+            candidates: Cached alerts with the same dedup key
+        
+        Returns:
+            Matching cached entry or None
+        """
+        if not candidates:
+            return None
+        
+        window_seconds = self.deduplication_window_hours * 3600
+        
+        # Newest first: recent alerts are the most likely matches
+        for cached in reversed(candidates):
+            time_diff = abs((alert.timestamp - cached.alert.timestamp).total_seconds())
+            if time_diff > window_seconds:
+                continue
+            
+            if self._trade_sets_overlap(trade_set, cached.trade_ids):
+                return cached
+        
+        return None
+    
     def _generate_dedup_key(self, alert: Alert) -> str:
         """
         Generate deduplication key for alert
@@ -492,9 +573,23 @@ class AlertManager:
             return False
         
         # Check trade overlap
-        trades1 = set(alert1.trade_ids) if alert1.trade_ids else set()
-        trades2 = set(alert2.trade_ids) if alert2.trade_ids else set()
+        return self._trade_sets_overlap(
+            frozenset(alert1.trade_ids or ()),
+            frozenset(alert2.trade_ids or ())
+        )
+    
+    @staticmethod
+    def _trade_sets_overlap(trades1: FrozenSet[str], trades2: FrozenSet[str]) -> bool:
+        """
+        Check whether two trade ID sets overlap enough to be duplicates
+        
+        Args:
+            trades1: First set of trade IDs
+            trades2: Second set of trade IDs
         
+        Returns:
+            True if at least 50% of the smaller set is shared
+        """
         if not trades1 and not trades2:
             return True  # If no trades in both, consider similar
         
@@ -514,35 +609,63 @@ class AlertManager:
         """
         Add alert to cache for deduplication
         
+        Every alert is kept in the history for its key until it expires.
+        
         Args:
             alert: Alert to cache
         """
         dedup_key = self._generate_dedup_key(alert)
-        self._alert_cache[dedup_key] = alert
         
         # Set expiry time
         expiry = alert.timestamp + timedelta(
             hours=self.deduplication_window_hours
         )
-        self._cache_expiry[dedup_key] = expiry
+        entry = _CachedAlert(
+            alert=alert,
+            trade_ids=frozenset(alert.trade_ids or ()),
+            expiry=expiry
+        )
+        
+        self._alert_index.setdefault(dedup_key, deque()).append(entry)
+        heapq.heappush(
+            self._expiry_heap,
+            (expiry, next(self._expiry_seq), dedup_key, entry)
+        )
     
     def _clean_cache(self) -> None:
         """Clean expired entries from cache"""
         now = datetime.now()
-        expired_keys = [
-            key for key, expiry in self._cache_expiry.items()
-            if expiry < now
-        ]
+        expired = 0
         
-        for key in expired_keys:
-            del self._alert_cache[key]
-            del self._cache_expiry[key]
+        while self._expiry_heap and self._expiry_heap[0][0] < now:
+            _, _, key, entry = heapq.heappop(self._expiry_heap)
+            history = self._alert_index.get(key)
+            if not history:
+                continue
+            
+            if history[0] is entry:
+                history.popleft()
+            else:
+                history.remove(entry)
+            
+            if not history:
+                del self._alert_index[key]
+            expired += 1
         
-        if expired_keys:
-            self.logger.debug(f"Cleaned {len(expired_keys)} expired cache entries")
+        if expired:
+            self.logger.debug(f"Cleaned {expired} expired cache entries")
     
     def clear_cache(self) -> None:
         """Clear all cached alerts"""
-        self._alert_cache.clear()
-        self._cache_expiry.clear()
+        self._alert_index.clear()
+        self._expiry_heap.clear()
         self.logger.info("Alert cache cleared")
+    
+    def cache_size(self) -> int:
+        """
+        Get number of cached alerts
+        
+        Returns:
+            Number of alerts currently held for deduplication
+        """
+        return len(self._expiry_heap)
@@ -9,19 +9,97 @@ import pandas as pd
 import numpy as np
 from typing import List, Dict, Any, Optional, Callable
 from datetime import datetime, timedelta
-from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass
+import multiprocessing as mp
+import os
 import time
 
-from trade_risk_analyzer.core.base import Alert, DetectionResult
+from trade_risk_analyzer.core.base import Alert, DetectionResult, BaseStorage
 from trade_risk_analyzer.core.logger import get_logger
 from trade_risk_analyzer.detection.engine import DetectionEngine, DetectionConfig
-from trade_risk_analyzer.data_ingestion.storage import DatabaseStorage
 
 
 logger = get_logger(__name__)
 
 
+# Per-process detection engine, built once by the pool initializer
+_worker_engine: Optional[DetectionEngine] = None
+
+
+def _init_worker(config: DetectionConfig, model_dir: Optional[str]) -> None:
+    """
+    Process pool initializer: build the detection engine and load models once
+    
+    Args:
+        config: Detection configuration
+        model_dir: Directory with trained models (None = rule-based only)
+    """
+    global _worker_engine
+    _worker_engine = DetectionEngine(config=config)
+    if model_dir:
+        _worker_engine.load_models(model_dir)
+
+
+def _encode_batch(batch: pd.DataFrame) -> Any:
+    """
+    Encode a batch for shipping to a worker process
+    
+    Uses the Arrow IPC stream format when pyarrow is installed, which is much
+    cheaper to serialize than pickling object-dtype DataFrames.
+    
+    Args:
+        batch: DataFrame batch
+    
+    Returns:
+        Tuple of (format, payload)
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return ('pandas', batch)
+    
+    table = pa.Table.from_pandas(batch, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return ('arrow', sink.getvalue().to_pybytes())
+
+
+def _decode_batch(encoded: Any) -> pd.DataFrame:
+    """
+    Decode a batch produced by _encode_batch
+    
+    Args:
+        encoded: Tuple of (format, payload)
+    
+    Returns:
+        DataFrame batch
+    """
+    kind, payload = encoded
+    if kind == 'arrow':
+        import pyarrow as pa
+        return pa.ipc.open_stream(payload).read_pandas()
+    return payload
+
+
+def _detect_encoded_batch(encoded: Any, group_by: str) -> Any:
+    """
+    Run detection on an encoded batch inside a worker process
+    
+    Args:
+        encoded: Encoded batch
+        group_by: Column to group by
+    
+    Returns:
+        Tuple of (DetectionResult, busy seconds)
+    """
+    start = time.perf_counter()
+    batch = _decode_batch(encoded)
+    result = _worker_engine.detect(batch, group_by=group_by)
+    return result, time.perf_counter() - start
+
+
 @dataclass
 class BatchProgress:
     """
@@ -36,6 +114,8 @@ class BatchProgress:
     estimated_completion: Optional[datetime] = None
     current_batch: int = 0
     errors: int = 0
+    workers: int = 1
+    busy_time: float = 0.0
     
     @property
     def progress_percentage(self) -> float:
@@ -56,6 +136,16 @@ class BatchProgress:
             return 0.0
         return self.processed_trades / self.elapsed_time
     
+    @property
+    def parallel_speedup(self) -> float:
+        """
+        Measured speedup: summed detection time across workers divided by
+        wall-clock time (1.0 = no parallelism)
+        """
+        if self.elapsed_time == 0:
+            return 0.0
+        return self.busy_time / self.elapsed_time
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
         return {
@@ -69,7 +159,10 @@ class BatchProgress:
             'processing_rate': self.processing_rate,
             'estimated_completion': self.estimated_completion.isoformat() if self.estimated_completion else None,
             'current_batch': self.current_batch,
-            'errors': self.errors
+            'errors': self.errors,
+            'workers': self.workers,
+            'busy_time': self.busy_time,
+            'parallel_speedup': self.parallel_speedup
         }
 
 
@@ -81,26 +174,36 @@ class BatchProcessor:
     def __init__(
         self,
         detection_engine: DetectionEngine,
-        storage: Optional[DatabaseStorage] = None,
+        storage: Optional[BaseStorage] = None,
         batch_size: int = 10000,
         max_workers: Optional[int] = None,
-        use_parallel: bool = False
+        use_parallel: bool = False,
+        model_dir: Optional[str] = None,
+        mp_context: Optional[str] = None,
+        chunk_size: int = 50000
     ):
         """
         Initialize batch processor
         
         Args:
             detection_engine: Detection engine instance
-            storage: Database storage for saving results
-            batch_size: Number of trades per batch
+            storage: Trade storage (DatabaseStorage or ParquetStorage)
+            batch_size: Target number of trades per batch
             max_workers: Maximum number of parallel workers (None = CPU count)
             use_parallel: Whether to use parallel processing
+            model_dir: Model directory loaded by each worker process
+                (defaults to the directory the engine loaded models from)
+            mp_context: Multiprocessing start method (None = platform default)
+            chunk_size: Trades read per database chunk in streaming mode
         """
         self.detection_engine = detection_engine
         self.storage = storage
         self.batch_size = batch_size
         self.max_workers = max_workers
         self.use_parallel = use_parallel
+        self.model_dir = model_dir
+        self.mp_context = mp_context
+        self.chunk_size = chunk_size
         self.logger = logger
         
         # Progress tracking
@@ -137,22 +240,24 @@ class BatchProcessor:
         """
         self.logger.info(f"Starting batch processing of {len(trades_df)} trades")
         
+        # Split into entity-partitioned batches
+        batches = self._split_into_batches(trades_df, group_by)
+        num_batches = len(batches)
+        use_parallel = self.use_parallel and num_batches > 1
+        
         # Initialize progress tracking
-        num_batches = int(np.ceil(len(trades_df) / self.batch_size))
         self.progress = BatchProgress(
             total_batches=num_batches,
             completed_batches=0,
             total_trades=len(trades_df),
             processed_trades=0,
             total_alerts=0,
-            start_time=datetime.now()
+            start_time=datetime.now(),
+            workers=self._resolve_workers(num_batches) if use_parallel else 1
         )
         
-        # Split into batches
-        batches = self._split_into_batches(trades_df)
-        
         # Process batches
-        if self.use_parallel and num_batches > 1:
+        if use_parallel:
             results = self._process_parallel(batches, group_by)
         else:
             results = self._process_sequential(batches, group_by)
@@ -166,6 +271,9 @@ class BatchProcessor:
                 all_alerts.extend(result.alerts)
                 total_anomaly_scores.extend(result.anomaly_scores)
         
+        # Symbol-level patterns can be reported by several entity batches
+        all_alerts = self._merge_batch_alerts(all_alerts)
+        
         # Save alerts if requested
         save_results = {'saved': 0, 'duplicates': 0, 'errors': 0}
         if save_alerts and all_alerts:
@@ -187,6 +295,7 @@ class BatchProcessor:
             'processing_time_seconds': processing_time,
             'trades_per_second': len(trades_df) / processing_time if processing_time > 0 else 0,
             'errors': self.progress.errors,
+            'parallel_speedup': self.progress.parallel_speedup,
             'progress': self.progress.to_dict()
         }
         
@@ -202,7 +311,8 @@ class BatchProcessor:
         filters: Optional[Dict[str, Any]] = None,
         group_by: str = 'user_id',
         save_alerts: bool = True,
-        check_duplicates: bool = True
+        check_duplicates: bool = True,
+        streaming: bool = False
     ) -> Dict[str, Any]:
         """
         Process trades from database in batches
@@ -212,6 +322,8 @@ class BatchProcessor:
             group_by: Column to group by for analysis
             save_alerts: Whether to save alerts to database
             check_duplicates: Whether to check for duplicate alerts
+            streaming: Read trades in chunks of chunk_size instead of loading
+                the whole result into memory
             
         Returns:
             Dictionary with processing results
@@ -219,6 +331,14 @@ class BatchProcessor:
         if not self.storage:
             raise ValueError("Storage not configured for database processing")
         
+        if streaming:
+            return self._process_streaming(
+                filters=filters,
+                group_by=group_by,
+                save_alerts=save_alerts,
+                check_duplicates=check_duplicates
+            )
+        
         self.logger.info("Loading trades from database...")
         
         # Load trades from database
@@ -250,7 +370,8 @@ class BatchProcessor:
         end_date: datetime,
         group_by: str = 'user_id',
         save_alerts: bool = True,
-        check_duplicates: bool = True
+        check_duplicates: bool = True,
+        streaming: bool = False
     ) -> Dict[str, Any]:
         """
         Process trades for a specific date range
@@ -261,6 +382,7 @@ class BatchProcessor:
             group_by: Column to group by for analysis
             save_alerts: Whether to save alerts to database
             check_duplicates: Whether to check for duplicate alerts
+            streaming: Read trades in bounded-memory chunks
             
         Returns:
             Dictionary with processing results
@@ -274,29 +396,221 @@ class BatchProcessor:
             filters=filters,
             group_by=group_by,
             save_alerts=save_alerts,
-            check_duplicates=check_duplicates
+            check_duplicates=check_duplicates,
+            streaming=streaming
         )
     
-    def _split_into_batches(self, df: pd.DataFrame) -> List[pd.DataFrame]:
+    def _process_streaming(
+        self,
+        filters: Optional[Dict[str, Any]],
+        group_by: str,
+        save_alerts: bool,
+        check_duplicates: bool
+    ) -> Dict[str, Any]:
         """
-        Split DataFrame into batches
+        Process trades from database chunk by chunk with bounded memory
+        
+        Chunks arrive ordered by (group_by, timestamp). The last entity of each
+        chunk may continue in the next one, so its rows are carried over;
+        all other entities are complete and are queued for detection. Once
+        the queue holds batch_size trades it is analyzed and its alerts are
+        saved immediately. Peak memory is roughly chunk_size + batch_size
+        trades (or the largest single entity, if bigger).
+        
+        Args:
+            filters: Filters for retrieving trades
+            group_by: Column to group by for analysis
+            save_alerts: Whether to save alerts to database
+            check_duplicates: Whether to check for duplicate alerts
+        
+        Returns:
+            Dictionary with processing results
+        """
+        total_trades = self.storage.get_trade_count(filters)
+        
+        self.logger.info(
+            f"Streaming {total_trades} trades from database "
+            f"in chunks of {self.chunk_size}"
+        )
+        
+        self.progress = BatchProgress(
+            total_batches=max(int(np.ceil(total_trades / self.batch_size)), 1) if total_trades else 0,
+            completed_batches=0,
+            total_trades=total_trades,
+            processed_trades=0,
+            total_alerts=0,
+            start_time=datetime.now()
+        )
+        
+        save_results = {'saved': 0, 'duplicates': 0, 'errors': 0}
+        pending: List[pd.DataFrame] = []
+        pending_rows = 0
+        carry: Optional[pd.DataFrame] = None
+        num_chunks = 0
+        
+        def run_pending() -> None:
+            nonlocal pending, pending_rows
+            if not pending:
+                return
+            batch = pd.concat(pending, ignore_index=True)
+            pending = []
+            pending_rows = 0
+            
+            alerts = self._detect_streaming_batch(batch, group_by)
+            if save_alerts and alerts:
+                batch_save = self.detection_engine.save_alerts(
+                    alerts,
+                    check_duplicates=check_duplicates
+                )
+                for key in save_results:
+                    save_results[key] += batch_save.get(key, 0)
+        
+        for chunk in self.storage.iter_trades_dataframe(
+            filters,
+            chunk_size=self.chunk_size,
+            order_by=group_by
+        ):
+            num_chunks += 1
+            
+            if carry is not None:
+                chunk = pd.concat([carry, chunk], ignore_index=True)
+            
+            # The last entity may continue in the next chunk
+            last_entity = chunk[group_by].iloc[-1]
+            is_last_entity = (chunk[group_by] == last_entity).to_numpy()
+            carry = chunk[is_last_entity]
+            complete = chunk[~is_last_entity]
+            
+            if not complete.empty:
+                pending.append(complete)
+                pending_rows += len(complete)
+            
+            if pending_rows >= self.batch_size:
+                run_pending()
+        
+        # Final entity is complete once the stream is exhausted
+        if carry is not None and not carry.empty:
+            pending.append(carry)
+        run_pending()
+        
+        self.progress.total_batches = self.progress.completed_batches
+        
+        processing_time = self.progress.elapsed_time
+        processed = self.progress.processed_trades
+        
+        summary = {
+            'total_trades': processed,
+            'total_batches': self.progress.completed_batches,
+            'total_chunks': num_chunks,
+            'total_alerts': self.progress.total_alerts,
+            'alerts_saved': save_results['saved'],
+            'alerts_duplicates': save_results['duplicates'],
+            'alerts_errors': save_results['errors'],
+            'processing_time_seconds': processing_time,
+            'trades_per_second': processed / processing_time if processing_time > 0 else 0,
+            'errors': self.progress.errors,
+            'parallel_speedup': self.progress.parallel_speedup,
+            'progress': self.progress.to_dict()
+        }
+        
+        self.logger.info(
+            f"Streaming batch processing complete: {self.progress.total_alerts} alerts "
+            f"from {processed} trades in {processing_time:.2f} seconds"
+        )
+        
+        return summary
+    
+    def _detect_streaming_batch(self, batch: pd.DataFrame, group_by: str) -> List[Alert]:
+        """
+        Run detection on a batch of complete entities in streaming mode
+        
+        Args:
+            batch: Trades for one or more complete entities
+            group_by: Column to group by
+        
+        Returns:
+            Alerts for the batch
+        """
+        # Keep the estimate ahead of the actual batch count
+        self.progress.total_batches = max(
+            self.progress.total_batches,
+            self.progress.completed_batches + 1
+        )
+        self.progress.current_batch = self.progress.completed_batches + 1
+        
+        try:
+            batch_start = time.perf_counter()
+            result = self.detection_engine.detect(batch, group_by=group_by)
+            self._record_batch(len(batch), result, time.perf_counter() - batch_start)
+            return self._merge_batch_alerts(result.alerts)
+        except Exception as e:
+            self.logger.error(
+                f"Error processing streaming batch {self.progress.current_batch}: {str(e)}",
+                exc_info=True
+            )
+            self.progress.errors += 1
+            self.progress.processed_trades += len(batch)
+            return []
+    
+    def _split_into_batches(self, df: pd.DataFrame,
+                            group_by: str = 'user_id') -> List[pd.DataFrame]:
+        """
+        Split DataFrame into batches partitioned by entity
+        
+        Every entity lands in exactly one batch, so per-entity features and
+        cross-trade patterns (e.g. wash trade pairing) are never split across
+        batch boundaries. Entities are packed greedily until a batch reaches
+        batch_size; a single entity larger than batch_size gets its own batch.
         
         Args:
             df: DataFrame to split
+            group_by: Entity column to partition by
             
         Returns:
             List of DataFrame batches
         """
-        batches = []
-        num_batches = int(np.ceil(len(df) / self.batch_size))
+        if df.empty:
+            return []
         
-        for i in range(num_batches):
-            start_idx = i * self.batch_size
-            end_idx = min((i + 1) * self.batch_size, len(df))
-            batch = df.iloc[start_idx:end_idx].copy()
-            batches.append(batch)
+        if group_by not in df.columns:
+            self.logger.warning(
+                f"Column '{group_by}' not found, falling back to positional batches"
+            )
+            return [
+                df.iloc[start:start + self.batch_size].copy()
+                for start in range(0, len(df), self.batch_size)
+            ]
+        
+        codes, _ = pd.factorize(df[group_by], sort=True)
+        entity_sizes = np.bincount(codes[codes >= 0])
+        
+        # Greedily assign each entity to a batch
+        entity_batch = np.empty(len(entity_sizes), dtype=np.int64)
+        batch_id = 0
+        current_size = 0
+        for entity_idx, size in enumerate(entity_sizes):
+            if current_size > 0 and current_size + size > self.batch_size:
+                batch_id += 1
+                current_size = 0
+            entity_batch[entity_idx] = batch_id
+            current_size += size
+        
+        # Rows with a missing entity key go into a batch of their own
+        row_batch = np.where(codes >= 0, entity_batch[np.maximum(codes, 0)], batch_id + 1)
+        
+        # One stable sort, then contiguous slices
+        order = np.argsort(row_batch, kind='stable')
+        sorted_df = df.iloc[order]
+        boundaries = np.flatnonzero(np.diff(row_batch[order])) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(sorted_df)]))
+        
+        batches = [sorted_df.iloc[start:end].copy() for start, end in zip(starts, ends)]
         
-        self.logger.info(f"Split data into {len(batches)} batches of size {self.batch_size}")
+        self.logger.info(
+            f"Split data into {len(batches)} batches by {group_by} "
+            f"(target size {self.batch_size})"
+        )
         
         return batches
     
@@ -322,23 +636,12 @@ class BatchProcessor:
             
             try:
                 # Process batch
+                batch_start = time.perf_counter()
                 result = self.detection_engine.detect(batch, group_by=group_by)
                 results.append(result)
                 
                 # Update progress
-                self.progress.completed_batches += 1
-                self.progress.processed_trades += len(batch)
-                self.progress.total_alerts += len(result.alerts)
-                
-                # Estimate completion time
-                if self.progress.completed_batches > 0:
-                    avg_time_per_batch = self.progress.elapsed_time / self.progress.completed_batches
-                    remaining_batches = self.progress.total_batches - self.progress.completed_batches
-                    remaining_seconds = avg_time_per_batch * remaining_batches
-                    self.progress.estimated_completion = datetime.now() + timedelta(seconds=remaining_seconds)
-                
-                # Call progress callbacks
-                self._notify_progress()
+                self._record_batch(len(batch), result, time.perf_counter() - batch_start)
                 
                 self.logger.info(
                     f"Batch {i+1}/{len(batches)} complete: "
@@ -359,7 +662,11 @@ class BatchProcessor:
         group_by: str
     ) -> List[DetectionResult]:
         """
-        Process batches in parallel
+        Process batches in parallel worker processes
+        
+        Detection is CPU-bound pandas/sklearn work, so a process pool is used
+        instead of threads. Each worker builds its detection engine and loads
+        models once in the pool initializer.
         
         Args:
             batches: List of DataFrame batches
@@ -368,15 +675,22 @@ class BatchProcessor:
         Returns:
             List of detection results
         """
-        self.logger.info(f"Processing {len(batches)} batches in parallel with {self.max_workers} workers")
+        workers = self.progress.workers
+        model_dir = self.model_dir or getattr(self.detection_engine, 'model_dir', None)
+        
+        self.logger.info(f"Processing {len(batches)} batches in parallel with {workers} worker processes")
         
         results = [None] * len(batches)
         
-        # Use ThreadPoolExecutor for I/O-bound tasks
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=mp.get_context(self.mp_context),
+            initializer=_init_worker,
+            initargs=(self.detection_engine.config, model_dir)
+        ) as executor:
             # Submit all batches
             future_to_idx = {
-                executor.submit(self._process_batch, batch, group_by): i
+                executor.submit(_detect_encoded_batch, _encode_batch(batch), group_by): i
                 for i, batch in enumerate(batches)
             }
             
@@ -385,28 +699,16 @@ class BatchProcessor:
                 idx = future_to_idx[future]
                 
                 try:
-                    result = future.result()
+                    result, busy_seconds = future.result()
                     results[idx] = result
                     
                     # Update progress
-                    self.progress.completed_batches += 1
-                    self.progress.processed_trades += len(batches[idx])
-                    if result:
-                        self.progress.total_alerts += len(result.alerts)
-                    
-                    # Estimate completion time
-                    if self.progress.completed_batches > 0:
-                        avg_time_per_batch = self.progress.elapsed_time / self.progress.completed_batches
-                        remaining_batches = self.progress.total_batches - self.progress.completed_batches
-                        remaining_seconds = avg_time_per_batch * remaining_batches
-                        self.progress.estimated_completion = datetime.now() + timedelta(seconds=remaining_seconds)
-                    
-                    # Call progress callbacks
-                    self._notify_progress()
+                    self._record_batch(len(batches[idx]), result, busy_seconds)
                     
                     self.logger.info(
                         f"Batch {idx+1}/{len(batches)} complete: "
-                        f"{self.progress.progress_percentage:.1f}% done"
+                        f"{self.progress.progress_percentage:.1f}% done, "
+                        f"speedup {self.progress.parallel_speedup:.2f}x"
                     )
                     
                 except Exception as e:
@@ -429,6 +731,73 @@ class BatchProcessor:
         """
         return self.detection_engine.detect(batch, group_by=group_by)
     
+    def _merge_batch_alerts(self, alerts: List[Alert]) -> List[Alert]:
+        """
+        Merge alerts with the same ID reported by different batches
+        
+        Market-wide detectors (e.g. pump and dump by symbol) derive alert IDs
+        from the symbol and time, so each entity batch trading that symbol
+        reports its own share of the same event. These are combined into one
+        alert with the union of users and trades and the highest score.
+        
+        Args:
+            alerts: Alerts from all batches
+        
+        Returns:
+            Alerts with unique IDs
+        """
+        merged: Dict[str, Alert] = {}
+        
+        for alert in alerts:
+            existing = merged.get(alert.alert_id)
+            if existing is None:
+                merged[alert.alert_id] = alert
+                continue
+            
+            users = existing.user_id.split(',') + alert.user_id.split(',')
+            trade_ids = list(existing.trade_ids or []) + list(alert.trade_ids or [])
+            
+            if alert.anomaly_score > existing.anomaly_score:
+                existing.anomaly_score = alert.anomaly_score
+                existing.risk_level = alert.risk_level
+                existing.explanation = alert.explanation
+            
+            existing.user_id = ','.join(dict.fromkeys(u.strip() for u in users))
+            existing.trade_ids = list(dict.fromkeys(trade_ids))
+        
+        return list(merged.values())
+    
+    def _resolve_workers(self, num_batches: int) -> int:
+        """Number of worker processes to start for a run"""
+        workers = self.max_workers or os.cpu_count() or 1
+        return max(1, min(workers, num_batches))
+    
+    def _record_batch(self, n_trades: int, result: Optional[DetectionResult],
+                      busy_seconds: float) -> None:
+        """
+        Update progress after a batch completes and notify callbacks
+        
+        Args:
+            n_trades: Number of trades in the batch
+            result: Detection result for the batch
+            busy_seconds: Time spent on detection for the batch
+        """
+        self.progress.completed_batches += 1
+        self.progress.processed_trades += n_trades
+        self.progress.busy_time += busy_seconds
+        if result:
+            self.progress.total_alerts += len(result.alerts)
+        
+        # Estimate completion time
+        if self.progress.completed_batches > 0:
+            avg_time_per_batch = self.progress.elapsed_time / self.progress.completed_batches
+            remaining_batches = self.progress.total_batches - self.progress.completed_batches
+            remaining_seconds = avg_time_per_batch * remaining_batches
+            self.progress.estimated_completion = datetime.now() + timedelta(seconds=remaining_seconds)
+        
+        # Call progress callbacks
+        self._notify_progress()
+    
     def _notify_progress(self) -> None:
         """Notify all progress callbacks"""
         for callback in self.progress_callbacks:
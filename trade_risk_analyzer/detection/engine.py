@@ -10,13 +10,22 @@ import numpy as np
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass, field
 from pathlib import Path
+import threading
 import time
 
 from trade_risk_analyzer.core.base import Alert, RiskLevel, PatternType, DetectionResult
 from trade_risk_analyzer.core.logger import get_logger
 from trade_risk_analyzer.core.config import get_config
+from trade_risk_analyzer.core.schema import to_trade_frame
 from trade_risk_analyzer.feature_engineering.extractor import FeatureExtractor
-from trade_risk_analyzer.models.ensemble import ModelEnsemble
+from trade_risk_analyzer.feature_engineering.pipeline import FeaturePipeline, FEATURE_PIPELINE_FILE
+from trade_risk_analyzer.models.ensemble import ModelEnsemble, ExplanationCache
+from trade_risk_analyzer.models.batch_scorer import MicroBatchScorer
+from trade_risk_analyzer.models.numpy_autoencoder import NumpyAutoencoder, AUTOENCODER_NUMPY_FILE
+from trade_risk_analyzer.models.artifact_store import artifact_ref_path
+from trade_risk_analyzer.models.flat_forest import FlatIsolationForest, FlatRandomForest
+from trade_risk_analyzer.models.drift import DriftBaseline, DriftMonitor, DRIFT_BASELINE_FILE
+from trade_risk_analyzer.models.registry import active_generation, read_active_manifest
 from trade_risk_analyzer.detection.rule_based_detector import (
     RuleBasedDetector,
     RuleBasedThresholds
@@ -36,6 +45,8 @@ class DetectionConfig:
     use_feature_extraction: bool = True
     feature_time_windows: List[str] = field(default_factory=lambda: ['1H', '24H', '7D'])
     feature_scaler_type: str = 'standard'
+    feature_burst_window: str = '5min'  # time bin for burst detection
+    feature_quote_stuffing_per_minute: int = 100
     
     # ML model settings
     use_ml_models: bool = True
@@ -47,6 +58,31 @@ class DetectionConfig:
     ml_high_risk_threshold: float = 0.8
     ml_medium_risk_threshold: float = 0.5
     
+    # Micro-batch ML scoring across concurrent detect() calls
+    ml_micro_batching: bool = False
+    ml_max_batch_size: int = 256
+    ml_max_batch_latency_ms: float = 2.0
+    
+    # Load forests from memory-mapped artifacts when the model directory has
+    # them. Opt-in: all serving processes share one copy of the trees, but the
+    # NumPy traversal scores large batches several times slower than the
+    # joblib (scikit-learn) models, so enable it only where memory per worker
+    # matters more than batch latency.
+    ml_memory_mapped_models: bool = False
+    
+    # ML alert explanations (cached by ensemble version, entity and features)
+    ml_explanation_top_k: int = 3
+    ml_explanation_cache_size: int = 10000
+    
+    # Feature and score drift against the training baseline (drift_baseline.npz)
+    ml_drift_monitoring: bool = True
+    drift_check_interval: float = 3600.0  # seconds between scheduled checks
+    drift_min_samples: int = 500
+    drift_psi_threshold: float = 0.25
+    drift_ks_threshold: float = 0.2
+    drift_feature_share_threshold: float = 0.2
+    drift_retrain_cooldown: float = 86400.0  # seconds between retraining triggers
+    
     # Rule-based detection settings
     use_rule_based: bool = True
     rule_based_thresholds: Optional[RuleBasedThresholds] = None
@@ -58,6 +94,28 @@ class DetectionConfig:
     # Risk thresholds
     high_risk_score: float = 80.0
     medium_risk_score: float = 50.0
+    
+    @classmethod
+    def from_app_config(cls, app_config: Optional[Any] = None, **overrides) -> 'DetectionConfig':
+        """
+        Create a detection config from the detection section of config.yaml
+        
+        Args:
+            app_config: Application Config (default: the global configuration)
+            **overrides: Other DetectionConfig fields
+        
+        Returns:
+            DetectionConfig with the configured feature windows, burst window
+            and quote stuffing threshold
+        """
+        detection = (app_config or get_config()).detection
+        settings = {
+            'feature_time_windows': list(detection.feature_windows),
+            'feature_burst_window': detection.thresholds.burst_window,
+            'feature_quote_stuffing_per_minute': detection.thresholds.quote_stuffing_per_minute
+        }
+        settings.update(overrides)
+        return cls(**settings)
 
 
 class DetectionEngine:
@@ -86,6 +144,30 @@ class DetectionEngine:
         # Storage for alert management
         self.storage = storage
         
+        # Directory models were loaded from (reused by worker processes)
+        self.model_dir: Optional[str] = None
+        
+        # Feature pipeline fitted at training time (transform-only at inference)
+        self.feature_pipeline: Optional[FeaturePipeline] = None
+        
+        # Activation generation of the loaded models (see models.registry)
+        self.model_generation: Optional[int] = None
+        
+        # Active model versions of the loaded models, for drift tracking
+        self.model_version = 'initial'
+        
+        # Guards swapping the feature pipeline and ensemble together
+        self._model_lock = threading.Lock()
+        
+        # Shared scorer that batches ML scoring of concurrent detections
+        self.scorer: Optional[MicroBatchScorer] = None
+        
+        # Explanations of ML alerts, reused while entities' features are unchanged
+        self.explanation_cache: Optional[ExplanationCache] = None
+        
+        # Drift of features and scores against the training baseline
+        self.drift_monitor: Optional[DriftMonitor] = None
+        
         self._initialize_components()
     
     def _initialize_components(self) -> None:
@@ -96,7 +178,9 @@ class DetectionEngine:
         if self.config.use_feature_extraction:
             self.feature_extractor = FeatureExtractor(
                 time_windows=self.config.feature_time_windows,
-                scaler_type=self.config.feature_scaler_type
+                scaler_type=self.config.feature_scaler_type,
+                burst_window=self.config.feature_burst_window,
+                quote_stuffing_threshold=self.config.feature_quote_stuffing_per_minute
             )
             self.logger.info("Feature extractor initialized")
         
@@ -109,6 +193,36 @@ class DetectionEngine:
             )
             self.logger.info("ML ensemble initialized")
         
+        # Initialize micro-batch scorer
+        if self.scorer is not None:
+            self.scorer.stop()
+            self.scorer = None
+        if self.ml_ensemble and self.config.ml_micro_batching:
+            self.scorer = MicroBatchScorer(
+                self.ml_ensemble,
+                max_batch_size=self.config.ml_max_batch_size,
+                max_latency_ms=self.config.ml_max_batch_latency_ms
+            )
+            self.logger.info("Micro-batch scorer initialized")
+        
+        # Initialize explanation cache
+        self.explanation_cache = ExplanationCache(self.config.ml_explanation_cache_size)
+        
+        # Initialize drift monitor (keeps the loaded baseline and callback)
+        previous_monitor = self.drift_monitor
+        self.drift_monitor = None
+        if self.ml_ensemble and self.config.ml_drift_monitoring:
+            self.drift_monitor = DriftMonitor(
+                baseline=previous_monitor.baseline if previous_monitor else None,
+                psi_threshold=self.config.drift_psi_threshold,
+                ks_threshold=self.config.drift_ks_threshold,
+                feature_share_threshold=self.config.drift_feature_share_threshold,
+                min_samples=self.config.drift_min_samples,
+                check_interval=self.config.drift_check_interval,
+                retrain_cooldown=self.config.drift_retrain_cooldown,
+                on_drift=previous_monitor.on_drift if previous_monitor else None
+            )
+        
         # Initialize rule-based detector
         if self.config.use_rule_based:
             thresholds = self.config.rule_based_thresholds or RuleBasedThresholds()
@@ -146,9 +260,19 @@ class DetectionEngine:
                 alerts=[]
             )
         
+        # Categorical/Arrow-backed columns for grouping and filtering
+        trades = to_trade_frame(trades)
+        
+        # Use one consistent model set even if models are hot-swapped meanwhile
+        with self._model_lock:
+            feature_pipeline = self.feature_pipeline
+            ml_ensemble = self.ml_ensemble
+            model_version = self.model_version
+        
         # Step 1: Extract features (if ML models are enabled)
         features_df = None
         feature_array = None
+        feature_names = None
         
         if self.config.use_feature_extraction and self.feature_extractor:
             self.logger.info("Step 1: Extracting features...")
@@ -159,8 +283,21 @@ class DetectionEngine:
                     market_data=market_data
                 )
                 
-                if not features_df.empty:
-                    # Normalize features
+                if not features_df.empty and feature_pipeline is not None:
+                    # Scale with the training-time schema and statistics
+                    features_df = feature_pipeline.transform_frame(
+                        features_df,
+                        id_columns=[group_by]
+                    )
+                    feature_array = features_df[feature_pipeline.feature_columns].to_numpy()
+                    feature_names = feature_pipeline.feature_columns
+                    
+                    self.logger.info(
+                        f"Extracted features: {feature_array.shape} "
+                        f"(pipeline {feature_pipeline.version})"
+                    )
+                elif not features_df.empty:
+                    # No fitted pipeline: normalize with this batch's statistics
                     features_df = self.feature_extractor.normalize_features(
                         features_df,
                         exclude_columns=[group_by],
@@ -172,6 +309,10 @@ class DetectionEngine:
                         features_df,
                         exclude_columns=[group_by]
                     )
+                    feature_names = [
+                        col for col in features_df.select_dtypes(include=[np.number]).columns
+                        if col != group_by
+                    ]
                     
                     self.logger.info(f"Extracted features: {feature_array.shape}")
             except Exception as e:
@@ -182,12 +323,19 @@ class DetectionEngine:
         ml_predictions = None
         ml_risk_levels = None
         
-        if (self.config.use_ml_models and self.ml_ensemble and 
+        if (self.config.use_ml_models and ml_ensemble and 
             feature_array is not None and len(feature_array) > 0):
             self.logger.info("Step 2: Running ML models...")
             try:
-                ml_predictions, ml_scores, ml_risk_levels = \
-                    self.ml_ensemble.predict_with_risk_level(feature_array)
+                if self.scorer is not None:
+                    # Joins a batch with other threads' feature rows (same models only)
+                    ml_predictions, ml_scores, ml_risk_levels = self.scorer.score(
+                        feature_array,
+                        ensemble=ml_ensemble
+                    )
+                else:
+                    ml_predictions, ml_scores, ml_risk_levels = \
+                        ml_ensemble.predict_with_risk_level(feature_array)
                 
                 anomaly_count = np.sum(ml_predictions)
                 self.logger.info(
@@ -197,6 +345,18 @@ class DetectionEngine:
             except Exception as e:
                 self.logger.error(f"ML prediction failed: {str(e)}", exc_info=True)
         
+        # Track drift (runs the scheduled check when due)
+        if self.drift_monitor is not None and ml_scores is not None:
+            try:
+                self.drift_monitor.update(
+                    feature_array if feature_pipeline is not None else None,
+                    ml_scores,
+                    model_version,
+                    ml_ensemble
+                )
+            except Exception as e:
+                self.logger.error(f"Drift monitoring failed: {str(e)}", exc_info=True)
+        
         # Step 3: Run rule-based detection (if enabled)
         rule_alerts = []
         
@@ -210,13 +370,17 @@ class DetectionEngine:
         
         # Step 4: Combine results and calculate final scores
         self.logger.info("Step 4: Combining results...")
-        combined_alerts, anomaly_scores, risk_flags = self._combine_results(
+        combined_alerts, anomaly_scores, risk_flags, entity_ids = self._combine_results(
             trades=trades,
             group_by=group_by,
             features_df=features_df,
             ml_scores=ml_scores,
             ml_risk_levels=ml_risk_levels,
-            rule_alerts=rule_alerts
+            rule_alerts=rule_alerts,
+            feature_array=feature_array,
+            feature_names=feature_names,
+            ml_ensemble=ml_ensemble,
+            feature_pipeline=feature_pipeline
         )
         
         detection_time = time.time() - start_time
@@ -228,7 +392,8 @@ class DetectionEngine:
         return DetectionResult(
             anomaly_scores=anomaly_scores,
             risk_flags=risk_flags,
-            alerts=combined_alerts
+            alerts=combined_alerts,
+            entity_ids=entity_ids
         )
     
     def _combine_results(
@@ -238,11 +403,18 @@ class DetectionEngine:
         features_df: Optional[pd.DataFrame],
         ml_scores: Optional[np.ndarray],
         ml_risk_levels: Optional[List[RiskLevel]],
-        rule_alerts: List[Alert]
-    ) -> Tuple[List[Alert], List[float], List[RiskLevel]]:
+        rule_alerts: List[Alert],
+        feature_array: Optional[np.ndarray] = None,
+        feature_names: Optional[List[str]] = None,
+        ml_ensemble: Optional[ModelEnsemble] = None,
+        feature_pipeline: Optional[FeaturePipeline] = None
+    ) -> Tuple[List[Alert], np.ndarray, np.ndarray, np.ndarray]:
         """
         Combine ML and rule-based results into unified alerts
         
+        Scores are returned as arrays aligned with a stable entity index:
+        the entities of `trades[group_by]` in order of first appearance.
+        
         Args:
             trades: Original trade data
             group_by: Grouping column
@@ -250,9 +422,13 @@ class DetectionEngine:
             ml_scores: ML anomaly scores
             ml_risk_levels: ML risk levels
             rule_alerts: Rule-based alerts
+            feature_array: Feature matrix the ML models scored
+            feature_names: Name of each feature column
+            ml_ensemble: Ensemble that scored the features (for explanations)
+            feature_pipeline: Pipeline that scaled the features
             
         Returns:
-            Tuple of (combined_alerts, anomaly_scores, risk_flags)
+            Tuple of (combined_alerts, anomaly_scores, risk_flags, entity_ids)
         """
         combined_alerts = []
         
@@ -266,7 +442,11 @@ class DetectionEngine:
                 ml_scores,
                 ml_risk_levels,
                 trades,
-                group_by
+                group_by,
+                feature_array=feature_array,
+                feature_names=feature_names,
+                ml_ensemble=ml_ensemble,
+                feature_pipeline=feature_pipeline
             )
             combined_alerts.extend(ml_alerts)
         
@@ -279,16 +459,12 @@ class DetectionEngine:
             rule_alerts
         )
         
-        # Assign risk flags based on combined scores
-        anomaly_scores = []
-        risk_flags = []
+        # Align scores with the entities in the trades and assign risk flags
+        entity_ids = pd.unique(trades[group_by].astype(str))
+        anomaly_scores = entity_scores.reindex(entity_ids, fill_value=0.0).to_numpy(dtype=float)
+        risk_flags = self._scores_to_risk_levels(anomaly_scores)
         
-        for entity_id in trades[group_by].unique():
-            score = entity_scores.get(entity_id, 0.0)
-            anomaly_scores.append(score)
-            risk_flags.append(self._score_to_risk_level(score))
-        
-        return combined_alerts, anomaly_scores, risk_flags
+        return combined_alerts, anomaly_scores, risk_flags, entity_ids
     
     def _create_ml_alerts(
         self,
@@ -296,60 +472,102 @@ class DetectionEngine:
         ml_scores: np.ndarray,
         ml_risk_levels: Optional[List[RiskLevel]],
         trades: pd.DataFrame,
-        group_by: str
+        group_by: str,
+        feature_array: Optional[np.ndarray] = None,
+        feature_names: Optional[List[str]] = None,
+        ml_ensemble: Optional[ModelEnsemble] = None,
+        feature_pipeline: Optional[FeaturePipeline] = None
     ) -> List[Alert]:
         """
         Create alerts from ML model predictions
         
+        All flagged entities are explained in one batch: model contributions
+        and the features deviating most from the training distribution.
+        
         Args:
             features_df: Features DataFrame with entity IDs
             ml_scores: ML anomaly scores
             ml_risk_levels: ML risk levels
             trades: Original trade data
             group_by: Grouping column
+            feature_array: Feature matrix the ML models scored
+            feature_names: Name of each feature column
+            ml_ensemble: Ensemble that scored the features
+            feature_pipeline: Pipeline that scaled the features
             
         Returns:
             List of ML-based alerts
         """
-        ml_alerts = []
-        
         # Get entity IDs from features
-        entity_ids = features_df[group_by].values
+        entity_ids = features_df[group_by].astype(str).to_numpy()
         
-        for idx, (entity_id, score) in enumerate(zip(entity_ids, ml_scores)):
-            # Only create alerts for high-risk predictions
-            risk_level = ml_risk_levels[idx] if ml_risk_levels else self._score_to_risk_level(score * 100)
-            
-            if risk_level in [RiskLevel.HIGH, RiskLevel.MEDIUM]:
-                # Get trades for this entity
-                entity_trades = trades[trades[group_by] == entity_id]
-                trade_ids = entity_trades['trade_id'].tolist()
-                
-                # Get model contributions for explanation
-                explanation = self._generate_ml_explanation(score, features_df.iloc[idx])
-                
-                alert = Alert(
-                    alert_id=f"ml_anomaly_{entity_id}_{pd.Timestamp.now().timestamp()}",
-                    timestamp=pd.Timestamp.now(),
-                    user_id=str(entity_id),
-                    trade_ids=trade_ids,
-                    anomaly_score=score * 100,  # Convert to 0-100 scale
-                    risk_level=risk_level,
-                    pattern_type=PatternType.GENERAL_ANOMALY,
-                    explanation=explanation,
-                    recommended_action="Review trading patterns for potential anomalous behavior"
+        # Only create alerts for high-risk predictions
+        if ml_risk_levels:
+            risk_levels = list(ml_risk_levels)
+        else:
+            risk_levels = [self._score_to_risk_level(score * 100) for score in ml_scores]
+        flagged = [
+            idx for idx, risk_level in enumerate(risk_levels)
+            if risk_level in [RiskLevel.HIGH, RiskLevel.MEDIUM]
+        ]
+        if not flagged:
+            return []
+        
+        # Trades of every entity in one pass
+        trade_ids_by_entity = (
+            trades.groupby(trades[group_by].astype(str), observed=True, sort=False)['trade_id']
+            .agg(list)
+        )
+        
+        explanations = [None] * len(flagged)
+        if ml_ensemble is not None and feature_array is not None:
+            try:
+                zscores = (
+                    feature_pipeline.zscore(feature_array)
+                    if feature_pipeline is not None else None
+                )
+                explanations = ml_ensemble.explain_batch(
+                    feature_array,
+                    sample_indices=flagged,
+                    feature_names=feature_names,
+                    feature_zscores=zscores,
+                    top_k=self.config.ml_explanation_top_k,
+                    entity_ids=entity_ids,
+                    cache=self.explanation_cache
                 )
-                ml_alerts.append(alert)
+            except Exception as e:
+                self.logger.warning(f"Could not explain ML alerts: {str(e)}")
+        
+        ml_alerts = []
+        
+        for idx, explanation in zip(flagged, explanations):
+            entity_id = entity_ids[idx]
+            score = ml_scores[idx]
+            
+            alert = Alert(
+                alert_id=f"ml_anomaly_{entity_id}_{pd.Timestamp.now().timestamp()}",
+                timestamp=pd.Timestamp.now(),
+                user_id=entity_id,
+                trade_ids=trade_ids_by_entity.get(entity_id, []),
+                anomaly_score=score * 100,  # Convert to 0-100 scale
+                risk_level=risk_levels[idx],
+                pattern_type=PatternType.GENERAL_ANOMALY,
+                explanation=self._generate_ml_explanation(score, explanation),
+                recommended_action="Review trading patterns for potential anomalous behavior"
+            )
+            ml_alerts.append(alert)
         
         return ml_alerts
     
-    def _generate_ml_explanation(self, score: float, features: pd.Series) -> str:
+    def _generate_ml_explanation(self, score: float,
+                                 explanation: Optional[Dict[str, Any]] = None) -> str:
         """
         Generate explanation for ML-based alert
         
         Args:
             score: Anomaly score
-            features: Feature values for the entity
+            explanation: Batch explanation of the entity (see
+                ModelEnsemble.explain_batch)
             
         Returns:
             Explanation string
@@ -358,17 +576,23 @@ class DetectionEngine:
             f"ML models detected anomalous behavior (score: {score*100:.1f}/100)"
         ]
         
-        # Identify top anomalous features
-        numeric_features = features.select_dtypes(include=[np.number])
-        
-        if len(numeric_features) > 0:
-            # Get features with highest absolute values (normalized)
-            top_features = numeric_features.abs().nlargest(3)
+        if explanation:
+            # Features deviating most from the training distribution
+            top_features = explanation.get('top_features', [])
+            if top_features:
+                explanation_parts.append(
+                    "Key indicators: " + ", ".join(
+                        f"{feature['feature']} (z={feature['zscore']:+.1f})" for feature in top_features
+                    )
+                )
             
-            if len(top_features) > 0:
-                feature_names = top_features.index.tolist()
+            contributions = explanation.get('model_contributions', {})
+            if contributions:
                 explanation_parts.append(
-                    f"Key indicators: {', '.join(feature_names[:3])}"
+                    "Model scores: " + ", ".join(
+                        f"{model_name} {contribution['score']:.2f}"
+                        for model_name, contribution in contributions.items()
+                    )
                 )
         
         return ". ".join(explanation_parts)
@@ -380,7 +604,7 @@ class DetectionEngine:
         ml_scores: Optional[np.ndarray],
         features_df: Optional[pd.DataFrame],
         rule_alerts: List[Alert]
-    ) -> Dict[str, float]:
+    ) -> pd.Series:
         """
         Calculate combined anomaly scores for each entity
         
@@ -392,48 +616,85 @@ class DetectionEngine:
             rule_alerts: Rule-based alerts
             
         Returns:
-            Dictionary mapping entity ID to combined score
+            Series mapping entity ID (as string) to combined score
         """
-        entity_scores = {}
-        
-        # Get ML scores by entity
-        ml_scores_dict = {}
+        # ML scores by entity (0-100)
         if ml_scores is not None and features_df is not None:
-            entity_ids = features_df[group_by].values
-            for entity_id, score in zip(entity_ids, ml_scores):
-                ml_scores_dict[str(entity_id)] = score * 100  # Convert to 0-100
-        
-        # Get rule-based scores by entity
-        rule_scores_dict = {}
-        for alert in rule_alerts:
-            # Handle multiple users in alert
-            user_ids = alert.user_id.split(',')
-            for user_id in user_ids:
-                user_id = user_id.strip()
-                if user_id not in rule_scores_dict:
-                    rule_scores_dict[user_id] = []
-                rule_scores_dict[user_id].append(alert.anomaly_score)
-        
-        # Average rule scores for each entity
-        for user_id, scores in rule_scores_dict.items():
-            rule_scores_dict[user_id] = np.mean(scores)
-        
-        # Combine scores
-        all_entities = set(ml_scores_dict.keys()) | set(rule_scores_dict.keys())
-        
-        for entity_id in all_entities:
-            ml_score = ml_scores_dict.get(entity_id, 0.0)
-            rule_score = rule_scores_dict.get(entity_id, 0.0)
-            
-            # Weighted combination
-            combined_score = (
-                self.config.ml_weight * ml_score +
-                self.config.rule_weight * rule_score
+            ml_series = pd.Series(
+                np.asarray(ml_scores, dtype=float) * 100,
+                index=features_df[group_by].astype(str).to_numpy()
             )
+            ml_series = ml_series[~ml_series.index.duplicated(keep='last')]
+        else:
+            ml_series = pd.Series(dtype=float)
+        
+        # Average rule-based score by entity
+        rule_series = self._aggregate_rule_scores(rule_alerts)['mean_score']
+        
+        # Weighted combination over the union of entities
+        entities = ml_series.index.union(rule_series.index)
+        combined = (
+            self.config.ml_weight * ml_series.reindex(entities, fill_value=0.0) +
+            self.config.rule_weight * rule_series.reindex(entities, fill_value=0.0)
+        )
+        
+        return combined
+    
+    def _aggregate_rule_scores(self, rule_alerts: List[Alert]) -> pd.DataFrame:
+        """
+        Aggregate rule-based alert scores per entity
+        
+        Alerts covering several users (comma-separated user_id) count towards
+        each of them.
+        
+        Args:
+            rule_alerts: Rule-based alerts
             
-            entity_scores[entity_id] = combined_score
+        Returns:
+            DataFrame indexed by entity ID with mean_score, max_score and
+            alert_count columns
+        """
+        columns = ['mean_score', 'max_score', 'alert_count']
+        
+        if not rule_alerts:
+            return pd.DataFrame(columns=columns, dtype=float)
+        
+        alerts_frame = pd.DataFrame({
+            'user_id': [alert.user_id for alert in rule_alerts],
+            'score': np.fromiter(
+                (alert.anomaly_score for alert in rule_alerts),
+                dtype=float,
+                count=len(rule_alerts)
+            )
+        })
+        
+        # One row per (alert, user)
+        alerts_frame['user_id'] = alerts_frame['user_id'].astype(str).str.split(',')
+        alerts_frame = alerts_frame.explode('user_id')
+        alerts_frame['user_id'] = alerts_frame['user_id'].str.strip()
+        
+        aggregated = alerts_frame.groupby('user_id', sort=False)['score'].agg(
+            ['mean', 'max', 'count']
+        )
+        aggregated.columns = columns
+        
+        return aggregated
+    
+    def _scores_to_risk_levels(self, scores: np.ndarray) -> np.ndarray:
+        """
+        Convert an array of anomaly scores to risk levels
         
-        return entity_scores
+        Args:
+            scores: Anomaly scores (0-100)
+            
+        Returns:
+            Object array of RiskLevel
+        """
+        scores = np.asarray(scores, dtype=float)
+        levels = np.full(scores.shape, RiskLevel.LOW, dtype=object)
+        levels[scores >= self.config.medium_risk_score] = RiskLevel.MEDIUM
+        levels[scores >= self.config.high_risk_score] = RiskLevel.HIGH
+        return levels
     
     def _score_to_risk_level(self, score: float) -> RiskLevel:
         """
@@ -452,10 +713,34 @@ class DetectionEngine:
         else:
             return RiskLevel.LOW
     
+    @staticmethod
+    def _joblib_model_path(model_path: Path, model_name: str) -> Optional[Path]:
+        """
+        Find a joblib model file in a model directory
+        
+        Retraining activates '<model>.joblib'; ModelTrainer.save_models
+        writes the file without extension.
+        
+        Args:
+            model_path: Model directory
+            model_name: Model name (e.g. 'random_forest')
+        
+        Returns:
+            Path of the model file, or None if there is none
+        """
+        for candidate in (model_path / f'{model_name}.joblib', model_path / model_name):
+            if candidate.is_file():
+                return candidate
+        return None
+    
     def load_models(self, model_dir: str) -> None:
         """
         Load trained ML models
         
+        The models are loaded into a new ensemble which then replaces the
+        current one, so detection keeps running on the old models while
+        loading (hot swap).
+        
         Args:
             model_dir: Directory containing model files
         """
@@ -465,29 +750,119 @@ class DetectionEngine:
         
         model_path = Path(model_dir)
         
-        # Load Isolation Forest
-        if (model_path / 'isolation_forest.joblib').exists():
+        # Read before loading: an activation during the load triggers another reload
+        manifest = read_active_manifest(model_path)
+        generation = manifest.get('generation') if manifest else None
+        model_version = ','.join(
+            f"{model_type}:{version}" for model_type, version in sorted(manifest.get('models', {}).items())
+        ) if manifest else 'initial'
+        
+        # Load feature pipeline
+        feature_pipeline = self.feature_pipeline
+        if (model_path / FEATURE_PIPELINE_FILE).exists():
+            feature_pipeline = FeaturePipeline.load(str(model_path / FEATURE_PIPELINE_FILE))
+            if not feature_pipeline.is_compatible(self.config.feature_time_windows):
+                self.logger.warning(
+                    f"Feature pipeline {feature_pipeline.version} was fitted with time windows "
+                    f"{feature_pipeline.time_windows}, engine uses {self.config.feature_time_windows}"
+                )
+            self.logger.info(f"Loaded feature pipeline {feature_pipeline.version}")
+        
+        ensemble = ModelEnsemble(
+            weights=self.ml_ensemble.weights,
+            high_risk_threshold=self.ml_ensemble.high_risk_threshold,
+            medium_risk_threshold=self.ml_ensemble.medium_risk_threshold
+        )
+        for name, model in self.ml_ensemble.models.items():
+            ensemble.add_model(name, model)
+        
+        # Load Isolation Forest: prefer the memory-mapped artifact, whose
+        # pages are shared by all processes serving this directory
+        iso_ref = artifact_ref_path(model_path, 'isolation_forest')
+        if self.config.ml_memory_mapped_models and iso_ref.exists():
+            iso_model = FlatIsolationForest()
+            iso_model.load(str(iso_ref))
+            ensemble.add_model('isolation_forest', iso_model)
+            self.logger.info("Loaded Isolation Forest model (memory-mapped)")
+        elif self._joblib_model_path(model_path, 'isolation_forest') is not None:
             from trade_risk_analyzer.models.isolation_forest import IsolationForestModel
             iso_model = IsolationForestModel()
-            iso_model.load(str(model_path / 'isolation_forest.joblib'))
-            self.ml_ensemble.add_model('isolation_forest', iso_model)
+            iso_model.load(str(self._joblib_model_path(model_path, 'isolation_forest')))
+            ensemble.add_model('isolation_forest', iso_model)
             self.logger.info("Loaded Isolation Forest model")
         
-        # Load Autoencoder
-        if (model_path / 'autoencoder.h5').exists():
+        # Load Autoencoder: prefer the NumPy export, which needs no TensorFlow
+        if (model_path / AUTOENCODER_NUMPY_FILE).exists():
+            ae_model = NumpyAutoencoder()
+            ae_model.load(str(model_path / AUTOENCODER_NUMPY_FILE))
+            ensemble.add_model('autoencoder', ae_model)
+            self.logger.info("Loaded Autoencoder model (NumPy runtime)")
+        elif (model_path / 'autoencoder_config.json').exists():
             from trade_risk_analyzer.models.autoencoder import AutoencoderModel
             ae_model = AutoencoderModel()
-            ae_model.load(str(model_path / 'autoencoder.h5'))
-            self.ml_ensemble.add_model('autoencoder', ae_model)
+            ae_model.load(str(model_path / 'autoencoder'))
+            ensemble.add_model('autoencoder', ae_model)
             self.logger.info("Loaded Autoencoder model")
         
         # Load Random Forest
-        if (model_path / 'random_forest.joblib').exists():
+        rf_ref = artifact_ref_path(model_path, 'random_forest')
+        if self.config.ml_memory_mapped_models and rf_ref.exists():
+            rf_model = FlatRandomForest()
+            rf_model.load(str(rf_ref))
+            ensemble.add_model('random_forest', rf_model)
+            self.logger.info("Loaded Random Forest model (memory-mapped)")
+        elif self._joblib_model_path(model_path, 'random_forest') is not None:
             from trade_risk_analyzer.models.random_forest import RandomForestModel
             rf_model = RandomForestModel()
-            rf_model.load(str(model_path / 'random_forest.joblib'))
-            self.ml_ensemble.add_model('random_forest', rf_model)
+            rf_model.load(str(self._joblib_model_path(model_path, 'random_forest')))
+            ensemble.add_model('random_forest', rf_model)
             self.logger.info("Loaded Random Forest model")
+        
+        # Load drift baseline (training distribution of the features)
+        drift_baseline = None
+        if self.drift_monitor is not None and (model_path / DRIFT_BASELINE_FILE).exists():
+            drift_baseline = DriftBaseline.load(str(model_path / DRIFT_BASELINE_FILE))
+        
+        with self._model_lock:
+            self.feature_pipeline = feature_pipeline
+            self.ml_ensemble = ensemble
+            if self.scorer is not None:
+                self.scorer.ensemble = ensemble
+            self.model_dir = str(model_path)
+            self.model_generation = generation
+            self.model_version = model_version or 'initial'
+            if drift_baseline is not None and (
+                self.drift_monitor.baseline is None or
+                self.drift_monitor.baseline.created_at != drift_baseline.created_at
+            ):
+                self.drift_monitor.set_baseline(drift_baseline)
+    
+    def reload_models_if_changed(self) -> bool:
+        """
+        Reload models if a new version was activated in the model directory
+        
+        Cheap enough to call before every detection run: it reads the
+        directory's small activation manifest. On a failed reload the
+        current models stay active.
+        
+        Returns:
+            True if models were reloaded
+        """
+        if self.model_dir is None:
+            return False
+        
+        generation = active_generation(self.model_dir)
+        if generation is None or generation == self.model_generation:
+            return False
+        
+        try:
+            self.load_models(self.model_dir)
+        except Exception as e:
+            self.logger.error(f"Model reload failed, keeping current models: {e}", exc_info=True)
+            return False
+        
+        self.logger.info(f"Hot-swapped models from {self.model_dir} (generation {generation})")
+        return True
     
     def update_config(self, new_config: DetectionConfig) -> None:
         """
@@ -540,7 +915,7 @@ class DetectionEngine:
                 stats['alerts_by_risk_level'].get(risk, 0) + 1
         
         # Score statistics
-        if result.anomaly_scores:
+        if len(result.anomaly_scores) > 0:
             scores = np.array(result.anomaly_scores)
             stats['anomaly_score_stats'] = {
                 'mean': float(np.mean(scores)),
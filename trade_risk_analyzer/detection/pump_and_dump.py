@@ -376,7 +376,7 @@ class PumpAndDumpDetector(BaseDetector):
             indicators.append(buy_ratio)
         
         # 4. Account concentration (few accounts with high volume)
-        user_volumes = symbol_trades.groupby('user_id')['volume'].sum().sort_values(ascending=False)
+        user_volumes = symbol_trades.groupby('user_id', observed=True)['volume'].sum().sort_values(ascending=False)
         
         if len(user_volumes) > 0:
             top_3_volume = user_volumes.head(3).sum()
@@ -0,0 +1,622 @@
+"""
+Sharded Streaming Module
+
+Runs the streaming analysis across several local worker processes. Trades are
+hash-partitioned by symbol (or user) so each shard owns its own sliding window
+and detection engine, and alerts are merged back into a single AlertManager.
+No external broker is required: batches travel over multiprocessing pipes.
+"""
+
+import multiprocessing as mp
+import queue
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+from trade_risk_analyzer.core.base import Trade, TradeType, Alert
+from trade_risk_analyzer.core.logger import get_logger
+from trade_risk_analyzer.detection.engine import DetectionEngine, DetectionConfig
+from trade_risk_analyzer.detection.alert_manager import AlertManager
+from trade_risk_analyzer.detection.streaming_processor import (
+    StreamingProcessor,
+    StreamingConfig
+)
+
+
+logger = get_logger(__name__)
+
+
+# Seconds between checks for shard processes that died
+SHARD_POLL_INTERVAL = 0.2
+
+
+@dataclass
+class ShardedStreamingConfig:
+    """
+    Configuration for the sharded streaming processor
+    """
+    # Sharding settings
+    num_shards: int = 4
+    partition_key: str = 'symbol'  # 'symbol' or 'user_id'
+    
+    # Ingestion settings
+    ingest_batch_size: int = 500
+    max_pending_batches: int = 16  # Per shard, applies backpressure
+    start_method: Optional[str] = None  # None = platform default
+    
+    # Per-shard processing settings
+    streaming: StreamingConfig = field(default_factory=StreamingConfig)
+    detection: DetectionConfig = field(
+        default_factory=lambda: DetectionConfig(use_ml_models=False)
+    )
+    model_dir: Optional[str] = None
+    
+    # Shutdown settings
+    shutdown_timeout_seconds: float = 10.0
+
+
+@dataclass
+class ShardStatistics:
+    """
+    Statistics for a single shard
+    """
+    shard_id: int
+    trades_submitted: int = 0
+    trades_processed: int = 0
+    batches_submitted: int = 0
+    batches_processed: int = 0
+    batches_failed: int = 0  # Lost with a dead shard process
+    trades_dropped: int = 0  # Submitted after the shard process died
+    alerts_generated: int = 0
+    last_lag_ms: float = 0.0
+    average_lag_ms: float = 0.0
+    busy_time_seconds: float = 0.0
+    errors: int = 0
+    alive: bool = True
+    started_at: Optional[datetime] = None
+    
+    @property
+    def pending_batches(self) -> int:
+        """Batches sent to the shard but not yet acknowledged or failed"""
+        return self.batches_submitted - self.batches_processed - self.batches_failed
+    
+    @property
+    def throughput(self) -> float:
+        """Trades processed per second since the shard started"""
+        if not self.started_at:
+            return 0.0
+        elapsed = (datetime.now() - self.started_at).total_seconds()
+        if elapsed <= 0:
+            return 0.0
+        return self.trades_processed / elapsed
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return {
+            'shard_id': self.shard_id,
+            'trades_submitted': self.trades_submitted,
+            'trades_processed': self.trades_processed,
+            'batches_submitted': self.batches_submitted,
+            'batches_processed': self.batches_processed,
+            'batches_failed': self.batches_failed,
+            'trades_dropped': self.trades_dropped,
+            'pending_batches': self.pending_batches,
+            'alerts_generated': self.alerts_generated,
+            'last_lag_ms': self.last_lag_ms,
+            'average_lag_ms': self.average_lag_ms,
+            'busy_time_seconds': self.busy_time_seconds,
+            'throughput': self.throughput,
+            'errors': self.errors,
+            'alive': self.alive,
+            'started_at': self.started_at.isoformat() if self.started_at else None
+        }
+
+
+def partition_for(key: Any, num_shards: int) -> int:
+    """
+    Get shard index for a partition key
+    
+    Uses CRC32 rather than hash() so the mapping is stable across processes
+    and interpreter runs.
+    
+    Args:
+        key: Partition key value (symbol or user ID)
+        num_shards: Number of shards
+    
+    Returns:
+        Shard index in [0, num_shards)
+    """
+    return zlib.crc32(str(key).encode('utf-8')) % num_shards
+
+
+def _trades_to_columns(trades: List[Trade]) -> Tuple[list, ...]:
+    """Pack trades into column lists (cheaper to pickle than dataclasses)"""
+    return (
+        [t.trade_id for t in trades],
+        [t.user_id for t in trades],
+        [t.timestamp for t in trades],
+        [t.symbol for t in trades],
+        [t.price for t in trades],
+        [t.volume for t in trades],
+        [t.trade_type.value if isinstance(t.trade_type, TradeType) else str(t.trade_type)
+         for t in trades],
+        [t.order_id for t in trades],
+    )
+
+
+def _columns_to_trades(columns: Tuple[list, ...]) -> List[Trade]:
+    """Unpack column lists back into Trade objects"""
+    trade_types = {tt.value: tt for tt in TradeType}
+    return [
+        Trade(
+            trade_id=trade_id,
+            user_id=user_id,
+            timestamp=timestamp,
+            symbol=symbol,
+            price=price,
+            volume=volume,
+            trade_type=trade_types[trade_type],
+            order_id=order_id
+        )
+        for trade_id, user_id, timestamp, symbol, price, volume, trade_type, order_id
+        in zip(*columns)
+    ]
+
+
+def _shard_worker(shard_id: int, config: ShardedStreamingConfig,
+                  conn: Any, result_queue: Any) -> None:
+    """
+    Worker process entry point
+    
+    Owns one StreamingProcessor (window and detection engine) and reports
+    every processed batch back on the shared result queue.
+    
+    Args:
+        shard_id: Shard index
+        config: Sharded streaming configuration
+        conn: Receiving end of the ingestion pipe
+        result_queue: Queue shared by all shards for results
+    """
+    engine = DetectionEngine(config=config.detection)
+    if config.model_dir:
+        engine.load_models(config.model_dir)
+    
+    processor = StreamingProcessor(
+        detection_engine=engine,
+        config=config.streaming
+    )
+    
+    emitted: List[Alert] = []
+    processor.add_alert_callback(emitted.append)
+    
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        
+        kind = message[0]
+        if kind == 'stop':
+            break
+        
+        _, seq, sent_at, columns = message
+        started = time.time()
+        error = None
+        n_trades = 0
+        
+        try:
+            if kind == 'batch':
+                trades = _columns_to_trades(columns)
+                n_trades = len(trades)
+                processor.process_trades_batch(trades, force_analysis=False)
+            elif kind == 'flush':
+                processor.analyze_current_window(force=True)
+        except Exception as e:
+            error = str(e)
+        
+        finished = time.time()
+        result_queue.put(
+            ('result', shard_id, seq, sent_at, n_trades,
+             list(emitted), finished - started, finished, error)
+        )
+        emitted.clear()
+    
+    result_queue.put(('stopped', shard_id))
+
+
+class ShardedStreamingProcessor:
+    """
+    Multi-process streaming processor partitioned by symbol or user
+    """
+    
+    def __init__(
+        self,
+        config: Optional[ShardedStreamingConfig] = None,
+        alert_manager: Optional[AlertManager] = None
+    ):
+        """
+        Initialize sharded streaming processor
+        
+        Args:
+            config: Sharded streaming configuration
+            alert_manager: Alert manager that merged alerts are saved through
+        """
+        self.config = config or ShardedStreamingConfig()
+        if self.config.num_shards < 1:
+            raise ValueError("num_shards must be at least 1")
+        if self.config.partition_key not in ('symbol', 'user_id'):
+            raise ValueError("partition_key must be 'symbol' or 'user_id'")
+        
+        self.alert_manager = alert_manager
+        self.logger = logger
+        
+        self.shard_statistics = [
+            ShardStatistics(shard_id=i) for i in range(self.config.num_shards)
+        ]
+        self.alert_callbacks: List[Callable[[Alert], None]] = []
+        
+        self._ctx = mp.get_context(self.config.start_method)
+        self._processes: List[Any] = []
+        self._connections: List[Any] = []
+        self._result_queue: Optional[Any] = None
+        self._collector_thread: Optional[threading.Thread] = None
+        
+        self._buffers: List[List[Trade]] = [[] for _ in range(self.config.num_shards)]
+        self._send_locks = [threading.Lock() for _ in range(self.config.num_shards)]
+        self._buffer_lock = threading.Lock()
+        self._stats_changed = threading.Condition()
+        self._seq = 0
+        self._running = False
+    
+    def start(self) -> None:
+        """Start shard worker processes and the result collector"""
+        if self._running:
+            self.logger.warning("Sharded streaming processor already running")
+            return
+        
+        self._result_queue = self._ctx.Queue()
+        self._processes = []
+        self._connections = []
+        
+        for shard_id in range(self.config.num_shards):
+            recv_conn, send_conn = self._ctx.Pipe(duplex=False)
+            process = self._ctx.Process(
+                target=_shard_worker,
+                args=(shard_id, self.config, recv_conn, self._result_queue),
+                name=f"trade-risk-shard-{shard_id}",
+                daemon=True
+            )
+            process.start()
+            recv_conn.close()
+            
+            self._processes.append(process)
+            self._connections.append(send_conn)
+            self.shard_statistics[shard_id].started_at = datetime.now()
+            self.shard_statistics[shard_id].alive = True
+        
+        self._running = True
+        self._collector_thread = threading.Thread(
+            target=self._collect_results,
+            daemon=True
+        )
+        self._collector_thread.start()
+        
+        self.logger.info(
+            f"Started {self.config.num_shards} streaming shards "
+            f"partitioned by {self.config.partition_key}"
+        )
+    
+    def stop(self) -> None:
+        """Flush pending trades and stop all shards"""
+        if not self._running:
+            return
+        
+        # Shards are joined (or terminated) even if the flush fails
+        try:
+            self.flush_buffers()
+        except Exception as e:
+            self.logger.error(f"Failed to flush buffers on stop: {e}")
+        
+        for shard_id, conn in enumerate(self._connections):
+            with self._send_locks[shard_id]:
+                try:
+                    conn.send(('stop',))
+                except (BrokenPipeError, EOFError, OSError):
+                    pass
+        
+        for process in self._processes:
+            process.join(timeout=self.config.shutdown_timeout_seconds)
+            if process.is_alive():
+                self.logger.warning(f"Terminating unresponsive shard {process.name}")
+                process.terminate()
+                process.join()
+        
+        self._running = False
+        
+        if self._collector_thread:
+            self._result_queue.put(('shutdown', -1))
+            self._collector_thread.join(timeout=self.config.shutdown_timeout_seconds)
+        
+        for conn in self._connections:
+            conn.close()
+        
+        self.logger.info("Stopped sharded streaming processor")
+    
+    def __enter__(self) -> 'ShardedStreamingProcessor':
+        self.start()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+    
+    def shard_for(self, trade: Trade) -> int:
+        """
+        Get shard index for a trade
+        
+        Args:
+            trade: Trade to route
+        
+        Returns:
+            Shard index
+        """
+        return partition_for(getattr(trade, self.config.partition_key),
+                             self.config.num_shards)
+    
+    def submit_trade(self, trade: Trade) -> None:
+        """
+        Route a single trade to its shard buffer
+        
+        Args:
+            trade: Trade to process
+        """
+        self.submit_trades([trade])
+    
+    def submit_trades(self, trades: List[Trade]) -> None:
+        """
+        Route trades to shard buffers, sending full batches to the workers
+        
+        Args:
+            trades: Trades to process
+        """
+        if not self._running:
+            raise RuntimeError("Sharded streaming processor not started. Call start() first.")
+        
+        ready = []
+        with self._buffer_lock:
+            for trade in trades:
+                shard_id = self.shard_for(trade)
+                buffer = self._buffers[shard_id]
+                buffer.append(trade)
+                if len(buffer) >= self.config.ingest_batch_size:
+                    ready.append((shard_id, buffer))
+                    self._buffers[shard_id] = []
+        
+        for shard_id, batch in ready:
+            self._send_batch(shard_id, batch)
+    
+    def flush_buffers(self) -> None:
+        """Send partially filled buffers to their shards"""
+        with self._buffer_lock:
+            ready = [(i, b) for i, b in enumerate(self._buffers) if b]
+            self._buffers = [[] for _ in range(self.config.num_shards)]
+        
+        for shard_id, batch in ready:
+            self._send_batch(shard_id, batch)
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Send buffered trades, force a window analysis on every shard and
+        wait until all shards have caught up
+        
+        Args:
+            timeout: Maximum time to wait in seconds (None = wait forever)
+        
+        Returns:
+            True if all shards caught up within the timeout
+        """
+        self.flush_buffers()
+        for shard_id in range(self.config.num_shards):
+            self._send(shard_id, 'flush', None, 0)
+        return self.wait_until_idle(timeout)
+    
+    def wait_until_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every submitted batch has been processed
+        
+        Args:
+            timeout: Maximum time to wait in seconds (None = wait forever)
+        
+        Batches of a shard process that died count as failed, so this
+        returns once the live shards have caught up.
+        
+        Returns:
+            True if idle, False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        
+        with self._stats_changed:
+            while not all(s.pending_batches == 0 for s in self.shard_statistics):
+                remaining = SHARD_POLL_INTERVAL
+                if deadline is not None:
+                    remaining = min(remaining, deadline - time.monotonic())
+                    if remaining <= 0:
+                        return False
+                self._stats_changed.wait(remaining)
+                self._check_shards()
+            return True
+    
+    def add_alert_callback(self, callback: Callable[[Alert], None]) -> None:
+        """
+        Add callback for merged alerts
+        
+        Args:
+            callback: Function to call for each alert from any shard
+        """
+        self.alert_callbacks.append(callback)
+    
+    def get_shard_statistics(self) -> List[ShardStatistics]:
+        """
+        Get per-shard statistics (lag, throughput, backlog)
+        
+        Returns:
+            List of ShardStatistics indexed by shard
+        """
+        return self.shard_statistics
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get aggregate statistics across shards
+        
+        Returns:
+            Dictionary with totals and per-shard details
+        """
+        shards = [s.to_dict() for s in self.shard_statistics]
+        return {
+            'num_shards': self.config.num_shards,
+            'partition_key': self.config.partition_key,
+            'trades_processed': sum(s['trades_processed'] for s in shards),
+            'alerts_generated': sum(s['alerts_generated'] for s in shards),
+            'pending_batches': sum(s['pending_batches'] for s in shards),
+            'max_lag_ms': max((s['last_lag_ms'] for s in shards), default=0.0),
+            'throughput': sum(s['throughput'] for s in shards),
+            'errors': sum(s['errors'] for s in shards),
+            'shards': shards
+        }
+    
+    def _send_batch(self, shard_id: int, batch: List[Trade]) -> None:
+        """Send a batch of trades to a shard"""
+        self._send(shard_id, 'batch', _trades_to_columns(batch), len(batch))
+    
+    def _send(self, shard_id: int, kind: str, payload: Any, n_trades: int) -> None:
+        """
+        Send a message to a shard, blocking while its backlog is full
+        
+        Args:
+            shard_id: Target shard
+            kind: Message kind ('batch' or 'flush')
+            payload: Message payload
+            n_trades: Number of trades in the payload
+        """
+        stats = self.shard_statistics[shard_id]
+        
+        with self._stats_changed:
+            while not self._stats_changed.wait_for(
+                lambda: stats.pending_batches < self.config.max_pending_batches or not stats.alive,
+                timeout=SHARD_POLL_INTERVAL
+            ):
+                self._check_shards()
+            
+            self._seq += 1
+            seq = self._seq
+            stats.batches_submitted += 1
+            stats.trades_submitted += n_trades
+            
+            # Nothing is listening: count the message as failed
+            if not stats.alive:
+                stats.batches_failed += 1
+                stats.trades_dropped += n_trades
+                return
+        
+        try:
+            with self._send_locks[shard_id]:
+                self._connections[shard_id].send((kind, seq, time.time(), payload))
+        except (BrokenPipeError, EOFError, OSError) as e:
+            self._mark_shard_dead(shard_id, f"send failed: {e}")
+            with self._stats_changed:
+                stats.trades_dropped += n_trades
+    
+    def _check_shards(self) -> None:
+        """Mark shards whose process exited without being stopped as dead"""
+        for shard_id, process in enumerate(self._processes):
+            # A clean exit (code 0) follows a stop message
+            if self.shard_statistics[shard_id].alive and process.exitcode not in (None, 0):
+                self._mark_shard_dead(shard_id, f"process exited with code {process.exitcode}")
+    
+    def _mark_shard_dead(self, shard_id: int, reason: str) -> None:
+        """
+        Fail a dead shard's pending batches and wake waiting threads
+        
+        Args:
+            shard_id: Shard whose process died
+            reason: Cause, for the log
+        """
+        with self._stats_changed:
+            stats = self.shard_statistics[shard_id]
+            if stats.alive:
+                stats.alive = False
+                stats.errors += 1
+                self.logger.error(
+                    f"Shard {shard_id} died ({reason}); "
+                    f"{stats.pending_batches} pending batches failed"
+                )
+            stats.batches_failed += stats.pending_batches
+            self._stats_changed.notify_all()
+    
+    def _collect_results(self) -> None:
+        """Collector loop: merge shard results into statistics and alerts"""
+        stopped = set()
+        
+        while len(stopped) < self.config.num_shards:
+            self._check_shards()
+            try:
+                message = self._result_queue.get(timeout=SHARD_POLL_INTERVAL)
+            except queue.Empty:
+                if not self._running:
+                    break
+                continue
+            
+            kind = message[0]
+            if kind == 'shutdown':
+                break
+            if kind == 'stopped':
+                stopped.add(message[1])
+                continue
+            
+            (_, shard_id, _seq, sent_at, n_trades,
+             alerts, busy_seconds, finished_at, error) = message
+            lag_ms = max(finished_at - sent_at, 0.0) * 1000
+            
+            with self._stats_changed:
+                stats = self.shard_statistics[shard_id]
+                stats.batches_processed += 1
+                if stats.batches_failed and stats.pending_batches < 0:
+                    # Result sent just before the shard died, already counted as failed
+                    stats.batches_failed -= 1
+                stats.trades_processed += n_trades
+                stats.alerts_generated += len(alerts)
+                stats.busy_time_seconds += busy_seconds
+                stats.last_lag_ms = lag_ms
+                if stats.average_lag_ms == 0:
+                    stats.average_lag_ms = lag_ms
+                else:
+                    stats.average_lag_ms = stats.average_lag_ms * 0.9 + lag_ms * 0.1
+                if error:
+                    stats.errors += 1
+                    self.logger.error(f"Shard {shard_id} failed to process batch: {error}")
+                self._stats_changed.notify_all()
+            
+            if alerts:
+                self._merge_alerts(alerts)
+    
+    def _merge_alerts(self, alerts: List[Alert]) -> None:
+        """
+        Merge alerts from a shard into the alert manager and callbacks
+        
+        Args:
+            alerts: Alerts reported by a shard
+        """
+        if self.alert_manager:
+            try:
+                self.alert_manager.save_alerts_batch(alerts, check_duplicates=True)
+            except Exception as e:
+                self.logger.error(f"Failed to merge shard alerts: {e}")
+        
+        for alert in alerts:
+            for callback in self.alert_callbacks:
+                try:
+                    callback(alert)
+                except Exception as e:
+                    self.logger.error(f"Error in alert callback: {e}")
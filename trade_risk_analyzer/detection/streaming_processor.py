@@ -17,6 +17,7 @@ import json
 
 from trade_risk_analyzer.core.base import Trade, Alert, DetectionResult
 from trade_risk_analyzer.core.logger import get_logger
+from trade_risk_analyzer.core.schema import to_trade_frame
 from trade_risk_analyzer.detection.engine import DetectionEngine, DetectionConfig
 from trade_risk_analyzer.data_ingestion.storage import DatabaseStorage
 
@@ -53,6 +54,9 @@ class StreamingConfig:
     # Auto-processing settings
     enable_auto_processing: bool = False
     auto_process_interval_seconds: int = 30
+    
+    # Reload models when a new version is activated (see models.registry)
+    enable_model_hot_swap: bool = True
 
 
 @dataclass
@@ -67,6 +71,7 @@ class StreamingStatistics:
     average_analysis_time_ms: float = 0.0
     current_window_size: int = 0
     errors: int = 0
+    model_reloads: int = 0
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
@@ -77,7 +82,8 @@ class StreamingStatistics:
             'last_analysis_time': self.last_analysis_time.isoformat() if self.last_analysis_time else None,
             'average_analysis_time_ms': self.average_analysis_time_ms,
             'current_window_size': self.current_window_size,
-            'errors': self.errors
+            'errors': self.errors,
+            'model_reloads': self.model_reloads
         }
 
 
@@ -187,7 +193,7 @@ class SlidingWindow:
                 'order_id': trade.order_id
             })
         
-        return pd.DataFrame(trades_data)
+        return to_trade_frame(pd.DataFrame(trades_data))
     
     def size(self) -> int:
         """Get current window size"""
@@ -447,13 +453,16 @@ class StreamingProcessor:
         
         return None
     
-    def process_trades_batch(self, trades: List[Trade]) -> Optional[DetectionResult]:
+    def process_trades_batch(self, trades: List[Trade],
+                             force_analysis: bool = True) -> Optional[DetectionResult]:
         """
         Process multiple trades at once
         
         Args:
             trades: List of trades to process
-            
+            force_analysis: Analyze after every batch; when False the
+                slide interval and minimum trade count are respected
+        
         Returns:
             Detection result if analysis triggered
         """
@@ -467,6 +476,9 @@ class StreamingProcessor:
             for trade in trades:
                 self.redis_cache.cache_trade(trade)
         
+        if not force_analysis and not self._should_analyze():
+            return None
+        
         # Analyze window
         return self.analyze_current_window()
     
@@ -493,6 +505,10 @@ class StreamingProcessor:
         start_time = time.time()
         
         try:
+            # Pick up newly activated models between windows
+            if self.config.enable_model_hot_swap and self.detection_engine.reload_models_if_changed():
+                self.statistics.model_reloads += 1
+            
             # Run detection
             result = self.detection_engine.detect(trades_df, group_by='user_id')
             
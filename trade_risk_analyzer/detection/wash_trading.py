@@ -419,8 +419,8 @@ class WashTradingDetector(BaseDetector):
             indicators.append(balance_score)
         
         # 2. Price consistency (trading at same prices)
-        price_std = user_trades.groupby('symbol')['price'].std().mean()
-        price_mean = user_trades.groupby('symbol')['price'].mean().mean()
+        price_std = user_trades.groupby('symbol', observed=True)['price'].std().mean()
+        price_mean = user_trades.groupby('symbol', observed=True)['price'].mean().mean()
         
         if price_mean > 0:
             price_consistency = 1 - min(1, price_std / price_mean)
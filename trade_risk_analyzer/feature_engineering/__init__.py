@@ -9,6 +9,10 @@ from trade_risk_analyzer.feature_engineering.volume_statistics import VolumeStat
 from trade_risk_analyzer.feature_engineering.temporal_patterns import TemporalPatternAnalyzer
 from trade_risk_analyzer.feature_engineering.price_impact import PriceImpactCalculator
 from trade_risk_analyzer.feature_engineering.behavioral_metrics import BehavioralMetricsCalculator
+from trade_risk_analyzer.feature_engineering.kernel import FeatureKernel
+from trade_risk_analyzer.feature_engineering.pipeline import FeaturePipeline
+from trade_risk_analyzer.feature_engineering.tdigest import TDigest
+from trade_risk_analyzer.feature_engineering.feature_store import FeatureStore
 from trade_risk_analyzer.feature_engineering.extractor import FeatureExtractor
 
 
@@ -18,5 +22,9 @@ __all__ = [
     'TemporalPatternAnalyzer',
     'PriceImpactCalculator',
     'BehavioralMetricsCalculator',
+    'FeatureKernel',
+    'FeaturePipeline',
+    'TDigest',
+    'FeatureStore',
     'FeatureExtractor',
 ]
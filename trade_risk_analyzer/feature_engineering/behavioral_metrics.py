@@ -11,6 +11,9 @@ from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 
 from trade_risk_analyzer.core.logger import get_logger
+from trade_risk_analyzer.feature_engineering.position_kernels import (
+    prepare_position_trades, track_positions, holding_time_metrics, win_loss_metrics
+)
 
 
 logger = get_logger(__name__)
@@ -42,76 +45,15 @@ class BehavioralMetricsCalculator:
         if df.empty or 'trade_type' not in df.columns:
             return pd.DataFrame()
         
-        df = df.copy()
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df['trade_type'] = df['trade_type'].str.upper()
+        positions = prepare_position_trades(df, group_by)
+        closed, holding_ns, _, _ = track_positions(
+            positions.segment_offsets, positions.side, positions.timestamps,
+            positions.prices, positions.volumes
+        )
         
-        results = []
+        metrics = holding_time_metrics(positions.codes, closed, holding_ns, positions.n_groups)
         
-        for group_id in df[group_by].unique():
-            group_df = df[df[group_by] == group_id].sort_values('timestamp')
-            
-            holding_times = []
-            
-            # Track positions for each symbol
-            for symbol in group_df['symbol'].unique():
-                symbol_df = group_df[group_df['symbol'] == symbol].sort_values('timestamp')
-                
-                # Track open positions
-                position_open_time = None
-                position_size = 0
-                
-                for _, trade in symbol_df.iterrows():
-                    if trade['trade_type'] == 'BUY':
-                        if position_size == 0:
-                            # Opening new position
-                            position_open_time = trade['timestamp']
-                        position_size += trade['volume']
-                    elif trade['trade_type'] == 'SELL':
-                        if position_size > 0 and position_open_time is not None:
-                            # Closing position (at least partially)
-                            holding_time = (trade['timestamp'] - position_open_time).total_seconds()
-                            holding_times.append(holding_time)
-                            
-                            position_size -= trade['volume']
-                            if position_size <= 0:
-                                position_size = 0
-                                position_open_time = None
-            
-            if holding_times:
-                # Convert to hours
-                holding_times_hours = np.array(holding_times) / 3600
-                
-                metrics = {
-                    group_by: group_id,
-                    'mean_holding_time_hours': np.mean(holding_times_hours),
-                    'median_holding_time_hours': np.median(holding_times_hours),
-                    'std_holding_time_hours': np.std(holding_times_hours),
-                    'min_holding_time_hours': np.min(holding_times_hours),
-                    'max_holding_time_hours': np.max(holding_times_hours),
-                    'short_term_holds_ratio': np.sum(holding_times_hours < 1) / len(holding_times_hours),  # < 1 hour
-                    'day_trading_ratio': np.sum(holding_times_hours < 24) / len(holding_times_hours),  # < 1 day
-                    'swing_trading_ratio': np.sum((holding_times_hours >= 24) & (holding_times_hours < 168)) / len(holding_times_hours),  # 1-7 days
-                    'position_count': len(holding_times)
-                }
-            else:
-                # No closed positions found
-                metrics = {
-                    group_by: group_id,
-                    'mean_holding_time_hours': 0,
-                    'median_holding_time_hours': 0,
-                    'std_holding_time_hours': 0,
-                    'min_holding_time_hours': 0,
-                    'max_holding_time_hours': 0,
-                    'short_term_holds_ratio': 0,
-                    'day_trading_ratio': 0,
-                    'swing_trading_ratio': 0,
-                    'position_count': 0
-                }
-            
-            results.append(metrics)
-        
-        result_df = pd.DataFrame(results)
+        result_df = pd.DataFrame({group_by: positions.keys, **metrics})
         self.logger.info(f"Calculated holding time statistics for {len(result_df)} groups")
         
         return result_df
@@ -133,79 +75,15 @@ class BehavioralMetricsCalculator:
         if df.empty or 'trade_type' not in df.columns:
             return pd.DataFrame()
         
-        df = df.copy()
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df['trade_type'] = df['trade_type'].str.upper()
-        
-        results = []
+        positions = prepare_position_trades(df, group_by)
+        _, _, realized, pnl = track_positions(
+            positions.segment_offsets, positions.side, positions.timestamps,
+            positions.prices, positions.volumes
+        )
         
-        for group_id in df[group_by].unique():
-            group_df = df[df[group_by] == group_id].sort_values('timestamp')
-            
-            wins = 0
-            losses = 0
-            total_profit = 0
-            total_loss = 0
-            
-            # Track positions for each symbol
-            for symbol in group_df['symbol'].unique():
-                symbol_df = group_df[group_df['symbol'] == symbol].sort_values('timestamp')
-                
-                # Track open positions
-                buy_price = 0
-                buy_volume = 0
-                
-                for _, trade in symbol_df.iterrows():
-                    if trade['trade_type'] == 'BUY':
-                        # Accumulate position
-                        total_cost = buy_price * buy_volume + trade['price'] * trade['volume']
-                        buy_volume += trade['volume']
-                        buy_price = total_cost / buy_volume if buy_volume > 0 else 0
-                    elif trade['trade_type'] == 'SELL' and buy_volume > 0:
-                        # Close position (at least partially)
-                        sell_volume = min(trade['volume'], buy_volume)
-                        pnl = (trade['price'] - buy_price) * sell_volume
-                        
-                        if pnl > 0:
-                            wins += 1
-                            total_profit += pnl
-                        elif pnl < 0:
-                            losses += 1
-                            total_loss += abs(pnl)
-                        
-                        buy_volume -= sell_volume
-                        if buy_volume <= 0:
-                            buy_price = 0
-                            buy_volume = 0
-            
-            total_trades = wins + losses
-            win_ratio = wins / total_trades if total_trades > 0 else 0
-            loss_ratio = losses / total_trades if total_trades > 0 else 0
-            
-            # Calculate profit factor (total profit / total loss)
-            profit_factor = total_profit / total_loss if total_loss > 0 else (total_profit if total_profit > 0 else 0)
-            
-            # Calculate average win/loss
-            avg_win = total_profit / wins if wins > 0 else 0
-            avg_loss = total_loss / losses if losses > 0 else 0
-            
-            metrics = {
-                group_by: group_id,
-                'win_count': wins,
-                'loss_count': losses,
-                'win_ratio': win_ratio,
-                'loss_ratio': loss_ratio,
-                'profit_factor': profit_factor,
-                'avg_win': avg_win,
-                'avg_loss': avg_loss,
-                'total_profit': total_profit,
-                'total_loss': total_loss,
-                'net_pnl': total_profit - total_loss
-            }
-            
-            results.append(metrics)
+        metrics = win_loss_metrics(positions.codes, realized, pnl, positions.n_groups)
         
-        result_df = pd.DataFrame(results)
+        result_df = pd.DataFrame({group_by: positions.keys, **metrics})
         self.logger.info(f"Calculated win/loss ratios for {len(result_df)} groups")
         
         return result_df
@@ -18,6 +18,9 @@ from trade_risk_analyzer.feature_engineering.volume_statistics import VolumeStat
 from trade_risk_analyzer.feature_engineering.temporal_patterns import TemporalPatternAnalyzer
 from trade_risk_analyzer.feature_engineering.price_impact import PriceImpactCalculator
 from trade_risk_analyzer.feature_engineering.behavioral_metrics import BehavioralMetricsCalculator
+from trade_risk_analyzer.feature_engineering.kernel import FeatureKernel
+from trade_risk_analyzer.feature_engineering.pipeline import FeaturePipeline
+from trade_risk_analyzer.feature_engineering.feature_store import FeatureStore
 
 
 logger = get_logger(__name__)
@@ -29,23 +32,36 @@ class FeatureExtractor(BaseFeatureExtractor):
     """
     
     def __init__(self, time_windows: Optional[List[str]] = None,
-                 scaler_type: str = 'standard'):
+                 scaler_type: str = 'standard',
+                 use_kernel: bool = True,
+                 burst_window: str = '5min',
+                 quote_stuffing_threshold: int = 100):
         """
         Initialize feature extractor
         
         Args:
             time_windows: List of time windows for calculations (e.g., ['1H', '24H', '7D'])
             scaler_type: Type of scaler ('standard', 'minmax', 'robust', or None)
+            use_kernel: Compute features in a single sorted pass instead of
+                merging the per-calculator outputs
+            burst_window: Time bin for burst detection
+            quote_stuffing_threshold: Orders per minute counted as quote stuffing
         """
         self.time_windows = time_windows or ['1H', '24H', '7D']
         self.scaler_type = scaler_type
+        self.use_kernel = use_kernel
         
         # Initialize sub-extractors
-        self.frequency_calculator = FrequencyMetricsCalculator(self.time_windows)
+        self.frequency_calculator = FrequencyMetricsCalculator(
+            self.time_windows,
+            burst_window=burst_window,
+            quote_stuffing_threshold=quote_stuffing_threshold
+        )
         self.volume_calculator = VolumeStatisticsCalculator(self.time_windows)
         self.temporal_analyzer = TemporalPatternAnalyzer()
         self.price_calculator = PriceImpactCalculator()
         self.behavioral_calculator = BehavioralMetricsCalculator()
+        self.kernel = FeatureKernel(self.time_windows, frequency_calculator=self.frequency_calculator)
         
         # Initialize scaler
         self.scaler = self._create_scaler()
@@ -54,6 +70,27 @@ class FeatureExtractor(BaseFeatureExtractor):
         self.logger = logger
         self._feature_names = None
     
+    @classmethod
+    def from_config(cls, detection_config=None, **kwargs) -> 'FeatureExtractor':
+        """
+        Create a feature extractor from the detection section of config.yaml
+        
+        Args:
+            detection_config: DetectionConfig (default: the global configuration)
+            **kwargs: Other FeatureExtractor arguments (scaler_type, use_kernel)
+        
+        Returns:
+            FeatureExtractor using the configured feature windows, burst
+            window and quote stuffing threshold
+        """
+        calculator = FrequencyMetricsCalculator.from_config(detection_config)
+        return cls(
+            time_windows=calculator.time_windows,
+            burst_window=calculator.burst_window,
+            quote_stuffing_threshold=calculator.quote_stuffing_threshold,
+            **kwargs
+        )
+    
     def extract_features(self, trades: pd.DataFrame, 
                         group_by: str = 'user_id',
                         include_frequency: bool = True,
@@ -83,6 +120,74 @@ class FeatureExtractor(BaseFeatureExtractor):
         if trades.empty:
             return pd.DataFrame()
         
+        if self.use_kernel and self.kernel.supports(trades):
+            result_df = self.kernel.compute(
+                trades, group_by,
+                include_frequency=include_frequency,
+                include_volume=include_volume,
+                include_temporal=include_temporal,
+                include_price=include_price,
+                include_behavioral=include_behavioral,
+                market_data=market_data
+            )
+        else:
+            result_df = self._extract_with_calculators(
+                trades, group_by,
+                include_frequency=include_frequency,
+                include_volume=include_volume,
+                include_temporal=include_temporal,
+                include_price=include_price,
+                include_behavioral=include_behavioral,
+                market_data=market_data
+            )
+        
+        if result_df.empty:
+            return result_df
+        
+        # Fill NaN values with 0
+        result_df = result_df.fillna(0)
+        
+        self.logger.info(f"Extracted {len(result_df.columns) - 1} features for {len(result_df)} groups")
+        
+        return result_df
+    
+    def extract_from_store(self, store: FeatureStore,
+                           entities: Optional[List[Any]] = None) -> pd.DataFrame:
+        """
+        Read features maintained incrementally by a feature store
+        
+        Avoids replaying the trade history: the cost is proportional to the
+        number of entities rather than the number of trades.
+        
+        Args:
+            store: Feature store updated with the trade batches
+            entities: Entities to read (default: all)
+        
+        Returns:
+            DataFrame with the store's features, one row per entity
+        """
+        if store.time_windows != self.time_windows:
+            self.logger.warning(
+                f"Feature store windows {store.time_windows} differ from extractor windows {self.time_windows}"
+            )
+        
+        result_df = store.get_features(entities)
+        if result_df.empty:
+            return result_df
+        
+        self.logger.info(f"Read {len(result_df.columns) - 1} features for {len(result_df)} entities from feature store")
+        
+        return result_df.fillna(0)
+    
+    def _extract_with_calculators(self, trades: pd.DataFrame,
+                                  group_by: str,
+                                  include_frequency: bool,
+                                  include_volume: bool,
+                                  include_temporal: bool,
+                                  include_price: bool,
+                                  include_behavioral: bool,
+                                  market_data: Optional[pd.DataFrame]) -> pd.DataFrame:
+        """Extract features by merging the outputs of each calculator"""
         # Start with group identifiers
         feature_dfs = []
         
@@ -133,42 +238,13 @@ class FeatureExtractor(BaseFeatureExtractor):
             if dup_cols:
                 result_df = result_df.drop(columns=dup_cols)
         
-        # Fill NaN values with 0
-        result_df = result_df.fillna(0)
-        
-        self.logger.info(f"Extracted {len(result_df.columns) - 1} features for {len(result_df)} groups")
-        
         return result_df
     
     def _extract_frequency_features(self, trades: pd.DataFrame, 
                                    group_by: str) -> pd.DataFrame:
         """Extract frequency-based features"""
-        features = []
-        
-        # Trades per window
-        trades_per_window = self.frequency_calculator.calculate_trades_per_window(trades, group_by)
-        if not trades_per_window.empty:
-            features.append(trades_per_window)
-        
-        # Burst metrics
-        burst_metrics = self.frequency_calculator.calculate_burst_metrics(trades, group_by=group_by)
-        if not burst_metrics.empty:
-            features.append(burst_metrics)
-        
-        # Quote stuffing detection
-        quote_stuffing = self.frequency_calculator.detect_quote_stuffing(trades, group_by=group_by)
-        if not quote_stuffing.empty:
-            features.append(quote_stuffing)
-        
-        # Merge frequency features
-        if not features:
-            return pd.DataFrame()
-        
-        result = features[0]
-        for df in features[1:]:
-            result = result.merge(df, on=group_by, how='outer')
-        
-        return result
+        # Window counts, bursts and quote stuffing from one sort of the timestamps
+        return self.frequency_calculator.calculate_frequency_metrics(trades, group_by)
     
     def _extract_volume_features(self, trades: pd.DataFrame,
                                 group_by: str) -> pd.DataFrame:
@@ -476,6 +552,32 @@ class FeatureExtractor(BaseFeatureExtractor):
         
         return result_df
     
+    def create_pipeline(self) -> FeaturePipeline:
+        """
+        Create an unfitted feature pipeline with this extractor's settings
+        
+        Returns:
+            FeaturePipeline (e.g. for ModelTrainer.train_all_models)
+        """
+        return FeaturePipeline(
+            scaler_type=self.scaler_type,
+            time_windows=self.time_windows
+        )
+    
+    def fit_pipeline(self, features_df: pd.DataFrame,
+                     exclude_columns: Optional[List[str]] = None) -> FeaturePipeline:
+        """
+        Fit a persistable feature pipeline (schema and scaler) on features
+        
+        Args:
+            features_df: DataFrame with extracted features
+            exclude_columns: Columns to exclude (e.g., identifiers)
+        
+        Returns:
+            Fitted FeaturePipeline
+        """
+        return self.create_pipeline().fit(features_df, exclude_columns=exclude_columns)
+    
     def extract_and_build(self, trades: pd.DataFrame,
                          group_by: str = 'user_id',
                          normalize: bool = True,
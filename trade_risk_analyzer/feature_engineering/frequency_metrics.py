@@ -10,7 +10,12 @@ import numpy as np
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 
+from pandas.tseries.frequencies import to_offset
+
 from trade_risk_analyzer.core.logger import get_logger
+from trade_risk_analyzer.feature_engineering.time_segments import (
+    NS_PER_MINUTE, NS_PER_HOUR, GroupTimes, coarsen_runs
+)
 
 
 logger = get_logger(__name__)
@@ -19,18 +24,93 @@ logger = get_logger(__name__)
 class FrequencyMetricsCalculator:
     """
     Calculates frequency-based features from trade data
+    
+    Timestamps are sorted once per group into int64 arrays: window counts
+    use a segmented searchsorted and quote stuffing and burst detection
+    share one per-minute histogram.
     """
     
-    def __init__(self, time_windows: Optional[List[str]] = None):
+    def __init__(self, time_windows: Optional[List[str]] = None,
+                 burst_window: str = '5min',
+                 quote_stuffing_threshold: int = 100):
         """
         Initialize frequency metrics calculator
         
         Args:
             time_windows: List of time windows for calculations (e.g., ['1H', '24H', '7D'])
+            burst_window: Default time bin for burst detection
+            quote_stuffing_threshold: Default orders per minute for quote stuffing
         """
         self.time_windows = time_windows or ['1H', '24H', '7D']
+        self.burst_window = burst_window
+        self.quote_stuffing_threshold = quote_stuffing_threshold
         self.logger = logger
     
+    @classmethod
+    def from_config(cls, detection_config=None) -> 'FrequencyMetricsCalculator':
+        """
+        Create a calculator from the detection section of config.yaml
+        
+        Args:
+            detection_config: DetectionConfig (default: the global configuration)
+        
+        Returns:
+            FrequencyMetricsCalculator using the configured feature windows,
+            burst window and quote stuffing threshold
+        """
+        if detection_config is None:
+            from trade_risk_analyzer.core.config import get_config
+            detection_config = get_config().detection
+        
+        thresholds = detection_config.thresholds
+        return cls(
+            time_windows=list(detection_config.feature_windows),
+            burst_window=thresholds.burst_window,
+            quote_stuffing_threshold=thresholds.quote_stuffing_per_minute
+        )
+    
+    def calculate_frequency_metrics(self, df: pd.DataFrame,
+                                    group_by: str = 'user_id',
+                                    burst_window: Optional[str] = None,
+                                    threshold_per_minute: Optional[int] = None) -> pd.DataFrame:
+        """
+        Calculate window counts, burst metrics and quote stuffing together
+        
+        Equivalent to merging the outputs of calculate_trades_per_window,
+        calculate_burst_metrics and detect_quote_stuffing, from a single
+        sort of the timestamps.
+        
+        Args:
+            df: DataFrame with trade data
+            group_by: Column to group by ('user_id' or 'symbol')
+            burst_window: Time window for burst detection (default: configured)
+            threshold_per_minute: Threshold for quote stuffing (default: configured)
+        
+        Returns:
+            DataFrame with frequency metrics per group
+        """
+        burst_window = burst_window or self.burst_window
+        threshold_per_minute = threshold_per_minute or self.quote_stuffing_threshold
+        
+        if df.empty:
+            return pd.DataFrame()
+        
+        times = GroupTimes.build(df, group_by)
+        if times.n_groups == 0:
+            return pd.DataFrame()
+        
+        minute_runs = times.bin_histogram(NS_PER_MINUTE)
+        
+        metrics = {group_by: times.keys}
+        metrics.update(self._window_metrics(times))
+        metrics.update(self._burst_metrics(times, self._burst_runs(times, burst_window, minute_runs)))
+        metrics.update(self._stuffing_metrics(times, minute_runs, threshold_per_minute))
+        
+        result_df = pd.DataFrame(metrics)
+        self.logger.info(f"Calculated frequency metrics for {len(result_df)} groups")
+        
+        return result_df
+    
     def calculate_trades_per_window(self, df: pd.DataFrame, 
                                     group_by: str = 'user_id') -> pd.DataFrame:
         """
@@ -48,51 +128,49 @@ class FrequencyMetricsCalculator:
         if df.empty:
             return pd.DataFrame()
         
-        # Ensure timestamp is datetime
-        df = df.copy()
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        times = GroupTimes.build(df, group_by)
         
-        results = []
+        metrics = {group_by: times.keys}
+        metrics.update(self._window_metrics(times))
         
-        for group_id in df[group_by].unique():
-            group_df = df[df[group_by] == group_id].sort_values('timestamp')
-            
-            metrics = {group_by: group_id}
-            
-            # Calculate for each time window
-            for window in self.time_windows:
-                # Get the most recent timestamp
-                latest_time = group_df['timestamp'].max()
-                
-                # Calculate window start time
-                window_start = self._get_window_start(latest_time, window)
-                
-                # Count trades in window
-                trades_in_window = len(group_df[group_df['timestamp'] >= window_start])
-                
-                # Calculate rate (trades per hour)
-                window_hours = self._window_to_hours(window)
-                trades_per_hour = trades_in_window / window_hours if window_hours > 0 else 0
-                
-                metrics[f'trades_count_{window}'] = trades_in_window
-                metrics[f'trades_per_hour_{window}'] = trades_per_hour
-            
-            # Calculate overall statistics
-            metrics['total_trades'] = len(group_df)
-            metrics['first_trade'] = group_df['timestamp'].min()
-            metrics['last_trade'] = group_df['timestamp'].max()
-            
-            # Calculate average trades per day over entire period
-            time_span = (group_df['timestamp'].max() - group_df['timestamp'].min()).total_seconds() / 86400
-            metrics['avg_trades_per_day'] = len(group_df) / time_span if time_span > 0 else 0
-            
-            results.append(metrics)
-        
-        result_df = pd.DataFrame(results)
+        result_df = pd.DataFrame(metrics)
         self.logger.info(f"Calculated frequency metrics for {len(result_df)} groups")
         
         return result_df
     
+    def _window_metrics(self, times: GroupTimes) -> Dict[str, np.ndarray]:
+        """
+        Trades in each window ending at the group's latest trade
+        
+        Args:
+            times: Sorted group timestamps
+        
+        Returns:
+            Dictionary of per-group window and activity span metrics
+        """
+        metrics = {}
+        for window in self.time_windows:
+            window_hours = self._window_to_hours(window)
+            trades_in_window = times.trailing_counts(int(round(window_hours * NS_PER_HOUR)))
+            
+            metrics[f'trades_count_{window}'] = trades_in_window
+            metrics[f'trades_per_hour_{window}'] = (
+                trades_in_window / window_hours if window_hours > 0 else 0
+            )
+        
+        first, last = times.starts, times.last
+        
+        # Timedelta.total_seconds() resolution (microseconds)
+        span_days = (((times.elapsed[last] - times.elapsed[first]) // 1000) / 1e6) / 86400
+        
+        metrics['total_trades'] = times.counts
+        metrics['first_trade'] = times.timestamps.iloc[first].reset_index(drop=True)
+        metrics['last_trade'] = times.timestamps.iloc[last].reset_index(drop=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            metrics['avg_trades_per_day'] = np.where(span_days > 0, times.counts / span_days, 0)
+        
+        return metrics
+    
     def calculate_order_to_trade_ratio(self, trades_df: pd.DataFrame, 
                                        orders_df: Optional[pd.DataFrame] = None,
                                        group_by: str = 'user_id') -> pd.DataFrame:
@@ -196,7 +274,7 @@ class FrequencyMetricsCalculator:
         return result_df
     
     def detect_quote_stuffing(self, df: pd.DataFrame,
-                             threshold_per_minute: int = 100,
+                             threshold_per_minute: Optional[int] = None,
                              group_by: str = 'user_id') -> pd.DataFrame:
         """
         Detect quote stuffing patterns (excessive orders per minute)
@@ -204,119 +282,154 @@ class FrequencyMetricsCalculator:
         Args:
             df: DataFrame with order/trade data
             threshold_per_minute: Threshold for quote stuffing detection
+                (default: configured threshold)
             group_by: Column to group by
             
         Returns:
             DataFrame with quote stuffing indicators
         """
+        threshold_per_minute = threshold_per_minute or self.quote_stuffing_threshold
         self.logger.info(f"Detecting quote stuffing (threshold: {threshold_per_minute}/min)")
         
         if df.empty:
             return pd.DataFrame()
         
-        df = df.copy()
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        times = GroupTimes.build(df, group_by)
         
-        results = []
+        metrics = {group_by: times.keys}
+        metrics.update(self._stuffing_metrics(
+            times, times.bin_histogram(NS_PER_MINUTE), threshold_per_minute
+        ))
         
-        for group_id in df[group_by].unique():
-            group_df = df[df[group_by] == group_id].sort_values('timestamp')
-            
-            # Create 1-minute bins
-            group_df['minute_bin'] = group_df['timestamp'].dt.floor('1min')
-            
-            # Count orders per minute
-            orders_per_minute = group_df.groupby('minute_bin').size()
-            
-            # Calculate statistics
-            max_orders_per_minute = orders_per_minute.max() if len(orders_per_minute) > 0 else 0
-            avg_orders_per_minute = orders_per_minute.mean() if len(orders_per_minute) > 0 else 0
-            
-            # Detect quote stuffing
-            stuffing_minutes = (orders_per_minute >= threshold_per_minute).sum()
-            is_quote_stuffing = stuffing_minutes > 0
-            
-            # Calculate stuffing intensity
-            if len(orders_per_minute) > 0:
-                stuffing_intensity = (orders_per_minute >= threshold_per_minute).sum() / len(orders_per_minute)
-            else:
-                stuffing_intensity = 0
-            
-            results.append({
-                group_by: group_id,
-                'max_orders_per_minute': max_orders_per_minute,
-                'avg_orders_per_minute': avg_orders_per_minute,
-                'quote_stuffing_detected': is_quote_stuffing,
-                'quote_stuffing_minutes': stuffing_minutes,
-                'quote_stuffing_intensity': stuffing_intensity,
-                'total_minutes_active': len(orders_per_minute)
-            })
-        
-        result_df = pd.DataFrame(results)
+        result_df = pd.DataFrame(metrics)
         self.logger.info(f"Detected quote stuffing for {len(result_df)} groups")
         
         return result_df
     
+    def _stuffing_metrics(self, times: GroupTimes,
+                          minute_runs: Tuple[np.ndarray, np.ndarray, np.ndarray],
+                          threshold_per_minute: int) -> Dict[str, np.ndarray]:
+        """
+        Quote stuffing indicators from the per-minute histogram
+        
+        Args:
+            times: Sorted group timestamps
+            minute_runs: (group codes, minute bins, counts) of active minutes
+            threshold_per_minute: Threshold for quote stuffing detection
+        
+        Returns:
+            Dictionary of per-group quote stuffing metrics
+        """
+        n_groups = times.n_groups
+        run_codes, _, run_sizes = minute_runs
+        
+        minutes_active = np.bincount(run_codes, minlength=n_groups)
+        stuffing_minutes = np.bincount(
+            run_codes[run_sizes >= threshold_per_minute], minlength=n_groups
+        )
+        max_orders = np.zeros(n_groups, dtype=np.int64)
+        np.maximum.at(max_orders, run_codes, run_sizes)
+        
+        return {
+            'max_orders_per_minute': max_orders,
+            'avg_orders_per_minute': np.bincount(run_codes, run_sizes, n_groups) / minutes_active,
+            'quote_stuffing_detected': stuffing_minutes > 0,
+            'quote_stuffing_minutes': stuffing_minutes,
+            'quote_stuffing_intensity': stuffing_minutes / minutes_active,
+            'total_minutes_active': minutes_active
+        }
+    
     def calculate_burst_metrics(self, df: pd.DataFrame,
-                                burst_window: str = '5min',
+                                burst_window: Optional[str] = None,
                                 group_by: str = 'user_id') -> pd.DataFrame:
         """
         Calculate burst trading metrics (sudden spikes in activity)
         
         Args:
             df: DataFrame with trade data
-            burst_window: Time window for burst detection
+            burst_window: Time window for burst detection (default: configured window)
             group_by: Column to group by
             
         Returns:
             DataFrame with burst metrics
         """
+        burst_window = burst_window or self.burst_window
         self.logger.info(f"Calculating burst metrics (window: {burst_window})")
         
         if df.empty:
             return pd.DataFrame()
         
-        df = df.copy()
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        times = GroupTimes.build(df, group_by)
         
-        results = []
-        
-        for group_id in df[group_by].unique():
-            group_df = df[df[group_by] == group_id].sort_values('timestamp')
-            
-            # Create time bins
-            group_df['time_bin'] = group_df['timestamp'].dt.floor(burst_window)
-            
-            # Count trades per bin
-            trades_per_bin = group_df.groupby('time_bin').size()
-            
-            if len(trades_per_bin) == 0:
-                continue
-            
-            # Calculate statistics
-            mean_trades = trades_per_bin.mean()
-            std_trades = trades_per_bin.std()
-            max_trades = trades_per_bin.max()
-            
-            # Detect bursts (trades > mean + 2*std)
-            burst_threshold = mean_trades + 2 * std_trades if std_trades > 0 else mean_trades * 2
-            burst_bins = (trades_per_bin > burst_threshold).sum()
-            
-            results.append({
-                group_by: group_id,
-                'mean_trades_per_window': mean_trades,
-                'std_trades_per_window': std_trades,
-                'max_trades_per_window': max_trades,
-                'burst_threshold': burst_threshold,
-                'burst_windows_detected': burst_bins,
-                'burst_ratio': burst_bins / len(trades_per_bin) if len(trades_per_bin) > 0 else 0
-            })
+        metrics = {group_by: times.keys}
+        metrics.update(self._burst_metrics(times, self._burst_runs(times, burst_window)))
         
-        result_df = pd.DataFrame(results)
+        result_df = pd.DataFrame(metrics)
         self.logger.info(f"Calculated burst metrics for {len(result_df)} groups")
         
         return result_df
     
+    def _burst_runs(self, times: GroupTimes, burst_window: str,
+                    minute_runs: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+                    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Per-group histogram over burst window bins
+        
+        Whole-minute burst windows are merged from the per-minute histogram
+        when it is available instead of re-binning the timestamps.
+        
+        Args:
+            times: Sorted group timestamps
+            burst_window: Time window for burst detection
+            minute_runs: Optional per-minute histogram to reuse
+        
+        Returns:
+            Tuple of (group codes, bins, counts) of the non-empty bins
+        """
+        burst_ns = to_offset(burst_window).nanos
+        if minute_runs is not None and burst_ns % NS_PER_MINUTE == 0:
+            return coarsen_runs(*minute_runs, burst_ns // NS_PER_MINUTE)
+        return times.bin_histogram(burst_ns)
+    
+    def _burst_metrics(self, times: GroupTimes,
+                       burst_runs: Tuple[np.ndarray, np.ndarray, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Burst statistics from the burst window histogram
+        
+        Args:
+            times: Sorted group timestamps
+            burst_runs: (group codes, bins, counts) of the non-empty bins
+        
+        Returns:
+            Dictionary of per-group burst metrics
+        """
+        n_groups = times.n_groups
+        run_codes, _, run_sizes = burst_runs
+        
+        bins_per_group = np.bincount(run_codes, minlength=n_groups)
+        mean_trades = np.bincount(run_codes, run_sizes, n_groups) / bins_per_group
+        
+        # Sample standard deviation, NaN for a single bin
+        squared = np.bincount(run_codes, (run_sizes - mean_trades[run_codes]) ** 2, n_groups)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            std_trades = np.where(bins_per_group > 1, np.sqrt(squared / (bins_per_group - 1)), np.nan)
+        
+        max_trades = np.zeros(n_groups, dtype=np.int64)
+        np.maximum.at(max_trades, run_codes, run_sizes)
+        
+        # Detect bursts (trades > mean + 2*std)
+        burst_threshold = np.where(std_trades > 0, mean_trades + 2 * std_trades, mean_trades * 2)
+        burst_bins = np.bincount(run_codes[run_sizes > burst_threshold[run_codes]], minlength=n_groups)
+        
+        return {
+            'mean_trades_per_window': mean_trades,
+            'std_trades_per_window': std_trades,
+            'max_trades_per_window': max_trades,
+            'burst_threshold': burst_threshold,
+            'burst_windows_detected': burst_bins,
+            'burst_ratio': burst_bins / bins_per_group
+        }
+    
     def _get_window_start(self, end_time: pd.Timestamp, window: str) -> pd.Timestamp:
         """
         Calculate window start time from end time and window string
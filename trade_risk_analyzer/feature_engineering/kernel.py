@@ -0,0 +1,1474 @@
+"""
+Feature Kernel
+
+Single-pass computation of the per-entity feature matrix. Trades are sorted
+once by (entity, timestamp) and every aggregate produced by the frequency,
+volume, temporal, price impact and behavioral calculators is computed over
+contiguous entity segments with groupby/NumPy reductions, instead of one
+boolean mask and sub-frame per entity.
+"""
+
+import pandas as pd
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+from scipy import stats
+from pandas.tseries.frequencies import to_offset
+
+from trade_risk_analyzer.core.logger import get_logger
+from trade_risk_analyzer.feature_engineering.frequency_metrics import FrequencyMetricsCalculator
+from trade_risk_analyzer.feature_engineering.price_impact import PriceImpactCalculator
+from trade_risk_analyzer.feature_engineering.position_kernels import (
+    trade_sides, segment_offsets, track_positions, holding_time_metrics, win_loss_metrics
+)
+from trade_risk_analyzer.feature_engineering.time_segments import (
+    NS_PER_SECOND, NS_PER_MINUTE, NS_PER_HOUR, NS_PER_DAY, group_searchsorted
+)
+
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class _TradeSegments:
+    """
+    Trades sorted by entity, with per-entity segment boundaries
+    
+    Arrays are in time order (entity, timestamp); `row_order` keeps the
+    original row order within each entity for the features that depend on it.
+    """
+    trades: pd.DataFrame
+    keys: np.ndarray              # Sorted entity keys, indexed by entity code
+    counts: np.ndarray            # Trades per entity
+    starts: np.ndarray            # First sorted position of each entity
+    codes: np.ndarray             # Entity code of each sorted trade
+    time_order: np.ndarray        # Frame positions sorted by (entity, timestamp)
+    row_order: np.ndarray         # Frame positions sorted by entity, stable
+    timestamps: pd.Series         # Parsed timestamps in frame order
+    elapsed: np.ndarray           # UTC nanoseconds in time order
+    wall: np.ndarray              # Wall-clock nanoseconds in time order
+    wall_monotonic: bool
+    _runs_cache: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]] = field(default_factory=dict)
+    _symbol_cache: Optional[Tuple[np.ndarray, np.ndarray]] = None
+    
+    @classmethod
+    def build(cls, trades: pd.DataFrame, group_by: str) -> '_TradeSegments':
+        """
+        Sort trades once by entity and timestamp
+        
+        Args:
+            trades: Trade data
+            group_by: Entity column
+        
+        Returns:
+            Sorted trade segments (trades with a missing entity are dropped)
+        """
+        timestamps = pd.to_datetime(trades['timestamp']).reset_index(drop=True)
+        if timestamps.dt.tz is not None:
+            elapsed = timestamps.dt.tz_convert(None)
+            wall = timestamps.dt.tz_localize(None)
+        else:
+            elapsed = wall = timestamps
+        elapsed = elapsed.to_numpy(dtype='datetime64[ns]').view(np.int64)
+        wall = wall.to_numpy(dtype='datetime64[ns]').view(np.int64)
+        
+        frame_codes, keys = pd.factorize(trades[group_by], sort=True)
+        positions = np.flatnonzero(frame_codes >= 0)
+        
+        time_order = positions[np.lexsort((elapsed[positions], frame_codes[positions]))]
+        row_order = positions[np.argsort(frame_codes[positions], kind='stable')]
+        
+        codes = frame_codes[time_order]
+        counts = np.bincount(codes, minlength=len(keys))
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64)
+        
+        wall_sorted = wall[time_order]
+        same_entity = codes[1:] == codes[:-1]
+        wall_monotonic = bool(np.all((wall_sorted[1:] >= wall_sorted[:-1]) | ~same_entity))
+        
+        return cls(
+            trades=trades,
+            keys=np.asarray(keys),
+            counts=counts,
+            starts=starts,
+            codes=codes,
+            time_order=time_order,
+            row_order=row_order,
+            timestamps=timestamps,
+            elapsed=elapsed[time_order],
+            wall=wall_sorted,
+            wall_monotonic=wall_monotonic
+        )
+    
+    @property
+    def n_groups(self) -> int:
+        return len(self.keys)
+    
+    @property
+    def last(self) -> np.ndarray:
+        return self.starts + self.counts - 1
+    
+    @property
+    def is_start(self) -> np.ndarray:
+        flags = np.zeros(len(self.codes), dtype=bool)
+        flags[self.starts] = True
+        return flags
+    
+    def column(self, name: str, order: str = 'time') -> np.ndarray:
+        """
+        Get a trade column as an array in time or row order
+        
+        Args:
+            name: Column name
+            order: 'time' (entity, timestamp) or 'row' (entity, original row)
+        
+        Returns:
+            Column values
+        """
+        positions = self.time_order if order == 'time' else self.row_order
+        return self.trades[name].to_numpy()[positions]
+    
+    def timestamps_at(self, sorted_positions: np.ndarray) -> pd.Series:
+        """Get parsed timestamps at time-ordered positions"""
+        return self.timestamps.iloc[self.time_order[sorted_positions]].reset_index(drop=True)
+    
+    def window_starts(self, window_ns: int, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Find the start of the trailing time window (t - window, t] of each trade
+        
+        Args:
+            window_ns: Window length in nanoseconds
+            rows: Time-ordered positions to query (all trades if None)
+        
+        Returns:
+            First position within the same entity inside each window
+        """
+        rows = np.arange(len(self.codes)) if rows is None else rows
+        return group_searchsorted(
+            self.codes, self.elapsed,
+            self.codes[rows], self.elapsed[rows] - window_ns,
+            side='right'
+        )
+    
+    def runs(self, bins: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Count trades per (entity, bin)
+        
+        Args:
+            bins: Bin index of each time-ordered trade
+        
+        Returns:
+            Tuple of (entity codes, bins, sizes) for each non-empty bin,
+            sorted by entity then bin
+        """
+        codes = self.codes
+        if not self.wall_monotonic:
+            order = np.lexsort((bins, codes))
+            bins = bins[order]
+        
+        boundary = np.ones(len(bins), dtype=bool)
+        boundary[1:] = (codes[1:] != codes[:-1]) | (bins[1:] != bins[:-1])
+        run_starts = np.flatnonzero(boundary)
+        run_sizes = np.diff(np.append(run_starts, len(bins)))
+        
+        return codes[run_starts], bins[run_starts], run_sizes
+    
+    def bin_runs(self, bin_ns: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Count trades per (entity, wall-clock time bin of bin_ns)"""
+        if bin_ns not in self._runs_cache:
+            self._runs_cache[bin_ns] = self.runs(np.floor_divide(self.wall, bin_ns))
+        return self._runs_cache[bin_ns]
+    
+    def symbol_order(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Order trades by (entity, symbol, timestamp)
+        
+        Returns:
+            Tuple of (time-ordered positions, segment start flags); trades
+            without a symbol are left out
+        """
+        if self._symbol_cache is None:
+            symbol_codes, _ = pd.factorize(self.column('symbol'))
+            valid = np.flatnonzero(symbol_codes >= 0)
+            order = valid[np.lexsort((symbol_codes[valid], self.codes[valid]))]
+            
+            codes = self.codes[order]
+            symbols = symbol_codes[order]
+            new_segment = np.ones(len(order), dtype=bool)
+            new_segment[1:] = (codes[1:] != codes[:-1]) | (symbols[1:] != symbols[:-1])
+            
+            self._symbol_cache = (order, new_segment)
+        return self._symbol_cache
+
+
+def _sliding_reduce(values: np.ndarray, starts: np.ndarray,
+                    op: Callable[[np.ndarray, np.ndarray], np.ndarray]) -> np.ndarray:
+    """
+    Reduce each trailing window values[starts[i]:i + 1] with an idempotent op
+    
+    Uses a sparse table, so every window is answered with two lookups.
+    
+    Args:
+        values: Values in window order
+        starts: Window start of each position
+        op: Binary idempotent reduction (e.g. np.fmax, np.fmin)
+    
+    Returns:
+        Reduced value of each window
+    """
+    n = len(values)
+    if n == 0:
+        return values.copy()
+    
+    index = np.arange(n)
+    lengths = index - starts + 1
+    levels = [values]
+    width = 1
+    while width * 2 <= lengths.max():
+        previous = levels[-1]
+        level = previous.copy()
+        level[:n - width] = op(previous[:n - width], previous[width:])
+        levels.append(level)
+        width *= 2
+    table = np.stack(levels)
+    
+    level_index = np.floor(np.log2(lengths)).astype(np.int64)
+    span = np.left_shift(1, level_index)
+    return op(table[level_index, starts], table[level_index, index - span + 1])
+
+
+def _grouped(values: np.ndarray, codes: np.ndarray, n_groups: int,
+             how: str, fill_value: float = np.nan) -> np.ndarray:
+    """
+    Aggregate values per entity code with a groupby reduction
+    
+    Args:
+        values: Values to aggregate
+        codes: Entity code of each value
+        n_groups: Number of entities
+        how: Aggregation name ('max', 'min', 'median', 'std', ...)
+        fill_value: Value for entities without any values
+    
+    Returns:
+        Aggregated value per entity
+    """
+    result = pd.Series(values).groupby(codes).agg(how)
+    return result.reindex(range(n_groups), fill_value=fill_value).to_numpy()
+
+
+def _grouped_std(values: np.ndarray, codes: np.ndarray, n_groups: int,
+                 ddof: int = 1) -> np.ndarray:
+    """Standard deviation per entity code (NaN for too few values)"""
+    result = pd.Series(values).groupby(codes).std(ddof=ddof)
+    return result.reindex(range(n_groups)).to_numpy()
+
+
+def _segment_gini(values: np.ndarray, codes: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """
+    Gini coefficient per entity
+    
+    Args:
+        values: Values, grouped by entity code
+        codes: Entity code of each value (sorted)
+        counts: Number of values per entity
+    
+    Returns:
+        Gini coefficient per entity
+    """
+    n_groups = len(counts)
+    order = np.lexsort((values, codes))
+    sorted_values = values[order]
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    rank = np.arange(len(values)) - starts[codes] + 1
+    
+    total = np.bincount(codes, sorted_values, n_groups)
+    weighted = np.bincount(codes, rank * sorted_values, n_groups)
+    return (2 * weighted) / (counts * total) - (counts + 1) / counts
+
+
+def _scalar_seconds(nanoseconds: np.ndarray) -> np.ndarray:
+    """Seconds as given by Timedelta.total_seconds() (microsecond resolution)"""
+    return (nanoseconds // 1000) / 1e6
+
+
+def shannon_entropy(probabilities: np.ndarray) -> np.ndarray:
+    """Shannon entropy (bits) of each row of a probability matrix"""
+    safe = np.where(probabilities > 0, probabilities, 1.0)
+    return -np.sum(np.where(probabilities > 0, probabilities * np.log2(safe), 0.0), axis=1)
+
+
+def hour_distribution_metrics(hour_counts: np.ndarray) -> pd.DataFrame:
+    """
+    Hour-of-day distribution metrics from per-entity hour histograms
+    
+    Args:
+        hour_counts: Trade counts of shape (n_entities, 24)
+    
+    Returns:
+        Feature frame with one row per histogram row
+    """
+    n_groups = len(hour_counts)
+    counts = hour_counts.sum(axis=1)
+    
+    hour_entropy = shannon_entropy(hour_counts / counts[:, None]) / np.log2(24)
+    business_hours_ratio = hour_counts[:, 9:18].sum(axis=1) / counts
+    
+    metrics = pd.DataFrame({
+        'peak_trading_hour': hour_counts.argmax(axis=1),
+        'peak_hour_ratio': hour_counts.max(axis=1) / counts,
+        'hour_entropy': hour_entropy,
+        'hour_concentration': 1 - hour_entropy,
+        'active_hours_count': (hour_counts > 0).sum(axis=1),
+        'business_hours_ratio': business_hours_ratio,
+        'off_hours_ratio': 1 - business_hours_ratio
+    })
+    
+    # Top hours by trade count, ties broken by earlier hour
+    rows = np.arange(n_groups)
+    top_hours = np.argsort(-hour_counts, axis=1, kind='stable')[:, :3]
+    for i in range(3):
+        top_count = hour_counts[rows, top_hours[:, i]]
+        present = top_count > 0
+        if not present.any():
+            break
+        metrics[f'top_{i + 1}_hour'] = pd.Series(top_hours[:, i]).where(present)
+        metrics[f'top_{i + 1}_hour_ratio'] = pd.Series(top_count / counts).where(present)
+    
+    return metrics
+
+
+def day_distribution_metrics(day_counts: np.ndarray) -> pd.DataFrame:
+    """
+    Day-of-week distribution metrics from per-entity weekday histograms
+    
+    Args:
+        day_counts: Trade counts of shape (n_entities, 7), Monday first
+    
+    Returns:
+        Feature frame with one row per histogram row
+    """
+    counts = day_counts.sum(axis=1)
+    
+    day_entropy = shannon_entropy(day_counts / counts[:, None]) / np.log2(7)
+    weekday_ratio = day_counts[:, :5].sum(axis=1) / counts
+    
+    return pd.DataFrame({
+        'peak_trading_day': day_counts.argmax(axis=1),
+        'peak_day_ratio': day_counts.max(axis=1) / counts,
+        'day_entropy': day_entropy,
+        'day_concentration': 1 - day_entropy,
+        'active_days_count': (day_counts > 0).sum(axis=1),
+        'weekday_ratio': weekday_ratio,
+        'weekend_ratio': 1 - weekday_ratio
+    })
+
+
+class FeatureKernel:
+    """
+    Computes all per-entity features in one pass over a sorted trade frame
+    
+    Produces the same feature matrix as merging the outputs of the individual
+    calculators, which remain the reference implementation. Trades with equal
+    timestamps are ordered by their original row position.
+    """
+    
+    REQUIRED_COLUMNS = ['timestamp', 'symbol', 'price', 'volume', 'trade_type']
+    
+    def __init__(self, time_windows: Optional[List[str]] = None,
+                 frequency_calculator: Optional[FrequencyMetricsCalculator] = None):
+        """
+        Initialize feature kernel
+        
+        Args:
+            time_windows: List of time windows for calculations (e.g., ['1H', '24H', '7D'])
+            frequency_calculator: Calculator with the burst window and quote
+                stuffing threshold to use (default: calculator defaults)
+        """
+        self.time_windows = time_windows or ['1H', '24H', '7D']
+        self.frequency_calculator = frequency_calculator or FrequencyMetricsCalculator(self.time_windows)
+        self.price_calculator = PriceImpactCalculator()
+        self.logger = logger
+    
+    def supports(self, trades: pd.DataFrame) -> bool:
+        """
+        Check whether the trade frame has the columns the kernel needs
+        
+        Args:
+            trades: Trade data
+        
+        Returns:
+            True if all required columns are present
+        """
+        return all(column in trades.columns for column in self.REQUIRED_COLUMNS)
+    
+    def compute(self, trades: pd.DataFrame,
+                group_by: str = 'user_id',
+                include_frequency: bool = True,
+                include_volume: bool = True,
+                include_temporal: bool = True,
+                include_price: bool = True,
+                include_behavioral: bool = True,
+                market_data: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Compute the feature matrix
+        
+        Args:
+            trades: DataFrame with trade data
+            group_by: Column to group by ('user_id' or 'symbol')
+            include_frequency: Include frequency-based features
+            include_volume: Include volume-based features
+            include_temporal: Include temporal features
+            include_price: Include price impact features
+            include_behavioral: Include behavioral features
+            market_data: Optional market data for price impact calculations
+        
+        Returns:
+            DataFrame with one row per entity (sorted by entity), missing
+            values left as NaN
+        """
+        if trades.empty:
+            return pd.DataFrame()
+        
+        segments = _TradeSegments.build(trades, group_by)
+        if segments.n_groups == 0:
+            return pd.DataFrame()
+        
+        parts = []
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if include_frequency:
+                parts.extend(self.frequency_features(segments))
+            if include_volume:
+                parts.extend(self.volume_features(segments))
+            if include_temporal:
+                parts.extend(self.temporal_features(segments))
+            if include_price:
+                parts.extend(self.price_features(segments, group_by, market_data))
+            if include_behavioral:
+                parts.extend(self.behavioral_features(segments))
+        
+        return self._assemble(segments, group_by, parts)
+    
+    def _assemble(self, segments: _TradeSegments, group_by: str,
+                  parts: List[pd.DataFrame]) -> pd.DataFrame:
+        """
+        Join feature parts on the entity index
+        
+        The first part providing a column wins, as with the calculator merge.
+        
+        Args:
+            segments: Sorted trade segments
+            group_by: Entity column
+            parts: Feature frames indexed by entity code
+        
+        Returns:
+            Combined feature DataFrame
+        """
+        columns = {}
+        for part in parts:
+            if part.empty:
+                continue
+            for column in part.columns:
+                if column not in columns:
+                    columns[column] = part[column]
+        
+        if not columns:
+            return pd.DataFrame()
+        
+        result_df = pd.DataFrame(columns, index=pd.RangeIndex(segments.n_groups))
+        result_df.insert(0, group_by, segments.keys)
+        
+        return result_df
+    
+    def frequency_features(self, segments: _TradeSegments,
+                           burst_window: Optional[str] = None,
+                           quote_stuffing_threshold: Optional[int] = None) -> List[pd.DataFrame]:
+        """
+        Trades per window, burst metrics and quote stuffing indicators
+        
+        Args:
+            segments: Sorted trade segments
+            burst_window: Time window for burst detection (default: the
+                frequency calculator's)
+            quote_stuffing_threshold: Orders per minute for quote stuffing
+                (default: the frequency calculator's)
+        
+        Returns:
+            List of feature frames indexed by entity code
+        """
+        burst_window = burst_window or self.frequency_calculator.burst_window
+        quote_stuffing_threshold = quote_stuffing_threshold or self.frequency_calculator.quote_stuffing_threshold
+        n_groups = segments.n_groups
+        codes = segments.codes
+        counts = segments.counts
+        elapsed = segments.elapsed
+        first, last = segments.starts, segments.last
+        
+        # Trades in each window ending at the entity's latest trade
+        window_metrics = {}
+        latest = elapsed[last]
+        for window in self.time_windows:
+            window_hours = self.frequency_calculator._window_to_hours(window)
+            window_ns = int(round(window_hours * NS_PER_HOUR))
+            in_window = elapsed >= (latest - window_ns)[codes]
+            trades_in_window = np.bincount(codes[in_window], minlength=n_groups)
+            
+            window_metrics[f'trades_count_{window}'] = trades_in_window
+            window_metrics[f'trades_per_hour_{window}'] = (
+                trades_in_window / window_hours if window_hours > 0 else 0
+            )
+        
+        span_days = _scalar_seconds(elapsed[last] - elapsed[first]) / 86400
+        window_metrics['total_trades'] = counts
+        window_metrics['first_trade'] = segments.timestamps_at(first)
+        window_metrics['last_trade'] = segments.timestamps_at(last)
+        window_metrics['avg_trades_per_day'] = np.where(span_days > 0, counts / span_days, 0)
+        
+        # Burst metrics over fixed time bins
+        run_codes, _, run_sizes = segments.bin_runs(to_offset(burst_window).nanos)
+        bins_per_group = np.bincount(run_codes, minlength=n_groups)
+        mean_trades = np.bincount(run_codes, run_sizes, n_groups) / bins_per_group
+        std_trades = _grouped_std(run_sizes, run_codes, n_groups)
+        max_trades = _grouped(run_sizes, run_codes, n_groups, 'max')
+        
+        burst_threshold = np.where(std_trades > 0, mean_trades + 2 * std_trades, mean_trades * 2)
+        is_burst = run_sizes > burst_threshold[run_codes]
+        burst_bins = np.bincount(run_codes[is_burst], minlength=n_groups)
+        
+        burst_metrics = {
+            'mean_trades_per_window': mean_trades,
+            'std_trades_per_window': std_trades,
+            'max_trades_per_window': max_trades,
+            'burst_threshold': burst_threshold,
+            'burst_windows_detected': burst_bins,
+            'burst_ratio': burst_bins / bins_per_group
+        }
+        
+        # Quote stuffing over 1-minute bins
+        run_codes, _, run_sizes = segments.bin_runs(NS_PER_MINUTE)
+        minutes_active = np.bincount(run_codes, minlength=n_groups)
+        stuffing_minutes = np.bincount(
+            run_codes[run_sizes >= quote_stuffing_threshold], minlength=n_groups
+        )
+        
+        stuffing_metrics = {
+            'max_orders_per_minute': _grouped(run_sizes, run_codes, n_groups, 'max'),
+            'avg_orders_per_minute': np.bincount(run_codes, run_sizes, n_groups) / minutes_active,
+            'quote_stuffing_detected': stuffing_minutes > 0,
+            'quote_stuffing_minutes': stuffing_minutes,
+            'quote_stuffing_intensity': stuffing_minutes / minutes_active,
+            'total_minutes_active': minutes_active
+        }
+        
+        return [
+            pd.DataFrame(window_metrics),
+            pd.DataFrame(burst_metrics),
+            pd.DataFrame(stuffing_metrics)
+        ]
+    
+    def volume_features(self, segments: _TradeSegments,
+                        percentiles: Optional[List[int]] = None,
+                        spike_threshold: float = 3.0,
+                        spike_window: str = '1H') -> List[pd.DataFrame]:
+        """
+        Volume statistics, percentiles, spikes, consistency, rolling
+        statistics and distribution characteristics
+        
+        Args:
+            segments: Sorted trade segments
+            percentiles: Percentiles to calculate (default: [25, 50, 75, 90, 95, 99])
+            spike_threshold: Multiplier of the rolling average for a spike
+            spike_window: Rolling window for spike detection
+        
+        Returns:
+            List of feature frames indexed by entity code
+        """
+        percentiles = percentiles or [25, 50, 75, 90, 95, 99]
+        
+        n_groups = segments.n_groups
+        codes = segments.codes
+        counts = segments.counts
+        volumes = segments.column('volume', order='row').astype(np.float64)
+        grouped = pd.Series(volumes).groupby(codes)
+        
+        # Basic statistics
+        volume_mean = np.bincount(codes, volumes, n_groups) / counts
+        volume_std = _grouped_std(volumes, codes, n_groups, ddof=0)
+        volume_min = grouped.min().to_numpy()
+        volume_max = grouped.max().to_numpy()
+        
+        centered = volumes - volume_mean[codes]
+        m2 = np.bincount(codes, centered ** 2, n_groups) / counts
+        m3 = np.bincount(codes, centered ** 3, n_groups) / counts
+        m4 = np.bincount(codes, centered ** 4, n_groups) / counts
+        degenerate = m2 <= (np.finfo(np.float64).eps * volume_mean) ** 2
+        skewness = np.where(degenerate, np.nan, m3 / m2 ** 1.5)
+        kurtosis = np.where(degenerate, np.nan, m4 / m2 ** 2 - 3)
+        
+        basic_metrics = {
+            'volume_mean': volume_mean,
+            'volume_median': grouped.median().to_numpy(),
+            'volume_std': volume_std,
+            'volume_min': volume_min,
+            'volume_max': volume_max,
+            'volume_range': volume_max - volume_min,
+            'volume_sum': np.bincount(codes, volumes, n_groups),
+            'volume_count': counts,
+            'volume_cv': np.where(volume_mean > 0, volume_std / volume_mean, 0),
+            'volume_skewness': np.where(counts >= 3, skewness, 0),
+            'volume_kurtosis': np.where(counts >= 3, kurtosis, 0)
+        }
+        
+        # Percentiles and IQR outliers
+        quantile_levels = sorted(set(percentiles) | {25, 75})
+        quantiles = grouped.quantile([p / 100 for p in quantile_levels]).unstack()
+        quantiles.columns = quantile_levels
+        
+        percentile_metrics = {f'volume_p{p}': quantiles[p].to_numpy() for p in percentiles}
+        q25, q75 = quantiles[25].to_numpy(), quantiles[75].to_numpy()
+        iqr = q75 - q25
+        outliers = (
+            (volumes < (q25 - 1.5 * iqr)[codes]) |
+            (volumes > (q75 + 1.5 * iqr)[codes])
+        )
+        outlier_count = np.bincount(codes[outliers], minlength=n_groups)
+        percentile_metrics['volume_iqr'] = iqr
+        percentile_metrics['volume_outlier_count'] = outlier_count
+        percentile_metrics['volume_outlier_ratio'] = outlier_count / counts
+        
+        # Spikes against the trailing rolling average
+        time_volumes = segments.column('volume').astype(np.float64)
+        window_start = segments.window_starts(to_offset(spike_window).nanos)
+        rolling_avg = self._window_means(time_volumes, codes, window_start, volume_mean)
+        spikes = time_volumes > rolling_avg * spike_threshold
+        spike_codes = codes[spikes]
+        spike_multiplier = time_volumes[spikes] / rolling_avg[spikes]
+        spike_count = np.bincount(spike_codes, minlength=n_groups)
+        
+        spike_metrics = {
+            'spike_count': spike_count,
+            'spike_ratio': spike_count / counts,
+            'max_spike_multiplier': _grouped(spike_multiplier, spike_codes, n_groups, 'max', 0),
+            'avg_spike_multiplier': _grouped(spike_multiplier, spike_codes, n_groups, 'mean', 0),
+            'total_trades': counts
+        }
+        
+        # Consistency of consecutive volumes (original row order)
+        same_entity = codes[1:] == codes[:-1]
+        change_codes = codes[1:][same_entity]
+        previous = volumes[:-1][same_entity]
+        changes = volumes[1:][same_entity] - previous
+        n_changes = counts - 1
+        
+        consistency_metrics = {
+            'consistency_score': np.where(volume_mean > 0, 1 / (1 + volume_std / volume_mean), 0),
+            'mean_abs_volume_change': np.bincount(change_codes, np.abs(changes), n_groups) / n_changes,
+            'max_abs_volume_change': _grouped(np.abs(changes), change_codes, n_groups, 'max'),
+            'mean_relative_volume_change': (
+                np.bincount(change_codes, np.abs(changes / previous), n_groups) / n_changes
+            )
+        }
+        volume_entropy = np.where(
+            counts >= 10, self._histogram_entropy(volumes, codes, counts, volume_min, volume_max), 0
+        )
+        consistency_metrics['volume_entropy'] = volume_entropy
+        consistency_metrics['volume_stability'] = 1 - volume_entropy
+        
+        # Rolling statistics of the window ending at the latest trade
+        rolling_metrics = {}
+        last = segments.last
+        positions = np.arange(len(codes))
+        for window in self.time_windows:
+            window_start = segments.window_starts(to_offset(window).nanos, rows=last)
+            in_window = positions >= window_start[codes]
+            window_codes = codes[in_window]
+            window_volumes = time_volumes[in_window]
+            window_counts = np.bincount(window_codes, minlength=n_groups)
+            
+            rolling_mean = np.bincount(window_codes, window_volumes, n_groups) / window_counts
+            rolling_metrics[f'volume_rolling_mean_{window}'] = rolling_mean
+            rolling_metrics[f'volume_rolling_std_{window}'] = _grouped_std(window_volumes, window_codes, n_groups)
+            rolling_metrics[f'volume_rolling_max_{window}'] = _grouped(window_volumes, window_codes, n_groups, 'max')
+            rolling_metrics[f'volume_rolling_min_{window}'] = _grouped(window_volumes, window_codes, n_groups, 'min')
+            rolling_metrics[f'volume_trend_{window}'] = np.where(
+                rolling_mean > 0, time_volumes[last] / rolling_mean, 1.0
+            )
+        
+        # Distribution characteristics
+        distribution_metrics = self._volume_distribution(volumes, codes, counts)
+        
+        multiple = counts >= 2
+        return [
+            pd.DataFrame(basic_metrics),
+            pd.DataFrame(percentile_metrics),
+            pd.DataFrame(spike_metrics)[multiple],
+            pd.DataFrame(consistency_metrics)[multiple],
+            pd.DataFrame(rolling_metrics)[multiple],
+            pd.DataFrame(distribution_metrics)[counts >= 3]
+        ]
+    
+    def _window_means(self, values: np.ndarray, codes: np.ndarray,
+                      window_start: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+        """
+        Mean of each trailing window values[window_start[i]:i + 1]
+        
+        Values are centered on a per-entity offset before the cumulative sum
+        to keep the running totals small.
+        
+        Args:
+            values: Values in time order
+            codes: Entity code of each value
+            window_start: Window start of each position
+            offsets: Per-entity centering offset (e.g. the entity mean)
+        
+        Returns:
+            Window mean at each position
+        """
+        index = np.arange(len(values))
+        centered = values - offsets[codes]
+        cumulative = np.concatenate([[0.0], np.cumsum(centered)])
+        window_size = index + 1 - window_start
+        return (cumulative[index + 1] - cumulative[window_start]) / window_size + offsets[codes]
+    
+    def _histogram_entropy(self, values: np.ndarray, codes: np.ndarray, counts: np.ndarray,
+                           minimum: np.ndarray, maximum: np.ndarray, bins: int = 10) -> np.ndarray:
+        """
+        Normalized entropy of a per-entity equal-width histogram
+        
+        Reproduces np.histogram bin assignment for every entity at once.
+        
+        Args:
+            values: Values grouped by entity code
+            codes: Entity code of each value
+            counts: Number of values per entity
+            minimum: Minimum value per entity
+            maximum: Maximum value per entity
+            bins: Number of histogram bins
+        
+        Returns:
+            Entropy per entity, normalized to 0-1
+        """
+        n_groups = len(counts)
+        degenerate = minimum == maximum
+        first_edge = np.where(degenerate, minimum - 0.5, minimum)
+        last_edge = np.where(degenerate, maximum + 0.5, maximum)
+        step = (last_edge - first_edge) / bins
+        
+        value_first = first_edge[codes]
+        value_last = last_edge[codes]
+        value_step = step[codes]
+        
+        def edge(index):
+            return np.where(index == bins, value_last, index * value_step + value_first)
+        
+        bin_index = ((values - value_first) / (value_last - value_first) * bins).astype(np.int64)
+        bin_index[bin_index == bins] -= 1
+        bin_index[values < edge(bin_index)] -= 1
+        bin_index[(values >= edge(bin_index + 1)) & (bin_index != bins - 1)] += 1
+        
+        histogram = np.bincount(codes * bins + bin_index, minlength=n_groups * bins)
+        probabilities = histogram.reshape(n_groups, bins) / counts[:, None]
+        return shannon_entropy(probabilities) / np.log2(bins)
+    
+    def _volume_distribution(self, volumes: np.ndarray, codes: np.ndarray,
+                             counts: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Normality, Gini coefficient and top-share concentration of volumes
+        
+        Args:
+            volumes: Volumes grouped by entity code
+            codes: Entity code of each volume
+            counts: Number of volumes per entity
+        
+        Returns:
+            Dictionary of per-entity metrics
+        """
+        n_groups = len(counts)
+        order = np.lexsort((volumes, codes))
+        sorted_volumes = volumes[order]
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        from_top = counts[codes] - (np.arange(len(volumes)) - starts[codes]) - 1
+        total = np.bincount(codes, sorted_volumes, n_groups)
+        
+        def top_share(fraction):
+            top_n = (counts * fraction).astype(np.int64)
+            in_top = from_top < top_n[codes]
+            return np.bincount(codes[in_top], sorted_volumes[in_top], n_groups) / total
+        
+        # Shapiro-Wilk has no vectorized form; each call reads a contiguous slice
+        is_normal = np.zeros(n_groups, dtype=bool)
+        for code in np.flatnonzero((counts >= 3) & (counts <= 5000)):
+            _, p_value = stats.shapiro(sorted_volumes[starts[code]:starts[code] + counts[code]])
+            is_normal[code] = p_value > 0.05
+        
+        gini = _segment_gini(volumes, codes, counts)
+        
+        return {
+            'is_normal_distribution': is_normal,
+            'volume_gini_coefficient': gini,
+            'top_10pct_volume_share': np.where(counts >= 10, top_share(0.1), 1.0),
+            'top_20pct_volume_share': np.where(counts >= 5, top_share(0.2), 1.0),
+            'volume_concentration': gini
+        }
+    
+    def temporal_features(self, segments: _TradeSegments,
+                          session_gap_minutes: int = 60,
+                          cluster_window_minutes: int = 5,
+                          cluster_threshold: int = 10) -> List[pd.DataFrame]:
+        """
+        Hour/day distributions, sessions, time between trades, temporal
+        clustering and regularity
+        
+        Args:
+            segments: Sorted trade segments
+            session_gap_minutes: Minutes of inactivity to define session boundary
+            cluster_window_minutes: Time window for clustering detection
+            cluster_threshold: Minimum trades in window to be considered a cluster
+        
+        Returns:
+            List of feature frames indexed by entity code
+        """
+        n_groups = segments.n_groups
+        codes = segments.codes
+        counts = segments.counts
+        elapsed = segments.elapsed
+        is_start = segments.is_start
+        
+        hour_metrics = self._hour_distribution(segments)
+        day_metrics = self._day_distribution(segments)
+        
+        # Sessions split by inactivity gaps
+        session_start = is_start.copy()
+        session_start[1:] |= np.diff(elapsed) > session_gap_minutes * NS_PER_MINUTE
+        session_starts = np.flatnonzero(session_start)
+        session_sizes = np.diff(np.append(session_starts, len(codes)))
+        session_codes = codes[session_starts]
+        session_minutes = _scalar_seconds(
+            elapsed[session_starts + session_sizes - 1] - elapsed[session_starts]
+        ) / 60
+        num_sessions = np.bincount(session_codes, minlength=n_groups)
+        multi_trade = session_sizes > 1
+        
+        session_metrics = {
+            'num_sessions': num_sessions,
+            'avg_trades_per_session': counts / num_sessions,
+            'max_trades_per_session': _grouped(session_sizes, session_codes, n_groups, 'max'),
+            'min_trades_per_session': _grouped(session_sizes, session_codes, n_groups, 'min'),
+            'avg_session_duration_minutes': _grouped(
+                session_minutes[multi_trade], session_codes[multi_trade], n_groups, 'mean', 0
+            ),
+            'max_session_duration_minutes': _grouped(
+                session_minutes[multi_trade], session_codes[multi_trade], n_groups, 'max', 0
+            ),
+            'session_concentration_gini': _segment_gini(
+                session_sizes.astype(np.float64), session_codes, num_sessions
+            ),
+            'total_trades': counts
+        }
+        
+        # Time between consecutive trades
+        diff_codes = codes[~is_start]
+        diffs = np.diff(elapsed)[~is_start[1:]] / NS_PER_SECOND
+        n_diffs = counts - 1
+        diff_grouped = pd.Series(diffs).groupby(diff_codes)
+        diff_mean = np.bincount(diff_codes, diffs, n_groups) / n_diffs
+        diff_std = _grouped_std(diffs, diff_codes, n_groups)
+        diff_quantiles = diff_grouped.quantile([0.25, 0.75, 0.95]).unstack().reindex(range(n_groups))
+        rapid_count = np.bincount(diff_codes[diffs < 1], minlength=n_groups)
+        very_fast_count = np.bincount(diff_codes[diffs < 0.1], minlength=n_groups)
+        diff_cv = np.where(diff_mean > 0, diff_std / diff_mean, 0)
+        
+        time_between_metrics = {
+            'mean_time_between_trades_sec': diff_mean,
+            'median_time_between_trades_sec': _grouped(diffs, diff_codes, n_groups, 'median'),
+            'std_time_between_trades_sec': diff_std,
+            'min_time_between_trades_sec': _grouped(diffs, diff_codes, n_groups, 'min'),
+            'max_time_between_trades_sec': _grouped(diffs, diff_codes, n_groups, 'max'),
+            'time_between_trades_cv': diff_cv,
+            'time_p25_sec': diff_quantiles[0.25].to_numpy(),
+            'time_p75_sec': diff_quantiles[0.75].to_numpy(),
+            'time_p95_sec': diff_quantiles[0.95].to_numpy(),
+            'rapid_trade_count': rapid_count,
+            'rapid_trade_ratio': rapid_count / n_diffs,
+            'very_fast_trade_count': very_fast_count,
+            'very_fast_trade_ratio': very_fast_count / n_diffs
+        }
+        
+        # Clusters of trades within fixed time bins
+        run_codes, _, run_sizes = segments.bin_runs(cluster_window_minutes * NS_PER_MINUTE)
+        is_cluster = run_sizes >= cluster_threshold
+        cluster_codes = run_codes[is_cluster]
+        num_clusters = np.bincount(cluster_codes, minlength=n_groups)
+        clustered_trades = np.bincount(cluster_codes, run_sizes[is_cluster], n_groups).astype(np.int64)
+        time_bins = np.bincount(run_codes, minlength=n_groups)
+        expected_per_bin = counts / time_bins
+        
+        clustering_metrics = {
+            'num_clusters': num_clusters,
+            'max_cluster_size': _grouped(run_sizes[is_cluster], cluster_codes, n_groups, 'max', 0),
+            'avg_cluster_size': np.where(num_clusters > 0, clustered_trades / num_clusters, 0),
+            'clustered_trades': clustered_trades,
+            'cluster_ratio': clustered_trades / counts,
+            'clustering_coefficient': np.where(
+                expected_per_bin > 0,
+                _grouped(run_sizes, run_codes, n_groups, 'max') / expected_per_bin,
+                0
+            ),
+            'total_time_bins': time_bins
+        }
+        
+        # Regularity of the time between trades
+        regularity_score = 1 / (1 + diff_cv)
+        periodicity = self._periodicity_strength(diffs, n_diffs)
+        
+        regularity_metrics = {
+            'regularity_score': regularity_score,
+            'time_diff_cv': diff_cv,
+            'time_diff_autocorr': np.where(
+                n_diffs >= 10, self._lag1_autocorrelation(diffs, diff_codes, n_groups), 0
+            ),
+            'periodicity_strength': periodicity,
+            'is_regular': regularity_score > 0.7,
+            'is_periodic': periodicity > 0.1
+        }
+        
+        multiple = counts >= 2
+        return [
+            hour_metrics,
+            day_metrics,
+            pd.DataFrame(session_metrics)[multiple],
+            pd.DataFrame(time_between_metrics)[multiple],
+            pd.DataFrame(clustering_metrics)[counts >= cluster_threshold],
+            pd.DataFrame(regularity_metrics)[counts >= 3]
+        ]
+    
+    def _hour_distribution(self, segments: _TradeSegments) -> pd.DataFrame:
+        """
+        Hour-of-day distribution metrics
+        
+        Args:
+            segments: Sorted trade segments
+        
+        Returns:
+            Feature frame indexed by entity code
+        """
+        n_groups = segments.n_groups
+        hours = (segments.wall // NS_PER_HOUR) % 24
+        hour_counts = np.bincount(segments.codes * 24 + hours, minlength=n_groups * 24).reshape(n_groups, 24)
+        return hour_distribution_metrics(hour_counts)
+    
+    def _day_distribution(self, segments: _TradeSegments) -> pd.DataFrame:
+        """
+        Day-of-week distribution metrics
+        
+        Args:
+            segments: Sorted trade segments
+        
+        Returns:
+            Feature frame indexed by entity code
+        """
+        n_groups = segments.n_groups
+        
+        # 1970-01-01 was a Thursday (dayofweek 3)
+        days = (segments.wall // NS_PER_DAY + 3) % 7
+        day_counts = np.bincount(segments.codes * 7 + days, minlength=n_groups * 7).reshape(n_groups, 7)
+        return day_distribution_metrics(day_counts)
+    
+    def _lag1_autocorrelation(self, values: np.ndarray, codes: np.ndarray,
+                              n_groups: int) -> np.ndarray:
+        """
+        Lag-1 Pearson autocorrelation of each entity's series
+        
+        Args:
+            values: Series values grouped by entity code
+            codes: Entity code of each value
+            n_groups: Number of entities
+        
+        Returns:
+            Autocorrelation per entity
+        """
+        paired = codes[1:] == codes[:-1]
+        pair_codes = codes[1:][paired]
+        current = values[1:][paired]
+        lagged = values[:-1][paired]
+        n_pairs = np.bincount(pair_codes, minlength=n_groups)
+        
+        current_dev = current - (np.bincount(pair_codes, current, n_groups) / n_pairs)[pair_codes]
+        lagged_dev = lagged - (np.bincount(pair_codes, lagged, n_groups) / n_pairs)[pair_codes]
+        covariance = np.bincount(pair_codes, current_dev * lagged_dev, n_groups)
+        current_ss = np.bincount(pair_codes, current_dev ** 2, n_groups)
+        lagged_ss = np.bincount(pair_codes, lagged_dev ** 2, n_groups)
+        
+        return np.clip(covariance / np.sqrt(current_ss * lagged_ss), -1, 1)
+    
+    def _periodicity_strength(self, diffs: np.ndarray, n_diffs: np.ndarray,
+                              min_length: int = 20) -> np.ndarray:
+        """
+        Dominant FFT power share of the normalized time between trades
+        
+        Args:
+            diffs: Time between trades, grouped by entity code
+            n_diffs: Number of time differences per entity
+            min_length: Minimum series length to analyze
+        
+        Returns:
+            Periodicity strength per entity (0 for short series)
+        """
+        periodicity = np.zeros(len(n_diffs))
+        diff_starts = np.concatenate([[0], np.cumsum(n_diffs)[:-1]])
+        
+        # FFT lengths differ per entity; each call reads a contiguous slice
+        for code in np.flatnonzero(n_diffs >= min_length):
+            series = diffs[diff_starts[code]:diff_starts[code] + n_diffs[code]]
+            normalized = (series - series.mean()) / series.std(ddof=1)
+            power = np.abs(np.fft.fft(normalized)) ** 2
+            dominant = np.argmax(power[1:len(power) // 2]) + 1
+            periodicity[code] = power[dominant] / np.sum(power)
+        
+        return periodicity
+    
+    def price_features(self, segments: _TradeSegments, group_by: str,
+                       market_data: Optional[pd.DataFrame] = None,
+                       reversal_threshold: float = 0.02,
+                       reversal_window: str = '5min',
+                       momentum_windows: Optional[List[str]] = None) -> List[pd.DataFrame]:
+        """
+        Price deviation, slippage, reversals, spread impact and momentum
+        
+        Args:
+            segments: Sorted trade segments
+            group_by: Entity column
+            market_data: Optional market data (prices, bid/ask)
+            reversal_threshold: Minimum price change to consider a reversal
+            reversal_window: Time window for reversal detection
+            momentum_windows: Time windows for momentum calculation
+        
+        Returns:
+            List of feature frames indexed by entity code
+        """
+        momentum_windows = momentum_windows or ['5min', '1H', '24H']
+        
+        n_groups = segments.n_groups
+        codes = segments.codes
+        counts = segments.counts
+        trades = segments.trades
+        prices = segments.column('price', order='row').astype(np.float64)
+        symbols = pd.Series(segments.column('symbol', order='row'))
+        
+        # Deviation from the symbol's market average price
+        if market_data is not None and not market_data.empty:
+            reference = symbols.map(market_data.groupby('symbol', observed=True)['price'].mean()).to_numpy(dtype=np.float64)
+            own_average = pd.Series(prices).groupby([codes, symbols.to_numpy()]).transform('mean').to_numpy()
+            reference = np.where(np.isnan(reference), own_average, reference)
+        else:
+            reference = symbols.map(trades.groupby('symbol', observed=True)['price'].mean()).to_numpy(dtype=np.float64)
+        
+        has_symbol = symbols.notna().to_numpy()
+        deviation_codes = codes[has_symbol]
+        deviations = ((prices - reference) / reference)[has_symbol]
+        n_deviations = np.bincount(deviation_codes, minlength=n_groups)
+        mean_deviation = np.bincount(deviation_codes, deviations, n_groups) / n_deviations
+        
+        deviation_metrics = {
+            'mean_price_deviation': mean_deviation,
+            'abs_mean_price_deviation': np.bincount(deviation_codes, np.abs(deviations), n_groups) / n_deviations,
+            'std_price_deviation': np.sqrt(
+                np.bincount(deviation_codes, (deviations - mean_deviation[deviation_codes]) ** 2, n_groups) / n_deviations
+            ),
+            'max_price_deviation': _grouped(np.abs(deviations), deviation_codes, n_groups, 'max'),
+            'positive_deviation_ratio': np.bincount(deviation_codes[deviations > 0], minlength=n_groups) / n_deviations,
+            'extreme_deviation_count': np.bincount(deviation_codes[np.abs(deviations) > 0.05], minlength=n_groups)
+        }
+        
+        # Slippage estimated from consecutive price changes (original row order)
+        same_entity = codes[1:] == codes[:-1]
+        change_codes = codes[1:][same_entity]
+        changes = ((prices[1:] - prices[:-1]) / prices[:-1])[same_entity]
+        n_changes = counts - 1
+        mean_change = np.bincount(change_codes, changes, n_groups) / n_changes
+        has_changes = n_changes > 0
+        
+        slippage_metrics = {
+            'mean_slippage': np.where(has_changes, mean_change, 0),
+            'abs_mean_slippage': np.where(
+                has_changes, np.bincount(change_codes, np.abs(changes), n_groups) / n_changes, 0
+            ),
+            'max_slippage': _grouped(np.abs(changes), change_codes, n_groups, 'max', 0),
+            'slippage_std': np.where(
+                has_changes,
+                np.sqrt(np.bincount(change_codes, (changes - mean_change[change_codes]) ** 2, n_groups) / n_changes),
+                0
+            ),
+            'high_slippage_count': np.zeros(n_groups, dtype=np.int64)
+        }
+        
+        reversal_metrics = self._price_reversals(segments, reversal_threshold, reversal_window)
+        
+        # Spread impact
+        if market_data is not None and 'bid' in market_data.columns and 'ask' in market_data.columns:
+            spread = self.price_calculator.analyze_spread_impact(trades, market_data, group_by)
+            spread_metrics = spread.set_index(group_by).reindex(segments.keys).reset_index(drop=True)
+        else:
+            price_std = _grouped_std(prices, codes, n_groups, ddof=0)
+            price_range = (
+                _grouped(prices, codes, n_groups, 'max') - _grouped(prices, codes, n_groups, 'min')
+            )
+            estimated_spread = 2 * price_std
+            estimable = (counts > 1) & (estimated_spread > 0)
+            spread_metrics = pd.DataFrame({
+                'mean_spread_impact': np.where(estimable, price_std / estimated_spread, 0),
+                'max_spread_impact': np.where(estimable, price_range / estimated_spread, 0),
+                'beyond_spread_ratio': np.zeros(n_groups, dtype=np.int64),
+                'total_trades': counts
+            })
+        
+        momentum_metrics = self._price_momentum(segments, momentum_windows)
+        
+        return [
+            pd.DataFrame(deviation_metrics)[n_deviations > 0],
+            pd.DataFrame(slippage_metrics),
+            reversal_metrics,
+            spread_metrics,
+            momentum_metrics[counts >= 2]
+        ]
+    
+    def _price_reversals(self, segments: _TradeSegments, threshold: float,
+                         window: str) -> pd.DataFrame:
+        """
+        Price reversals from the trailing high/low of each (entity, symbol)
+        
+        Args:
+            segments: Sorted trade segments
+            threshold: Minimum relative move from the trailing high/low
+            window: Trailing time window
+        
+        Returns:
+            Feature frame indexed by entity code
+        """
+        n_groups = segments.n_groups
+        order, new_segment = segments.symbol_order()
+        codes = segments.codes[order]
+        elapsed = segments.elapsed[order]
+        prices = segments.column('price')[order].astype(np.float64)
+        
+        segment_ids = np.cumsum(new_segment) - 1
+        segment_starts = np.flatnonzero(new_segment)
+        segment_sizes = np.diff(np.append(segment_starts, len(order)))
+        window_start = group_searchsorted(
+            segment_ids, elapsed, segment_ids, elapsed - to_offset(window).nanos, side='right'
+        )
+        rolling_max = _sliding_reduce(prices, window_start, np.fmax)
+        rolling_min = _sliding_reduce(prices, window_start, np.fmin)
+        
+        # Compare each price (from the third of a segment) to the previous window
+        position = np.arange(len(order)) - segment_starts[segment_ids]
+        eligible = (position >= 2) & (segment_sizes[segment_ids] >= 3)
+        previous_max = np.roll(rolling_max, 1)
+        previous_min = np.roll(rolling_min, 1)
+        drops = (previous_max - prices) / previous_max
+        rises = (prices - previous_min) / previous_min
+        is_drop = eligible & (previous_max > 0) & (drops > threshold)
+        is_rise = eligible & (previous_min > 0) & (rises > threshold)
+        
+        magnitudes = np.concatenate([drops[is_drop], rises[is_rise]])
+        magnitude_codes = np.concatenate([codes[is_drop], codes[is_rise]])
+        reversal_count = np.bincount(magnitude_codes, minlength=n_groups)
+        
+        return pd.DataFrame({
+            'reversal_count': reversal_count,
+            'max_reversal_magnitude': _grouped(magnitudes, magnitude_codes, n_groups, 'max', 0),
+            'avg_reversal_magnitude': np.where(
+                reversal_count > 0,
+                np.bincount(magnitude_codes, magnitudes, n_groups) / reversal_count,
+                0
+            ),
+            'reversal_ratio': reversal_count / segments.counts
+        })
+    
+    def _price_momentum(self, segments: _TradeSegments, windows: List[str]) -> pd.DataFrame:
+        """
+        Rolling sums of returns over trailing time windows
+        
+        Args:
+            segments: Sorted trade segments
+            windows: Time windows for momentum calculation
+        
+        Returns:
+            Feature frame indexed by entity code
+        """
+        n_groups = segments.n_groups
+        codes = segments.codes
+        last = segments.last
+        prices = segments.column('price').astype(np.float64)
+        
+        returns = np.full(len(prices), np.nan)
+        returns[1:] = prices[1:] / prices[:-1] - 1
+        returns[segments.is_start] = np.nan
+        valid = ~np.isnan(returns)
+        n_valid = np.bincount(codes[valid], minlength=n_groups)
+        mean_return = np.bincount(codes[valid], returns[valid], n_groups) / np.maximum(n_valid, 1)
+        
+        index = np.arange(len(prices))
+        centered = np.where(valid, returns - mean_return[codes], 0.0)
+        cumulative = np.concatenate([[0.0], np.cumsum(centered)])
+        cumulative_valid = np.concatenate([[0], np.cumsum(valid)])
+        
+        metrics = {}
+        for window in windows:
+            window_start = segments.window_starts(to_offset(window).nanos)
+            observations = cumulative_valid[index + 1] - cumulative_valid[window_start]
+            rolling_return = (
+                cumulative[index + 1] - cumulative[window_start] +
+                observations * mean_return[codes]
+            )
+            rolling_return[observations == 0] = np.nan
+            
+            defined = ~np.isnan(rolling_return)
+            metrics[f'momentum_{window}'] = rolling_return[last]
+            metrics[f'momentum_mean_{window}'] = _grouped(rolling_return[defined], codes[defined], n_groups, 'mean')
+            metrics[f'momentum_std_{window}'] = _grouped_std(rolling_return[defined], codes[defined], n_groups)
+        
+        return pd.DataFrame(metrics)
+    
+    def behavioral_features(self, segments: _TradeSegments,
+                            velocity_windows: Optional[List[str]] = None) -> List[pd.DataFrame]:
+        """
+        Holding times, win/loss, symbol diversity, velocity and trading style
+        
+        Args:
+            segments: Sorted trade segments
+            velocity_windows: Time windows for velocity calculation
+        
+        Returns:
+            List of feature frames indexed by entity code
+        """
+        velocity_windows = velocity_windows or ['1H', '24H', '7D']
+        
+        n_groups = segments.n_groups
+        counts = segments.counts
+        sides = self._trade_sides(segments)
+        
+        holding_frame, win_loss_frame = self._position_metrics(segments, sides)
+        diversity_metrics = self._symbol_diversity(segments)
+        velocity_metrics = self._velocity(segments, velocity_windows)
+        style_metrics = self._trading_style(segments, sides)
+        
+        return [
+            holding_frame,
+            win_loss_frame,
+            diversity_metrics,
+            velocity_metrics[counts >= 2],
+            style_metrics
+        ]
+    
+    def _trade_sides(self, segments: _TradeSegments) -> np.ndarray:
+        """Trade side in time order: 1 for BUY, -1 for SELL, 0 otherwise"""
+        return trade_sides(segments.trades['trade_type'].iloc[segments.time_order])
+    
+    def _position_metrics(self, segments: _TradeSegments,
+                          sides: np.ndarray) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Holding time and win/loss statistics from tracked positions
+        
+        Args:
+            segments: Sorted trade segments
+            sides: Trade side in time order
+        
+        Returns:
+            Tuple of (holding time frame, win/loss frame) indexed by entity code
+        """
+        n_groups = segments.n_groups
+        order, new_segment = segments.symbol_order()
+        codes = segments.codes[order]
+        
+        closed, holding_ns, realized, pnl = track_positions(
+            segment_offsets(new_segment),
+            sides[order],
+            segments.elapsed[order],
+            segments.column('price')[order].astype(np.float64),
+            segments.column('volume')[order].astype(np.float64)
+        )
+        
+        return (
+            pd.DataFrame(holding_time_metrics(codes, closed, holding_ns, n_groups)),
+            pd.DataFrame(win_loss_metrics(codes, realized, pnl, n_groups))
+        )
+    
+    def _symbol_diversity(self, segments: _TradeSegments) -> pd.DataFrame:
+        """
+        Trading pair diversity per entity
+        
+        Args:
+            segments: Sorted trade segments
+        
+        Returns:
+            Feature frame indexed by entity code
+        """
+        n_groups = segments.n_groups
+        counts = segments.counts
+        symbol_codes, symbol_keys = pd.factorize(segments.column('symbol'))
+        has_symbol = symbol_codes >= 0
+        
+        pair_keys = segments.codes[has_symbol].astype(np.int64) * len(symbol_keys) + symbol_codes[has_symbol]
+        pairs, pair_counts = np.unique(pair_keys, return_counts=True)
+        pair_codes = pairs // max(len(symbol_keys), 1)
+        
+        unique_symbols = np.bincount(pair_codes, minlength=n_groups)
+        probabilities = pair_counts / counts[pair_codes]
+        entropy = -np.bincount(pair_codes, probabilities * np.log2(probabilities), n_groups)
+        max_entropy = np.where(unique_symbols > 1, np.log2(np.maximum(unique_symbols, 1)), 1)
+        normalized_entropy = np.where(max_entropy > 0, entropy / max_entropy, 0)
+        
+        # Rank symbols by trade count within each entity
+        order = np.lexsort((-pair_counts, pair_codes))
+        ranked_codes = pair_codes[order]
+        ranked_counts = pair_counts[order]
+        pair_starts = np.concatenate([[0], np.cumsum(unique_symbols)[:-1]])
+        rank = np.arange(len(order)) - pair_starts[ranked_codes]
+        
+        return pd.DataFrame({
+            'unique_symbols': unique_symbols,
+            'symbol_diversity_entropy': normalized_entropy,
+            'symbol_concentration_herfindahl': np.bincount(pair_codes, probabilities ** 2, n_groups),
+            'top_symbol_ratio': np.bincount(ranked_codes[rank == 0], ranked_counts[rank == 0], n_groups) / counts,
+            'top_3_symbols_ratio': np.bincount(ranked_codes[rank < 3], ranked_counts[rank < 3], n_groups) / counts,
+            'is_diversified': (unique_symbols >= 5) & (normalized_entropy > 0.7)
+        })
+    
+    def _velocity(self, segments: _TradeSegments, windows: List[str]) -> pd.DataFrame:
+        """
+        Change in trade counts across consecutive resample bins
+        
+        Works on non-empty bins only: runs of empty bins contribute known
+        zero counts, so the statistics of the dense bin series are derived
+        without materializing it.
+        
+        Args:
+            segments: Sorted trade segments
+            windows: Resample frequencies
+        
+        Returns:
+            Feature frame indexed by entity code
+        """
+        n_groups = segments.n_groups
+        counts = segments.counts
+        wall = segments.wall
+        origin = (wall[segments.starts] // NS_PER_DAY) * NS_PER_DAY
+        
+        metrics = {}
+        for window in windows:
+            bins = (wall - origin[segments.codes]) // to_offset(window).nanos
+            run_codes, run_bins, run_sizes = segments.runs(bins)
+            run_sizes = run_sizes.astype(np.float64)
+            n_runs = np.bincount(run_codes, minlength=n_groups)
+            first_run = np.concatenate([[0], np.cumsum(n_runs)[:-1]])
+            last_run = first_run + n_runs - 1
+            
+            first_bin, last_bin = run_bins[first_run], run_bins[last_run]
+            n_bins = last_bin - first_bin + 1
+            n_velocity = n_bins - 1
+            first_count, last_count = run_sizes[first_run], run_sizes[last_run]
+            
+            # Differences between consecutive non-empty bins; a gap contributes
+            # a drop to zero, (gap - 1) zeros and a rise from zero
+            same_entity = run_codes[1:] == run_codes[:-1]
+            gap = run_bins[1:] - run_bins[:-1] - 1
+            adjacent = same_entity & (gap == 0)
+            gapped = same_entity & (gap > 0)
+            step_values = np.concatenate([
+                (run_sizes[1:] - run_sizes[:-1])[adjacent],
+                -run_sizes[:-1][gapped],
+                run_sizes[1:][gapped]
+            ])
+            step_codes = np.concatenate([
+                run_codes[1:][adjacent], run_codes[1:][gapped], run_codes[1:][gapped]
+            ])
+            zero_steps = np.bincount(run_codes[1:][gapped], gap[gapped] - 1, n_groups)
+            
+            velocity_mean = (last_count - first_count) / n_velocity
+            squared = (
+                np.bincount(step_codes, (step_values - velocity_mean[step_codes]) ** 2, n_groups) +
+                zero_steps * velocity_mean ** 2
+            )
+            velocity_std = np.where(n_velocity > 1, np.sqrt(squared / (n_velocity - 1)), np.nan)
+            velocity_max = _grouped(step_values, step_codes, n_groups, 'max', -np.inf)
+            velocity_min = _grouped(step_values, step_codes, n_groups, 'min', np.inf)
+            velocity_max = np.where(zero_steps > 0, np.maximum(velocity_max, 0), velocity_max)
+            velocity_min = np.where(zero_steps > 0, np.minimum(velocity_min, 0), velocity_min)
+            
+            # Acceleration mean telescopes to (v[m-1] - v[1]) / (m - 2)
+            second_run = np.minimum(first_run + 1, len(run_bins) - 1)
+            second_count = np.where(
+                (n_runs > 1) & (run_bins[second_run] == first_bin + 1), run_sizes[second_run], 0
+            )
+            penultimate_run = np.maximum(last_run - 1, 0)
+            penultimate_count = np.where(
+                (n_runs > 1) & (run_bins[penultimate_run] == last_bin - 1), run_sizes[penultimate_run], 0
+            )
+            acceleration_mean = np.where(
+                n_bins > 2,
+                ((last_count - penultimate_count) - (second_count - first_count)) / (n_bins - 2),
+                np.nan
+            )
+            
+            # Least-squares slope of counts over bin index
+            relative_bins = (run_bins - first_bin[run_codes]).astype(np.float64)
+            sum_xy = np.bincount(run_codes, relative_bins * run_sizes, n_groups)
+            x_mean = (n_bins - 1) / 2
+            x_ss = n_bins * (n_bins.astype(np.float64) ** 2 - 1) / 12
+            activity_trend = np.where(n_bins >= 3, (sum_xy - x_mean * counts) / x_ss, 0)
+            
+            changing = n_bins > 1
+            metrics[f'velocity_mean_{window}'] = np.where(changing, velocity_mean, 0)
+            metrics[f'velocity_std_{window}'] = np.where(changing, velocity_std, 0)
+            metrics[f'velocity_max_{window}'] = np.where(changing, velocity_max, 0)
+            metrics[f'velocity_min_{window}'] = np.where(changing, velocity_min, 0)
+            metrics[f'acceleration_mean_{window}'] = np.where(changing, acceleration_mean, 0)
+            metrics[f'activity_trend_{window}'] = activity_trend
+        
+        return pd.DataFrame(metrics)
+    
+    def _trading_style(self, segments: _TradeSegments, sides: np.ndarray) -> pd.DataFrame:
+        """
+        Buy/sell balance, trade size and activity-based style indicators
+        
+        Args:
+            segments: Sorted trade segments
+            sides: Trade side in time order
+        
+        Returns:
+            Feature frame indexed by entity code
+        """
+        n_groups = segments.n_groups
+        codes = segments.codes
+        counts = segments.counts
+        volumes = segments.column('volume').astype(np.float64)
+        
+        buy_count = np.bincount(codes[sides == 1], minlength=n_groups)
+        sell_count = np.bincount(codes[sides == -1], minlength=n_groups)
+        
+        avg_trade_size = np.bincount(codes, volumes, n_groups) / counts
+        large_threshold = pd.Series(volumes).groupby(codes).quantile(0.9).to_numpy()
+        large_trades = np.bincount(codes[volumes > large_threshold[codes]], minlength=n_groups)
+        
+        span_days = _scalar_seconds(segments.elapsed[segments.last] - segments.elapsed[segments.starts]) / 86400
+        trades_per_day = np.where(span_days > 0, counts / span_days, 0)
+        style = np.select(
+            [trades_per_day > 50, trades_per_day > 10, trades_per_day > 1],
+            ['high_frequency', 'day_trader', 'active_trader'],
+            'casual_trader'
+        )
+        
+        return pd.DataFrame({
+            'buy_count': buy_count,
+            'sell_count': sell_count,
+            'buy_sell_ratio': np.where(sell_count > 0, buy_count / np.maximum(sell_count, 1), buy_count),
+            'avg_trade_size': avg_trade_size,
+            'trade_size_cv': np.where(
+                avg_trade_size > 0, _grouped_std(volumes, codes, n_groups) / avg_trade_size, 0
+            ),
+            'large_trade_ratio': large_trades / counts,
+            'trades_per_day': trades_per_day,
+            'trading_style': style,
+            'is_high_frequency': style == 'high_frequency',
+            'is_day_trader': style == 'day_trader'
+        })
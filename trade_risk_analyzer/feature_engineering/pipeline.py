@@ -0,0 +1,303 @@
+"""
+Feature Pipeline
+
+Serializable feature pipeline artifact: the feature column schema, the
+fitted scaling parameters, the training feature distribution and a version
+hash. It is fitted once at training
+time, saved alongside the models and applied transform-only at inference,
+so every detection batch is scaled with the same statistics.
+"""
+
+import pandas as pd
+import numpy as np
+import hashlib
+import json
+import joblib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple
+
+from sklearn.preprocessing import StandardScaler, MinMaxScaler, RobustScaler
+
+from trade_risk_analyzer.core.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+FEATURE_PIPELINE_FILE = 'feature_pipeline.joblib'
+
+
+class FeaturePipeline:
+    """
+    Fitted feature schema and scaler applied at inference time
+    
+    Scaling is stored as an affine map (x - offset) * multiplier, which is
+    equivalent to the fitted standard, min-max or robust scaler.
+    """
+    
+    def __init__(self, scaler_type: Optional[str] = 'standard',
+                 time_windows: Optional[List[str]] = None):
+        """
+        Initialize feature pipeline
+        
+        Args:
+            scaler_type: Type of scaler ('standard', 'minmax', 'robust', or None)
+            time_windows: Time windows the features were extracted with
+        """
+        self.scaler_type = scaler_type
+        self.time_windows = list(time_windows or ['1H', '24H', '7D'])
+        
+        self.feature_columns: List[str] = []
+        self.dtypes: Dict[str, str] = {}
+        self.offset: Optional[np.ndarray] = None
+        self.multiplier: Optional[np.ndarray] = None
+        self.feature_mean: Optional[np.ndarray] = None
+        self.feature_std: Optional[np.ndarray] = None
+        self.version: Optional[str] = None
+        self.fitted_at: Optional[str] = None
+        self.n_samples = 0
+        
+        self.is_fitted = False
+        self.logger = logger
+    
+    def fit(self, features_df: pd.DataFrame,
+            exclude_columns: Optional[List[str]] = None) -> 'FeaturePipeline':
+        """
+        Fix the feature schema and fit the scaler
+        
+        Args:
+            features_df: DataFrame with extracted features
+            exclude_columns: Columns to exclude (e.g., identifiers)
+        
+        Returns:
+            Self
+        """
+        exclude_columns = exclude_columns or ['user_id', 'symbol', 'trade_id']
+        
+        numeric_cols = features_df.select_dtypes(include=[np.number]).columns
+        self.feature_columns = [col for col in numeric_cols if col not in exclude_columns]
+        self.dtypes = {col: str(features_df[col].dtype) for col in self.feature_columns}
+        
+        X = features_df[self.feature_columns].to_numpy(dtype=np.float64)
+        self.offset, self.multiplier = self._fit_scaling(X)
+        self.feature_mean = X.mean(axis=0)
+        self.feature_std = X.std(axis=0)
+        
+        self.n_samples = len(X)
+        self.fitted_at = datetime.now().isoformat()
+        self.version = self._compute_version()
+        self.is_fitted = True
+        
+        self.logger.info(
+            f"Fitted feature pipeline {self.version}: {len(self.feature_columns)} features, "
+            f"{self.n_samples} samples"
+        )
+        
+        return self
+    
+    def _fit_scaling(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Fit the configured scaler and return its affine parameters"""
+        n_features = X.shape[1]
+        
+        if self.scaler_type == 'standard':
+            scaler = StandardScaler().fit(X)
+            return scaler.mean_, 1.0 / scaler.scale_
+        elif self.scaler_type == 'minmax':
+            scaler = MinMaxScaler().fit(X)
+            return -scaler.min_ / scaler.scale_, scaler.scale_
+        elif self.scaler_type == 'robust':
+            scaler = RobustScaler().fit(X)
+            return scaler.center_, 1.0 / scaler.scale_
+        else:
+            return np.zeros(n_features), np.ones(n_features)
+    
+    def _compute_version(self) -> str:
+        """Hash of the feature schema and scaler configuration"""
+        schema = {
+            'feature_columns': self.feature_columns,
+            'dtypes': self.dtypes,
+            'scaler_type': self.scaler_type,
+            'time_windows': self.time_windows
+        }
+        digest = hashlib.sha256(json.dumps(schema, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()[:16]
+    
+    def transform(self, features_df: pd.DataFrame,
+                  out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Build the scaled feature matrix in schema column order
+        
+        Columns missing from the batch (e.g. hour ranks no entity reached)
+        are filled with 0 and extra columns are ignored. Values are written
+        straight into the output matrix and scaled in place.
+        
+        Args:
+            features_df: DataFrame with extracted features
+            out: Optional preallocated float64 array of shape
+                (len(features_df), n_features) to write into
+        
+        Returns:
+            Scaled feature matrix
+        """
+        if not self.is_fitted:
+            raise ValueError("Feature pipeline must be fitted before transform")
+        
+        shape = (len(features_df), len(self.feature_columns))
+        if out is None:
+            out = np.empty(shape, dtype=np.float64)
+        elif out.shape != shape or out.dtype != np.float64:
+            raise ValueError(f"Output array must be float64 with shape {shape}")
+        
+        for j, col in enumerate(self.feature_columns):
+            if col in features_df.columns:
+                out[:, j] = features_df[col].to_numpy()
+            else:
+                out[:, j] = 0.0
+        
+        np.subtract(out, self.offset, out=out)
+        np.multiply(out, self.multiplier, out=out)
+        
+        return out
+    
+    def transform_frame(self, features_df: pd.DataFrame,
+                        id_columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Scale features and return them as a DataFrame in schema order
+        
+        Args:
+            features_df: DataFrame with extracted features
+            id_columns: Identifier columns to keep in front (e.g. ['user_id'])
+        
+        Returns:
+            DataFrame with identifier columns followed by scaled features
+        """
+        scaled_df = pd.DataFrame(
+            self.transform(features_df),
+            columns=self.feature_columns,
+            index=features_df.index
+        )
+        
+        for position, col in enumerate(id_columns or []):
+            if col in features_df.columns:
+                scaled_df.insert(position, col, features_df[col])
+        
+        return scaled_df
+    
+    def zscore(self, X: np.ndarray) -> np.ndarray:
+        """
+        Express scaled features as z-scores against the training distribution
+        
+        Args:
+            X: Scaled feature matrix (output of transform)
+        
+        Returns:
+            Z-scores (0 for features that were constant in training)
+        """
+        if not self.is_fitted:
+            raise ValueError("Feature pipeline must be fitted before zscore")
+        
+        mean, std = self.feature_mean, self.feature_std
+        if mean is None or std is None:
+            if self.scaler_type != 'standard':
+                # Pipelines saved without statistics: scaled values are the best proxy
+                return np.asarray(X, dtype=np.float64)
+            mean, std = self.offset, 1.0 / self.multiplier
+        
+        # Undo the scaling and standardize: z = X * a + b
+        std = np.where(std > 0, std, np.inf)
+        a = 1.0 / (self.multiplier * std)
+        b = (self.offset - mean) / std
+        
+        return np.asarray(X, dtype=np.float64) * a + b
+    
+    def is_compatible(self, time_windows: List[str]) -> bool:
+        """
+        Check whether the pipeline was fitted for the given time windows
+        
+        Args:
+            time_windows: Time windows used for feature extraction
+        
+        Returns:
+            True if the windows match
+        """
+        return list(time_windows) == self.time_windows
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert pipeline metadata to dictionary"""
+        return {
+            'version': self.version,
+            'scaler_type': self.scaler_type,
+            'time_windows': self.time_windows,
+            'feature_columns': self.feature_columns,
+            'dtypes': self.dtypes,
+            'n_samples': self.n_samples,
+            'fitted_at': self.fitted_at
+        }
+    
+    def save(self, path: str) -> None:
+        """
+        Save pipeline to file
+        
+        Args:
+            path: Output file path
+        """
+        if not self.is_fitted:
+            raise ValueError("Cannot save unfitted feature pipeline")
+        
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        
+        pipeline_data = {
+            **self.to_dict(),
+            'offset': self.offset,
+            'multiplier': self.multiplier,
+            'feature_mean': self.feature_mean,
+            'feature_std': self.feature_std
+        }
+        joblib.dump(pipeline_data, path)
+        
+        # Save metadata separately
+        metadata_path = Path(path).with_suffix('.json')
+        with open(metadata_path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        
+        self.logger.info(f"Feature pipeline {self.version} saved to {path}")
+    
+    @classmethod
+    def load(cls, path: str) -> 'FeaturePipeline':
+        """
+        Load pipeline from file
+        
+        Args:
+            path: Input file path
+        
+        Returns:
+            Loaded FeaturePipeline
+        """
+        if not Path(path).exists():
+            raise FileNotFoundError(f"Feature pipeline file not found: {path}")
+        
+        pipeline_data = joblib.load(path)
+        
+        pipeline = cls(
+            scaler_type=pipeline_data['scaler_type'],
+            time_windows=pipeline_data['time_windows']
+        )
+        pipeline.feature_columns = list(pipeline_data['feature_columns'])
+        pipeline.dtypes = dict(pipeline_data['dtypes'])
+        pipeline.offset = np.asarray(pipeline_data['offset'], dtype=np.float64)
+        pipeline.multiplier = np.asarray(pipeline_data['multiplier'], dtype=np.float64)
+        if pipeline_data.get('feature_mean') is not None:
+            pipeline.feature_mean = np.asarray(pipeline_data['feature_mean'], dtype=np.float64)
+            pipeline.feature_std = np.asarray(pipeline_data['feature_std'], dtype=np.float64)
+        pipeline.n_samples = pipeline_data.get('n_samples', 0)
+        pipeline.fitted_at = pipeline_data.get('fitted_at')
+        pipeline.version = pipeline_data['version']
+        pipeline.is_fitted = True
+        
+        if pipeline._compute_version() != pipeline.version:
+            logger.warning(f"Feature pipeline {path} schema does not match its version hash")
+        
+        logger.info(f"Loaded feature pipeline {pipeline.version} ({len(pipeline.feature_columns)} features)")
+        
+        return pipeline
@@ -0,0 +1,325 @@
+"""
+Position Kernels
+
+Typed array kernels that replay each (entity, symbol) trade sequence as an
+open-position state machine, producing per-trade holding times and realized
+profit/loss in a single pass. The tracking loop is compiled with Numba when
+it is installed and runs as plain Python over the same arrays otherwise.
+"""
+
+import pandas as pd
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+from trade_risk_analyzer.core.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+SIDE_BUY = 1
+SIDE_SELL = -1
+SIDE_OTHER = 0
+
+
+@dataclass
+class PositionTrades:
+    """
+    Trades ordered by (entity, symbol, timestamp) for position tracking
+    """
+    keys: np.ndarray              # Entity keys, indexed by entity code
+    codes: np.ndarray             # Entity code of each ordered trade
+    segment_offsets: np.ndarray   # Start of each (entity, symbol) segment, plus the end
+    side: np.ndarray              # SIDE_BUY, SIDE_SELL or SIDE_OTHER
+    timestamps: np.ndarray        # UTC nanoseconds
+    prices: np.ndarray
+    volumes: np.ndarray
+
+    @property
+    def n_groups(self) -> int:
+        return len(self.keys)
+
+
+def trade_sides(trade_types) -> np.ndarray:
+    """
+    Encode trade types as sides (case-insensitive)
+
+    Categorical input is encoded per category and expanded by code.
+    
+    Args:
+        trade_types: Trade type values ('BUY', 'SELL', ...)
+
+    Returns:
+        Array of SIDE_BUY, SIDE_SELL or SIDE_OTHER
+    """
+    trade_types = pd.Series(trade_types)
+    if isinstance(trade_types.dtype, pd.CategoricalDtype):
+        category_sides = trade_sides(trade_types.cat.categories.to_numpy())
+        # Code -1 (missing) selects the appended SIDE_OTHER
+        return np.append(category_sides, SIDE_OTHER).astype(np.int8)[trade_types.cat.codes.to_numpy()]
+    
+    trade_types = trade_types.astype(str).str.upper()
+    return np.select(
+        [(trade_types == 'BUY').to_numpy(), (trade_types == 'SELL').to_numpy()],
+        [SIDE_BUY, SIDE_SELL],
+        SIDE_OTHER
+    ).astype(np.int8)
+
+
+def segment_offsets(new_segment: np.ndarray) -> np.ndarray:
+    """
+    Convert segment start flags into offsets
+
+    Args:
+        new_segment: True where a new segment starts
+
+    Returns:
+        Start position of each segment followed by the total length
+    """
+    return np.append(np.flatnonzero(new_segment), len(new_segment)).astype(np.int64)
+
+
+def prepare_position_trades(df: pd.DataFrame, group_by: str = 'user_id') -> PositionTrades:
+    """
+    Order trades by (entity, symbol, timestamp) for position tracking
+
+    Entities keep their order of first appearance. Trades without an entity
+    or symbol are left out, and trades with equal timestamps keep their
+    original row order.
+
+    Args:
+        df: DataFrame with trade data
+        group_by: Column to group by
+
+    Returns:
+        PositionTrades
+    """
+    timestamps = pd.to_datetime(df['timestamp']).reset_index(drop=True)
+    if timestamps.dt.tz is not None:
+        timestamps = timestamps.dt.tz_convert(None)
+    timestamps = timestamps.to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+    entity_codes, keys = pd.factorize(df[group_by])
+    symbol_codes, _ = pd.factorize(df['symbol'])
+
+    valid = np.flatnonzero((entity_codes >= 0) & (symbol_codes >= 0))
+    order = valid[np.lexsort((timestamps[valid], symbol_codes[valid], entity_codes[valid]))]
+
+    codes = entity_codes[order]
+    symbols = symbol_codes[order]
+    new_segment = np.ones(len(order), dtype=bool)
+    new_segment[1:] = (codes[1:] != codes[:-1]) | (symbols[1:] != symbols[:-1])
+
+    return PositionTrades(
+        keys=np.asarray(keys),
+        codes=codes,
+        segment_offsets=segment_offsets(new_segment),
+        side=trade_sides(df['trade_type'].iloc[order]),
+        timestamps=timestamps[order],
+        prices=df['price'].to_numpy(dtype=np.float64)[order],
+        volumes=df['volume'].to_numpy(dtype=np.float64)[order]
+    )
+
+
+def _track_positions_loop(offsets, side, timestamps, prices, volumes,
+                          closed, holding_ns, realized, pnl):
+    """
+    Replay positions segment by segment, filling the per-trade outputs
+
+    A BUY opens (or adds to) a position and updates the volume-weighted
+    entry price; a SELL closes against the open position, recording the
+    holding time since it was opened and the profit/loss against the
+    average entry price.
+    """
+    for segment in range(len(offsets) - 1):
+        position = 0.0
+        open_time = 0
+        has_open = False
+        buy_price = 0.0
+        buy_volume = 0.0
+
+        for i in range(offsets[segment], offsets[segment + 1]):
+            price = prices[i]
+            volume = volumes[i]
+
+            if side[i] == 1:
+                if position == 0:
+                    open_time = timestamps[i]
+                    has_open = True
+                position += volume
+
+                total_cost = buy_price * buy_volume + price * volume
+                buy_volume += volume
+                buy_price = total_cost / buy_volume if buy_volume > 0 else 0.0
+            elif side[i] == -1:
+                if position > 0 and has_open:
+                    closed[i] = True
+                    holding_ns[i] = timestamps[i] - open_time
+                    position -= volume
+                    if position <= 0:
+                        position = 0.0
+                        has_open = False
+
+                if buy_volume > 0:
+                    sell_volume = min(volume, buy_volume)
+                    realized[i] = True
+                    pnl[i] = (price - buy_price) * sell_volume
+                    buy_volume -= sell_volume
+                    if buy_volume <= 0:
+                        buy_price = 0.0
+                        buy_volume = 0.0
+
+
+if NUMBA_AVAILABLE:
+    _track_positions_compiled = njit(cache=True, nogil=True)(_track_positions_loop)
+
+
+def track_positions(offsets: np.ndarray, side: np.ndarray, timestamps: np.ndarray,
+                    prices: np.ndarray, volumes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Track open positions through sorted (entity, symbol) segments
+
+    Args:
+        offsets: Start of each segment followed by the total length
+        side: SIDE_BUY, SIDE_SELL or SIDE_OTHER per trade
+        timestamps: Trade timestamps (ns), sorted within each segment
+        prices: Trade prices
+        volumes: Trade volumes
+
+    Returns:
+        Tuple of (closed, holding_ns, realized, pnl): whether each trade
+        closed a position and its holding time, and whether it realized
+        profit/loss and the amount
+    """
+    n = len(side)
+
+    if NUMBA_AVAILABLE:
+        closed = np.zeros(n, dtype=np.bool_)
+        holding_ns = np.zeros(n, dtype=np.int64)
+        realized = np.zeros(n, dtype=np.bool_)
+        pnl = np.zeros(n, dtype=np.float64)
+        _track_positions_compiled(
+            np.ascontiguousarray(offsets, dtype=np.int64),
+            np.ascontiguousarray(side, dtype=np.int8),
+            np.ascontiguousarray(timestamps, dtype=np.int64),
+            np.ascontiguousarray(prices, dtype=np.float64),
+            np.ascontiguousarray(volumes, dtype=np.float64),
+            closed, holding_ns, realized, pnl
+        )
+        return closed, holding_ns, realized, pnl
+
+    # Python scalars are much faster than NumPy element access in a plain loop
+    closed = [False] * n
+    holding_ns = [0] * n
+    realized = [False] * n
+    pnl = [0.0] * n
+    _track_positions_loop(
+        np.asarray(offsets).tolist(),
+        np.asarray(side).tolist(),
+        np.asarray(timestamps, dtype=np.int64).tolist(),
+        np.asarray(prices, dtype=np.float64).tolist(),
+        np.asarray(volumes, dtype=np.float64).tolist(),
+        closed, holding_ns, realized, pnl
+    )
+    return (
+        np.array(closed, dtype=bool),
+        np.array(holding_ns, dtype=np.int64),
+        np.array(realized, dtype=bool),
+        np.array(pnl, dtype=np.float64)
+    )
+
+
+def holding_time_metrics(codes: np.ndarray, closed: np.ndarray, holding_ns: np.ndarray,
+                         n_groups: int) -> Dict[str, np.ndarray]:
+    """
+    Aggregate closed-position holding times per entity
+
+    Args:
+        codes: Entity code of each tracked trade
+        closed: Whether each trade closed a position
+        holding_ns: Holding time of each closing trade (ns)
+        n_groups: Number of entities
+
+    Returns:
+        Dictionary of per-entity holding time metrics (zeros for entities
+        without closed positions)
+    """
+    hold_codes = codes[closed]
+
+    # Timedelta.total_seconds() resolution (microseconds)
+    hold_hours = ((holding_ns[closed] // 1000) / 1e6) / 3600
+
+    position_count = np.bincount(hold_codes, minlength=n_groups)
+    divisor = np.maximum(position_count, 1)
+    grouped = pd.Series(hold_hours).groupby(hold_codes)
+
+    def per_group(values):
+        return values.reindex(range(n_groups), fill_value=0).to_numpy()
+
+    def hold_ratio(mask):
+        return np.bincount(hold_codes[mask], minlength=n_groups) / divisor
+
+    mean_hours = np.bincount(hold_codes, hold_hours, n_groups) / divisor
+
+    return {
+        'mean_holding_time_hours': mean_hours,
+        'median_holding_time_hours': per_group(grouped.median()),
+        'std_holding_time_hours': np.sqrt(
+            np.bincount(hold_codes, (hold_hours - mean_hours[hold_codes]) ** 2, n_groups) / divisor
+        ),
+        'min_holding_time_hours': per_group(grouped.min()),
+        'max_holding_time_hours': per_group(grouped.max()),
+        'short_term_holds_ratio': hold_ratio(hold_hours < 1),
+        'day_trading_ratio': hold_ratio(hold_hours < 24),
+        'swing_trading_ratio': hold_ratio((hold_hours >= 24) & (hold_hours < 168)),
+        'position_count': position_count
+    }
+
+
+def win_loss_metrics(codes: np.ndarray, realized: np.ndarray, pnl: np.ndarray,
+                     n_groups: int) -> Dict[str, np.ndarray]:
+    """
+    Aggregate realized profit and loss per entity
+
+    Args:
+        codes: Entity code of each tracked trade
+        realized: Whether each trade realized profit/loss
+        pnl: Realized profit/loss of each trade
+        n_groups: Number of entities
+
+    Returns:
+        Dictionary of per-entity win/loss metrics
+    """
+    pnl_codes = codes[realized]
+    pnl = pnl[realized]
+
+    wins = np.bincount(pnl_codes[pnl > 0], minlength=n_groups)
+    losses = np.bincount(pnl_codes[pnl < 0], minlength=n_groups)
+    total_profit = np.bincount(pnl_codes, np.where(pnl > 0, pnl, 0), n_groups)
+    total_loss = np.bincount(pnl_codes, np.where(pnl < 0, -pnl, 0), n_groups)
+    decided = wins + losses
+
+    return {
+        'win_count': wins,
+        'loss_count': losses,
+        'win_ratio': wins / np.maximum(decided, 1),
+        'loss_ratio': losses / np.maximum(decided, 1),
+        'profit_factor': np.where(
+            total_loss > 0,
+            total_profit / np.where(total_loss > 0, total_loss, 1),
+            total_profit
+        ),
+        'avg_win': total_profit / np.maximum(wins, 1),
+        'avg_loss': total_loss / np.maximum(losses, 1),
+        'total_profit': total_profit,
+        'total_loss': total_loss,
+        'net_pnl': total_profit - total_loss
+    }
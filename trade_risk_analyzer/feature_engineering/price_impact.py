@@ -281,75 +281,102 @@ class PriceImpactCalculator:
         if df.empty:
             return pd.DataFrame()
         
-        results = []
-        
-        for group_id in df[group_by].unique():
-            group_df = df[df[group_by] == group_id]
+        codes, keys = pd.factorize(df[group_by])
+        n_groups = len(keys)
+        valid = codes >= 0
+        codes = codes[valid]
+        prices = df['price'].to_numpy(dtype=np.float64)[valid]
+        total_trades = np.bincount(codes, minlength=n_groups)
+        
+        # If market data with bid/ask is provided
+        if market_data_df is not None and 'bid' in market_data_df.columns and 'ask' in market_data_df.columns:
+            bid, ask = self._match_quotes(df, market_data_df)
+            bid, ask = bid[valid], ask[valid]
+            matched = ~np.isnan(bid)
             
-            # If market data with bid/ask is provided
-            if market_data_df is not None and 'bid' in market_data_df.columns and 'ask' in market_data_df.columns:
-                spread_impacts = []
-                
-                for _, trade in group_df.iterrows():
-                    # Find corresponding market data
-                    market_row = market_data_df[
-                        (market_data_df['symbol'] == trade['symbol']) &
-                        (market_data_df['timestamp'] <= trade['timestamp'])
-                    ].tail(1)
-                    
-                    if not market_row.empty:
-                        bid = market_row['bid'].values[0]
-                        ask = market_row['ask'].values[0]
-                        mid = (bid + ask) / 2
-                        spread = ask - bid
-                        
-                        # Calculate impact
-                        if trade['trade_type'] == 'BUY':
-                            impact = (trade['price'] - mid) / spread if spread > 0 else 0
-                        else:
-                            impact = (mid - trade['price']) / spread if spread > 0 else 0
-                        
-                        spread_impacts.append(impact)
-                
-                if spread_impacts:
-                    mean_impact = np.mean(spread_impacts)
-                    max_impact = np.max(np.abs(spread_impacts))
-                    beyond_spread_ratio = np.sum(np.abs(spread_impacts) > 1) / len(spread_impacts)
-                else:
-                    mean_impact = 0
-                    max_impact = 0
-                    beyond_spread_ratio = 0
-            else:
-                # Estimate spread impact using price volatility
-                prices = group_df['price'].values
-                if len(prices) > 1:
-                    price_std = np.std(prices)
-                    price_mean = np.mean(prices)
-                    estimated_spread = 2 * price_std  # Rough estimate
-                    
-                    mean_impact = price_std / estimated_spread if estimated_spread > 0 else 0
-                    max_impact = (np.max(prices) - np.min(prices)) / estimated_spread if estimated_spread > 0 else 0
-                    beyond_spread_ratio = 0
-                else:
-                    mean_impact = 0
-                    max_impact = 0
-                    beyond_spread_ratio = 0
+            mid = (bid + ask) / 2
+            spread = ask - bid
+            is_buy = (df['trade_type'] == 'BUY').to_numpy()[valid]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                impact = np.where(is_buy, prices - mid, mid - prices) / spread
+            impact = np.where(spread > 0, impact, 0)[matched]
+            impact_codes = codes[matched]
             
-            metrics = {
-                group_by: group_id,
-                'mean_spread_impact': mean_impact,
-                'max_spread_impact': max_impact,
-                'beyond_spread_ratio': beyond_spread_ratio,
-                'total_trades': len(group_df)
-            }
+            impact_count = np.bincount(impact_codes, minlength=n_groups)
+            divisor = np.maximum(impact_count, 1)
+            max_impact = pd.Series(np.abs(impact)).groupby(impact_codes).max()
             
-            results.append(metrics)
-        
-        result_df = pd.DataFrame(results)
+            mean_impact = np.bincount(impact_codes, impact, n_groups) / divisor
+            max_impact = max_impact.reindex(range(n_groups), fill_value=0).to_numpy()
+            beyond_spread_ratio = np.bincount(impact_codes[np.abs(impact) > 1], minlength=n_groups) / divisor
+        else:
+            # Estimate spread impact using price volatility
+            grouped = pd.Series(prices).groupby(codes)
+            price_std = grouped.std(ddof=0).reindex(range(n_groups)).to_numpy()
+            price_range = (grouped.max() - grouped.min()).reindex(range(n_groups)).to_numpy()
+            estimated_spread = 2 * price_std  # Rough estimate
+            estimable = (total_trades > 1) & (estimated_spread > 0)
+            divisor = np.where(estimable, estimated_spread, 1)
+            
+            mean_impact = np.where(estimable, price_std / divisor, 0)
+            max_impact = np.where(estimable, price_range / divisor, 0)
+            beyond_spread_ratio = np.zeros(n_groups)
+        
+        result_df = pd.DataFrame({
+            group_by: keys,
+            'mean_spread_impact': mean_impact,
+            'max_spread_impact': max_impact,
+            'beyond_spread_ratio': beyond_spread_ratio,
+            'total_trades': total_trades
+        })
         self.logger.info(f"Analyzed spread impact for {len(result_df)} groups")
         
         return result_df
     
+    def _match_quotes(self, df: pd.DataFrame,
+                      market_data_df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the quote in effect for each trade
+        
+        Uses the last market data row (in market data order) for the trade's
+        symbol with a timestamp at or before the trade.
+        
+        Args:
+            df: DataFrame with trade data
+            market_data_df: DataFrame with market data (symbol, timestamp, bid, ask)
+        
+        Returns:
+            Tuple of (bid, ask) arrays aligned with df rows, NaN where no quote exists
+        """
+        quotes = pd.DataFrame({
+            'symbol': market_data_df['symbol'].to_numpy(),
+            'timestamp': pd.to_datetime(market_data_df['timestamp']).to_numpy(),
+            'row': np.arange(len(market_data_df))
+        }).dropna(subset=['symbol', 'timestamp'])
+        quotes = quotes.sort_values('timestamp', kind='stable')
+        
+        # Latest market data row among quotes at or before each timestamp
+        quotes['row'] = quotes.groupby('symbol', observed=True)['row'].cummax()
+        
+        trades = pd.DataFrame({
+            'symbol': df['symbol'].to_numpy(),
+            'timestamp': pd.to_datetime(df['timestamp']).to_numpy(),
+            'position': np.arange(len(df))
+        }).dropna(subset=['symbol', 'timestamp'])
+        trades = trades.sort_values('timestamp', kind='stable')
+        
+        matched = pd.merge_asof(trades, quotes, on='timestamp', by='symbol', direction='backward')
+        matched = matched.dropna(subset=['row'])
+        
+        bid = np.full(len(df), np.nan)
+        ask = np.full(len(df), np.nan)
+        rows = matched['row'].to_numpy(dtype=np.int64)
+        positions = matched['position'].to_numpy()
+        bid[positions] = market_data_df['bid'].to_numpy(dtype=np.float64)[rows]
+        ask[positions] = market_data_df['ask'].to_numpy(dtype=np.float64)[rows]
+        
+        return bid, ask
+    
     def calculate_price_momentum(self, df: pd.DataFrame,
                                  windows: Optional[List[str]] = None,
                                  group_by: str = 'user_id') -> pd.DataFrame:
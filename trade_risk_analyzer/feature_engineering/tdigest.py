@@ -0,0 +1,189 @@
+"""
+T-Digest
+
+Compact merging t-digest for streaming quantile estimates. Digests of
+disjoint batches can be merged, so per-entity percentiles are maintained
+incrementally without keeping raw values.
+"""
+
+import numpy as np
+from typing import Dict, Any, Iterable
+
+
+class TDigest:
+    """
+    Merging t-digest (k1 scale function)
+    
+    Centroids near the tails stay small, so extreme percentiles remain
+    accurate while the digest size is bounded by the compression.
+    """
+    
+    def __init__(self, compression: float = 100.0):
+        """
+        Initialize t-digest
+        
+        Args:
+            compression: Accuracy/size trade-off (roughly the maximum number
+                of centroids)
+        """
+        self.compression = compression
+        self.means = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.min = np.inf
+        self.max = -np.inf
+    
+    @property
+    def count(self) -> float:
+        """Total weight of all values added"""
+        return float(self.weights.sum())
+    
+    def update(self, values: Iterable[float]) -> 'TDigest':
+        """
+        Add values to the digest
+        
+        Args:
+            values: Values to add (NaN values are ignored)
+        
+        Returns:
+            Self
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._compress(
+            np.concatenate([self.means, values]),
+            np.concatenate([self.weights, np.ones(len(values))])
+        )
+        return self
+    
+    def merge(self, other: 'TDigest') -> 'TDigest':
+        """
+        Merge another digest into this one
+        
+        Args:
+            other: Digest to merge
+        
+        Returns:
+            Self
+        """
+        if len(other.means) == 0:
+            return self
+        
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(
+            np.concatenate([self.means, other.means]),
+            np.concatenate([self.weights, other.weights])
+        )
+        return self
+    
+    def _compress(self, means: np.ndarray, weights: np.ndarray) -> None:
+        """Merge sorted centroids greedily within the k1 size limit"""
+        order = np.argsort(means, kind='stable')
+        means = means[order]
+        weights = weights[order]
+        total = weights.sum()
+        
+        cumulative = np.cumsum(weights)
+        merged_means = []
+        merged_weights = []
+        
+        current_mean = means[0]
+        current_weight = weights[0]
+        weight_so_far = 0.0
+        limit = total * self._k_to_q(self._q_to_k(0.0) + 1.0)
+        
+        for i in range(1, len(means)):
+            if cumulative[i] <= limit:
+                current_weight += weights[i]
+                current_mean += (means[i] - current_mean) * weights[i] / current_weight
+            else:
+                merged_means.append(current_mean)
+                merged_weights.append(current_weight)
+                weight_so_far += current_weight
+                limit = total * self._k_to_q(self._q_to_k(weight_so_far / total) + 1.0)
+                
+                current_mean = means[i]
+                current_weight = weights[i]
+        
+        merged_means.append(current_mean)
+        merged_weights.append(current_weight)
+        
+        self.means = np.array(merged_means, dtype=np.float64)
+        self.weights = np.array(merged_weights, dtype=np.float64)
+    
+    def _q_to_k(self, q: float) -> float:
+        return self.compression / (2 * np.pi) * np.arcsin(2 * min(max(q, 0.0), 1.0) - 1)
+    
+    def _k_to_q(self, k: float) -> float:
+        if k >= self.compression / 4:
+            return 1.0
+        return (np.sin(k * 2 * np.pi / self.compression) + 1) / 2
+    
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile
+        
+        Args:
+            q: Quantile in [0, 1]
+        
+        Returns:
+            Estimated value (NaN for an empty digest)
+        """
+        if len(self.means) == 0:
+            return np.nan
+        if len(self.means) == 1 or q <= 0:
+            return self.min if q <= 0 else float(self.means[0])
+        if q >= 1:
+            return self.max
+        
+        total = self.weights.sum()
+        
+        # Weight position of each centroid center; the target position
+        # follows numpy.percentile's linear interpolation, so digests made of
+        # single-value centroids return exact percentiles
+        centers = np.cumsum(self.weights) - self.weights / 2
+        index = q * (total - 1) + 0.5
+        
+        if index <= centers[0]:
+            if self.weights[0] <= 1:
+                return float(self.means[0])
+            return float(self.min + (self.means[0] - self.min) * index / centers[0])
+        if index >= centers[-1]:
+            if self.weights[-1] <= 1:
+                return float(self.means[-1])
+            tail = total - centers[-1]
+            return float(self.means[-1] + (self.max - self.means[-1]) * (index - centers[-1]) / tail)
+        
+        right = int(np.searchsorted(centers, index, side='right'))
+        left = right - 1
+        fraction = (index - centers[left]) / (centers[right] - centers[left])
+        return float(self.means[left] + fraction * (self.means[right] - self.means[left]))
+    
+    def quantiles(self, qs: Iterable[float]) -> np.ndarray:
+        """Estimate several quantiles"""
+        return np.array([self.quantile(q) for q in qs], dtype=np.float64)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert digest to dictionary"""
+        return {
+            'compression': self.compression,
+            'means': self.means.tolist(),
+            'weights': self.weights.tolist(),
+            'min': self.min,
+            'max': self.max
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TDigest':
+        """Create digest from dictionary"""
+        digest = cls(compression=data.get('compression', 100.0))
+        digest.means = np.asarray(data['means'], dtype=np.float64)
+        digest.weights = np.asarray(data['weights'], dtype=np.float64)
+        digest.min = data['min']
+        digest.max = data['max']
+        return digest
@@ -0,0 +1,185 @@
+"""
+Time Segments
+
+Per-group sorted int64 timestamp arrays shared by the frequency
+calculations: trailing-window counts come from a segmented searchsorted
+and time-bin histograms from run-length counts over the sorted bins, so
+every window and bin size is answered from a single sort.
+"""
+
+import pandas as pd
+import numpy as np
+from dataclasses import dataclass
+from typing import Tuple
+
+
+NS_PER_SECOND = 1_000_000_000
+NS_PER_MINUTE = 60 * NS_PER_SECOND
+NS_PER_HOUR = 3600 * NS_PER_SECOND
+NS_PER_DAY = 86400 * NS_PER_SECOND
+
+
+def group_searchsorted(codes: np.ndarray, values: np.ndarray,
+                       query_codes: np.ndarray, query_values: np.ndarray,
+                       side: str = 'left') -> np.ndarray:
+    """
+    Search sorted values within each entity segment
+    
+    Args:
+        codes: Entity code of each value (sorted, values sorted within entity)
+        values: Values to search
+        query_codes: Entity code of each query
+        query_values: Values to insert
+        side: 'left' or 'right', as in np.searchsorted
+    
+    Returns:
+        Global insertion position of each query within its entity segment
+    """
+    n = len(values)
+    data_tie, query_tie = (0, 1) if side == 'right' else (1, 0)
+    ties = np.concatenate([
+        np.full(n, data_tie, dtype=np.int8),
+        np.full(len(query_values), query_tie, dtype=np.int8)
+    ])
+    order = np.lexsort((
+        ties,
+        np.concatenate([values, query_values]),
+        np.concatenate([codes, query_codes])
+    ))
+    
+    is_data = order < n
+    data_seen = np.cumsum(is_data)
+    
+    positions = np.empty(len(query_values), dtype=np.int64)
+    positions[order[~is_data] - n] = data_seen[~is_data]
+    return positions
+
+
+def coarsen_runs(codes: np.ndarray, bins: np.ndarray, sizes: np.ndarray,
+                 factor: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Merge a (group, bin) histogram into bins `factor` times wider
+    
+    Args:
+        codes: Group code of each non-empty bin, sorted
+        bins: Bin index of each non-empty bin, sorted within group
+        sizes: Count of each bin
+        factor: Number of bins merged into one
+    
+    Returns:
+        Tuple of (group codes, bins, sizes) of the wider histogram
+    """
+    if factor == 1 or len(bins) == 0:
+        return codes, bins, sizes
+    
+    wide_bins = np.floor_divide(bins, factor)
+    boundary = np.ones(len(bins), dtype=bool)
+    boundary[1:] = (codes[1:] != codes[:-1]) | (wide_bins[1:] != wide_bins[:-1])
+    run_starts = np.flatnonzero(boundary)
+    
+    return codes[run_starts], wide_bins[run_starts], np.add.reduceat(sizes, run_starts)
+
+
+@dataclass
+class GroupTimes:
+    """
+    Trade timestamps sorted by (group, timestamp)
+    
+    Groups are coded in order of first appearance, as `Series.unique()`
+    returns them; rows with a missing group are dropped.
+    """
+    keys: np.ndarray              # Group keys, indexed by group code
+    counts: np.ndarray            # Trades per group
+    starts: np.ndarray            # First sorted position of each group
+    codes: np.ndarray             # Group code of each sorted trade
+    elapsed: np.ndarray           # UTC nanoseconds, sorted within group
+    wall: np.ndarray              # Wall-clock nanoseconds, same order
+    timestamps: pd.Series         # Parsed timestamps, same order
+    
+    @classmethod
+    def build(cls, df: pd.DataFrame, group_by: str) -> 'GroupTimes':
+        """
+        Sort timestamps once per group
+        
+        Args:
+            df: DataFrame with 'timestamp' and the group column
+            group_by: Column to group by
+        
+        Returns:
+            GroupTimes
+        """
+        timestamps = pd.to_datetime(df['timestamp']).reset_index(drop=True)
+        if timestamps.dt.tz is not None:
+            elapsed = timestamps.dt.tz_convert(None)
+            wall = timestamps.dt.tz_localize(None)
+        else:
+            elapsed = wall = timestamps
+        elapsed = elapsed.to_numpy(dtype='datetime64[ns]').view(np.int64)
+        wall = wall.to_numpy(dtype='datetime64[ns]').view(np.int64)
+        
+        frame_codes, keys = pd.factorize(df[group_by])
+        positions = np.flatnonzero(frame_codes >= 0)
+        order = positions[np.lexsort((elapsed[positions], frame_codes[positions]))]
+        
+        codes = frame_codes[order]
+        counts = np.bincount(codes, minlength=len(keys))
+        
+        return cls(
+            keys=np.asarray(keys),
+            counts=counts,
+            starts=np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64),
+            codes=codes,
+            elapsed=elapsed[order],
+            wall=wall[order],
+            timestamps=timestamps.iloc[order].reset_index(drop=True)
+        )
+    
+    @property
+    def n_groups(self) -> int:
+        return len(self.keys)
+    
+    @property
+    def last(self) -> np.ndarray:
+        return self.starts + self.counts - 1
+    
+    def trailing_counts(self, window_ns: int) -> np.ndarray:
+        """
+        Count trades at or after each group's latest trade minus the window
+        
+        Args:
+            window_ns: Window length in nanoseconds
+        
+        Returns:
+            Trades in the window per group
+        """
+        group_codes = np.arange(self.n_groups)
+        window_start = self.elapsed[self.last] - window_ns
+        first_inside = group_searchsorted(self.codes, self.elapsed, group_codes, window_start, side='left')
+        return self.starts + self.counts - first_inside
+    
+    def bin_histogram(self, bin_ns: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Count trades per (group, wall-clock time bin)
+        
+        Args:
+            bin_ns: Bin width in nanoseconds
+        
+        Returns:
+            Tuple of (group codes, bins, sizes) for each non-empty bin,
+            sorted by group then bin
+        """
+        codes = self.codes
+        bins = np.floor_divide(self.wall, bin_ns)
+        
+        # Wall-clock time can step back within a group across DST changes
+        same_group = codes[1:] == codes[:-1]
+        if not np.all((bins[1:] >= bins[:-1]) | ~same_group):
+            order = np.lexsort((bins, codes))
+            bins = bins[order]
+        
+        boundary = np.ones(len(bins), dtype=bool)
+        boundary[1:] = (codes[1:] != codes[:-1]) | (bins[1:] != bins[:-1])
+        run_starts = np.flatnonzero(boundary)
+        run_sizes = np.diff(np.append(run_starts, len(bins)))
+        
+        return codes[run_starts], bins[run_starts], run_sizes
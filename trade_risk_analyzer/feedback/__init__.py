@@ -13,6 +13,15 @@ from trade_risk_analyzer.feedback.retraining import (
     ModelVersion,
     PerformanceMetrics
 )
+from trade_risk_analyzer.feedback.active_learning import (
+    ActiveLearningSampler,
+    LabelingCandidate
+)
+from trade_risk_analyzer.feedback.job_queue import (
+    RetrainingJobQueue,
+    RetrainingJob,
+    JobStatus
+)
 
 __all__ = [
     "FeedbackCollector",
@@ -22,4 +31,9 @@ __all__ = [
     "RetrainingPipeline",
     "ModelVersion",
     "PerformanceMetrics",
+    "ActiveLearningSampler",
+    "LabelingCandidate",
+    "RetrainingJobQueue",
+    "RetrainingJob",
+    "JobStatus",
 ]
@@ -0,0 +1,244 @@
+"""
+Active Learning Sampler
+
+Ranks unreviewed alerts by how much a reviewer's label would teach the
+models. An alert is informative when the ensemble's models disagree about
+it or its ensemble score sits near the decision threshold, and when it is
+unlike the alerts already labeled or picked for the same queue. Reviewing
+the queue in order spends reviewer time on the labels that move the next
+retraining cycle most, instead of on alerts every model already agrees on.
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+from trade_risk_analyzer.core.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class LabelingCandidate:
+    """
+    Alert proposed for review, with the reasons it was ranked
+    """
+    alert_id: str
+    rank: int
+    priority: float  # Combined uncertainty and diversity (0-1)
+    uncertainty: float  # Combined disagreement and margin (0-1)
+    disagreement: float  # Spread of the model scores (0-1)
+    margin: float  # Closeness of the ensemble score to the decision threshold (0-1)
+    diversity: float  # Distance to labeled and already queued alerts (0-1)
+    ensemble_score: float
+    model_scores: Dict[str, float] = field(default_factory=dict)
+    user_id: Optional[str] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return {
+            'alert_id': self.alert_id,
+            'rank': self.rank,
+            'priority': self.priority,
+            'uncertainty': self.uncertainty,
+            'disagreement': self.disagreement,
+            'margin': self.margin,
+            'diversity': self.diversity,
+            'ensemble_score': self.ensemble_score,
+            'model_scores': dict(self.model_scores),
+            'user_id': self.user_id
+        }
+
+
+class ActiveLearningSampler:
+    """
+    Selects the most informative alerts to label from ensemble uncertainty
+    and feature-space diversity
+    """
+    
+    def __init__(self,
+                 ensemble: Any,
+                 decision_threshold: float = 0.5,
+                 disagreement_weight: float = 0.5,
+                 diversity_weight: float = 0.3):
+        """
+        Initialize active learning sampler
+        
+        Args:
+            ensemble: ModelEnsemble scoring the candidates
+            decision_threshold: Ensemble score separating normal from anomalous
+            disagreement_weight: Share of model disagreement in uncertainty
+                (the rest is closeness to the decision threshold)
+            diversity_weight: Share of diversity in the priority (the rest is
+                uncertainty); 0 ranks by uncertainty alone
+        """
+        if not 0 < decision_threshold < 1:
+            raise ValueError("decision_threshold must be between 0 and 1")
+        if not 0 <= disagreement_weight <= 1 or not 0 <= diversity_weight <= 1:
+            raise ValueError("Weights must be between 0 and 1")
+        
+        self.ensemble = ensemble
+        self.decision_threshold = decision_threshold
+        self.disagreement_weight = disagreement_weight
+        self.diversity_weight = diversity_weight
+        self.logger = logger
+    
+    def score_uncertainty(self, X: np.ndarray) -> Dict[str, Any]:
+        """
+        Score how uncertain the ensemble is about each sample
+        
+        Args:
+            X: Candidate features (n_samples, n_features)
+        
+        Returns:
+            Dictionary with 'ensemble_score', 'disagreement', 'margin' and
+            'uncertainty' arrays, and 'model_scores' (model name -> array)
+        
+        Raises:
+            ValueError: If no model of the ensemble can score X
+        """
+        contributions = self.ensemble.get_model_contributions(X)
+        if not contributions:
+            raise ValueError("No ensemble model could score the candidates")
+        
+        names = list(contributions)
+        scores = np.vstack([contributions[name] for name in names])
+        weights = np.array([self.ensemble.weights.get(name, 0.0) for name in names], dtype=float)
+        if weights.sum() <= 0:
+            weights = np.ones(len(names))
+        weights /= weights.sum()
+        
+        # Same weighting as ModelEnsemble.predict_ensemble
+        ensemble_score = weights @ scores
+        
+        # Weighted standard deviation of [0, 1] scores is at most 0.5
+        spread = np.sqrt(weights @ (scores - ensemble_score) ** 2)
+        disagreement = np.clip(spread / 0.5, 0.0, 1.0)
+        
+        max_distance = max(self.decision_threshold, 1 - self.decision_threshold)
+        margin = 1.0 - np.abs(ensemble_score - self.decision_threshold) / max_distance
+        
+        uncertainty = self.disagreement_weight * disagreement + (1 - self.disagreement_weight) * margin
+        
+        return {
+            'ensemble_score': ensemble_score,
+            'disagreement': disagreement,
+            'margin': margin,
+            'uncertainty': uncertainty,
+            'model_scores': contributions
+        }
+    
+    def select(self, X: np.ndarray, n: int, uncertainty: np.ndarray,
+               labeled_X: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Greedily pick samples with high uncertainty that are far from the
+        labeled samples and from the samples picked before them
+        
+        Args:
+            X: Candidate features (n_samples, n_features)
+            n: Number of samples to pick
+            uncertainty: Uncertainty of each candidate (0-1)
+            labeled_X: Features of already labeled samples
+        
+        Returns:
+            Tuple of (picked indices, their priorities, their diversities), in
+            pick order
+        """
+        n = min(n, len(X))
+        if n <= 0:
+            return np.array([], dtype=int), np.array([]), np.array([])
+        
+        if self.diversity_weight == 0:
+            order = np.argsort(-uncertainty, kind='stable')[:n]
+            return order, uncertainty[order], np.ones(n)
+        
+        # Standardize with candidate statistics so no feature dominates distances
+        X = np.nan_to_num(np.asarray(X, dtype=float))
+        mean = X.mean(axis=0)
+        std = X.std(axis=0)
+        std[std == 0] = 1.0
+        Z = (X - mean) / std
+        
+        # Distance from each candidate to its nearest labeled sample
+        min_dist = np.full(len(Z), np.inf)
+        if labeled_X is not None and len(labeled_X):
+            L = (np.nan_to_num(np.asarray(labeled_X, dtype=float)) - mean) / std
+            z_norms = (Z ** 2).sum(axis=1)
+            for start in range(0, len(L), 1024):
+                block = L[start:start + 1024]
+                sq_dist = z_norms[:, None] + (block ** 2).sum(axis=1)[None, :] - 2 * Z @ block.T
+                min_dist = np.minimum(min_dist, np.sqrt(np.maximum(sq_dist.min(axis=1), 0)))
+        
+        picked = np.zeros(len(Z), dtype=bool)
+        indices, priorities, diversities = [], [], []
+        
+        for _ in range(n):
+            finite = np.isfinite(min_dist) & ~picked
+            scale = min_dist[finite].max() if finite.any() else 0.0
+            if scale > 0:
+                diversity = np.where(np.isfinite(min_dist), min_dist / scale, 1.0)
+            else:
+                # Nothing labeled or picked yet, or all candidates identical
+                diversity = np.where(np.isfinite(min_dist), 0.0, 1.0)
+            
+            priority = (1 - self.diversity_weight) * uncertainty + self.diversity_weight * diversity
+            priority[picked] = -np.inf
+            
+            best = int(np.argmax(priority))
+            picked[best] = True
+            indices.append(best)
+            priorities.append(float(priority[best]))
+            diversities.append(float(diversity[best]))
+            
+            min_dist = np.minimum(min_dist, np.sqrt(((Z - Z[best]) ** 2).sum(axis=1)))
+        
+        return np.array(indices), np.array(priorities), np.array(diversities)
+    
+    def rank(self, X: np.ndarray, alert_ids: Sequence[str], n: int = 50,
+             labeled_X: Optional[np.ndarray] = None,
+             user_ids: Optional[Sequence[str]] = None) -> List[LabelingCandidate]:
+        """
+        Build a labeling queue from candidate alerts
+        
+        Args:
+            X: Features of the candidate alerts (n_samples, n_features)
+            alert_ids: Alert ID of each row of X
+            n: Queue length
+            labeled_X: Features of already labeled alerts
+            user_ids: User ID of each row of X
+        
+        Returns:
+            Candidates in review order
+        """
+        if len(X) != len(alert_ids):
+            raise ValueError("X and alert_ids must have the same length")
+        if len(X) == 0:
+            return []
+        
+        scores = self.score_uncertainty(X)
+        indices, priorities, diversities = self.select(X, n, scores['uncertainty'], labeled_X)
+        
+        candidates = [
+            LabelingCandidate(
+                alert_id=alert_ids[i],
+                rank=rank + 1,
+                priority=float(priority),
+                uncertainty=float(scores['uncertainty'][i]),
+                disagreement=float(scores['disagreement'][i]),
+                margin=float(scores['margin'][i]),
+                diversity=float(diversity),
+                ensemble_score=float(scores['ensemble_score'][i]),
+                model_scores={name: float(s[i]) for name, s in scores['model_scores'].items()},
+                user_id=user_ids[i] if user_ids is not None else None
+            )
+            for rank, (i, priority, diversity) in enumerate(zip(indices, priorities, diversities))
+        ]
+        
+        self.logger.info(
+            f"Labeling queue: {len(candidates)} of {len(X)} candidates "
+            f"(mean uncertainty {scores['uncertainty'].mean():.3f})"
+        )
+        
+        return candidates
@@ -0,0 +1,421 @@
+"""
+Retraining Job Queue
+
+SQLite-backed queue of model retraining jobs shared by the API (which
+enqueues jobs and reports their status) and retraining worker processes
+(which claim and run them). SQLite's write lock makes claiming atomic, so
+several workers can poll the same queue.
+"""
+
+import json
+import os
+import sqlite3
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from enum import Enum
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterator
+
+from trade_risk_analyzer.core.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+DEFAULT_MODEL_TYPES = ['random_forest', 'isolation_forest']
+
+
+class JobStatus(Enum):
+    """Retraining job status"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+@dataclass
+class RetrainingJob:
+    """
+    Retraining job record
+    """
+    job_id: str
+    status: JobStatus
+    model_types: List[str]
+    params: Dict[str, Any] = field(default_factory=dict)
+    progress: float = 0.0  # 0-100
+    message: str = "Retraining queued"
+    model_versions: Dict[str, str] = field(default_factory=dict)
+    metrics: Dict[str, Any] = field(default_factory=dict)
+    worker_id: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return {
+            'job_id': self.job_id,
+            'status': self.status.value,
+            'model_types': list(self.model_types),
+            'params': dict(self.params),
+            'progress': self.progress,
+            'message': self.message,
+            'model_versions': dict(self.model_versions),
+            'metrics': dict(self.metrics),
+            'worker_id': self.worker_id,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'heartbeat_at': self.heartbeat_at.isoformat() if self.heartbeat_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS retraining_jobs (
+    job_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    model_types TEXT NOT NULL,
+    params TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    model_versions TEXT NOT NULL DEFAULT '{}',
+    metrics TEXT NOT NULL DEFAULT '{}',
+    worker_id TEXT,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    heartbeat_at TEXT,
+    completed_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_retraining_jobs_status ON retraining_jobs (status, created_at);
+"""
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+class RetrainingJobQueue:
+    """
+    Persistent retraining job queue in a SQLite file
+    """
+    
+    def __init__(self, path: str = "retraining_queue.db", timeout: float = 30.0):
+        """
+        Initialize job queue (creates the database file if needed)
+        
+        Args:
+            path: SQLite database file
+            timeout: Seconds to wait for another process's write lock
+        """
+        self.path = str(path)
+        self.timeout = timeout
+        self.logger = logger
+        
+        directory = Path(self.path).parent
+        directory.mkdir(parents=True, exist_ok=True)
+        
+        with self._connect() as conn:
+            # WAL lets the API read status while a worker writes progress
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection in autocommit mode (transactions are explicit)"""
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    def enqueue(self, model_types: Optional[List[str]] = None,
+                params: Optional[Dict[str, Any]] = None) -> RetrainingJob:
+        """
+        Add a retraining job to the queue
+        
+        Args:
+            model_types: Models to retrain (default: random_forest, isolation_forest)
+            params: Keyword arguments for the retraining methods, per model type
+                (e.g. {'random_forest': {'min_feedback_samples': 20}})
+        
+        Returns:
+            Queued RetrainingJob
+        """
+        job = RetrainingJob(
+            job_id=str(uuid.uuid4()),
+            status=JobStatus.QUEUED,
+            model_types=list(model_types or DEFAULT_MODEL_TYPES),
+            params=params or {}
+        )
+        
+        with self._connect() as conn:
+            self._insert(conn, job)
+        
+        self.logger.info(f"Retraining job {job.job_id} queued ({', '.join(job.model_types)})")
+        
+        return job
+    
+    def enqueue_if_idle(self, model_types: Optional[List[str]] = None,
+                        params: Optional[Dict[str, Any]] = None,
+                        message: str = "Retraining queued") -> Optional[RetrainingJob]:
+        """
+        Add a retraining job unless one is already queued or running
+        
+        Used by automatic triggers (e.g. drift detection), which must not
+        pile up jobs while a retraining is pending.
+        
+        Args:
+            model_types: Models to retrain (default: random_forest, isolation_forest)
+            params: Keyword arguments for the retraining methods, per model type
+            message: Status message of the queued job (e.g. the trigger reason)
+        
+        Returns:
+            Queued RetrainingJob, or None if a job was already pending
+        """
+        job = RetrainingJob(
+            job_id=str(uuid.uuid4()),
+            status=JobStatus.QUEUED,
+            model_types=list(model_types or DEFAULT_MODEL_TYPES),
+            params=params or {},
+            message=message
+        )
+        
+        with self._connect() as conn:
+            # Take the write lock before checking so two triggers cannot both enqueue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                pending = conn.execute(
+                    "SELECT job_id FROM retraining_jobs WHERE status IN (?, ?) LIMIT 1",
+                    (JobStatus.QUEUED.value, JobStatus.RUNNING.value)
+                ).fetchone()
+                if pending is None:
+                    self._insert(conn, job)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        
+        if pending is not None:
+            self.logger.info(f"Retraining job {pending['job_id']} already pending, not queuing another")
+            return None
+        
+        self.logger.info(f"Retraining job {job.job_id} queued ({', '.join(job.model_types)}): {message}")
+        
+        return job
+    
+    def _insert(self, conn: sqlite3.Connection, job: RetrainingJob) -> None:
+        """Insert a new job row"""
+        conn.execute(
+            "INSERT INTO retraining_jobs (job_id, status, model_types, params, progress, "
+            "message, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job.job_id, job.status.value, json.dumps(job.model_types), json.dumps(job.params),
+             job.progress, job.message, job.created_at.isoformat())
+        )
+    
+    def claim_next(self, worker_id: Optional[str] = None) -> Optional[RetrainingJob]:
+        """
+        Claim the oldest queued job for a worker
+        
+        Args:
+            worker_id: Worker identifier (default: hostname-pid)
+        
+        Returns:
+            The claimed job (now running), or None if the queue is empty
+        """
+        worker_id = worker_id or f"{os.uname().nodename}-{os.getpid()}"
+        now = datetime.now().isoformat()
+        
+        with self._connect() as conn:
+            # Take the write lock before reading so no other worker claims the same job
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT job_id FROM retraining_jobs WHERE status = ? "
+                    "ORDER BY created_at LIMIT 1",
+                    (JobStatus.QUEUED.value,)
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                
+                conn.execute(
+                    "UPDATE retraining_jobs SET status = ?, worker_id = ?, started_at = ?, "
+                    "heartbeat_at = ?, message = ? WHERE job_id = ?",
+                    (JobStatus.RUNNING.value, worker_id, now, now, "Retraining started", row['job_id'])
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        
+        self.logger.info(f"Worker {worker_id} claimed retraining job {row['job_id']}")
+        
+        return self.get_job(row['job_id'])
+    
+    def update_progress(self, job_id: str, progress: float, message: str,
+                        model_versions: Optional[Dict[str, str]] = None,
+                        metrics: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Record progress of a running job (also refreshes its heartbeat)
+        
+        Args:
+            job_id: Job ID
+            progress: Percent complete (0-100)
+            message: Status message
+            model_versions: Versions produced so far
+            metrics: Metrics per model type so far
+        """
+        assignments = ["progress = ?", "message = ?", "heartbeat_at = ?"]
+        values: List[Any] = [progress, message, datetime.now().isoformat()]
+        if model_versions is not None:
+            assignments.append("model_versions = ?")
+            values.append(json.dumps(model_versions))
+        if metrics is not None:
+            assignments.append("metrics = ?")
+            values.append(json.dumps(metrics))
+        
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE retraining_jobs SET {', '.join(assignments)} WHERE job_id = ?",
+                values + [job_id]
+            )
+    
+    def heartbeat(self, job_id: str) -> None:
+        """
+        Refresh the heartbeat of a running job
+        
+        Args:
+            job_id: Job ID
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE retraining_jobs SET heartbeat_at = ? WHERE job_id = ?",
+                (datetime.now().isoformat(), job_id)
+            )
+    
+    def complete(self, job_id: str, message: str, model_versions: Dict[str, str],
+                 metrics: Dict[str, Any]) -> None:
+        """
+        Mark a job completed
+        
+        Args:
+            job_id: Job ID
+            message: Final status message
+            model_versions: Activated versions per model type
+            metrics: Metrics per model type
+        """
+        self._finish(job_id, JobStatus.COMPLETED, message, model_versions, metrics)
+    
+    def fail(self, job_id: str, message: str,
+             model_versions: Optional[Dict[str, str]] = None,
+             metrics: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Mark a job failed
+        
+        Args:
+            job_id: Job ID
+            message: Error message
+            model_versions: Versions produced before the failure
+            metrics: Metrics produced before the failure
+        """
+        self._finish(job_id, JobStatus.FAILED, message, model_versions or {}, metrics or {})
+    
+    def _finish(self, job_id: str, status: JobStatus, message: str,
+                model_versions: Dict[str, str], metrics: Dict[str, Any]) -> None:
+        now = datetime.now().isoformat()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE retraining_jobs SET status = ?, progress = COALESCE(?, progress), "
+                "message = ?, model_versions = ?, metrics = ?, heartbeat_at = ?, completed_at = ? "
+                "WHERE job_id = ?",
+                (status.value, 100.0 if status == JobStatus.COMPLETED else None, message,
+                 json.dumps(model_versions), json.dumps(metrics), now, now, job_id)
+            )
+    
+    def requeue_stale(self, timeout: float) -> int:
+        """
+        Requeue running jobs whose worker stopped sending heartbeats
+        
+        Args:
+            timeout: Seconds without a heartbeat after which a job is stale
+        
+        Returns:
+            Number of jobs requeued
+        """
+        cutoff = (datetime.now() - timedelta(seconds=timeout)).isoformat()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE retraining_jobs SET status = ?, worker_id = NULL, progress = 0, "
+                "message = ? WHERE status = ? AND heartbeat_at < ?",
+                (JobStatus.QUEUED.value, "Requeued after worker timeout",
+                 JobStatus.RUNNING.value, cutoff)
+            )
+            requeued = cursor.rowcount
+        
+        if requeued:
+            self.logger.warning(f"Requeued {requeued} stale retraining jobs")
+        
+        return requeued
+    
+    def get_job(self, job_id: str) -> Optional[RetrainingJob]:
+        """
+        Get a job by ID
+        
+        Args:
+            job_id: Job ID
+        
+        Returns:
+            RetrainingJob, or None if not found
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM retraining_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        
+        return self._row_to_job(row) if row else None
+    
+    def list_jobs(self, status: Optional[JobStatus] = None, limit: int = 100) -> List[RetrainingJob]:
+        """
+        List jobs, newest first
+        
+        Args:
+            status: Filter by status
+            limit: Maximum number of jobs
+        
+        Returns:
+            List of RetrainingJob
+        """
+        query = "SELECT * FROM retraining_jobs"
+        values: List[Any] = []
+        if status is not None:
+            query += " WHERE status = ?"
+            values.append(status.value)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        values.append(limit)
+        
+        with self._connect() as conn:
+            rows = conn.execute(query, values).fetchall()
+        
+        return [self._row_to_job(row) for row in rows]
+    
+    def _row_to_job(self, row: sqlite3.Row) -> RetrainingJob:
+        """Convert a database row to a RetrainingJob"""
+        return RetrainingJob(
+            job_id=row['job_id'],
+            status=JobStatus(row['status']),
+            model_types=json.loads(row['model_types']),
+            params=json.loads(row['params']),
+            progress=row['progress'] or 0.0,
+            message=row['message'] or "",
+            model_versions=json.loads(row['model_versions']),
+            metrics=json.loads(row['metrics']),
+            worker_id=row['worker_id'],
+            created_at=datetime.fromisoformat(row['created_at']),
+            started_at=_parse_time(row['started_at']),
+            heartbeat_at=_parse_time(row['heartbeat_at']),
+            completed_at=_parse_time(row['completed_at'])
+        )
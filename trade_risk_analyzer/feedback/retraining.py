@@ -11,19 +11,37 @@ from datetime import datetime
 from dataclasses import dataclass, field
 from pathlib import Path
 import json
+import time
 import joblib
 
 from trade_risk_analyzer.core.logger import get_logger
 from trade_risk_analyzer.feedback.collector import FeedbackCollector, FeedbackStatus
+from trade_risk_analyzer.feedback.active_learning import ActiveLearningSampler, LabelingCandidate
 from trade_risk_analyzer.feature_engineering.extractor import FeatureExtractor
+from trade_risk_analyzer.feature_engineering.pipeline import FeaturePipeline, FEATURE_PIPELINE_FILE
 from trade_risk_analyzer.models.random_forest import RandomForestModel
 from trade_risk_analyzer.models.isolation_forest import IsolationForestModel
+from trade_risk_analyzer.models.registry import install_model_file, activate_in_manifest
+from trade_risk_analyzer.models.artifact_store import (
+    ARTIFACT_STORE_DIR,
+    ArtifactStore,
+    artifact_ref_path,
+    write_artifact_ref
+)
+from trade_risk_analyzer.models.flat_forest import FlatRandomForest, FlatIsolationForest
 from trade_risk_analyzer.data_ingestion.storage import DatabaseStorage
 
 
 logger = get_logger(__name__)
 
 
+# Flat (memory-mappable) forest class of each versioned model type
+FLAT_MODEL_CLASSES = {
+    'random_forest': FlatRandomForest,
+    'isolation_forest': FlatIsolationForest
+}
+
+
 @dataclass
 class PerformanceMetrics:
     """Model performance metrics"""
@@ -36,6 +54,8 @@ class PerformanceMetrics:
     auc_roc: Optional[float] = None
     training_samples: int = 0
     feedback_samples: int = 0
+    training_time: float = 0.0  # Seconds spent fitting
+    training_mode: str = 'full'  # 'full' or 'incremental'
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
@@ -48,7 +68,9 @@ class PerformanceMetrics:
             'f1_score': self.f1_score,
             'auc_roc': self.auc_roc,
             'training_samples': self.training_samples,
-            'feedback_samples': self.feedback_samples
+            'feedback_samples': self.feedback_samples,
+            'training_time': self.training_time,
+            'training_mode': self.training_mode
         }
 
 
@@ -63,6 +85,8 @@ class ModelVersion:
     is_active: bool = False
     parent_version: Optional[str] = None
     notes: Optional[str] = None
+    artifact: Optional[str] = None  # Digest of the flat forest in the version artifact store
+    feature_version: Optional[str] = None  # Feature pipeline the model was trained with
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
@@ -74,10 +98,89 @@ class ModelVersion:
             'performance_metrics': self.performance_metrics.to_dict(),
             'is_active': self.is_active,
             'parent_version': self.parent_version,
-            'notes': self.notes
+            'notes': self.notes,
+            'artifact': self.artifact,
+            'feature_version': self.feature_version
         }
 
 
+def read_model_versions(
+    version_dir: str,
+    model_type: Optional[str] = None,
+    limit: Optional[int] = None
+) -> List[ModelVersion]:
+    """
+    Read model versions from a version directory without modifying it
+    
+    Args:
+        version_dir: Directory of model versions
+        model_type: Filter by model type
+        limit: Maximum number of versions
+    
+    Returns:
+        List of ModelVersion objects
+    """
+    version_dir = Path(version_dir)
+    if not version_dir.is_dir():
+        return []
+    
+    versions = []
+    
+    for path in sorted(version_dir.iterdir(), reverse=True):
+        if not path.is_dir():
+            continue
+        
+        metadata_path = path / "metadata.json"
+        if not metadata_path.exists():
+            continue
+        
+        try:
+            with open(metadata_path, 'r') as f:
+                metadata = json.load(f)
+            
+            # Filter by model type
+            if model_type and metadata['model_type'] != model_type:
+                continue
+            
+            # Create ModelVersion object
+            metrics = PerformanceMetrics(
+                version=metadata['version'],
+                timestamp=datetime.fromisoformat(metadata['performance_metrics']['timestamp']),
+                accuracy=metadata['performance_metrics']['accuracy'],
+                precision=metadata['performance_metrics']['precision'],
+                recall=metadata['performance_metrics']['recall'],
+                f1_score=metadata['performance_metrics']['f1_score'],
+                auc_roc=metadata['performance_metrics'].get('auc_roc'),
+                training_samples=metadata['performance_metrics'].get('training_samples', 0),
+                feedback_samples=metadata['performance_metrics'].get('feedback_samples', 0),
+                training_time=metadata['performance_metrics'].get('training_time', 0.0),
+                training_mode=metadata['performance_metrics'].get('training_mode', 'full')
+            )
+            
+            version = ModelVersion(
+                version=metadata['version'],
+                created_at=datetime.fromisoformat(metadata['created_at']),
+                model_type=metadata['model_type'],
+                model_path=metadata['model_path'],
+                performance_metrics=metrics,
+                is_active=metadata.get('is_active', False),
+                parent_version=metadata.get('parent_version'),
+                notes=metadata.get('notes'),
+                artifact=metadata.get('artifact'),
+                feature_version=metadata.get('feature_version')
+            )
+            
+            versions.append(version)
+            
+            if limit and len(versions) >= limit:
+                break
+        
+        except Exception as e:
+            logger.error(f"Failed to load version {path.name}: {e}")
+    
+    return versions
+
+
 class RetrainingPipeline:
     """
     Pipeline for retraining models with feedback data
@@ -109,15 +212,20 @@ class RetrainingPipeline:
         self.model_dir.mkdir(exist_ok=True)
         self.version_dir.mkdir(exist_ok=True)
         
+        # Memory-mappable forests of all versions; identical arrays are stored once
+        self.artifact_store = ArtifactStore(self.version_dir / ARTIFACT_STORE_DIR)
+        
         # Feature extractor
-        self.feature_extractor = FeatureExtractor()
+        self.feature_extractor = FeatureExtractor.from_config()
     
     def retrain_random_forest(
         self,
         min_feedback_samples: int = 50,
         min_confidence: float = 0.7,
         test_size: float = 0.2,
-        incremental: bool = True
+        incremental: bool = True,
+        n_new_estimators: int = 25,
+        max_estimators: Optional[int] = 500
     ) -> Optional[ModelVersion]:
         """
         Retrain Random Forest model with feedback data
@@ -126,7 +234,10 @@ class RetrainingPipeline:
             min_feedback_samples: Minimum feedback samples required
             min_confidence: Minimum confidence score for feedback
             test_size: Test set size for evaluation
-            incremental: Whether to use incremental learning
+            incremental: Whether to warm-start from the active model (adds
+                trees fitted on the feedback instead of refitting)
+            n_new_estimators: Trees added per incremental update
+            max_estimators: Forest size above which the oldest trees are dropped
             
         Returns:
             ModelVersion if successful, None otherwise
@@ -153,14 +264,18 @@ class RetrainingPipeline:
             return None
         
         # Extract features for labeled data
+        feature_pipeline = self._active_feature_pipeline()
         features_df = self._extract_features_for_labeled_data(labeled_df)
         
         if features_df.empty:
             self.logger.error("Failed to extract features")
             return None
         
+        if feature_pipeline is None:
+            feature_pipeline = self._fit_feature_pipeline(features_df)
+        
         # Prepare training data
-        X, y = self._prepare_training_data(features_df, labeled_df)
+        X, y = self._prepare_training_data(features_df, labeled_df, feature_pipeline)
         
         if X is None or y is None:
             self.logger.error("Failed to prepare training data")
@@ -178,27 +293,44 @@ class RetrainingPipeline:
         
         # Load existing model if incremental
         model = RandomForestModel()
+        loaded = False
         
         if incremental:
             existing_model_path = self.model_dir / "random_forest.joblib"
             if existing_model_path.exists():
                 try:
                     model.load(str(existing_model_path))
+                    loaded = True
                     self.logger.info("Loaded existing model for incremental learning")
                 except Exception as e:
                     self.logger.warning(f"Failed to load existing model: {e}")
         
-        # Train model
-        self.logger.info("Training Random Forest model...")
-        model.train(X_train, y_train)
+        # Train model: add trees to the loaded forest, or fit from scratch
+        training_mode = 'full'
+        start = time.perf_counter()
+        if loaded:
+            try:
+                model.update(X_train, y_train, n_new_estimators=n_new_estimators,
+                             max_estimators=max_estimators)
+                training_mode = 'incremental'
+            except ValueError as e:
+                self.logger.warning(f"Incremental update not possible ({e}), retraining from scratch")
+                model = RandomForestModel()
+        
+        if training_mode == 'full':
+            self.logger.info("Training Random Forest model...")
+            model.train(X_train, y_train)
+        training_time = time.perf_counter() - start
         
         # Evaluate model
         metrics = self._evaluate_model(model, X_test, y_test, len(labeled_df))
+        metrics.training_time = training_time
+        metrics.training_mode = training_mode
         
         self.logger.info(
             f"Model performance: Accuracy={metrics.accuracy:.3f}, "
             f"Precision={metrics.precision:.3f}, Recall={metrics.recall:.3f}, "
-            f"F1={metrics.f1_score:.3f}"
+            f"F1={metrics.f1_score:.3f}, {training_mode} training in {training_time:.2f}s"
         )
         
         # Create model version
@@ -206,11 +338,11 @@ class RetrainingPipeline:
             model_type="random_forest",
             model=model,
             metrics=metrics,
-            incremental=incremental
+            incremental=training_mode == 'incremental'
         )
         
         # Save model version
-        self._save_model_version(version, model)
+        self._save_model_version(version, model, feature_pipeline)
         
         # Update feedback status
         self._mark_feedback_as_incorporated(labeled_df)
@@ -222,7 +354,9 @@ class RetrainingPipeline:
     def retrain_isolation_forest(
         self,
         min_feedback_samples: int = 100,
-        contamination: float = 0.1
+        contamination: float = 0.1,
+        incremental: bool = True,
+        replace_fraction: float = 0.2
     ) -> Optional[ModelVersion]:
         """
         Retrain Isolation Forest model with feedback data
@@ -230,6 +364,9 @@ class RetrainingPipeline:
         Args:
             min_feedback_samples: Minimum feedback samples required
             contamination: Expected proportion of anomalies
+            incremental: Whether to partially refit the active model on its
+                reservoir plus the feedback confirmed as normal
+            replace_fraction: Share of trees replaced per incremental update
             
         Returns:
             ModelVersion if successful, None otherwise
@@ -249,23 +386,44 @@ class RetrainingPipeline:
             return None
         
         # Extract features
+        feature_pipeline = self._active_feature_pipeline()
         features_df = self._extract_features_for_labeled_data(labeled_df)
         
         if features_df.empty:
             self.logger.error("Failed to extract features")
             return None
         
+        if feature_pipeline is None:
+            feature_pipeline = self._fit_feature_pipeline(features_df)
+        
         # Prepare training data
-        X, y = self._prepare_training_data(features_df, labeled_df)
+        X, y = self._prepare_training_data(features_df, labeled_df, feature_pipeline)
         
         if X is None:
             self.logger.error("Failed to prepare training data")
             return None
         
-        # Train model
+        # Train model: refit part of the loaded forest, or fit from scratch
         model = IsolationForestModel(contamination=contamination)
-        self.logger.info("Training Isolation Forest model...")
-        model.train(X)
+        training_mode = 'full'
+        start = time.perf_counter()
+        
+        existing_model_path = self.model_dir / "isolation_forest.joblib"
+        if incremental and existing_model_path.exists():
+            try:
+                model.load(str(existing_model_path))
+                # False positives are confirmed normal traffic
+                X_normal = X[y == 0] if y is not None and np.any(y == 0) else X
+                model.update(X_normal, replace_fraction=replace_fraction)
+                training_mode = 'incremental'
+            except Exception as e:
+                self.logger.warning(f"Incremental update not possible ({e}), retraining from scratch")
+                model = IsolationForestModel(contamination=contamination)
+        
+        if training_mode == 'full':
+            self.logger.info("Training Isolation Forest model...")
+            model.train(X)
+        training_time = time.perf_counter() - start
         
         # Evaluate model (if we have labels)
         if y is not None:
@@ -285,17 +443,19 @@ class RetrainingPipeline:
                 f1_score=0.0,
                 training_samples=len(X)
             )
+        metrics.training_time = training_time
+        metrics.training_mode = training_mode
         
         # Create model version
         version = self._create_model_version(
             model_type="isolation_forest",
             model=model,
             metrics=metrics,
-            incremental=False
+            incremental=training_mode == 'incremental'
         )
         
         # Save model version
-        self._save_model_version(version, model)
+        self._save_model_version(version, model, feature_pipeline)
         
         self.logger.info(f"Isolation Forest retraining complete: version {version.version}")
         
@@ -305,6 +465,11 @@ class RetrainingPipeline:
         """
         Activate a specific model version
         
+        The model file is swapped in atomically, the version's memory-mapped
+        artifact is linked into the directory's artifact store, and the
+        directory's active generation is bumped, so detection engines polling
+        the directory reload it without a restart.
+        
         Args:
             version: Version to activate
             
@@ -324,27 +489,61 @@ class RetrainingPipeline:
         model_type = metadata['model_type']
         model_file = f"{model_type}.joblib"
         
-        # Copy model to active directory
+        # Install model in the active directory (atomic rename)
         source = self.version_dir / version / model_file
-        dest = self.model_dir / model_file
         
         if not source.exists():
             self.logger.error(f"Model file not found: {source}")
             return False
         
-        # Copy model
-        import shutil
-        shutil.copy2(source, dest)
+        install_model_file(source, self.model_dir, model_file)
         
-        # Update metadata
-        metadata['is_active'] = True
-        with open(version_path, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        # Serve the version with the feature pipeline it was trained with
+        pipeline_source = self.version_dir / version / FEATURE_PIPELINE_FILE
+        if pipeline_source.exists():
+            active_pipeline = self._active_feature_pipeline()
+            if active_pipeline is not None and active_pipeline.version != metadata.get('feature_version'):
+                self.logger.warning(
+                    f"Version {version} replaces feature pipeline {active_pipeline.version} "
+                    f"with {metadata.get('feature_version')}; other active models were trained on the old one"
+                )
+            metadata_file = Path(FEATURE_PIPELINE_FILE).with_suffix('.json').name
+            install_model_file(pipeline_source.with_suffix('.json'), self.model_dir, metadata_file)
+            install_model_file(pipeline_source, self.model_dir, FEATURE_PIPELINE_FILE)
+        
+        # Point serving processes at the version's artifact (or back at the joblib file)
+        digest = metadata.get('artifact')
+        ref_path = artifact_ref_path(self.model_dir, model_type)
+        if digest and self.artifact_store.exists(digest):
+            self.artifact_store.copy_to(digest, ArtifactStore(self.model_dir / ARTIFACT_STORE_DIR))
+            write_artifact_ref(ref_path, digest, model_type)
+        else:
+            ref_path.unlink(missing_ok=True)
+        
+        # Mark this version active and the other versions of its type inactive
+        for other in self.get_model_versions(model_type=model_type):
+            if other.is_active and other.version != version:
+                self._set_version_active(other.version, False)
+        self._set_version_active(version, True)
+        
+        # Signal serving processes to reload
+        activate_in_manifest(self.model_dir, model_type, version)
         
         self.logger.info(f"Activated model version {version}")
         
         return True
     
+    def _set_version_active(self, version: str, is_active: bool) -> None:
+        """Update the is_active flag in a version's metadata"""
+        version_path = self.version_dir / version / "metadata.json"
+        
+        with open(version_path, 'r') as f:
+            metadata = json.load(f)
+        
+        metadata['is_active'] = is_active
+        with open(version_path, 'w') as f:
+            json.dump(metadata, f, indent=2)
+    
     def rollback_to_version(self, version: str) -> bool:
         """
         Rollback to a previous model version
@@ -373,57 +572,7 @@ class RetrainingPipeline:
         Returns:
             List of ModelVersion objects
         """
-        versions = []
-        
-        for version_dir in sorted(self.version_dir.iterdir(), reverse=True):
-            if not version_dir.is_dir():
-                continue
-            
-            metadata_path = version_dir / "metadata.json"
-            if not metadata_path.exists():
-                continue
-            
-            try:
-                with open(metadata_path, 'r') as f:
-                    metadata = json.load(f)
-                
-                # Filter by model type
-                if model_type and metadata['model_type'] != model_type:
-                    continue
-                
-                # Create ModelVersion object
-                metrics = PerformanceMetrics(
-                    version=metadata['version'],
-                    timestamp=datetime.fromisoformat(metadata['performance_metrics']['timestamp']),
-                    accuracy=metadata['performance_metrics']['accuracy'],
-                    precision=metadata['performance_metrics']['precision'],
-                    recall=metadata['performance_metrics']['recall'],
-                    f1_score=metadata['performance_metrics']['f1_score'],
-                    auc_roc=metadata['performance_metrics'].get('auc_roc'),
-                    training_samples=metadata['performance_metrics'].get('training_samples', 0),
-                    feedback_samples=metadata['performance_metrics'].get('feedback_samples', 0)
-                )
-                
-                version = ModelVersion(
-                    version=metadata['version'],
-                    created_at=datetime.fromisoformat(metadata['created_at']),
-                    model_type=metadata['model_type'],
-                    model_path=metadata['model_path'],
-                    performance_metrics=metrics,
-                    is_active=metadata.get('is_active', False),
-                    parent_version=metadata.get('parent_version'),
-                    notes=metadata.get('notes')
-                )
-                
-                versions.append(version)
-                
-                if limit and len(versions) >= limit:
-                    break
-                    
-            except Exception as e:
-                self.logger.error(f"Failed to load version {version_dir.name}: {e}")
-        
-        return versions
+        return read_model_versions(self.version_dir, model_type=model_type, limit=limit)
     
     def get_performance_history(
         self,
@@ -443,57 +592,206 @@ class RetrainingPipeline:
         versions = self.get_model_versions(model_type=model_type, limit=limit)
         return [v.performance_metrics for v in versions]
     
+    def get_labeling_queue(
+        self,
+        ensemble: Any,
+        feature_pipeline: Optional[FeaturePipeline] = None,
+        n: int = 50,
+        max_candidates: int = 1000,
+        decision_threshold: float = 0.5,
+        diversity_weight: float = 0.3
+    ) -> List[LabelingCandidate]:
+        """
+        Rank unreviewed alerts by how informative a reviewer's label would be
+        
+        Alerts are scored in the feature space the models are served with.
+        An alert on several users is ranked by its most uncertain user.
+        Reviewed alerts only count towards diversity, so the queue avoids
+        alerts like the ones already labeled.
+        
+        Args:
+            ensemble: ModelEnsemble with the active models
+            feature_pipeline: Feature pipeline the ensemble is served with
+                (default: the one in the model directory)
+            n: Queue length
+            max_candidates: Most recent unreviewed (and reviewed) alerts considered
+            decision_threshold: Ensemble score separating normal from anomalous
+            diversity_weight: Share of feature-space diversity in the priority
+        
+        Returns:
+            LabelingCandidate list in review order
+        """
+        if not self.storage:
+            self.logger.error("Storage not configured")
+            return []
+        
+        if feature_pipeline is None:
+            feature_pipeline = self._active_feature_pipeline()
+            if feature_pipeline is None:
+                raise ValueError("No feature pipeline to score labeling candidates with")
+        else:
+            self._match_feature_extractor(feature_pipeline)
+        
+        unreviewed = self.storage.get_alerts({'is_reviewed': False, 'limit': max_candidates})
+        if not unreviewed:
+            return []
+        reviewed = self.storage.get_alerts({'is_reviewed': True, 'limit': max_candidates})
+        
+        alerts_df = self._split_user_ids(pd.DataFrame([
+            {
+                'alert_id': alert.alert_id,
+                'user_id': alert.user_id,
+                'trade_ids': ','.join(alert.trade_ids or []),
+                'is_reviewed': bool(alert.is_reviewed)
+            }
+            for alert in unreviewed + reviewed
+        ]))
+        
+        features_df = self._extract_features_for_labeled_data(alerts_df)
+        if features_df.empty:
+            self.logger.warning("No features for the labeling candidates")
+            return []
+        
+        merged_df = alerts_df.merge(features_df, on='user_id', how='inner')
+        X = feature_pipeline.transform(merged_df)
+        is_reviewed = merged_df['is_reviewed'].values.astype(bool)
+        candidates_df = merged_df[~is_reviewed].reset_index(drop=True)
+        X_candidates = X[~is_reviewed]
+        
+        sampler = ActiveLearningSampler(
+            ensemble,
+            decision_threshold=decision_threshold,
+            diversity_weight=diversity_weight
+        )
+        
+        # Keep the most uncertain user row of alerts on several users
+        if candidates_df['alert_id'].duplicated().any():
+            uncertainty = sampler.score_uncertainty(X_candidates)['uncertainty']
+            keep = np.sort(
+                candidates_df.assign(uncertainty=uncertainty)
+                .sort_values('uncertainty', ascending=False, kind='stable')
+                .drop_duplicates('alert_id')
+                .index.to_numpy()
+            )
+            candidates_df = candidates_df.iloc[keep]
+            X_candidates = X_candidates[keep]
+        
+        return sampler.rank(
+            X_candidates,
+            candidates_df['alert_id'].tolist(),
+            n=n,
+            labeled_X=X[is_reviewed],
+            user_ids=candidates_df['user_id'].tolist()
+        )
+    
+    def _active_feature_pipeline(self) -> Optional[FeaturePipeline]:
+        """
+        Load the feature pipeline the active models are served with
+        
+        The feature extractor is switched to the pipeline's time windows,
+        so extracted features match its schema.
+        
+        Returns:
+            FeaturePipeline, or None if the model directory has none yet
+        """
+        pipeline_path = self.model_dir / FEATURE_PIPELINE_FILE
+        if not pipeline_path.exists():
+            return None
+        
+        pipeline = FeaturePipeline.load(str(pipeline_path))
+        self._match_feature_extractor(pipeline)
+        
+        return pipeline
+    
+    def _match_feature_extractor(self, feature_pipeline: FeaturePipeline) -> None:
+        """Extract features with the time windows the pipeline was fitted for"""
+        if not feature_pipeline.is_compatible(self.feature_extractor.time_windows):
+            calculator = self.feature_extractor.frequency_calculator
+            self.feature_extractor = FeatureExtractor(
+                time_windows=feature_pipeline.time_windows,
+                scaler_type=feature_pipeline.scaler_type,
+                burst_window=calculator.burst_window,
+                quote_stuffing_threshold=calculator.quote_stuffing_threshold
+            )
+    
+    def _fit_feature_pipeline(self, features_df: pd.DataFrame) -> FeaturePipeline:
+        """Fit a feature pipeline on feedback features (no active pipeline yet)"""
+        self.logger.warning(
+            f"No feature pipeline in {self.model_dir}, fitting one on the feedback features"
+        )
+        return self.feature_extractor.fit_pipeline(features_df, exclude_columns=['user_id'])
+    
     def _extract_features_for_labeled_data(
         self,
         labeled_df: pd.DataFrame
     ) -> pd.DataFrame:
-        """Extract features for labeled data"""
+        """Extract unscaled features for labeled data"""
         if not self.storage:
             return pd.DataFrame()
         
-        # Get trades for each alert
-        all_trades = []
-        
-        for _, row in labeled_df.iterrows():
-            # Get trades from trade_ids
-            trade_ids = row['trade_ids'].split(',') if row['trade_ids'] else []
-            
-            if trade_ids:
-                trades_df = self.storage.get_trades_as_dataframe({
-                    'trade_ids': trade_ids
-                })
-                all_trades.append(trades_df)
-        
-        if not all_trades:
+        # Fetch the trades of all labeled alerts at once (each trade once)
+        trade_ids = self._collect_trade_ids(labeled_df)
+        if not trade_ids:
             return pd.DataFrame()
         
-        # Combine all trades
-        trades_df = pd.concat(all_trades, ignore_index=True)
+        trades_df = self.storage.get_trades_by_ids(trade_ids)
+        if trades_df.empty:
+            return pd.DataFrame()
         
-        # Extract features
+        # Extract features (scaled later with the feature pipeline)
         features_df = self.feature_extractor.extract_features(
             trades_df,
             group_by='user_id'
         )
         
-        # Normalize features
-        features_df = self.feature_extractor.normalize_features(
-            features_df,
-            exclude_columns=['user_id'],
-            fit=True
-        )
-        
         return features_df
     
+    def _collect_trade_ids(self, labeled_df: pd.DataFrame) -> List[str]:
+        """
+        Collect the distinct trade IDs referenced by labeled alerts
+        
+        Args:
+            labeled_df: Labeled data with comma-separated 'trade_ids'
+        
+        Returns:
+            Trade IDs in order of first reference
+        """
+        if labeled_df.empty or 'trade_ids' not in labeled_df.columns:
+            return []
+        
+        trade_ids = labeled_df['trade_ids'].dropna().astype(str).str.split(',').explode().str.strip()
+        return trade_ids[trade_ids != ''].unique().tolist()
+    
+    def _split_user_ids(self, alerts_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Split alerts whose user_id lists several comma-separated users
+        
+        Args:
+            alerts_df: Alerts with a 'user_id' column
+        
+        Returns:
+            One row per alert and user
+        """
+        if alerts_df.empty:
+            return alerts_df
+        
+        split_df = alerts_df.assign(
+            user_id=alerts_df['user_id'].fillna('').astype(str).str.split(',')
+        ).explode('user_id')
+        split_df['user_id'] = split_df['user_id'].str.strip()
+        
+        return split_df[split_df['user_id'] != ''].reset_index(drop=True)
+    
     def _prepare_training_data(
         self,
         features_df: pd.DataFrame,
-        labeled_df: pd.DataFrame
+        labeled_df: pd.DataFrame,
+        feature_pipeline: FeaturePipeline
     ) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
-        """Prepare training data from features and labels"""
-        # Merge features with labels
+        """Prepare training data from features and labels, scaled with the feature pipeline"""
+        # Merge features with labels (each user of a multi-user alert gets its label)
         merged_df = features_df.merge(
-            labeled_df[['user_id', 'is_true_positive']],
+            self._split_user_ids(labeled_df[['user_id', 'is_true_positive']]),
             on='user_id',
             how='inner'
         )
@@ -501,11 +799,8 @@ class RetrainingPipeline:
         if merged_df.empty:
             return None, None
         
-        # Build feature vector
-        X = self.feature_extractor.build_feature_vector(
-            merged_df,
-            exclude_columns=['user_id', 'is_true_positive']
-        )
+        # Build feature vector in the pipeline's schema
+        X = feature_pipeline.transform(merged_df)
         
         # Get labels (1 for anomaly/true positive, 0 for normal/false positive)
         y = merged_df['is_true_positive'].values.astype(int)
@@ -600,11 +895,25 @@ class RetrainingPipeline:
         
         return version
     
-    def _save_model_version(self, version: ModelVersion, model: Any) -> None:
-        """Save model version"""
+    def _save_model_version(self, version: ModelVersion, model: Any,
+                            feature_pipeline: Optional[FeaturePipeline] = None) -> None:
+        """Save model version with the feature pipeline it was trained with"""
         # Save model
         model.save(version.model_path)
         
+        # Save feature pipeline (installed with the model on activation)
+        if feature_pipeline is not None:
+            feature_pipeline.save(str(Path(version.model_path).parent / FEATURE_PIPELINE_FILE))
+            version.feature_version = feature_pipeline.version
+        
+        # Flat forest for memory-mapped serving
+        flat_class = FLAT_MODEL_CLASSES.get(version.model_type)
+        if flat_class is not None:
+            try:
+                version.artifact = flat_class.from_model(model).save_to_store(self.artifact_store)
+            except Exception as e:
+                self.logger.warning(f"Could not export artifact for {version.version}: {e}")
+        
         # Save metadata
         metadata_path = Path(version.model_path).parent / "metadata.json"
         with open(metadata_path, 'w') as f:
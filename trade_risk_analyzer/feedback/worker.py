@@ -0,0 +1,341 @@
+"""
+Retraining Worker
+
+Local worker process that claims retraining jobs from the SQLite job queue,
+retrains models with feedback data under CPU and memory limits, writes
+versioned artifacts and activates them. Activation bumps the model
+directory's generation, which the API and streaming processors poll to
+hot-swap the new models.
+
+Run as:
+    python -m trade_risk_analyzer.feedback.worker [--config config.yaml]
+"""
+
+import argparse
+import inspect
+import os
+import threading
+import time
+from typing import List, Dict, Any, Optional
+
+from trade_risk_analyzer.core.logger import get_logger
+from trade_risk_analyzer.feedback.job_queue import RetrainingJobQueue, RetrainingJob, DEFAULT_MODEL_TYPES
+
+
+logger = get_logger(__name__)
+
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+try:
+    from threadpoolctl import threadpool_limits
+    THREADPOOLCTL_AVAILABLE = True
+except ImportError:
+    THREADPOOLCTL_AVAILABLE = False
+
+
+# RetrainingPipeline method for each model type
+RETRAIN_METHODS = {
+    'random_forest': 'retrain_random_forest',
+    'isolation_forest': 'retrain_isolation_forest'
+}
+
+# Environment variables read by numerical libraries when they start
+THREAD_ENV_VARS = [
+    'OMP_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'NUMEXPR_NUM_THREADS',
+    'LOKY_MAX_CPU_COUNT',
+    'TF_NUM_INTRAOP_THREADS',
+    'TF_NUM_INTEROP_THREADS'
+]
+
+
+def apply_resource_limits(max_memory_mb: int = 0, cpu_threads: int = 0, nice: int = 0) -> None:
+    """
+    Limit the resources of the current process
+    
+    Thread pools that are already running are limited through threadpoolctl;
+    pools started later read the thread environment variables.
+    
+    Args:
+        max_memory_mb: Address space limit in MB (0 = unlimited)
+        cpu_threads: CPUs and library threads to use (0 = all)
+        nice: Scheduling priority increment
+    """
+    if nice > 0 and hasattr(os, 'nice'):
+        os.nice(nice)
+    
+    if cpu_threads > 0:
+        for name in THREAD_ENV_VARS:
+            os.environ.setdefault(name, str(cpu_threads))
+        if hasattr(os, 'sched_setaffinity'):
+            cpus = sorted(os.sched_getaffinity(0))[:cpu_threads]
+            os.sched_setaffinity(0, cpus)
+        if THREADPOOLCTL_AVAILABLE:
+            threadpool_limits(limits=cpu_threads)
+    
+    if max_memory_mb > 0:
+        if RESOURCE_AVAILABLE:
+            limit = max_memory_mb * 1024 * 1024
+            _, hard = resource.getrlimit(resource.RLIMIT_AS)
+            if hard != resource.RLIM_INFINITY:
+                limit = min(limit, hard)
+            resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+        else:
+            logger.warning("Memory limit not supported on this platform")
+    
+    logger.info(
+        f"Worker resource limits: memory={max_memory_mb or 'unlimited'} MB, "
+        f"cpu_threads={cpu_threads or 'all'}, nice={nice}"
+    )
+
+
+def validate_job_options(model_types: Optional[List[str]] = None,
+                         params: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+    """
+    Check retraining job options before the job is queued
+    
+    Args:
+        model_types: Models to retrain (default: random_forest, isolation_forest)
+        params: Keyword arguments for the retraining methods, per model type
+    
+    Raises:
+        ValueError: If a model type has no retraining method, or params are
+            given for a model that is not retrained or name an argument the
+            retraining method does not accept
+    """
+    from trade_risk_analyzer.feedback.retraining import RetrainingPipeline
+    
+    model_types = list(model_types or DEFAULT_MODEL_TYPES)
+    unsupported = [model_type for model_type in model_types if model_type not in RETRAIN_METHODS]
+    if unsupported:
+        raise ValueError(
+            f"Unsupported model types: {', '.join(unsupported)} "
+            f"(supported: {', '.join(RETRAIN_METHODS)})"
+        )
+    
+    for model_type, kwargs in (params or {}).items():
+        if model_type not in model_types:
+            raise ValueError(f"Params given for {model_type}, which is not retrained")
+        
+        signature = inspect.signature(getattr(RetrainingPipeline, RETRAIN_METHODS[model_type]))
+        accepted = set(signature.parameters) - {'self'}
+        unknown = sorted(set(kwargs) - accepted)
+        if unknown:
+            raise ValueError(
+                f"Unknown {model_type} params: {', '.join(unknown)} "
+                f"(accepted: {', '.join(sorted(accepted))})"
+            )
+
+
+class RetrainingWorker:
+    """
+    Polls the retraining job queue and runs jobs one at a time
+    """
+    
+    def __init__(
+        self,
+        queue: RetrainingJobQueue,
+        pipeline: Any,
+        poll_interval: float = 5.0,
+        stale_job_timeout: float = 3600.0,
+        worker_id: Optional[str] = None
+    ):
+        """
+        Initialize retraining worker
+        
+        Args:
+            queue: Retraining job queue
+            pipeline: RetrainingPipeline that trains, versions and activates models
+            poll_interval: Seconds between polls of an empty queue (also the
+                heartbeat interval of a running job)
+            stale_job_timeout: Seconds without heartbeat after which another
+                worker's running job is requeued
+            worker_id: Worker identifier (default: hostname-pid)
+        """
+        self.queue = queue
+        self.pipeline = pipeline
+        self.poll_interval = poll_interval
+        self.stale_job_timeout = stale_job_timeout
+        self.worker_id = worker_id or f"{os.uname().nodename}-{os.getpid()}"
+        self.logger = logger
+        
+        self._stop_event = threading.Event()
+    
+    def run(self, max_jobs: Optional[int] = None) -> int:
+        """
+        Process jobs until stopped
+        
+        Args:
+            max_jobs: Stop after this many jobs (None = run until stop())
+        
+        Returns:
+            Number of jobs processed
+        """
+        self.logger.info(f"Retraining worker {self.worker_id} started (queue {self.queue.path})")
+        processed = 0
+        
+        while not self._stop_event.is_set():
+            job = self.run_once()
+            if job is None:
+                self._stop_event.wait(self.poll_interval)
+                continue
+            
+            processed += 1
+            if max_jobs is not None and processed >= max_jobs:
+                break
+        
+        self.logger.info(f"Retraining worker {self.worker_id} stopped after {processed} jobs")
+        
+        return processed
+    
+    def stop(self) -> None:
+        """Stop the worker after the current job"""
+        self._stop_event.set()
+    
+    def run_once(self) -> Optional[RetrainingJob]:
+        """
+        Claim and process the next queued job
+        
+        Returns:
+            The processed job (re-read from the queue), or None if the queue was empty
+        """
+        self.queue.requeue_stale(self.stale_job_timeout)
+        
+        job = self.queue.claim_next(self.worker_id)
+        if job is None:
+            return None
+        
+        self.process_job(job)
+        return self.queue.get_job(job.job_id)
+    
+    def process_job(self, job: RetrainingJob) -> None:
+        """
+        Retrain, version and activate each model type of a job
+        
+        Model types without enough feedback are skipped. Progress is written
+        to the queue after each model; a heartbeat is kept while training.
+        
+        Args:
+            job: Claimed job
+        """
+        model_versions: Dict[str, str] = {}
+        metrics: Dict[str, Any] = {}
+        skipped: List[str] = []
+        n_models = len(job.model_types)
+        
+        heartbeat_stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat_loop,
+            args=(job.job_id, heartbeat_stop),
+            daemon=True
+        )
+        heartbeat.start()
+        
+        try:
+            for i, model_type in enumerate(job.model_types):
+                method = RETRAIN_METHODS.get(model_type)
+                if method is None:
+                    raise ValueError(f"Unsupported model type: {model_type}")
+                
+                self.queue.update_progress(
+                    job.job_id, 100.0 * i / n_models, f"Retraining {model_type} ({i + 1}/{n_models})"
+                )
+                
+                start = time.perf_counter()
+                version = getattr(self.pipeline, method)(**job.params.get(model_type, {}))
+                if version is None:
+                    skipped.append(model_type)
+                    continue
+                
+                if not self.pipeline.activate_model_version(version.version):
+                    raise RuntimeError(f"Failed to activate {version.version}")
+                
+                model_versions[model_type] = version.version
+                metrics[model_type] = version.performance_metrics.to_dict()
+                self.logger.info(
+                    f"Job {job.job_id}: activated {version.version} "
+                    f"in {time.perf_counter() - start:.1f}s"
+                )
+                
+                self.queue.update_progress(
+                    job.job_id, 100.0 * (i + 1) / n_models, f"Activated {version.version}",
+                    model_versions=model_versions, metrics=metrics
+                )
+            
+            if model_versions:
+                message = f"Retraining completed. Active versions: {', '.join(model_versions.values())}"
+            else:
+                message = "Retraining completed. No model retrained"
+            if skipped:
+                message += f" (not enough feedback for {', '.join(skipped)})"
+            
+            self.queue.complete(job.job_id, message, model_versions, metrics)
+            self.logger.info(f"Retraining job {job.job_id} completed")
+        
+        except Exception as e:
+            self.logger.error(f"Retraining job {job.job_id} failed: {e}", exc_info=True)
+            self.queue.fail(job.job_id, f"Error: {str(e)}", model_versions, metrics)
+        
+        finally:
+            heartbeat_stop.set()
+            heartbeat.join()
+    
+    def _heartbeat_loop(self, job_id: str, stop: threading.Event) -> None:
+        """Refresh a running job's heartbeat until stopped"""
+        while not stop.wait(self.poll_interval):
+            try:
+                self.queue.heartbeat(job_id)
+            except Exception as e:
+                self.logger.warning(f"Heartbeat for job {job_id} failed: {e}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run a retraining worker with settings from the configuration file"""
+    parser = argparse.ArgumentParser(description="Model retraining worker")
+    parser.add_argument('--config', help="Configuration file")
+    parser.add_argument('--max-jobs', type=int, help="Exit after this many jobs")
+    args = parser.parse_args(argv)
+    
+    from trade_risk_analyzer.core.config import ConfigManager
+    config = ConfigManager(args.config).load()
+    settings = config.retraining
+    
+    apply_resource_limits(settings.max_memory_mb, settings.cpu_threads, settings.nice)
+    
+    from trade_risk_analyzer.data_ingestion.storage import DatabaseStorage
+    from trade_risk_analyzer.feedback.retraining import RetrainingPipeline
+    
+    storage = DatabaseStorage(config.database.url, config.database.pool_size, config.database.max_overflow)
+    storage.connect()
+    
+    pipeline = RetrainingPipeline(
+        storage=storage,
+        model_dir=settings.model_dir,
+        version_dir=settings.version_dir
+    )
+    worker = RetrainingWorker(
+        queue=RetrainingJobQueue(settings.queue_path),
+        pipeline=pipeline,
+        poll_interval=settings.poll_interval,
+        stale_job_timeout=settings.stale_job_timeout
+    )
+    
+    try:
+        worker.run(max_jobs=args.max_jobs)
+    except KeyboardInterrupt:
+        worker.stop()
+    finally:
+        storage.disconnect()
+    
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -6,15 +6,56 @@ Implements anomaly detection models and ensemble system.
 
 from trade_risk_analyzer.models.isolation_forest import IsolationForestModel
 from trade_risk_analyzer.models.autoencoder import AutoencoderModel
+from trade_risk_analyzer.models.numpy_autoencoder import NumpyAutoencoder
 from trade_risk_analyzer.models.random_forest import RandomForestModel
+from trade_risk_analyzer.models.artifact_store import ArtifactStore
+from trade_risk_analyzer.models.flat_forest import FlatRandomForest, FlatIsolationForest
 from trade_risk_analyzer.models.trainer import ModelTrainer
-from trade_risk_analyzer.models.ensemble import ModelEnsemble
+from trade_risk_analyzer.models.tuning import (
+    CachedFolds,
+    HyperparameterTuner,
+    TrialStore,
+    TuningResult
+)
+from trade_risk_analyzer.models.ensemble import ModelEnsemble, ExplanationCache
+from trade_risk_analyzer.models.batch_scorer import MicroBatchScorer, ScorerStatistics
+from trade_risk_analyzer.models.drift import (
+    DriftBaseline,
+    DriftMonitor,
+    DriftReport,
+    HistogramSketch
+)
+from trade_risk_analyzer.models.registry import (
+    read_active_manifest,
+    active_generation,
+    install_model_file,
+    activate_in_manifest
+)
 
 
 __all__ = [
     'IsolationForestModel',
     'AutoencoderModel',
+    'NumpyAutoencoder',
     'RandomForestModel',
+    'ArtifactStore',
+    'FlatRandomForest',
+    'FlatIsolationForest',
     'ModelTrainer',
+    'CachedFolds',
+    'HyperparameterTuner',
+    'TrialStore',
+    'TuningResult',
     'ModelEnsemble',
+    'ExplanationCache',
+    'MicroBatchScorer',
+    'ScorerStatistics',
+    'DriftBaseline',
+    'DriftMonitor',
+    'DriftReport',
+    'HistogramSketch',
+    'read_active_manifest',
+    'active_generation',
+    'install_model_file',
+    'activate_in_manifest',
 ]
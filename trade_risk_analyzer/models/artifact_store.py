@@ -0,0 +1,335 @@
+"""
+Model Artifact Store
+
+Content-addressed store for model arrays. Each array is saved once as a
+plain .npy object named by the hash of its contents, and an artifact is a
+small JSON manifest naming its arrays and metadata, itself addressed by the
+hash of the manifest. Identical arrays and artifacts are stored once across
+versions, objects are immutable, and artifacts load with mmap_mode='r' so
+every process serving a model maps the same page-cache copy of its arrays.
+
+Layout of a store directory:
+    objects/<sha256>.npy      Array contents
+    artifacts/<sha256>.json   Artifact manifests
+
+A model directory points at its active artifacts with reference files
+(<model_type>.artifact) next to a store in <model_dir>/artifacts.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple, Union
+
+import numpy as np
+
+from trade_risk_analyzer.core.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Store directory inside a model directory
+ARTIFACT_STORE_DIR = 'artifacts'
+
+# Suffix of artifact reference files in a model directory
+ARTIFACT_REF_SUFFIX = '.artifact'
+
+
+def _jsonable(value: Any) -> Any:
+    """Convert NumPy scalars, arrays and dictionary keys for JSON serialization"""
+    if isinstance(value, dict):
+        return {
+            (k.item() if isinstance(k, np.generic) else k)
+            if isinstance(k, (str, int, float, bool, np.generic)) else str(k): _jsonable(v)
+            for k, v in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return _jsonable(value.tolist())
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def array_digest(array: np.ndarray) -> str:
+    """
+    Content hash of an array (dtype, shape and data)
+    
+    Args:
+        array: Array to hash
+    
+    Returns:
+        SHA-256 hex digest
+    """
+    array = np.ascontiguousarray(array)
+    h = hashlib.sha256()
+    h.update(f"{array.dtype.str}|{array.shape}|".encode())
+    h.update(memoryview(array).cast('B'))
+    return h.hexdigest()
+
+
+def _atomic_write(path: Path, write) -> None:
+    """Write a file through a temporary file renamed into place"""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ArtifactStore:
+    """
+    Content-addressed store of model arrays and artifact manifests
+    """
+    
+    def __init__(self, root: Union[str, Path]):
+        """
+        Initialize artifact store (creates the directories if needed)
+        
+        Args:
+            root: Store directory
+        """
+        self.root = Path(root)
+        self.objects_dir = self.root / 'objects'
+        self.artifacts_dir = self.root / 'artifacts'
+        self.logger = logger
+        
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.artifacts_dir.mkdir(parents=True, exist_ok=True)
+    
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / f"{digest}.npy"
+    
+    def _manifest_path(self, digest: str) -> Path:
+        return self.artifacts_dir / f"{digest}.json"
+    
+    def put_array(self, array: np.ndarray) -> str:
+        """
+        Store an array unless an identical one is already stored
+        
+        Args:
+            array: Array to store (object arrays are not supported)
+        
+        Returns:
+            Object digest
+        """
+        array = np.ascontiguousarray(array)
+        if array.dtype.hasobject:
+            raise ValueError("Object arrays cannot be stored as memory-mappable objects")
+        
+        digest = array_digest(array)
+        path = self._object_path(digest)
+        if not path.exists():
+            _atomic_write(path, lambda f: np.save(f, array, allow_pickle=False))
+        
+        return digest
+    
+    def put(self, arrays: Dict[str, np.ndarray], metadata: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Store an artifact: named arrays plus JSON metadata
+        
+        Args:
+            arrays: Arrays by name
+            metadata: JSON-serializable metadata (NumPy scalars are converted)
+        
+        Returns:
+            Artifact digest
+        """
+        manifest = {
+            'arrays': {name: self.put_array(array) for name, array in sorted(arrays.items())},
+            'metadata': _jsonable(metadata or {})
+        }
+        content = json.dumps(manifest, sort_keys=True).encode()
+        digest = hashlib.sha256(content).hexdigest()
+        
+        path = self._manifest_path(digest)
+        if path.exists():
+            self.logger.debug(f"Artifact {digest[:12]} already stored")
+        else:
+            _atomic_write(path, lambda f: f.write(content))
+            self.logger.info(f"Stored artifact {digest[:12]} ({len(arrays)} arrays) in {self.root}")
+        
+        return digest
+    
+    def exists(self, digest: str) -> bool:
+        """Whether an artifact is stored"""
+        return self._manifest_path(digest).exists()
+    
+    def read_manifest(self, digest: str) -> Dict[str, Any]:
+        """
+        Read an artifact manifest
+        
+        Args:
+            digest: Artifact digest
+        
+        Returns:
+            Manifest with 'arrays' (name -> object digest) and 'metadata'
+        
+        Raises:
+            FileNotFoundError: If the artifact is not stored
+        """
+        path = self._manifest_path(digest)
+        if not path.exists():
+            raise FileNotFoundError(f"Artifact {digest} not found in {self.root}")
+        
+        with open(path, 'r') as f:
+            return json.load(f)
+    
+    def get(self, digest: str, mmap_mode: Optional[str] = 'r') -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """
+        Load an artifact
+        
+        Args:
+            digest: Artifact digest
+            mmap_mode: np.load memory-map mode ('r' shares pages between
+                processes; None reads the arrays into memory)
+        
+        Returns:
+            Tuple of (arrays by name, metadata)
+        """
+        manifest = self.read_manifest(digest)
+        arrays = {
+            name: np.load(self._object_path(object_digest), mmap_mode=mmap_mode, allow_pickle=False)
+            for name, object_digest in manifest['arrays'].items()
+        }
+        return arrays, manifest['metadata']
+    
+    def copy_to(self, digest: str, other: 'ArtifactStore') -> None:
+        """
+        Copy an artifact into another store
+        
+        Objects the other store already holds are skipped; new ones are hard
+        linked when both stores are on the same file system. Objects are
+        never modified, so linked stores cannot affect each other.
+        
+        Args:
+            digest: Artifact digest
+            other: Destination store
+        """
+        manifest_path = self._manifest_path(digest)
+        for object_digest in self.read_manifest(digest)['arrays'].values():
+            _link_or_copy(self._object_path(object_digest), other._object_path(object_digest))
+        _link_or_copy(manifest_path, other._manifest_path(digest))
+    
+    def list_artifacts(self) -> List[str]:
+        """
+        List stored artifacts
+        
+        Returns:
+            Artifact digests, oldest first
+        """
+        paths = sorted(self.artifacts_dir.glob('*.json'), key=lambda p: p.stat().st_mtime)
+        return [path.stem for path in paths]
+    
+    def remove_unreferenced(self, keep: List[str]) -> int:
+        """
+        Remove artifacts not in keep and objects no kept artifact uses
+        
+        Processes that mapped a removed object keep their mapping until
+        they close it.
+        
+        Args:
+            keep: Artifact digests to keep
+        
+        Returns:
+            Number of files removed
+        """
+        keep = set(keep)
+        used = set()
+        removed = 0
+        
+        for digest in self.list_artifacts():
+            if digest in keep:
+                used.update(self.read_manifest(digest)['arrays'].values())
+            else:
+                self._manifest_path(digest).unlink(missing_ok=True)
+                removed += 1
+        
+        for path in self.objects_dir.glob('*.npy'):
+            if path.stem not in used:
+                path.unlink(missing_ok=True)
+                removed += 1
+        
+        if removed:
+            self.logger.info(f"Removed {removed} unreferenced files from {self.root}")
+        
+        return removed
+    
+    def size_bytes(self) -> int:
+        """Total size of stored objects and manifests"""
+        return sum(path.stat().st_size for path in self.root.rglob('*') if path.is_file())
+
+
+def _link_or_copy(source: Path, dest: Path) -> None:
+    """Hard link (or copy) an immutable store file unless dest exists"""
+    if dest.exists():
+        return
+    
+    tmp_path = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+    try:
+        try:
+            os.link(source, tmp_path)
+        except OSError:
+            shutil.copy2(source, tmp_path)
+        os.replace(tmp_path, dest)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_artifact_ref(path: Union[str, Path], digest: str, kind: str) -> Path:
+    """
+    Point a reference file at an artifact (atomic replace)
+    
+    Args:
+        path: Reference file (e.g. models/random_forest.artifact)
+        digest: Artifact digest in the store next to the reference
+        kind: Artifact kind (e.g. 'random_forest')
+    
+    Returns:
+        Reference file path
+    """
+    path = Path(path)
+    content = json.dumps({
+        'digest': digest,
+        'kind': kind,
+        'written_at': datetime.now().isoformat()
+    }, indent=2).encode()
+    _atomic_write(path, lambda f: f.write(content))
+    return path
+
+
+def read_artifact_ref(path: Union[str, Path]) -> Tuple[ArtifactStore, str]:
+    """
+    Resolve a reference file to its store and artifact digest
+    
+    Args:
+        path: Reference file
+    
+    Returns:
+        Tuple of (store next to the reference, artifact digest)
+    """
+    path = Path(path)
+    with open(path, 'r') as f:
+        ref = json.load(f)
+    return ArtifactStore(path.parent / ARTIFACT_STORE_DIR), ref['digest']
+
+
+def artifact_ref_path(model_dir: Union[str, Path], model_type: str) -> Path:
+    """Reference file of a model type in a model directory"""
+    return Path(model_dir) / f"{model_type}{ARTIFACT_REF_SUFFIX}"
@@ -2,12 +2,15 @@
 Autoencoder Model Implementation
 
 Deep learning-based anomaly detection using reconstruction error.
+
+TensorFlow is imported on first use (building, training or loading a Keras
+model), not at module import. Inference runs through a NumPy forward pass
+of the trained weights (see numpy_autoencoder); serving processes can load
+the NumPy export and never import TensorFlow.
 """
 
+import importlib.util
 import numpy as np
-import tensorflow as tf
-from tensorflow import keras
-from tensorflow.keras import layers, models, callbacks
 from typing import Dict, Any, Optional, Tuple
 from pathlib import Path
 import json
@@ -15,11 +18,23 @@ from datetime import datetime
 
 from trade_risk_analyzer.core.base import BaseModel
 from trade_risk_analyzer.core.logger import get_logger
+from trade_risk_analyzer.models.numpy_autoencoder import NumpyAutoencoder
 
 
 logger = get_logger(__name__)
 
 
+TENSORFLOW_AVAILABLE = importlib.util.find_spec('tensorflow') is not None
+
+
+def _import_tensorflow():
+    """Import TensorFlow on first use (it adds seconds and hundreds of MB to startup)"""
+    if not TENSORFLOW_AVAILABLE:
+        raise ImportError("TensorFlow is required to build, train or load Keras autoencoders")
+    import tensorflow as tf
+    return tf
+
+
 class AutoencoderModel(BaseModel):
     """
     Autoencoder model for anomaly detection using reconstruction error
@@ -68,10 +83,12 @@ class AutoencoderModel(BaseModel):
         self.reconstruction_threshold = None
         self.training_metadata = {}
         
+        # NumPy forward pass of the current weights (built on first inference)
+        self._runtime: Optional[NumpyAutoencoder] = None
+        
         self.logger = logger
         
-        # Set random seeds
-        tf.random.set_seed(random_state)
+        # Set random seed (TensorFlow's is set when the model is built)
         np.random.seed(random_state)
     
     def _build_model(self, input_dim: int) -> None:
@@ -83,6 +100,10 @@ class AutoencoderModel(BaseModel):
         """
         self.input_dim = input_dim
         
+        tf = _import_tensorflow()
+        keras, layers, models = tf.keras, tf.keras.layers, tf.keras.models
+        tf.random.set_seed(self.random_state)
+        
         # Input layer
         input_layer = layers.Input(shape=(input_dim,))
         
@@ -134,6 +155,8 @@ class AutoencoderModel(BaseModel):
         if self.model is None:
             self._build_model(X_train.shape[1])
         
+        callbacks = _import_tensorflow().keras.callbacks
+        
         # Callbacks
         callback_list = [
             callbacks.EarlyStopping(
@@ -163,6 +186,7 @@ class AutoencoderModel(BaseModel):
         
         self.training_history = history.history
         self.is_trained = True
+        self._runtime = None
         
         # Calculate reconstruction threshold (95th percentile of training errors)
         train_reconstructions = self.model.predict(X_train, verbose=0)
@@ -185,6 +209,78 @@ class AutoencoderModel(BaseModel):
         self.logger.info(f"Autoencoder training complete (epochs: {self.training_metadata['epochs_trained']})")
         self.logger.info(f"Reconstruction threshold: {self.reconstruction_threshold:.6f}")
     
+    def fine_tune(self, X_new: np.ndarray, epochs: int = 5,
+                  learning_rate: Optional[float] = None) -> None:
+        """
+        Continue training a trained (or loaded) autoencoder on new samples
+        
+        Starts from the current weights instead of rebuilding the network,
+        so a few epochs adapt the model to recent traffic. The
+        reconstruction threshold is recomputed on the new samples.
+        
+        Args:
+            X_new: New samples of normal traffic (n_samples, n_features)
+            epochs: Maximum number of fine-tuning epochs
+            learning_rate: Optional learning rate for fine-tuning
+                (default: keep the optimizer's current rate)
+        
+        Raises:
+            ValueError: If the feature count differs from the trained model
+        """
+        if not self.is_trained or self.model is None:
+            self.train(X_new)
+            return
+        
+        if X_new.shape[1] != self.input_dim:
+            raise ValueError(f"Expected {self.input_dim} features, got {X_new.shape[1]}")
+        
+        self.logger.info(f"Fine-tuning Autoencoder with {X_new.shape[0]} samples for up to {epochs} epochs")
+        
+        callbacks = _import_tensorflow().keras.callbacks
+        
+        if learning_rate is not None:
+            self.model.optimizer.learning_rate.assign(learning_rate)
+        
+        # Hold out a validation split only when it leaves at least one sample
+        use_validation = int(X_new.shape[0] * self.validation_split) >= 1
+        monitor = 'val_loss' if use_validation else 'loss'
+        
+        history = self.model.fit(
+            X_new, X_new,
+            batch_size=self.batch_size,
+            epochs=epochs,
+            validation_split=self.validation_split if use_validation else 0.0,
+            callbacks=[
+                callbacks.EarlyStopping(
+                    monitor=monitor,
+                    patience=min(self.early_stopping_patience, epochs),
+                    restore_best_weights=True,
+                    verbose=0
+                )
+            ],
+            verbose=0
+        )
+        
+        self._runtime = None
+        
+        reconstructions = self.model.predict(X_new, verbose=0)
+        errors = np.mean(np.square(X_new - reconstructions), axis=1)
+        self.reconstruction_threshold = np.percentile(errors, 95)
+        
+        self.training_metadata.update({
+            'fine_tune_epochs': len(history.history['loss']),
+            'fine_tune_samples': X_new.shape[0],
+            'final_loss': float(history.history['loss'][-1]),
+            'reconstruction_threshold': float(self.reconstruction_threshold),
+            'incremental_updates': self.training_metadata.get('incremental_updates', 0) + 1,
+            'updated_at': datetime.now().isoformat()
+        })
+        
+        self.logger.info(
+            f"Autoencoder fine-tuning complete (epochs: {len(history.history['loss'])}, "
+            f"threshold: {self.reconstruction_threshold:.6f})"
+        )
+    
     def predict(self, X: np.ndarray) -> np.ndarray:
         """
         Predict anomaly labels (1 for anomaly, 0 for normal)
@@ -221,13 +317,8 @@ class AutoencoderModel(BaseModel):
         if not self.is_trained:
             raise RuntimeError("Model must be trained before prediction")
         
-        # Reconstruct inputs
-        reconstructions = self.model.predict(X, verbose=0)
-        
-        # Calculate MSE for each sample
-        errors = np.mean(np.square(X - reconstructions), axis=1)
-        
-        return errors
+        # NumPy forward pass: same result as model.predict without Keras' per-call overhead
+        return self.to_numpy().calculate_reconstruction_error(X)
     
     def predict_anomaly_score(self, X: np.ndarray) -> np.ndarray:
         """
@@ -272,7 +363,35 @@ class AutoencoderModel(BaseModel):
         if not self.is_trained:
             raise RuntimeError("Model must be trained before encoding")
         
-        return self.encoder.predict(X, verbose=0)
+        return self.to_numpy().get_encoding(X)
+    
+    def to_numpy(self) -> NumpyAutoencoder:
+        """
+        Get the NumPy forward pass of the trained model
+        
+        Returns:
+            NumpyAutoencoder with the current weights (cached until the
+            model is retrained or reloaded)
+        """
+        if not self.is_trained:
+            raise RuntimeError("Model must be trained before export")
+        
+        if self._runtime is None:
+            self._runtime = NumpyAutoencoder.from_keras(
+                self.model,
+                self.reconstruction_threshold,
+                self.training_metadata
+            )
+        return self._runtime
+    
+    def export_numpy(self, path: str) -> None:
+        """
+        Export the model for TensorFlow-free inference
+        
+        Args:
+            path: Output .npz file path (load with NumpyAutoencoder.load)
+        """
+        self.to_numpy().save(path)
     
     def save(self, path: str) -> None:
         """
@@ -356,8 +475,10 @@ class AutoencoderModel(BaseModel):
         model_path = f"{path}_model.keras"
         encoder_path = f"{path}_encoder.keras"
         
+        keras = _import_tensorflow().keras
         self.model = keras.models.load_model(model_path)
         self.encoder = keras.models.load_model(encoder_path)
+        self._runtime = None
         
         self.logger.info(f"Model loaded successfully")
     
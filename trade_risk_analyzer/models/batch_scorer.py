@@ -0,0 +1,317 @@
+"""
+Micro-Batching Scorer
+
+In-process scoring server for ModelEnsemble. Callers on many threads (API
+requests, streaming windows) submit small feature arrays; a background
+thread collects them until the batch is full or the oldest request reaches
+its latency deadline, scores the whole batch with one call per model, and
+hands each caller its slice of the results. Requests are scored with the
+ensemble that was current when they were submitted (or the one they pass),
+and only requests with the same ensemble and feature width share a call.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from trade_risk_analyzer.core.base import RiskLevel
+from trade_risk_analyzer.core.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class ScorerStatistics:
+    """
+    Statistics for the micro-batching scorer
+    """
+    requests: int = 0
+    rows_scored: int = 0
+    unique_rows_scored: int = 0
+    batches: int = 0
+    errors: int = 0
+    p50_latency_ms: float = 0.0
+    p99_latency_ms: float = 0.0
+    mean_batch_fill: float = 0.0  # Batch rows / max_batch_size
+    mean_requests_per_batch: float = 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return {
+            'requests': self.requests,
+            'rows_scored': self.rows_scored,
+            'unique_rows_scored': self.unique_rows_scored,
+            'batches': self.batches,
+            'errors': self.errors,
+            'p50_latency_ms': self.p50_latency_ms,
+            'p99_latency_ms': self.p99_latency_ms,
+            'mean_batch_fill': self.mean_batch_fill,
+            'mean_requests_per_batch': self.mean_requests_per_batch
+        }
+
+
+@dataclass
+class _ScoringRequest:
+    """Feature rows waiting to be scored"""
+    X: np.ndarray
+    future: Future
+    enqueued_at: float
+    ensemble: Any
+
+
+class MicroBatchScorer:
+    """
+    Batches concurrent scoring requests for a ModelEnsemble
+    """
+    
+    def __init__(self,
+                 ensemble: Any,
+                 max_batch_size: int = 256,
+                 max_latency_ms: float = 2.0,
+                 deduplicate: bool = True,
+                 latency_window: int = 10000):
+        """
+        Initialize micro-batching scorer
+        
+        Args:
+            ensemble: ModelEnsemble to score with (may be replaced while running)
+            max_batch_size: Rows that trigger scoring before the deadline
+            max_latency_ms: Longest a request waits for other requests to join its batch
+            deduplicate: Score identical feature rows of a batch only once
+            latency_window: Number of recent request latencies kept for percentiles
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        
+        self.ensemble = ensemble
+        self.max_batch_size = max_batch_size
+        self.max_latency_ms = max_latency_ms
+        self.deduplicate = deduplicate
+        self.logger = logger
+        
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        
+        self._stats_lock = threading.Lock()
+        self._stats = ScorerStatistics()
+        self._latencies: deque = deque(maxlen=latency_window)
+        self._batch_rows_total = 0
+    
+    def start(self) -> None:
+        """Start the scoring thread (called on first submit if needed)"""
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name="MicroBatchScorer",
+                daemon=True
+            )
+            self._thread.start()
+            self.logger.info(
+                f"Micro-batch scorer started (max_batch_size={self.max_batch_size}, "
+                f"max_latency_ms={self.max_latency_ms})"
+            )
+    
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        """
+        Stop the scoring thread after scoring queued requests
+        
+        Args:
+            timeout: Seconds to wait for the thread
+        """
+        with self._start_lock:
+            if self._thread is None:
+                return
+            self._stop_event.set()
+            self._thread.join(timeout)
+            self._thread = None
+        
+        self.logger.info("Micro-batch scorer stopped")
+    
+    def __enter__(self) -> 'MicroBatchScorer':
+        self.start()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+    
+    def submit(self, X: np.ndarray, ensemble: Optional[Any] = None) -> Future:
+        """
+        Queue feature rows for scoring
+        
+        Args:
+            X: Input features (n_samples, n_features)
+            ensemble: ModelEnsemble to score with (default: the scorer's
+                current ensemble)
+        
+        Returns:
+            Future resolving to (predictions, scores, risk_levels)
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+        
+        future: Future = Future()
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        
+        ensemble = ensemble if ensemble is not None else self.ensemble
+        self._queue.put(_ScoringRequest(X, future, time.perf_counter(), ensemble))
+        return future
+    
+    def score(self, X: np.ndarray,
+              timeout: Optional[float] = None,
+              ensemble: Optional[Any] = None) -> Tuple[np.ndarray, np.ndarray, List[RiskLevel]]:
+        """
+        Score feature rows, waiting for the batch they join
+        
+        Args:
+            X: Input features (n_samples, n_features)
+            timeout: Seconds to wait for the result
+            ensemble: ModelEnsemble to score with (default: the scorer's
+                current ensemble)
+        
+        Returns:
+            Tuple of (predictions, scores, risk_levels), as
+            ModelEnsemble.predict_with_risk_level
+        """
+        return self.submit(X, ensemble).result(timeout)
+    
+    async def score_async(self, X: np.ndarray,
+                          ensemble: Optional[Any] = None) -> Tuple[np.ndarray, np.ndarray, List[RiskLevel]]:
+        """
+        Score feature rows from a coroutine without blocking the event loop
+        
+        Args:
+            X: Input features (n_samples, n_features)
+            ensemble: ModelEnsemble to score with (default: the scorer's
+                current ensemble)
+        
+        Returns:
+            Tuple of (predictions, scores, risk_levels)
+        """
+        return await asyncio.wrap_future(self.submit(X, ensemble))
+    
+    def get_statistics(self) -> ScorerStatistics:
+        """
+        Get scorer statistics, including latency percentiles
+        
+        Returns:
+            ScorerStatistics snapshot
+        """
+        with self._stats_lock:
+            stats = ScorerStatistics(**self._stats.to_dict())
+            latencies = np.array(self._latencies)
+            batch_rows_total = self._batch_rows_total
+        
+        if len(latencies):
+            stats.p50_latency_ms, stats.p99_latency_ms = (
+                float(v) for v in np.percentile(latencies, [50, 99])
+            )
+        if stats.batches:
+            stats.mean_batch_fill = batch_rows_total / (stats.batches * self.max_batch_size)
+            stats.mean_requests_per_batch = stats.requests / stats.batches
+        
+        return stats
+    
+    def reset_statistics(self) -> None:
+        """Reset scorer statistics"""
+        with self._stats_lock:
+            self._stats = ScorerStatistics()
+            self._latencies.clear()
+            self._batch_rows_total = 0
+    
+    def _run(self) -> None:
+        """Collect requests into batches and score them until stopped"""
+        while not (self._stop_event.is_set() and self._queue.empty()):
+            try:
+                first = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if not first.future.set_running_or_notify_cancel():
+                continue
+            
+            batch = [first]
+            n_rows = len(first.X)
+            deadline = first.enqueued_at + self.max_latency_ms / 1000
+            
+            while n_rows < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                # Callers may cancel while queued
+                if request.future.set_running_or_notify_cancel():
+                    batch.append(request)
+                    n_rows += len(request.X)
+            
+            self._score_batch(batch)
+    
+    def _score_batch(self, batch: List[_ScoringRequest]) -> None:
+        """Score a batch, one ensemble call per ensemble and feature width"""
+        groups: Dict[tuple, List[_ScoringRequest]] = {}
+        for request in batch:
+            groups.setdefault((id(request.ensemble), request.X.shape[1:]), []).append(request)
+        
+        for group in groups.values():
+            try:
+                self._score_group(group)
+            except Exception as e:
+                # Never leave a caller waiting on an unresolved future
+                self.logger.error(f"Batch scoring failed for {len(group)} requests: {e}", exc_info=True)
+                for request in group:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                with self._stats_lock:
+                    self._stats.errors += 1
+    
+    def _score_group(self, batch: List[_ScoringRequest]) -> None:
+        """Score requests with one ensemble call and resolve their futures"""
+        ensemble = batch[0].ensemble
+        if ensemble is None:
+            raise ValueError("No ensemble to score with")
+        
+        X = batch[0].X if len(batch) == 1 else np.vstack([request.X for request in batch])
+        
+        if self.deduplicate and len(X) > 1:
+            unique_X, inverse = np.unique(X, axis=0, return_inverse=True)
+            inverse = inverse.reshape(-1)
+        else:
+            unique_X, inverse = X, None
+        
+        predictions, scores, risk_levels = ensemble.predict_with_risk_level(unique_X)
+        risk_levels = np.asarray(risk_levels, dtype=object)
+        
+        if inverse is not None:
+            predictions, scores, risk_levels = predictions[inverse], scores[inverse], risk_levels[inverse]
+        
+        done = time.perf_counter()
+        start = 0
+        for request in batch:
+            end = start + len(request.X)
+            request.future.set_result(
+                (predictions[start:end], scores[start:end], risk_levels[start:end].tolist())
+            )
+            start = end
+        
+        with self._stats_lock:
+            self._stats.requests += len(batch)
+            self._stats.rows_scored += len(X)
+            self._stats.unique_rows_scored += len(unique_X)
+            self._stats.batches += 1
+            self._batch_rows_total += min(len(X), self.max_batch_size)
+            self._latencies.extend((done - request.enqueued_at) * 1000 for request in batch)
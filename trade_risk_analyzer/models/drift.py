@@ -0,0 +1,697 @@
+"""
+Drift Monitor
+
+Streaming sketches of the feature and ensemble score distributions seen in
+production, compared on a schedule against the training baseline with the
+population stability index (PSI) and the Kolmogorov-Smirnov statistic (KS).
+
+Each column is sketched as a histogram whose bin edges are quantiles of the
+training data, so a sketch is a fixed-size count array: an update is one
+searchsorted per column, sketches of several processes merge by adding
+counts, and PSI and KS come from the counts alone. The score baseline of a
+model version is built by scoring a held-out reference sample from the
+training distribution with that version's ensemble (training rows would
+get overconfident scores), so every version, including ones retrained from
+feedback, is compared against its own scores on unseen normal traffic.
+"""
+
+import json
+import threading
+import time
+import warnings
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable, Sequence
+
+import numpy as np
+
+from trade_risk_analyzer.core.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# File name of the drift baseline in a model directory
+DRIFT_BASELINE_FILE = 'drift_baseline.npz'
+
+# Histogram bins per column (bin edges are training quantiles)
+DEFAULT_BINS = 20
+
+# Extra quantile edges that resolve the tails (high anomaly scores)
+TAIL_LEVELS = (0.01, 0.99)
+
+# Floor of bin proportions in PSI (empty bins would make it infinite)
+PSI_EPSILON = 1e-4
+
+
+def _proportions(counts: np.ndarray) -> np.ndarray:
+    """Normalize counts along the last axis"""
+    counts = np.asarray(counts, dtype=np.float64)
+    totals = counts.sum(axis=-1, keepdims=True)
+    return counts / np.where(totals > 0, totals, 1.0)
+
+
+def population_stability_index(expected: np.ndarray, actual: np.ndarray) -> np.ndarray:
+    """
+    Population stability index between binned distributions
+    
+    Args:
+        expected: Baseline counts (..., n_bins)
+        actual: Observed counts on the same bins
+    
+    Returns:
+        PSI along the last axis (0.1-0.25 is a moderate, >0.25 a large shift)
+    """
+    p = np.maximum(_proportions(expected), PSI_EPSILON)
+    q = np.maximum(_proportions(actual), PSI_EPSILON)
+    return np.sum((q - p) * np.log(q / p), axis=-1)
+
+
+def ks_statistic(expected: np.ndarray, actual: np.ndarray) -> np.ndarray:
+    """
+    Kolmogorov-Smirnov distance between binned distributions
+    
+    The CDFs are compared at the bin edges, which gives a lower bound of
+    the KS statistic of the raw samples.
+    
+    Args:
+        expected: Baseline counts (..., n_bins)
+        actual: Observed counts on the same bins
+    
+    Returns:
+        KS statistic along the last axis (0-1)
+    """
+    cdf_expected = np.cumsum(_proportions(expected), axis=-1)
+    cdf_actual = np.cumsum(_proportions(actual), axis=-1)
+    return np.max(np.abs(cdf_expected - cdf_actual), axis=-1)
+
+
+class HistogramSketch:
+    """
+    Mergeable fixed-size histograms of several columns
+    
+    Column j has the bins (-inf, e_1], (e_1, e_2], ..., (e_{k-1}, inf) of
+    its inner edges e, so values outside the baseline range fall in the end
+    bins. NaNs are counted separately.
+    """
+    
+    def __init__(self, edges: np.ndarray, lower: np.ndarray, upper: np.ndarray):
+        """
+        Initialize an empty sketch
+        
+        Args:
+            edges: Inner bin edges (n_columns, n_bins - 1), sorted per row
+            lower: Baseline minimum of each column (for quantile estimates)
+            upper: Baseline maximum of each column
+        """
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.lower = np.asarray(lower, dtype=np.float64)
+        self.upper = np.asarray(upper, dtype=np.float64)
+        self.counts = np.zeros((self.edges.shape[0], self.edges.shape[1] + 1), dtype=np.int64)
+        self.missing = np.zeros(self.edges.shape[0], dtype=np.int64)
+    
+    @classmethod
+    def from_data(cls, X: np.ndarray, n_bins: int = DEFAULT_BINS) -> 'HistogramSketch':
+        """
+        Build a sketch with quantile bins of X and the counts of X
+        
+        Args:
+            X: Data (n_samples, n_columns)
+            n_bins: Evenly spaced quantile bins per column (the tails get
+                extra edges at TAIL_LEVELS)
+        
+        Returns:
+            HistogramSketch holding X
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[:, None]
+        
+        levels = np.union1d(np.linspace(0, 1, n_bins + 1), TAIL_LEVELS)
+        with warnings.catch_warnings():
+            # All-NaN columns get zero edges
+            warnings.simplefilter('ignore', RuntimeWarning)
+            quantiles = np.nanquantile(X, levels, axis=0).T if len(X) else np.zeros((X.shape[1], n_bins + 1))
+        quantiles = np.nan_to_num(quantiles)
+        
+        sketch = cls(quantiles[:, 1:-1], quantiles[:, 0], quantiles[:, -1])
+        sketch.update(X)
+        return sketch
+    
+    @property
+    def n_columns(self) -> int:
+        return self.edges.shape[0]
+    
+    @property
+    def total(self) -> int:
+        """Number of non-missing values of the first column"""
+        return int(self.counts[0].sum()) if self.n_columns else 0
+    
+    def empty_copy(self) -> 'HistogramSketch':
+        """Sketch with the same bins and no counts"""
+        return HistogramSketch(self.edges, self.lower, self.upper)
+    
+    def update(self, X: np.ndarray) -> None:
+        """
+        Add rows to the sketch
+        
+        Args:
+            X: Data (n_samples, n_columns), or (n_samples,) for one column
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[:, None]
+        if X.shape[1] != self.n_columns:
+            raise ValueError(f"Expected {self.n_columns} columns, got {X.shape[1]}")
+        
+        n_bins = self.counts.shape[1]
+        nan_mask = np.isnan(X)
+        self.missing += nan_mask.sum(axis=0)
+        has_nan = nan_mask.any(axis=0)
+        
+        # Contiguous columns
+        columns = np.ascontiguousarray(X.T)
+        
+        for j in range(self.n_columns):
+            column = columns[j]
+            if has_nan[j]:
+                column = column[~np.isnan(column)]
+            bins = np.searchsorted(self.edges[j], column, side='left')
+            self.counts[j] += np.bincount(bins, minlength=n_bins)
+    
+    def merge(self, other: 'HistogramSketch') -> None:
+        """
+        Add another sketch's counts (same bins) to this sketch
+        
+        Args:
+            other: Sketch built from the same baseline
+        """
+        if other.edges.shape != self.edges.shape or not np.array_equal(other.edges, self.edges):
+            raise ValueError("Sketches have different bins")
+        self.counts += other.counts
+        self.missing += other.missing
+    
+    def quantiles(self, q: Sequence[float]) -> np.ndarray:
+        """
+        Estimate quantiles by interpolating within bins
+        
+        The end bins are bounded by the baseline minimum and maximum.
+        
+        Args:
+            q: Quantile levels (0-1)
+        
+        Returns:
+            Estimates (n_columns, len(q)); NaN for empty columns
+        """
+        bounds = np.column_stack([self.lower, self.edges, self.upper])
+        cumulative = np.cumsum(self.counts, axis=1)
+        totals = cumulative[:, -1]
+        result = np.full((self.n_columns, len(q)), np.nan)
+        
+        rows = np.flatnonzero(totals > 0)
+        for i, level in enumerate(q):
+            target = level * totals[rows]
+            bins = np.argmax(cumulative[rows] >= target[:, None], axis=1)
+            below = np.where(bins > 0, cumulative[rows, np.maximum(bins - 1, 0)], 0)
+            in_bin = self.counts[rows, bins]
+            fraction = np.where(in_bin > 0, (target - below) / np.maximum(in_bin, 1), 0.0)
+            left = bounds[rows, bins]
+            right = bounds[rows, bins + 1]
+            result[rows, i] = left + np.clip(fraction, 0, 1) * (right - left)
+        
+        return result
+
+
+class DriftBaseline:
+    """
+    Training distribution of the features: a histogram sketch with training
+    quantile bins and a held-out reference sample for score baselines
+    """
+    
+    def __init__(self,
+                 feature_sketch: HistogramSketch,
+                 reference: np.ndarray,
+                 feature_names: Optional[List[str]] = None,
+                 n_samples: int = 0,
+                 created_at: Optional[str] = None,
+                 n_bins: int = DEFAULT_BINS):
+        """
+        Initialize drift baseline
+        
+        Args:
+            feature_sketch: Sketch of the training features
+            reference: Held-out feature rows from the training distribution
+            feature_names: Name of each feature column
+            n_samples: Number of training samples
+            created_at: ISO timestamp of the fit
+            n_bins: Evenly spaced quantile bins per histogram
+        """
+        self.feature_sketch = feature_sketch
+        self.reference = np.asarray(reference, dtype=np.float64)
+        self.feature_names = list(feature_names or [f"feature_{j}" for j in range(feature_sketch.n_columns)])
+        self.n_samples = n_samples
+        self.created_at = created_at or datetime.now().isoformat()
+        self.n_bins = n_bins
+        self.logger = logger
+    
+    @property
+    def n_features(self) -> int:
+        return self.feature_sketch.n_columns
+    
+    @classmethod
+    def fit(cls, X: np.ndarray,
+            feature_names: Optional[List[str]] = None,
+            reference: Optional[np.ndarray] = None,
+            n_bins: int = DEFAULT_BINS,
+            reference_size: int = 2000,
+            random_state: int = 42) -> 'DriftBaseline':
+        """
+        Fit a baseline on training features
+        
+        Args:
+            X: Training features, as scored by the models (n_samples, n_features)
+            feature_names: Name of each feature column
+            reference: Held-out rows (e.g. the validation split) for score
+                baselines; X is sampled when omitted, which overstates how
+                confident the models are
+            n_bins: Histogram bins per feature
+            reference_size: Rows kept for building score baselines
+            random_state: Seed of the reference sample
+        
+        Returns:
+            Fitted DriftBaseline
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if feature_names is not None and len(feature_names) != X.shape[1]:
+            raise ValueError(f"Got {len(feature_names)} feature names for {X.shape[1]} features")
+        
+        reference = X if reference is None else np.asarray(reference, dtype=np.float64)
+        rng = np.random.default_rng(random_state)
+        if len(reference) > reference_size:
+            reference = reference[np.sort(rng.choice(len(reference), reference_size, replace=False))]
+        else:
+            reference = reference.copy()
+        
+        baseline = cls(HistogramSketch.from_data(X, n_bins), reference, feature_names, len(X), n_bins=n_bins)
+        logger.info(
+            f"Fitted drift baseline: {baseline.n_features} features, {len(X)} samples, "
+            f"{len(reference)} reference rows"
+        )
+        return baseline
+    
+    def score_sketch(self, ensemble: Any) -> HistogramSketch:
+        """
+        Baseline sketch of an ensemble's scores on the reference sample
+        
+        Args:
+            ensemble: ModelEnsemble to score with
+        
+        Returns:
+            One-column sketch with quantile bins of the reference scores
+        """
+        _, scores = ensemble.predict_ensemble(self.reference)
+        return HistogramSketch.from_data(scores, self.n_bins)
+    
+    def save(self, path: str) -> None:
+        """
+        Save baseline to a .npz file
+        
+        Args:
+            path: Output file path
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        
+        config = {
+            'feature_names': self.feature_names,
+            'n_samples': self.n_samples,
+            'created_at': self.created_at,
+            'n_bins': self.n_bins
+        }
+        with open(path, 'wb') as f:
+            np.savez(
+                f,
+                config=np.array(json.dumps(config)),
+                edges=self.feature_sketch.edges,
+                lower=self.feature_sketch.lower,
+                upper=self.feature_sketch.upper,
+                counts=self.feature_sketch.counts,
+                missing=self.feature_sketch.missing,
+                reference=self.reference
+            )
+        
+        self.logger.info(f"Saved drift baseline ({self.n_features} features) to {path}")
+    
+    @classmethod
+    def load(cls, path: str) -> 'DriftBaseline':
+        """
+        Load baseline from a .npz file
+        
+        Args:
+            path: Input file path
+        
+        Returns:
+            Loaded DriftBaseline
+        """
+        with np.load(path, allow_pickle=False) as data:
+            config = json.loads(str(data['config']))
+            sketch = HistogramSketch(data['edges'], data['lower'], data['upper'])
+            sketch.counts = data['counts'].astype(np.int64)
+            sketch.missing = data['missing'].astype(np.int64)
+            reference = data['reference']
+        
+        baseline = cls(sketch, reference, config['feature_names'], config['n_samples'],
+                       config['created_at'], config['n_bins'])
+        logger.info(f"Loaded drift baseline ({baseline.n_features} features) from {path}")
+        return baseline
+
+
+@dataclass
+class DriftReport:
+    """
+    Drift of one model version's inputs and scores against the baseline
+    """
+    model_version: str
+    checked_at: datetime
+    n_samples: int
+    sufficient_samples: bool
+    score_psi: Optional[float] = None
+    score_ks: Optional[float] = None
+    score_quantiles: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    n_features: int = 0
+    n_features_drifted: int = 0
+    max_feature_psi: Optional[float] = None
+    top_features: List[Dict[str, Any]] = field(default_factory=list)
+    is_drifted: bool = False
+    reasons: List[str] = field(default_factory=list)
+    retraining_triggered: bool = False
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return {
+            'model_version': self.model_version,
+            'checked_at': self.checked_at.isoformat(),
+            'n_samples': self.n_samples,
+            'sufficient_samples': self.sufficient_samples,
+            'score_psi': self.score_psi,
+            'score_ks': self.score_ks,
+            'score_quantiles': self.score_quantiles,
+            'n_features': self.n_features,
+            'n_features_drifted': self.n_features_drifted,
+            'max_feature_psi': self.max_feature_psi,
+            'top_features': self.top_features,
+            'is_drifted': self.is_drifted,
+            'reasons': self.reasons,
+            'retraining_triggered': self.retraining_triggered
+        }
+
+
+class _VersionSketches:
+    """Live sketches of one model version"""
+    
+    def __init__(self, model_version: str, features: Optional[HistogramSketch],
+                 scores: HistogramSketch, score_baseline: HistogramSketch):
+        self.model_version = model_version
+        self.features = features
+        self.scores = scores
+        self.score_baseline = score_baseline
+        self.n_samples = 0
+        self.started_at = time.time()
+        self.retraining_triggered = False
+
+
+class DriftMonitor:
+    """
+    Tracks feature and ensemble score drift per model version and triggers
+    retraining when it crosses the thresholds
+    """
+    
+    # Score quantiles reported for the baseline and live distributions
+    REPORTED_QUANTILES = (0.5, 0.9, 0.99)
+    
+    def __init__(self,
+                 baseline: Optional[DriftBaseline] = None,
+                 psi_threshold: float = 0.25,
+                 ks_threshold: float = 0.2,
+                 feature_share_threshold: float = 0.2,
+                 min_samples: int = 500,
+                 check_interval: float = 3600.0,
+                 retrain_cooldown: float = 86400.0,
+                 on_drift: Optional[Callable[[DriftReport], None]] = None,
+                 max_versions: int = 5,
+                 max_feature_rows: int = 1000,
+                 random_state: Optional[int] = None):
+        """
+        Initialize drift monitor
+        
+        Args:
+            baseline: Training baseline (monitoring is idle without one)
+            psi_threshold: PSI of the scores, or of a feature, counted as drift
+            ks_threshold: KS statistic of the scores counted as drift
+            feature_share_threshold: Share of drifted features counted as drift
+            min_samples: Live samples of a version needed before it is judged
+            check_interval: Seconds between scheduled checks
+            retrain_cooldown: Minimum seconds between retraining triggers
+            on_drift: Called with the report when drift is detected (e.g. to
+                queue a retraining job); at most once per model version
+            max_versions: Model versions whose sketches are kept
+            max_feature_rows: Rows of a batch added to the feature sketch; larger
+                batches are subsampled (scores are always added in full)
+            random_state: Seed of the subsampling
+        """
+        self.baseline = baseline
+        self.psi_threshold = psi_threshold
+        self.ks_threshold = ks_threshold
+        self.feature_share_threshold = feature_share_threshold
+        self.min_samples = min_samples
+        self.check_interval = check_interval
+        self.retrain_cooldown = retrain_cooldown
+        self.on_drift = on_drift
+        self.max_versions = max_versions
+        self.max_feature_rows = max_feature_rows
+        self.logger = logger
+        
+        self._rng = np.random.default_rng(random_state)
+        
+        self._lock = threading.Lock()
+        self._versions: Dict[str, _VersionSketches] = {}
+        self._current_version: Optional[str] = None
+        self._last_check = time.time()
+        self._last_trigger: Optional[float] = None
+        self.last_report: Optional[DriftReport] = None
+    
+    def set_baseline(self, baseline: DriftBaseline) -> None:
+        """
+        Replace the training baseline (drops the live sketches)
+        
+        Args:
+            baseline: New training baseline
+        """
+        with self._lock:
+            self.baseline = baseline
+            self._versions.clear()
+            self._current_version = None
+            self.last_report = None
+    
+    def _version_sketches(self, model_version: str, ensemble: Any) -> _VersionSketches:
+        """Sketches of a model version, created on its first batch"""
+        state = self._versions.get(model_version)
+        if state is None:
+            score_baseline = self.baseline.score_sketch(ensemble)
+            state = _VersionSketches(
+                model_version,
+                self.baseline.feature_sketch.empty_copy(),
+                score_baseline.empty_copy(),
+                score_baseline
+            )
+            self._versions[model_version] = state
+            while len(self._versions) > self.max_versions:
+                self._versions.pop(next(iter(self._versions)))
+            self.logger.info(f"Monitoring drift of model version {model_version}")
+        
+        self._current_version = model_version
+        return state
+    
+    def update(self, X: Optional[np.ndarray], scores: np.ndarray,
+               model_version: str, ensemble: Any) -> Optional[DriftReport]:
+        """
+        Add a scored batch and run the scheduled check when it is due
+        
+        Args:
+            X: Features the ensemble scored (None to track scores only)
+            scores: Ensemble scores of the batch
+            model_version: Version of the models that scored the batch
+            ensemble: ModelEnsemble that scored the batch
+        
+        Returns:
+            Report of the scheduled check if one ran, else None
+        """
+        if self.baseline is None or len(scores) == 0:
+            return None
+        
+        with self._lock:
+            state = self._version_sketches(model_version, ensemble)
+            
+            if state.features is not None and X is not None:
+                if X.shape[1] == self.baseline.n_features:
+                    if len(X) > self.max_feature_rows:
+                        X = X[self._rng.choice(len(X), self.max_feature_rows, replace=False)]
+                    state.features.update(X)
+                else:
+                    self.logger.warning(
+                        f"Feature drift not tracked for {model_version}: batch has {X.shape[1]} "
+                        f"features, baseline {self.baseline.n_features}"
+                    )
+                    state.features = None
+            
+            state.scores.update(np.asarray(scores, dtype=np.float64))
+            state.n_samples += len(scores)
+            
+            due = time.time() - self._last_check >= self.check_interval
+        
+        return self.check(model_version) if due else None
+    
+    def _build_report(self, state: _VersionSketches) -> DriftReport:
+        """Compare a version's sketches with the baseline"""
+        report = DriftReport(
+            model_version=state.model_version,
+            checked_at=datetime.now(),
+            n_samples=state.n_samples,
+            sufficient_samples=state.n_samples >= self.min_samples,
+            retraining_triggered=state.retraining_triggered
+        )
+        
+        if state.scores.total:
+            report.score_psi = float(population_stability_index(state.score_baseline.counts, state.scores.counts)[0])
+            report.score_ks = float(ks_statistic(state.score_baseline.counts, state.scores.counts)[0])
+            labels = [f"p{int(q * 100)}" for q in self.REPORTED_QUANTILES]
+            for name, sketch in (('baseline', state.score_baseline), ('live', state.scores)):
+                values = sketch.quantiles(self.REPORTED_QUANTILES)[0]
+                report.score_quantiles[name] = {label: float(value) for label, value in zip(labels, values)}
+            
+            if report.score_psi >= self.psi_threshold:
+                report.reasons.append(f"Ensemble score PSI {report.score_psi:.3f} >= {self.psi_threshold}")
+            if report.score_ks >= self.ks_threshold:
+                report.reasons.append(f"Ensemble score KS {report.score_ks:.3f} >= {self.ks_threshold}")
+        
+        if state.features is not None and state.features.total:
+            feature_psi = population_stability_index(self.baseline.feature_sketch.counts, state.features.counts)
+            feature_ks = ks_statistic(self.baseline.feature_sketch.counts, state.features.counts)
+            drifted = feature_psi >= self.psi_threshold
+            
+            report.n_features = len(feature_psi)
+            report.n_features_drifted = int(drifted.sum())
+            report.max_feature_psi = float(feature_psi.max())
+            report.top_features = [
+                {
+                    'feature': self.baseline.feature_names[j],
+                    'psi': float(feature_psi[j]),
+                    'ks': float(feature_ks[j])
+                }
+                for j in np.argsort(-feature_psi, kind='stable')[:10]
+            ]
+            
+            if report.n_features_drifted >= self.feature_share_threshold * report.n_features:
+                report.reasons.append(
+                    f"{report.n_features_drifted} of {report.n_features} features have PSI >= {self.psi_threshold}"
+                )
+        
+        report.is_drifted = report.sufficient_samples and bool(report.reasons)
+        return report
+    
+    def report(self, model_version: Optional[str] = None) -> Optional[DriftReport]:
+        """
+        Compare live sketches with the baseline without triggering retraining
+        
+        Args:
+            model_version: Version to report (the most recent one by default)
+        
+        Returns:
+            DriftReport, or None if the version has not scored anything
+        """
+        with self._lock:
+            state = self._versions.get(model_version or self._current_version)
+            return self._build_report(state) if state is not None else None
+    
+    def check(self, model_version: Optional[str] = None) -> Optional[DriftReport]:
+        """
+        Check for drift and trigger retraining if it crossed the thresholds
+        
+        Retraining is triggered at most once per model version and never
+        within retrain_cooldown seconds of the previous trigger.
+        
+        Args:
+            model_version: Version to check (the most recent one by default)
+        
+        Returns:
+            DriftReport, or None if the version has not scored anything
+        """
+        with self._lock:
+            self._last_check = time.time()
+            state = self._versions.get(model_version or self._current_version)
+            if state is None:
+                return None
+            
+            report = self._build_report(state)
+            
+            cooled_down = (
+                self._last_trigger is None or
+                time.time() - self._last_trigger >= self.retrain_cooldown
+            )
+            trigger = (
+                report.is_drifted and not state.retraining_triggered and
+                cooled_down and self.on_drift is not None
+            )
+            if trigger:
+                state.retraining_triggered = True
+                report.retraining_triggered = True
+                self._last_trigger = time.time()
+            
+            self.last_report = report
+        
+        if report.is_drifted:
+            self.logger.warning(f"Drift detected for model version {report.model_version}: {'; '.join(report.reasons)}")
+        else:
+            self.logger.info(
+                f"No drift for model version {report.model_version} "
+                f"(score PSI {report.score_psi}, {report.n_features_drifted} features drifted)"
+            )
+        
+        if trigger:
+            try:
+                self.on_drift(report)
+            except Exception as e:
+                self.logger.error(f"Drift callback failed: {e}", exc_info=True)
+        
+        return report
+    
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Get monitor configuration and state
+        
+        Returns:
+            Dictionary with thresholds, baseline details, monitored versions
+            and the last scheduled check
+        """
+        with self._lock:
+            return {
+                'baseline': {
+                    'n_features': self.baseline.n_features,
+                    'n_samples': self.baseline.n_samples,
+                    'created_at': self.baseline.created_at
+                } if self.baseline is not None else None,
+                'thresholds': {
+                    'psi': self.psi_threshold,
+                    'ks': self.ks_threshold,
+                    'feature_share': self.feature_share_threshold,
+                    'min_samples': self.min_samples
+                },
+                'check_interval': self.check_interval,
+                'retrain_cooldown': self.retrain_cooldown,
+                'current_version': self._current_version,
+                'versions': {
+                    version: {'n_samples': state.n_samples, 'retraining_triggered': state.retraining_triggered}
+                    for version, state in self._versions.items()
+                },
+                'last_check': self.last_report.to_dict() if self.last_report is not None else None
+            }
@@ -5,9 +5,13 @@ Combines predictions from multiple models using weighted voting.
 """
 
 import numpy as np
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, List, Sequence, Tuple
+from collections import OrderedDict
 from pathlib import Path
+import hashlib
+import itertools
 import json
+import threading
 
 from trade_risk_analyzer.core.logger import get_logger
 from trade_risk_analyzer.core.base import RiskLevel
@@ -19,6 +23,85 @@ from trade_risk_analyzer.models.random_forest import RandomForestModel
 logger = get_logger(__name__)
 
 
+# Source of ensemble versions (unique within the process)
+_ensemble_versions = itertools.count(1)
+
+
+def feature_hash(row: np.ndarray) -> str:
+    """
+    Hash of a feature vector, for caching results computed from it
+    
+    Args:
+        row: Feature vector
+    
+    Returns:
+        Hex digest
+    """
+    row = np.ascontiguousarray(row, dtype=np.float64)
+    return hashlib.blake2b(row.tobytes(), digest_size=16).hexdigest()
+
+
+class ExplanationCache:
+    """
+    Thread-safe LRU cache of explanations keyed by
+    (ensemble version, entity, feature hash)
+    """
+    
+    def __init__(self, max_entries: int = 10000):
+        """
+        Initialize explanation cache
+        
+        Args:
+            max_entries: Maximum number of cached explanations (0 disables caching)
+        """
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Tuple[str, str, str], Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: Tuple[str, str, str]) -> Optional[Dict[str, Any]]:
+        """Cached explanation for a key, or None"""
+        with self._lock:
+            explanation = self._entries.get(key)
+            if explanation is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return explanation
+    
+    def put(self, key: Tuple[str, str, str], explanation: Dict[str, Any]) -> None:
+        """Cache an explanation, evicting the least recently used beyond max_entries"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = explanation
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Remove all cached explanations"""
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache size and hit statistics"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+
 class ModelEnsemble:
     """
     Ensemble system that combines predictions from multiple models
@@ -51,6 +134,9 @@ class ModelEnsemble:
         
         self.models = {}
         self.logger = logger
+        
+        # Changes whenever models or weights change (explanation cache key)
+        self.version = f"ensemble-{next(_ensemble_versions)}"
     
     def add_model(self, model_name: str, model: Any) -> None:
         """
@@ -61,6 +147,7 @@ class ModelEnsemble:
             model: Model instance
         """
         self.models[model_name] = model
+        self.version = f"ensemble-{next(_ensemble_versions)}"
         self.logger.info(f"Added model: {model_name}")
     
     def set_weights(self, weights: Dict[str, float]) -> None:
@@ -74,6 +161,7 @@ class ModelEnsemble:
             raise ValueError("Weights must sum to 1.0")
         
         self.weights = weights
+        self.version = f"ensemble-{next(_ensemble_versions)}"
         self.logger.info(f"Updated weights: {weights}")
     
     def predict_single(self, X: np.ndarray, model_name: str) -> Tuple[np.ndarray, np.ndarray]:
@@ -105,6 +193,35 @@ class ModelEnsemble:
             self.logger.error(f"Error predicting with {model_name}: {str(e)}")
             raise
     
+    def _anomaly_probability(self, X: np.ndarray, model_name: str) -> np.ndarray:
+        """
+        Score samples with one model on a 0-1 scale (1 = anomaly)
+        
+        Args:
+            X: Input features
+            model_name: Name of model to use
+        
+        Returns:
+            Anomaly probabilities
+        """
+        model = self.models[model_name]
+        
+        if model_name == 'isolation_forest':
+            # Isolation Forest scores are negative for anomalies
+            scores = model.predict_anomaly_score(X)
+            return 1 / (1 + np.exp(scores * 2))
+        
+        if model_name == 'autoencoder':
+            # Autoencoder uses reconstruction error (NumPy forward pass)
+            errors = model.predict_anomaly_score(X)
+            return 1 / (1 + np.exp(-(errors - model.reconstruction_threshold) * 10))
+        
+        # Random Forest already provides probabilities
+        probs = model.predict_proba(X)
+        if probs.ndim > 1:
+            probs = probs[:, 1]  # Probability of anomaly class
+        return probs
+    
     def predict_ensemble(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         """
         Get ensemble predictions using weighted voting
@@ -118,48 +235,43 @@ class ModelEnsemble:
         if not self.models:
             raise ValueError("No models in ensemble. Add models first.")
         
-        self.logger.info(f"Generating ensemble predictions for {X.shape[0]} samples")
+        self.logger.debug(f"Generating ensemble predictions for {X.shape[0]} samples")
         
-        # Collect predictions and scores from each model
-        all_predictions = {}
-        all_scores = {}
+        # Score each model once (0-1 range where 1 = anomaly)
+        normalized_scores = {}
         
         for model_name in self.weights.keys():
             if model_name in self.models:
                 try:
-                    predictions, scores = self.predict_single(X, model_name)
-                    all_predictions[model_name] = predictions
-                    all_scores[model_name] = scores
+                    normalized_scores[model_name] = self._anomaly_probability(X, model_name)
                 except Exception as e:
                     self.logger.warning(f"Skipping {model_name} due to error: {str(e)}")
                     continue
         
-        if not all_scores:
-            raise RuntimeError("No models produced valid predictions")
+        ensemble_predictions, ensemble_scores = self._combine_scores(normalized_scores, X.shape[0])
         
-        # Normalize scores to 0-1 range for each model
-        normalized_scores = {}
-        for model_name, scores in all_scores.items():
-            # Convert to probabilities (0-1 range where 1 = anomaly)
-            if model_name == 'isolation_forest':
-                # Isolation Forest scores are negative for anomalies
-                probs = 1 / (1 + np.exp(scores * 2))
-            elif model_name == 'autoencoder':
-                # Autoencoder uses reconstruction error
-                model = self.models[model_name]
-                threshold = model.reconstruction_threshold
-                probs = 1 / (1 + np.exp(-(scores - threshold) * 10))
-            else:
-                # Random Forest already provides probabilities
-                model = self.models[model_name]
-                probs = model.predict_proba(X)
-                if probs.ndim > 1:
-                    probs = probs[:, 1]  # Probability of anomaly class
-            
-            normalized_scores[model_name] = probs
+        anomaly_count = np.sum(ensemble_predictions)
+        self.logger.debug(f"Ensemble detected {anomaly_count} anomalies ({anomaly_count/len(X):.2%})")
+        
+        return ensemble_predictions, ensemble_scores
+    
+    def _combine_scores(self, normalized_scores: Dict[str, np.ndarray],
+                        n_samples: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Weighted vote over the models that produced scores
+        
+        Args:
+            normalized_scores: 0-1 anomaly scores by model name
+            n_samples: Number of samples
+        
+        Returns:
+            Tuple of (predictions, ensemble_scores)
+        """
+        if not normalized_scores:
+            raise RuntimeError("No models produced valid predictions")
         
         # Calculate weighted ensemble scores
-        ensemble_scores = np.zeros(X.shape[0])
+        ensemble_scores = np.zeros(n_samples)
         total_weight = 0
         
         for model_name, weight in self.weights.items():
@@ -174,9 +286,6 @@ class ModelEnsemble:
         # Convert scores to binary predictions
         ensemble_predictions = (ensemble_scores > 0.5).astype(int)
         
-        anomaly_count = np.sum(ensemble_predictions)
-        self.logger.info(f"Ensemble detected {anomaly_count} anomalies ({anomaly_count/len(X):.2%})")
-        
         return ensemble_predictions, ensemble_scores
     
     def predict_with_risk_level(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray, List[RiskLevel]]:
@@ -191,22 +300,16 @@ class ModelEnsemble:
         """
         predictions, scores = self.predict_ensemble(X)
         
-        # Classify risk levels
-        risk_levels = []
-        for score in scores:
-            if score >= self.high_risk_threshold:
-                risk_levels.append(RiskLevel.HIGH)
-            elif score >= self.medium_risk_threshold:
-                risk_levels.append(RiskLevel.MEDIUM)
-            else:
-                risk_levels.append(RiskLevel.LOW)
+        # Classify risk levels (0 = LOW, 1 = MEDIUM, 2 = HIGH)
+        level_index = (
+            (scores >= self.medium_risk_threshold).astype(int) +
+            (scores >= self.high_risk_threshold)
+        )
+        levels = (RiskLevel.LOW, RiskLevel.MEDIUM, RiskLevel.HIGH)
+        risk_levels = [levels[i] for i in level_index]
         
-        # Count risk levels
-        high_count = sum(1 for r in risk_levels if r == RiskLevel.HIGH)
-        medium_count = sum(1 for r in risk_levels if r == RiskLevel.MEDIUM)
-        low_count = sum(1 for r in risk_levels if r == RiskLevel.LOW)
-        
-        self.logger.info(f"Risk levels: HIGH={high_count}, MEDIUM={medium_count}, LOW={low_count}")
+        low_count, medium_count, high_count = np.bincount(level_index, minlength=3)
+        self.logger.debug(f"Risk levels: HIGH={high_count}, MEDIUM={medium_count}, LOW={low_count}")
         
         return predictions, scores, risk_levels
     
@@ -265,24 +368,7 @@ class ModelEnsemble:
         for model_name in self.weights.keys():
             if model_name in self.models:
                 try:
-                    _, scores = self.predict_single(X, model_name)
-                    
-                    # Normalize scores
-                    if model_name == 'isolation_forest':
-                        scores = 1 / (1 + np.exp(scores * 2))
-                    elif model_name == 'autoencoder':
-                        model = self.models[model_name]
-                        threshold = model.reconstruction_threshold
-                        scores = 1 / (1 + np.exp(-(scores - threshold) * 10))
-                    else:
-                        model = self.models[model_name]
-                        probs = model.predict_proba(X)
-                        if probs.ndim > 1:
-                            scores = probs[:, 1]
-                        else:
-                            scores = probs
-                    
-                    contributions[model_name] = scores
+                    contributions[model_name] = self._anomaly_probability(X, model_name)
                 except Exception as e:
                     self.logger.warning(f"Could not get contribution from {model_name}: {str(e)}")
         
@@ -299,32 +385,113 @@ class ModelEnsemble:
         Returns:
             Dictionary with explanation details
         """
-        # Get ensemble prediction
-        predictions, scores = self.predict_ensemble(X)
+        return self.explain_batch(X, [sample_idx])[0]
+    
+    def explain_batch(self,
+                      X: np.ndarray,
+                      sample_indices: Optional[Sequence[int]] = None,
+                      feature_names: Optional[Sequence[str]] = None,
+                      feature_zscores: Optional[np.ndarray] = None,
+                      top_k: int = 3,
+                      entity_ids: Optional[Sequence[str]] = None,
+                      cache: Optional[ExplanationCache] = None) -> List[Dict[str, Any]]:
+        """
+        Explain ensemble predictions for many samples in one pass
         
-        # Get individual model contributions
-        contributions = self.get_model_contributions(X)
+        Each model scores only the requested rows that are not cached, once
+        for all of them, and the top deviating features of every row come
+        from one partial sort of the z-score matrix.
         
-        # Build explanation
-        explanation = {
-            'sample_index': sample_idx,
-            'ensemble_prediction': int(predictions[sample_idx]),
-            'ensemble_score': float(scores[sample_idx]),
-            'risk_level': self._score_to_risk_level(scores[sample_idx]).value,
-            'model_contributions': {}
-        }
+        Args:
+            X: Input features (n_samples, n_features)
+            sample_indices: Rows to explain (all rows by default)
+            feature_names: Name of each feature column
+            feature_zscores: Z-scores of X against the training distribution
+                (same shape as X); X itself is used when omitted, which fits
+                features scaled by a standard scaler
+            top_k: Number of deviating features per sample
+            entity_ids: Entity of each row of X; required for caching
+            cache: Explanation cache keyed by (ensemble version, entity,
+                feature hash)
         
-        for model_name, model_scores in contributions.items():
-            weight = self.weights.get(model_name, 0)
-            contribution = weight * model_scores[sample_idx]
+        Returns:
+            One explanation per requested row, in request order. Cached
+            explanations are shared and must not be modified.
+        """
+        if sample_indices is None:
+            sample_indices = range(len(X))
+        sample_indices = np.asarray(sample_indices, dtype=int)
+        if feature_zscores is None:
+            feature_zscores = X
+        if feature_names is None:
+            feature_names = [f"feature_{j}" for j in range(X.shape[1])]
+        
+        use_cache = cache is not None and entity_ids is not None
+        explanations: List[Optional[Dict[str, Any]]] = [None] * len(sample_indices)
+        keys = [None] * len(sample_indices)
+        
+        if use_cache:
+            for position, idx in enumerate(sample_indices):
+                keys[position] = (self.version, str(entity_ids[idx]), feature_hash(X[idx]))
+                explanations[position] = cache.get(keys[position])
+        
+        missing = [position for position, explanation in enumerate(explanations) if explanation is None]
+        
+        if missing:
+            rows = sample_indices[missing]
+            X_rows = X[rows]
             
-            explanation['model_contributions'][model_name] = {
-                'score': float(model_scores[sample_idx]),
-                'weight': weight,
-                'weighted_contribution': float(contribution)
-            }
-        
-        return explanation
+            # Score every model once for all uncached rows
+            contributions = self.get_model_contributions(X_rows)
+            predictions, scores = self._combine_scores(contributions, len(rows))
+            
+            # Top-k features by absolute z-score
+            abs_z = np.abs(np.nan_to_num(np.asarray(feature_zscores[rows], dtype=np.float64)))
+            k = min(top_k, abs_z.shape[1])
+            if k > 0:
+                top = np.argpartition(-abs_z, k - 1, axis=1)[:, :k]
+                order = np.argsort(-np.take_along_axis(abs_z, top, axis=1), axis=1, kind='stable')
+                top = np.take_along_axis(top, order, axis=1)
+            else:
+                top = np.empty((len(rows), 0), dtype=int)
+            
+            for i, position in enumerate(missing):
+                idx = rows[i]
+                explanation = {
+                    'sample_index': int(idx),
+                    'ensemble_prediction': int(predictions[i]),
+                    'ensemble_score': float(scores[i]),
+                    'risk_level': self._score_to_risk_level(scores[i]).value,
+                    'model_contributions': {
+                        model_name: {
+                            'score': float(model_scores[i]),
+                            'weight': self.weights.get(model_name, 0),
+                            'weighted_contribution': float(self.weights.get(model_name, 0) * model_scores[i])
+                        }
+                        for model_name, model_scores in contributions.items()
+                    },
+                    'top_features': [
+                        {'feature': feature_names[j], 'zscore': float(feature_zscores[idx, j])}
+                        for j in top[i]
+                    ]
+                }
+                if entity_ids is not None:
+                    explanation['entity_id'] = str(entity_ids[idx])
+                
+                explanations[position] = explanation
+                if use_cache:
+                    cache.put(keys[position], explanation)
+        
+        # Cached explanations may come from another batch position
+        for position, idx in enumerate(sample_indices):
+            if explanations[position]['sample_index'] != idx:
+                explanations[position] = {**explanations[position], 'sample_index': int(idx)}
+        
+        self.logger.debug(
+            f"Explained {len(sample_indices)} samples ({len(sample_indices) - len(missing)} cached)"
+        )
+        
+        return explanations
     
     def _score_to_risk_level(self, score: float) -> RiskLevel:
         """Convert anomaly score to risk level"""
@@ -369,6 +536,7 @@ class ModelEnsemble:
         self.weights = config['weights']
         self.high_risk_threshold = config['high_risk_threshold']
         self.medium_risk_threshold = config['medium_risk_threshold']
+        self.version = f"ensemble-{next(_ensemble_versions)}"
         
         self.logger.info(f"Ensemble config loaded from {path}")
     
@@ -0,0 +1,584 @@
+"""
+Flat Forest Runtime
+
+Inference-only tree ensembles stored as a few flat arrays: the nodes of all
+trees are concatenated, child indices are global, and leaf outputs are
+precomputed. Unpickled scikit-learn trees copy their node arrays into
+private memory, so worker processes each hold a full copy of every forest;
+flat forests are traversed directly from memory-mapped .npy objects of an
+ArtifactStore, so all processes share one physical copy.
+
+Traversal advances every (sample, tree) pair one level per step with NumPy
+gathers and drops pairs that reached a leaf. Inputs are compared as float32
+like scikit-learn, so predictions match the exported model exactly. The
+traversal trades latency for memory: large batches score several times
+slower than scikit-learn's compiled trees, so the detection engine only
+serves flat forests when DetectionConfig.ml_memory_mapped_models is set.
+"""
+
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple, Union
+
+import numpy as np
+
+from trade_risk_analyzer.core.base import BaseModel
+from trade_risk_analyzer.core.logger import get_logger
+from trade_risk_analyzer.models.artifact_store import (
+    ARTIFACT_STORE_DIR,
+    ArtifactStore,
+    write_artifact_ref,
+    read_artifact_ref
+)
+
+
+logger = get_logger(__name__)
+
+
+# (sample, tree) pairs traversed at once; bounds the temporary arrays
+TRAVERSAL_CHUNK = 1 << 20
+
+_EULER_GAMMA = np.euler_gamma
+
+
+def _average_path_length(n_samples: np.ndarray) -> np.ndarray:
+    """Average path length of an unsuccessful BST search (Isolation Forest c(n))"""
+    n = np.asarray(n_samples, dtype=np.float64)
+    result = np.zeros_like(n)
+    result[n == 2] = 1.0
+    large = n > 2
+    result[large] = 2.0 * (np.log(n[large] - 1.0) + _EULER_GAMMA) - 2.0 * (n[large] - 1.0) / n[large]
+    return result
+
+
+def _node_depths(children_left: np.ndarray, children_right: np.ndarray,
+                 roots: np.ndarray) -> np.ndarray:
+    """Depth of every node of the flattened trees"""
+    depths = np.zeros(len(children_left), dtype=np.float64)
+    frontier = roots
+    depth = 0
+    while frontier.size:
+        depths[frontier] = depth
+        internal = frontier[children_left[frontier] != -1]
+        frontier = np.concatenate([children_left[internal], children_right[internal]])
+        depth += 1
+    return depths
+
+
+def flatten_trees(estimators: list, estimators_features: Optional[list] = None) -> Dict[str, np.ndarray]:
+    """
+    Concatenate fitted scikit-learn trees into flat node arrays
+    
+    Args:
+        estimators: Fitted DecisionTree/ExtraTree estimators
+        estimators_features: Input column of each tree feature, if the trees
+            were fitted on feature subsets (Isolation Forest)
+    
+    Returns:
+        Arrays 'roots', 'children_left', 'children_right', 'feature',
+        'threshold', 'missing_go_to_left', 'n_node_samples' and 'value'
+        (leaves have children -1)
+    """
+    trees = [estimator.tree_ for estimator in estimators]
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+    
+    def concat(name, dtype, offset_children=False, remap_features=False):
+        parts = []
+        for i, tree in enumerate(trees):
+            part = np.asarray(getattr(tree, name)).astype(dtype, copy=True)
+            if offset_children:
+                part[part != -1] += offsets[i]
+            if remap_features:
+                leaves = tree.children_left == -1
+                part[leaves] = 0
+                if estimators_features is not None:
+                    part = np.asarray(estimators_features[i], dtype=dtype)[part]
+            parts.append(part)
+        return np.concatenate(parts)
+    
+    arrays = {
+        'roots': offsets[:-1].astype(np.int64),
+        'children_left': concat('children_left', np.int64, offset_children=True),
+        'children_right': concat('children_right', np.int64, offset_children=True),
+        'feature': concat('feature', np.int64, remap_features=True),
+        'threshold': concat('threshold', np.float64),
+        'n_node_samples': concat('n_node_samples', np.int64),
+        'value': np.concatenate([tree.value[:, 0, :] for tree in trees]).astype(np.float64)
+    }
+    if all(hasattr(tree, 'missing_go_to_left') for tree in trees):
+        arrays['missing_go_to_left'] = concat('missing_go_to_left', np.bool_)
+    
+    return arrays
+
+
+class FlatForest:
+    """
+    Flattened tree ensemble traversed with NumPy
+    """
+    
+    def __init__(self, arrays: Dict[str, np.ndarray], n_features: int):
+        """
+        Initialize flat forest
+        
+        Args:
+            arrays: Node arrays as returned by flatten_trees (may be memory-mapped)
+            n_features: Number of input features
+        """
+        self.roots = arrays['roots']
+        self.children_left = arrays['children_left']
+        self.children_right = arrays['children_right']
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.missing_go_to_left = arrays.get('missing_go_to_left')
+        self.n_features = n_features
+    
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+    
+    @property
+    def n_nodes(self) -> int:
+        return len(self.children_left)
+    
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """
+        Find the leaf each sample reaches in each tree
+        
+        Args:
+            X: Input features (n_samples, n_features)
+        
+        Returns:
+            Global leaf node indices (n_samples, n_trees)
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected input with {self.n_features} features, got shape {X.shape}")
+        
+        n_samples, n_trees = X.shape[0], self.n_trees
+        leaves = np.empty((n_samples, n_trees), dtype=np.int64)
+        chunk = max(1, TRAVERSAL_CHUNK // max(n_trees, 1))
+        
+        for start in range(0, n_samples, chunk):
+            X_chunk = np.ascontiguousarray(X[start:start + chunk])
+            leaves[start:start + len(X_chunk)] = self._apply_chunk(X_chunk)
+        
+        return leaves
+    
+    def _apply_chunk(self, X: np.ndarray) -> np.ndarray:
+        """Traverse all trees for a chunk of samples"""
+        n_samples, n_trees = X.shape[0], self.n_trees
+        X_flat = X.ravel()
+        
+        # One entry per (sample, tree) pair, sample-major
+        nodes = np.tile(np.asarray(self.roots), n_samples)
+        row_offsets = np.repeat(np.arange(n_samples, dtype=np.int64) * self.n_features, n_trees)
+        
+        active = np.flatnonzero(self.children_left[nodes] != -1)
+        while active.size:
+            current = nodes[active]
+            values = X_flat[row_offsets[active] + self.feature[current]]
+            go_left = values <= self.threshold[current]
+            if self.missing_go_to_left is not None:
+                missing = np.isnan(values)
+                if missing.any():
+                    go_left = np.where(missing, self.missing_go_to_left[current], go_left)
+            
+            current = np.where(go_left, self.children_left[current], self.children_right[current])
+            nodes[active] = current
+            active = active[self.children_left[current] != -1]
+        
+        return nodes.reshape(n_samples, n_trees)
+
+
+class _FlatForestModel(BaseModel):
+    """Shared storage and loading of flat forest models"""
+    
+    kind = ''
+    model_name = ''
+    
+    def __init__(self):
+        self.forest: Optional[FlatForest] = None
+        self.leaf_value: Optional[np.ndarray] = None
+        self.feature_names = None
+        self.training_metadata: Dict[str, Any] = {}
+        self.digest: Optional[str] = None
+        self.logger = logger
+    
+    @property
+    def is_trained(self) -> bool:
+        """Whether a forest is loaded"""
+        return self.forest is not None
+    
+    def train(self, X_train: np.ndarray, y_train: Optional[np.ndarray] = None) -> None:
+        """Not supported: train the scikit-learn model and export it"""
+        raise NotImplementedError(f"{type(self).__name__} is inference-only; train a {self.model_name} and export it")
+    
+    def _check_loaded(self) -> None:
+        if not self.is_trained:
+            raise RuntimeError("Model must be loaded before prediction")
+    
+    def _to_artifact(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """Arrays and metadata to store (implemented by subclasses)"""
+        raise NotImplementedError
+    
+    def _from_artifact(self, arrays: Dict[str, np.ndarray], metadata: Dict[str, Any]) -> None:
+        """Set up the model from stored arrays and metadata (implemented by subclasses)"""
+        raise NotImplementedError
+    
+    def save_to_store(self, store: ArtifactStore) -> str:
+        """
+        Save the forest to an artifact store
+        
+        Args:
+            store: Artifact store
+        
+        Returns:
+            Artifact digest
+        """
+        self._check_loaded()
+        arrays, metadata = self._to_artifact()
+        metadata = {
+            'kind': self.kind,
+            'n_features': self.forest.n_features,
+            'feature_names': self.feature_names,
+            'training_metadata': self.training_metadata,
+            **metadata
+        }
+        self.digest = store.put(arrays, metadata)
+        return self.digest
+    
+    def load_from_store(self, store: ArtifactStore, digest: str, mmap_mode: Optional[str] = 'r') -> None:
+        """
+        Load the forest from an artifact store
+        
+        Args:
+            store: Artifact store
+            digest: Artifact digest
+            mmap_mode: 'r' to memory-map the arrays, None to read them into memory
+        
+        Raises:
+            ValueError: If the artifact holds a different kind of model
+        """
+        arrays, metadata = store.get(digest, mmap_mode=mmap_mode)
+        if metadata.get('kind') != self.kind:
+            raise ValueError(f"Artifact {digest} is a {metadata.get('kind')} model, not {self.kind}")
+        
+        self.forest = FlatForest(arrays, metadata['n_features'])
+        self.feature_names = metadata.get('feature_names')
+        self.training_metadata = metadata.get('training_metadata', {})
+        self.digest = digest
+        self._from_artifact(arrays, metadata)
+        
+        self.logger.info(
+            f"Loaded {self.model_name} artifact {digest[:12]} "
+            f"({self.forest.n_trees} trees, {self.forest.n_nodes} nodes, mmap_mode={mmap_mode})"
+        )
+    
+    def save(self, path: str) -> None:
+        """
+        Save to the store next to a reference file and point the reference at it
+        
+        Args:
+            path: Reference file (e.g. models/random_forest.artifact)
+        """
+        store = ArtifactStore(Path(path).parent / ARTIFACT_STORE_DIR)
+        digest = self.save_to_store(store)
+        write_artifact_ref(path, digest, self.kind)
+        
+        self.logger.info(f"Saved {self.model_name} artifact {digest[:12]} to {path}")
+    
+    def load(self, path: str, mmap_mode: Optional[str] = 'r') -> None:
+        """
+        Load the artifact a reference file points at
+        
+        Args:
+            path: Reference file
+            mmap_mode: 'r' to memory-map the arrays, None to read them into memory
+        """
+        store, digest = read_artifact_ref(path)
+        self.load_from_store(store, digest, mmap_mode)
+    
+    def get_model_info(self) -> Dict[str, Any]:
+        """
+        Get model information
+        
+        Returns:
+            Dictionary with model details
+        """
+        return {
+            'model_type': type(self).__name__,
+            'n_estimators': self.forest.n_trees if self.forest else 0,
+            'n_nodes': self.forest.n_nodes if self.forest else 0,
+            'digest': self.digest,
+            'is_trained': self.is_trained,
+            'training_metadata': self.training_metadata
+        }
+
+
+class FlatRandomForest(_FlatForestModel):
+    """
+    Flat Random Forest classifier (inference only)
+    """
+    
+    kind = 'random_forest'
+    model_name = 'RandomForestModel'
+    
+    def __init__(self):
+        super().__init__()
+        self.classes: Optional[np.ndarray] = None
+        self.feature_importances: Optional[np.ndarray] = None
+    
+    @classmethod
+    def from_model(cls, model: Any) -> 'FlatRandomForest':
+        """
+        Flatten a trained RandomForestModel
+        
+        Args:
+            model: Trained RandomForestModel
+        
+        Returns:
+            FlatRandomForest with the same predictions
+        """
+        if not model.is_trained:
+            raise RuntimeError("Cannot export untrained model")
+        
+        forest = model.model
+        if getattr(forest, 'n_outputs_', 1) != 1:
+            raise ValueError("Only single-output forests can be flattened")
+        
+        arrays = flatten_trees(forest.estimators_)
+        value = arrays.pop('value')
+        totals = value.sum(axis=1, keepdims=True)
+        totals[totals == 0] = 1.0
+        
+        flat = cls()
+        flat.forest = FlatForest(arrays, forest.n_features_in_)
+        flat.leaf_value = value / totals
+        flat.classes = np.asarray(forest.classes_)
+        flat.feature_importances = model.feature_importances
+        flat.feature_names = model.feature_names
+        flat.training_metadata = model.training_metadata
+        return flat
+    
+    def _to_artifact(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        forest = self.forest
+        arrays = {
+            'roots': forest.roots,
+            'children_left': forest.children_left,
+            'children_right': forest.children_right,
+            'feature': forest.feature,
+            'threshold': forest.threshold,
+            'leaf_value': self.leaf_value,
+            'classes': self.classes
+        }
+        if forest.missing_go_to_left is not None:
+            arrays['missing_go_to_left'] = forest.missing_go_to_left
+        if self.feature_importances is not None:
+            arrays['feature_importances'] = np.asarray(self.feature_importances, dtype=np.float64)
+        return arrays, {}
+    
+    def _from_artifact(self, arrays: Dict[str, np.ndarray], metadata: Dict[str, Any]) -> None:
+        self.leaf_value = arrays['leaf_value']
+        self.classes = np.asarray(arrays['classes'])
+        self.feature_importances = arrays.get('feature_importances')
+    
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predict class probabilities
+        
+        Args:
+            X: Input features (n_samples, n_features)
+        
+        Returns:
+            Class probabilities (n_samples, n_classes)
+        """
+        self._check_loaded()
+        leaves = self.forest.apply(X)
+        return self.leaf_value[leaves].mean(axis=1)
+    
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predict class labels
+        
+        Args:
+            X: Input features (n_samples, n_features)
+        
+        Returns:
+            Predicted class labels
+        """
+        return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+    
+    def predict_anomaly_score(self, X: np.ndarray) -> np.ndarray:
+        """
+        Calculate anomaly scores (probability of anomaly class)
+        
+        Args:
+            X: Input features (n_samples, n_features)
+        
+        Returns:
+            Anomaly scores
+        """
+        probabilities = self.predict_proba(X)
+        if probabilities.shape[1] == 2:
+            return probabilities[:, 1]
+        return np.max(probabilities, axis=1)
+    
+    def get_feature_importance(self) -> np.ndarray:
+        """
+        Get feature importance scores
+        
+        Returns:
+            Feature importance scores
+        """
+        self._check_loaded()
+        return self.feature_importances
+
+
+class FlatIsolationForest(_FlatForestModel):
+    """
+    Flat Isolation Forest (inference only)
+    """
+    
+    kind = 'isolation_forest'
+    model_name = 'IsolationForestModel'
+    
+    def __init__(self):
+        super().__init__()
+        self.offset: float = -0.5
+        self.denominator: float = 1.0
+    
+    @classmethod
+    def from_model(cls, model: Any) -> 'FlatIsolationForest':
+        """
+        Flatten a trained IsolationForestModel
+        
+        Args:
+            model: Trained IsolationForestModel
+        
+        Returns:
+            FlatIsolationForest with the same scores
+        """
+        if not model.is_trained:
+            raise RuntimeError("Cannot export untrained model")
+        
+        forest = model.model
+        n_features = forest.n_features_in_
+        # Trees see a column subset only when features are subsampled
+        subsampled = (forest.bootstrap_features
+                      or getattr(forest, '_max_features', n_features) != n_features)
+        
+        arrays = flatten_trees(forest.estimators_, forest.estimators_features_ if subsampled else None)
+        arrays.pop('value')
+        n_node_samples = arrays.pop('n_node_samples')
+        
+        # Path length credited to a sample ending in each node: its depth
+        # (root = 0) plus the expected depth of the unbuilt subtree below it
+        depths = _node_depths(arrays['children_left'], arrays['children_right'], arrays['roots'])
+        path_length = depths + _average_path_length(n_node_samples)
+        
+        max_samples = getattr(forest, '_max_samples', forest.max_samples_)
+        
+        flat = cls()
+        flat.forest = FlatForest(arrays, n_features)
+        flat.leaf_value = path_length
+        flat.offset = float(forest.offset_)
+        flat.denominator = float(len(forest.estimators_) * _average_path_length([max_samples])[0])
+        flat.feature_names = model.feature_names
+        flat.training_metadata = model.training_metadata
+        return flat
+    
+    def _to_artifact(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        forest = self.forest
+        arrays = {
+            'roots': forest.roots,
+            'children_left': forest.children_left,
+            'children_right': forest.children_right,
+            'feature': forest.feature,
+            'threshold': forest.threshold,
+            'leaf_value': self.leaf_value
+        }
+        if forest.missing_go_to_left is not None:
+            arrays['missing_go_to_left'] = forest.missing_go_to_left
+        return arrays, {'offset': self.offset, 'denominator': self.denominator}
+    
+    def _from_artifact(self, arrays: Dict[str, np.ndarray], metadata: Dict[str, Any]) -> None:
+        self.leaf_value = arrays['leaf_value']
+        self.offset = metadata['offset']
+        self.denominator = metadata['denominator']
+    
+    def score_samples(self, X: np.ndarray) -> np.ndarray:
+        """
+        Opposite of the anomaly score of the original paper (as scikit-learn)
+        
+        Args:
+            X: Input features (n_samples, n_features)
+        
+        Returns:
+            Scores (lower = more anomalous)
+        """
+        self._check_loaded()
+        depths = self.leaf_value[self.forest.apply(X)].sum(axis=1)
+        if self.denominator == 0:
+            return -np.ones(len(depths))
+        return -(2 ** (-depths / self.denominator))
+    
+    def predict_anomaly_score(self, X: np.ndarray) -> np.ndarray:
+        """
+        Calculate anomaly scores (lower = more anomalous)
+        
+        Args:
+            X: Input features (n_samples, n_features)
+        
+        Returns:
+            Anomaly scores (decision_function of the exported model)
+        """
+        return self.score_samples(X) - self.offset
+    
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predict anomaly labels (-1 for anomaly, 1 for normal)
+        
+        Args:
+            X: Input features (n_samples, n_features)
+        
+        Returns:
+            Predictions (-1 for anomaly, 1 for normal)
+        """
+        return np.where(self.predict_anomaly_score(X) < 0, -1, 1)
+    
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Calculate anomaly probability (0 to 1, higher = more anomalous)
+        
+        Args:
+            X: Input features (n_samples, n_features)
+        
+        Returns:
+            Anomaly probabilities
+        """
+        return 1 / (1 + np.exp(self.predict_anomaly_score(X) * 2))
+    
+    def get_feature_importance(self) -> Optional[np.ndarray]:
+        """Isolation Forest has no feature importance"""
+        return None
+
+
+def load_flat_forest(path: Union[str, Path], mmap_mode: Optional[str] = 'r') -> _FlatForestModel:
+    """
+    Load the flat forest a reference file points at
+    
+    Args:
+        path: Reference file (e.g. models/isolation_forest.artifact)
+        mmap_mode: 'r' to memory-map the arrays, None to read them into memory
+    
+    Returns:
+        FlatRandomForest or FlatIsolationForest
+    """
+    store, digest = read_artifact_ref(path)
+    kind = store.read_manifest(digest)['metadata'].get('kind')
+    model_classes = {cls.kind: cls for cls in (FlatRandomForest, FlatIsolationForest)}
+    if kind not in model_classes:
+        raise ValueError(f"Artifact {digest} is not a flat forest ({kind})")
+    
+    model = model_classes[kind]()
+    model.load_from_store(store, digest, mmap_mode)
+    return model
@@ -15,6 +15,8 @@ from datetime import datetime
 
 from trade_risk_analyzer.core.base import BaseModel
 from trade_risk_analyzer.core.logger import get_logger
+from trade_risk_analyzer.models.flat_forest import FlatIsolationForest
+from trade_risk_analyzer.models.tuning import tune, TrialStore
 
 
 logger = get_logger(__name__)
@@ -30,7 +32,8 @@ class IsolationForestModel(BaseModel):
                  max_samples: str = 'auto',
                  contamination: float = 0.1,
                  max_features: float = 1.0,
-                 random_state: int = 42):
+                 random_state: int = 42,
+                 reservoir_size: int = 10000):
         """
         Initialize Isolation Forest model
         
@@ -40,18 +43,24 @@ class IsolationForestModel(BaseModel):
             contamination: Expected proportion of outliers
             max_features: Number of features to draw for each tree
             random_state: Random seed for reproducibility
+            reservoir_size: Training samples retained for incremental updates
         """
         self.n_estimators = n_estimators
         self.max_samples = max_samples
         self.contamination = contamination
         self.max_features = max_features
         self.random_state = random_state
+        self.reservoir_size = reservoir_size
         
         self.model = None
         self.is_trained = False
         self.feature_names = None
         self.training_metadata = {}
         
+        # Uniform sample of all training data seen so far
+        self.reservoir: Optional[np.ndarray] = None
+        self.samples_seen = 0
+        
         self.logger = logger
     
     def train(self, X_train: np.ndarray, y_train: Optional[np.ndarray] = None) -> None:
@@ -80,6 +89,11 @@ class IsolationForestModel(BaseModel):
         
         self.is_trained = True
         
+        # Start a new reservoir from the training data
+        self.reservoir = None
+        self.samples_seen = 0
+        self._update_reservoir(X_train)
+        
         # Store training metadata
         self.training_metadata = {
             'n_samples': X_train.shape[0],
@@ -91,6 +105,110 @@ class IsolationForestModel(BaseModel):
         
         self.logger.info("Isolation Forest training complete")
     
+    def _update_reservoir(self, X_new: np.ndarray) -> None:
+        """
+        Add samples to the reservoir (Algorithm R, vectorized)
+        
+        Every sample seen so far is retained with equal probability.
+        
+        Args:
+            X_new: New samples
+        """
+        X_new = np.asarray(X_new, dtype=np.float64)
+        rng = np.random.default_rng(self.random_state + self.samples_seen)
+        
+        if self.reservoir is None:
+            self.reservoir = np.empty((0, X_new.shape[1]))
+        
+        # Fill free slots first
+        free = max(self.reservoir_size - len(self.reservoir), 0)
+        if free:
+            self.reservoir = np.vstack([self.reservoir, X_new[:free]])
+        
+        rest = X_new[free:]
+        if len(rest):
+            # Sample t (0-based, overall) replaces a random slot with probability size / (t + 1)
+            seen = self.samples_seen + free + np.arange(len(rest))
+            slots = np.floor(rng.random(len(rest)) * (seen + 1)).astype(np.int64)
+            keep = slots < self.reservoir_size
+            self.reservoir[slots[keep]] = rest[keep]
+        
+        self.samples_seen += len(X_new)
+    
+    def update(self, X_new: np.ndarray, replace_fraction: float = 0.2) -> None:
+        """
+        Partially refit a trained forest with new (normal) traffic
+        
+        The new samples are merged into the reservoir; a fraction of the
+        trees is then refitted on the reservoir and replaces the oldest trees,
+        and the decision threshold is recomputed on the reservoir. Cost is
+        roughly replace_fraction of a full fit.
+        
+        Args:
+            X_new: New samples of normal traffic (n_samples, n_features)
+            replace_fraction: Share of trees replaced per update
+        
+        Raises:
+            ValueError: If the feature count differs from the trained model
+        """
+        if not self.is_trained or self.reservoir is None:
+            self.train(X_new)
+            return
+        
+        if X_new.shape[1] != self.model.n_features_in_:
+            raise ValueError(
+                f"Expected {self.model.n_features_in_} features, got {X_new.shape[1]}"
+            )
+        
+        self._update_reservoir(X_new)
+        
+        n_replace = min(max(int(round(self.n_estimators * replace_fraction)), 1), self.n_estimators)
+        max_samples = self.model.max_samples_
+        if len(self.reservoir) < max_samples:
+            # Trees built on fewer samples would be normalized differently
+            self.logger.info("Reservoir smaller than the tree sample size, refitting fully")
+            reservoir, seen = self.reservoir, self.samples_seen
+            self.train(reservoir)
+            self.reservoir, self.samples_seen = reservoir, seen
+            return
+        
+        self.logger.info(
+            f"Updating Isolation Forest with {X_new.shape[0]} samples "
+            f"(replacing {n_replace} of {self.n_estimators} trees)"
+        )
+        
+        # Drop the oldest trees and let a warm-started fit add the new ones;
+        # fit rebuilds the per-tree path lengths and the decision threshold
+        model = self.model
+        params = model.get_params()
+        estimators, estimators_features = model.estimators_, model.estimators_features_
+        model.estimators_ = estimators[n_replace:]
+        model.estimators_features_ = estimators_features[n_replace:]
+        model.set_params(
+            warm_start=True,
+            max_samples=max_samples,
+            random_state=self.random_state + self.samples_seen
+        )
+        try:
+            model.fit(self.reservoir)
+        except Exception:
+            model.estimators_, model.estimators_features_ = estimators, estimators_features
+            raise
+        finally:
+            model.set_params(
+                warm_start=params['warm_start'],
+                max_samples=params['max_samples'],
+                random_state=params['random_state']
+            )
+        
+        self.training_metadata.update({
+            'incremental_updates': self.training_metadata.get('incremental_updates', 0) + 1,
+            'samples_seen': self.samples_seen,
+            'updated_at': datetime.now().isoformat()
+        })
+        
+        self.logger.info("Isolation Forest update complete")
+    
     def predict(self, X: np.ndarray) -> np.ndarray:
         """
         Predict anomaly labels (-1 for anomaly, 1 for normal)
@@ -151,7 +269,10 @@ class IsolationForestModel(BaseModel):
     def tune_hyperparameters(self, 
                             X_train: np.ndarray,
                             param_grid: Optional[Dict[str, list]] = None,
-                            cv: int = 5) -> Dict[str, Any]:
+                            cv: int = 5,
+                            method: str = 'grid',
+                            y_train: Optional[np.ndarray] = None,
+                            trial_store: Optional[TrialStore] = None) -> Dict[str, Any]:
         """
         Tune hyperparameters using cross-validation
         
@@ -159,12 +280,22 @@ class IsolationForestModel(BaseModel):
             X_train: Training features
             param_grid: Parameter grid for search
             cv: Number of cross-validation folds
+            method: 'grid' (exhaustive), 'halving' or 'hyperband' (see models.tuning)
+            y_train: Anomaly labels; halving/hyperband rank candidates by the
+                ROC-AUC of their anomaly scores
+            trial_store: Trial store to resume halving/hyperband searches from
             
         Returns:
             Best parameters found
         """
         self.logger.info("Starting hyperparameter tuning...")
         
+        if method != 'grid':
+            result = tune('isolation_forest', X_train, y_train, method=method, param_grid=param_grid,
+                          cv=cv, trial_store=trial_store, random_state=self.random_state)
+            self._set_params(result.best_params)
+            return result.best_params
+        
         if param_grid is None:
             param_grid = {
                 'n_estimators': [50, 100, 200],
@@ -192,14 +323,17 @@ class IsolationForestModel(BaseModel):
         
         self.logger.info(f"Best parameters: {best_params}")
         
-        # Update model parameters
-        self.n_estimators = best_params.get('n_estimators', self.n_estimators)
-        self.max_samples = best_params.get('max_samples', self.max_samples)
-        self.contamination = best_params.get('contamination', self.contamination)
-        self.max_features = best_params.get('max_features', self.max_features)
+        self._set_params(best_params)
         
         return best_params
     
+    def _set_params(self, params: Dict[str, Any]) -> None:
+        """Update model parameters from tuning results"""
+        self.n_estimators = params.get('n_estimators', self.n_estimators)
+        self.max_samples = params.get('max_samples', self.max_samples)
+        self.contamination = params.get('contamination', self.contamination)
+        self.max_features = params.get('max_features', self.max_features)
+    
     def cross_validate(self, X: np.ndarray, cv: int = 5) -> Dict[str, float]:
         """
         Perform cross-validation
@@ -234,6 +368,21 @@ class IsolationForestModel(BaseModel):
         
         return results
     
+    def export_artifact(self, path: str) -> str:
+        """
+        Export the model as a memory-mappable flat forest
+        
+        Args:
+            path: Reference file (e.g. models/isolation_forest.artifact); the arrays
+                go to the artifact store next to it
+        
+        Returns:
+            Artifact digest (load with FlatIsolationForest.load)
+        """
+        flat = FlatIsolationForest.from_model(self)
+        flat.save(path)
+        return flat.digest
+    
     def save(self, path: str) -> None:
         """
         Save model to file
@@ -259,7 +408,10 @@ class IsolationForestModel(BaseModel):
             'random_state': self.random_state,
             'feature_names': self.feature_names,
             'training_metadata': self.training_metadata,
-            'is_trained': self.is_trained
+            'is_trained': self.is_trained,
+            'reservoir_size': self.reservoir_size,
+            'reservoir': self.reservoir,
+            'samples_seen': self.samples_seen
         }
         
         joblib.dump(model_data, path)
@@ -295,6 +447,9 @@ class IsolationForestModel(BaseModel):
         self.feature_names = model_data.get('feature_names')
         self.training_metadata = model_data.get('training_metadata', {})
         self.is_trained = model_data['is_trained']
+        self.reservoir_size = model_data.get('reservoir_size', self.reservoir_size)
+        self.reservoir = model_data.get('reservoir')
+        self.samples_seen = model_data.get('samples_seen', 0)
         
         self.logger.info(f"Model loaded successfully (trained on {self.training_metadata.get('n_samples', 'unknown')} samples)")
     
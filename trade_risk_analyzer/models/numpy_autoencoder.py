@@ -0,0 +1,297 @@
+"""
+NumPy Autoencoder Runtime
+
+Inference-only autoencoder that runs the forward pass of a trained Keras
+autoencoder as NumPy matrix multiplies. Serving processes load it from a
+.npz export instead of importing TensorFlow, which saves seconds of startup
+and hundreds of MB of memory, and small batches skip Keras' per-call
+overhead. Dropout is the identity at inference, so only the Dense layers are
+exported.
+"""
+
+import json
+import numpy as np
+from typing import List, Dict, Any, Optional, Callable
+from pathlib import Path
+
+from trade_risk_analyzer.core.base import BaseModel
+from trade_risk_analyzer.core.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# File name of the NumPy export in a model directory
+AUTOENCODER_NUMPY_FILE = 'autoencoder.npz'
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1 / (1 + np.exp(-x))
+
+
+def _elu(x: np.ndarray) -> np.ndarray:
+    return np.where(x > 0, x, np.expm1(np.minimum(x, 0)))
+
+
+def _selu(x: np.ndarray) -> np.ndarray:
+    alpha, scale = 1.6732632423543772, 1.0507009873554805
+    return scale * np.where(x > 0, x, alpha * np.expm1(np.minimum(x, 0)))
+
+
+# Keras activation name -> NumPy implementation (applied in place where possible)
+ACTIVATIONS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0, out=x),
+    'tanh': lambda x: np.tanh(x, out=x),
+    'sigmoid': _sigmoid,
+    'elu': _elu,
+    'selu': _selu,
+    'softplus': lambda x: np.logaddexp(x, 0)
+}
+
+
+class NumpyAutoencoder(BaseModel):
+    """
+    NumPy forward pass of a trained autoencoder (inference only)
+    """
+    
+    def __init__(self,
+                 weights: Optional[List[np.ndarray]] = None,
+                 biases: Optional[List[np.ndarray]] = None,
+                 activations: Optional[List[str]] = None,
+                 reconstruction_threshold: Optional[float] = None,
+                 encoding_layer: Optional[int] = None,
+                 training_metadata: Optional[Dict[str, Any]] = None):
+        """
+        Initialize NumPy autoencoder
+        
+        Args:
+            weights: Kernel of each Dense layer (n_in, n_out)
+            biases: Bias of each Dense layer (n_out,)
+            activations: Keras activation name of each Dense layer
+            reconstruction_threshold: Reconstruction error threshold for anomalies
+            encoding_layer: Index of the bottleneck layer (for get_encoding)
+            training_metadata: Metadata of the exported model
+        
+        Raises:
+            ValueError: If an activation is not supported
+        """
+        self.reconstruction_threshold = reconstruction_threshold
+        self.encoding_layer = encoding_layer
+        self.training_metadata = training_metadata or {}
+        self.logger = logger
+        
+        self._set_layers(weights or [], biases or [], activations or [])
+    
+    def _set_layers(self, weights: List[np.ndarray], biases: List[np.ndarray],
+                    activations: List[str]) -> None:
+        """Store layers as float32 arrays and check the activations"""
+        unsupported = [name for name in activations if name not in ACTIVATIONS]
+        if unsupported:
+            raise ValueError(f"Unsupported activations for NumPy inference: {unsupported}")
+        
+        self.weights = [np.ascontiguousarray(w, dtype=np.float32) for w in weights]
+        self.biases = [np.asarray(b, dtype=np.float32) for b in biases]
+        self.activations = list(activations)
+    
+    @property
+    def is_trained(self) -> bool:
+        """Whether layers are loaded"""
+        return bool(self.weights)
+    
+    @property
+    def input_dim(self) -> Optional[int]:
+        """Input feature dimension"""
+        return self.weights[0].shape[0] if self.weights else None
+    
+    @classmethod
+    def from_keras(cls, model: Any, reconstruction_threshold: Optional[float],
+                   training_metadata: Optional[Dict[str, Any]] = None) -> 'NumpyAutoencoder':
+        """
+        Extract the Dense layers of a Keras autoencoder
+        
+        Args:
+            model: Keras model built from Dense (and Dropout) layers
+            reconstruction_threshold: Reconstruction error threshold
+            training_metadata: Metadata to carry over
+        
+        Returns:
+            NumpyAutoencoder with the model's weights
+        
+        Raises:
+            ValueError: If the model has layers other than Input, Dense and Dropout
+        """
+        weights, biases, activations = [], [], []
+        encoding_layer = None
+        
+        for layer in model.layers:
+            kind = type(layer).__name__
+            if kind in ('InputLayer', 'Dropout'):
+                continue
+            if kind != 'Dense':
+                raise ValueError(f"Cannot export layer {layer.name} ({kind}) to NumPy")
+            
+            kernel, bias = layer.get_weights()
+            if layer.name == 'encoding':
+                encoding_layer = len(weights)
+            weights.append(kernel)
+            biases.append(bias)
+            activations.append(layer.get_config()['activation'])
+        
+        return cls(weights, biases, activations, reconstruction_threshold,
+                   encoding_layer, training_metadata)
+    
+    def _forward(self, X: np.ndarray, n_layers: Optional[int] = None) -> np.ndarray:
+        """Run the first n_layers Dense layers (all by default)"""
+        out = np.asarray(X, dtype=np.float32)
+        for W, b, activation in list(zip(self.weights, self.biases, self.activations))[:n_layers]:
+            out = out @ W
+            out += b
+            out = ACTIVATIONS[activation](out)
+        return out
+    
+    def train(self, X_train: np.ndarray, y_train: Optional[np.ndarray] = None) -> None:
+        """Not supported: train an AutoencoderModel and export it"""
+        raise NotImplementedError("NumpyAutoencoder is inference-only; train an AutoencoderModel and export it")
+    
+    def reconstruct(self, X: np.ndarray) -> np.ndarray:
+        """
+        Reconstruct inputs
+        
+        Args:
+            X: Input features (n_samples, n_features)
+        
+        Returns:
+            Reconstructions (float32)
+        """
+        if not self.is_trained:
+            raise RuntimeError("Model must be loaded before prediction")
+        return self._forward(X)
+    
+    def calculate_reconstruction_error(self, X: np.ndarray) -> np.ndarray:
+        """
+        Calculate reconstruction error for each sample
+        
+        Args:
+            X: Input features (n_samples, n_features)
+        
+        Returns:
+            Reconstruction errors (MSE per sample)
+        """
+        return np.mean(np.square(X - self.reconstruct(X)), axis=1)
+    
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predict anomaly labels (1 for anomaly, 0 for normal)
+        
+        Args:
+            X: Input features (n_samples, n_features)
+        
+        Returns:
+            Predictions (1 for anomaly, 0 for normal)
+        """
+        return (self.calculate_reconstruction_error(X) > self.reconstruction_threshold).astype(int)
+    
+    def predict_anomaly_score(self, X: np.ndarray) -> np.ndarray:
+        """
+        Calculate anomaly scores (reconstruction errors, higher = more anomalous)
+        
+        Args:
+            X: Input features (n_samples, n_features)
+        
+        Returns:
+            Anomaly scores
+        """
+        return self.calculate_reconstruction_error(X)
+    
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Calculate anomaly probability (0 to 1, higher = more anomalous)
+        
+        Args:
+            X: Input features (n_samples, n_features)
+        
+        Returns:
+            Anomaly probabilities
+        """
+        errors = self.calculate_reconstruction_error(X)
+        return 1 / (1 + np.exp(-(errors - self.reconstruction_threshold) * 10))
+    
+    def get_encoding(self, X: np.ndarray) -> np.ndarray:
+        """
+        Get encoded representation of inputs
+        
+        Args:
+            X: Input features
+        
+        Returns:
+            Encoded features
+        """
+        if self.encoding_layer is None:
+            raise RuntimeError("Model has no encoding layer")
+        return self._forward(X, self.encoding_layer + 1)
+    
+    def save(self, path: str) -> None:
+        """
+        Save layers to a .npz file
+        
+        Args:
+            path: Output file path
+        """
+        if not self.is_trained:
+            raise RuntimeError("Cannot save untrained model")
+        
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        
+        config = {
+            'activations': self.activations,
+            'reconstruction_threshold': (
+                float(self.reconstruction_threshold) if self.reconstruction_threshold is not None else None
+            ),
+            'encoding_layer': self.encoding_layer,
+            'training_metadata': self.training_metadata
+        }
+        arrays = {f'W{i}': w for i, w in enumerate(self.weights)}
+        arrays.update({f'b{i}': b for i, b in enumerate(self.biases)})
+        
+        with open(path, 'wb') as f:
+            np.savez(f, config=np.array(json.dumps(config)), **arrays)
+        
+        self.logger.info(f"Saved NumPy autoencoder ({len(self.weights)} layers) to {path}")
+    
+    def load(self, path: str) -> None:
+        """
+        Load layers from a .npz file
+        
+        Args:
+            path: Input file path
+        """
+        with np.load(path, allow_pickle=False) as data:
+            config = json.loads(str(data['config']))
+            n_layers = len(config['activations'])
+            weights = [data[f'W{i}'] for i in range(n_layers)]
+            biases = [data[f'b{i}'] for i in range(n_layers)]
+        
+        self._set_layers(weights, biases, config['activations'])
+        self.reconstruction_threshold = config['reconstruction_threshold']
+        self.encoding_layer = config['encoding_layer']
+        self.training_metadata = config['training_metadata']
+        
+        self.logger.info(f"Loaded NumPy autoencoder ({n_layers} layers) from {path}")
+    
+    def get_model_info(self) -> Dict[str, Any]:
+        """
+        Get model information
+        
+        Returns:
+            Dictionary with model details
+        """
+        return {
+            'model_type': 'NumpyAutoencoder',
+            'layers': [w.shape for w in self.weights],
+            'activations': self.activations,
+            'input_dim': self.input_dim,
+            'reconstruction_threshold': self.reconstruction_threshold,
+            'is_trained': self.is_trained,
+            'training_metadata': self.training_metadata
+        }
@@ -6,6 +6,7 @@ Supervised classification for anomaly detection with labeled data.
 
 import numpy as np
 import joblib
+import warnings
 from sklearn.ensemble import RandomForestClassifier as SklearnRandomForest
 from sklearn.model_selection import GridSearchCV, cross_val_score
 from sklearn.utils.class_weight import compute_class_weight
@@ -16,6 +17,8 @@ from datetime import datetime
 
 from trade_risk_analyzer.core.base import BaseModel
 from trade_risk_analyzer.core.logger import get_logger
+from trade_risk_analyzer.models.flat_forest import FlatRandomForest
+from trade_risk_analyzer.models.tuning import tune, TrialStore
 
 
 logger = get_logger(__name__)
@@ -110,6 +113,72 @@ class RandomForestModel(BaseModel):
         
         self.logger.info("Random Forest training complete")
     
+    def update(self, X_new: np.ndarray, y_new: np.ndarray, n_new_estimators: int = 25,
+               max_estimators: Optional[int] = None) -> None:
+        """
+        Incrementally update a trained forest (warm start)
+        
+        Adds n_new_estimators trees fitted on the new samples and keeps the
+        existing trees, so prior learning is retained and only the new trees
+        are paid for. With max_estimators, the oldest trees are dropped once
+        the forest grows beyond that size.
+        
+        Args:
+            X_new: New training features (n_samples, n_features)
+            y_new: New training labels (n_samples,)
+            n_new_estimators: Number of trees to add
+            max_estimators: Maximum forest size (None = unbounded)
+        
+        Raises:
+            ValueError: If the feature count or label classes differ from
+                the trained model
+        """
+        if not self.is_trained:
+            self.train(X_new, y_new)
+            return
+        
+        if X_new.shape[1] != self.model.n_features_in_:
+            raise ValueError(
+                f"Expected {self.model.n_features_in_} features, got {X_new.shape[1]}"
+            )
+        
+        # New trees must vote over the same classes as the existing ones
+        new_classes = np.unique(y_new)
+        if not np.array_equal(new_classes, self.classes):
+            raise ValueError(
+                f"Update labels {new_classes.tolist()} must cover the model classes {self.classes.tolist()}"
+            )
+        
+        self.logger.info(
+            f"Updating Random Forest with {X_new.shape[0]} samples "
+            f"({len(self.model.estimators_)} + {n_new_estimators} trees)"
+        )
+        
+        self.model.set_params(
+            warm_start=True,
+            n_estimators=len(self.model.estimators_) + n_new_estimators
+        )
+        with warnings.catch_warnings():
+            # Class weights are balanced per update on purpose
+            warnings.filterwarnings('ignore', message='class_weight presets')
+            self.model.fit(X_new, y_new)
+        
+        if max_estimators is not None and len(self.model.estimators_) > max_estimators:
+            self.model.estimators_ = self.model.estimators_[-max_estimators:]
+        
+        self.model.set_params(warm_start=False, n_estimators=len(self.model.estimators_))
+        self.n_estimators = len(self.model.estimators_)
+        self.feature_importances = self.model.feature_importances_
+        
+        self.training_metadata.update({
+            'n_estimators': self.n_estimators,
+            'incremental_updates': self.training_metadata.get('incremental_updates', 0) + 1,
+            'incremental_samples': self.training_metadata.get('incremental_samples', 0) + X_new.shape[0],
+            'updated_at': datetime.now().isoformat()
+        })
+        
+        self.logger.info(f"Random Forest update complete ({self.n_estimators} trees)")
+    
     def predict(self, X: np.ndarray) -> np.ndarray:
         """
         Predict class labels
@@ -207,7 +276,9 @@ class RandomForestModel(BaseModel):
                             X_train: np.ndarray,
                             y_train: np.ndarray,
                             param_grid: Optional[Dict[str, list]] = None,
-                            cv: int = 5) -> Dict[str, Any]:
+                            cv: int = 5,
+                            method: str = 'grid',
+                            trial_store: Optional[TrialStore] = None) -> Dict[str, Any]:
         """
         Tune hyperparameters using cross-validation
         
@@ -216,12 +287,20 @@ class RandomForestModel(BaseModel):
             y_train: Training labels
             param_grid: Parameter grid for search
             cv: Number of cross-validation folds
+            method: 'grid' (exhaustive), 'halving' or 'hyperband' (see models.tuning)
+            trial_store: Trial store to resume halving/hyperband searches from
             
         Returns:
             Best parameters found
         """
         self.logger.info("Starting hyperparameter tuning...")
         
+        if method != 'grid':
+            result = tune('random_forest', X_train, y_train, method=method, param_grid=param_grid,
+                          cv=cv, trial_store=trial_store, random_state=self.random_state)
+            self._set_params(result.best_params)
+            return result.best_params
+        
         if param_grid is None:
             param_grid = {
                 'n_estimators': [50, 100, 200],
@@ -255,15 +334,18 @@ class RandomForestModel(BaseModel):
         self.logger.info(f"Best parameters: {best_params}")
         self.logger.info(f"Best F1 score: {grid_search.best_score_:.4f}")
         
-        # Update model parameters
-        self.n_estimators = best_params.get('n_estimators', self.n_estimators)
-        self.max_depth = best_params.get('max_depth', self.max_depth)
-        self.min_samples_split = best_params.get('min_samples_split', self.min_samples_split)
-        self.min_samples_leaf = best_params.get('min_samples_leaf', self.min_samples_leaf)
-        self.max_features = best_params.get('max_features', self.max_features)
+        self._set_params(best_params)
         
         return best_params
     
+    def _set_params(self, params: Dict[str, Any]) -> None:
+        """Update model parameters from tuning results"""
+        self.n_estimators = params.get('n_estimators', self.n_estimators)
+        self.max_depth = params.get('max_depth', self.max_depth)
+        self.min_samples_split = params.get('min_samples_split', self.min_samples_split)
+        self.min_samples_leaf = params.get('min_samples_leaf', self.min_samples_leaf)
+        self.max_features = params.get('max_features', self.max_features)
+    
     def cross_validate(self, X: np.ndarray, y: np.ndarray, cv: int = 5) -> Dict[str, float]:
         """
         Perform cross-validation
@@ -303,6 +385,21 @@ class RandomForestModel(BaseModel):
         
         return results
     
+    def export_artifact(self, path: str) -> str:
+        """
+        Export the model as a memory-mappable flat forest
+        
+        Args:
+            path: Reference file (e.g. models/random_forest.artifact); the arrays
+                go to the artifact store next to it
+        
+        Returns:
+            Artifact digest (load with FlatRandomForest.load)
+        """
+        flat = FlatRandomForest.from_model(self)
+        flat.save(path)
+        return flat.digest
+    
     def save(self, path: str) -> None:
         """
         Save model to file
@@ -0,0 +1,148 @@
+"""
+Active Model Registry
+
+Tracks which model versions are active in a model directory. Activation
+replaces model files atomically and bumps a generation counter in a small
+manifest; processes serving the models poll the generation and reload when
+it changes, so a new version is picked up without a restart.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional, Union
+
+from trade_risk_analyzer.core.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+
+ACTIVE_MANIFEST_FILE = 'active.json'
+ACTIVE_LOCK_FILE = 'active.lock'
+
+
+def read_active_manifest(model_dir: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """
+    Read the active model manifest of a model directory
+    
+    Args:
+        model_dir: Model directory
+    
+    Returns:
+        Manifest dictionary ('generation', 'models', 'activated_at'), or None
+        if no version was ever activated
+    """
+    path = Path(model_dir) / ACTIVE_MANIFEST_FILE
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Unreadable model manifest {path}: {e}")
+        return None
+
+
+def active_generation(model_dir: Union[str, Path]) -> Optional[int]:
+    """
+    Current activation generation of a model directory
+    
+    Args:
+        model_dir: Model directory
+    
+    Returns:
+        Generation counter, or None if no version was ever activated
+    """
+    manifest = read_active_manifest(model_dir)
+    return manifest.get('generation') if manifest else None
+
+
+def _atomic_write_json(path: Path, data: Dict[str, Any]) -> None:
+    """Write JSON to a temporary file and rename it over the target"""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def install_model_file(source: Union[str, Path], model_dir: Union[str, Path],
+                       filename: Optional[str] = None) -> Path:
+    """
+    Copy a model file into a model directory atomically
+    
+    The file is copied next to its destination and renamed into place, so
+    readers see either the old or the new model, never a partial file.
+    
+    Args:
+        source: Model file to install
+        model_dir: Model directory
+        filename: Destination file name (default: source file name)
+    
+    Returns:
+        Installed file path
+    """
+    source = Path(source)
+    dest = Path(model_dir) / (filename or source.name)
+    
+    fd, tmp_path = tempfile.mkstemp(dir=dest.parent, prefix=f".{dest.name}.", suffix='.tmp')
+    os.close(fd)
+    try:
+        shutil.copy2(source, tmp_path)
+        os.replace(tmp_path, dest)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    
+    return dest
+
+
+def activate_in_manifest(model_dir: Union[str, Path], model_type: str, version: str) -> int:
+    """
+    Record a model version as active and bump the generation
+    
+    Call after the model file has been installed; processes that see the
+    new generation reload the directory.
+    
+    Args:
+        model_dir: Model directory
+        model_type: Model type (e.g. 'random_forest')
+        version: Activated version
+    
+    Returns:
+        New generation counter
+    """
+    model_dir = Path(model_dir)
+    
+    with open(model_dir / ACTIVE_LOCK_FILE, 'a') as lock:
+        # Serialize read-modify-write between concurrent activations
+        if FCNTL_AVAILABLE:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        
+        manifest = read_active_manifest(model_dir) or {'generation': 0, 'models': {}}
+        manifest['generation'] = manifest.get('generation', 0) + 1
+        manifest.setdefault('models', {})[model_type] = version
+        manifest['activated_at'] = datetime.now().isoformat()
+        _atomic_write_json(model_dir / ACTIVE_MANIFEST_FILE, manifest)
+    
+    logger.info(f"Active {model_type} model is now {version} (generation {manifest['generation']})")
+    
+    return manifest['generation']
@@ -5,20 +5,32 @@ Handles data splitting, training pipeline, evaluation, and model selection.
 """
 
 import numpy as np
+import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import (
     precision_score, recall_score, f1_score, accuracy_score,
     roc_auc_score, confusion_matrix, classification_report
 )
-from typing import Dict, Any, Optional, Tuple, List
+from typing import Dict, Any, Optional, Tuple, List, Union
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import json
 from datetime import datetime
 
 from trade_risk_analyzer.core.logger import get_logger
 from trade_risk_analyzer.models.isolation_forest import IsolationForestModel
 from trade_risk_analyzer.models.autoencoder import AutoencoderModel
+from trade_risk_analyzer.models.artifact_store import artifact_ref_path
+from trade_risk_analyzer.models.numpy_autoencoder import AUTOENCODER_NUMPY_FILE
 from trade_risk_analyzer.models.random_forest import RandomForestModel
+from trade_risk_analyzer.models.tuning import (
+    CachedFolds,
+    HyperparameterTuner,
+    TrialStore,
+    TuningResult
+)
+from trade_risk_analyzer.feature_engineering.pipeline import FeaturePipeline, FEATURE_PIPELINE_FILE
+from trade_risk_analyzer.models.drift import DriftBaseline, DRIFT_BASELINE_FILE
 
 
 logger = get_logger(__name__)
@@ -64,15 +76,20 @@ class ModelTrainer:
         # Store trained models
         self.models = {}
         self.evaluation_results = {}
+        self.tuning_results: Dict[str, TuningResult] = {}
+        
+        # Feature pipeline the training features were built with
+        self.feature_pipeline: Optional[FeaturePipeline] = None
     
     def split_data(self,
-                   X: np.ndarray,
+                   X: Union[np.ndarray, pd.DataFrame],
                    y: Optional[np.ndarray] = None) -> Tuple[np.ndarray, ...]:
         """
         Split data into train/val/test sets
         
         Args:
-            X: Features (n_samples, n_features)
+            X: Features (n_samples, n_features), or a DataFrame of extracted
+                features (split as DataFrames, see fit_feature_pipeline)
             y: Labels (n_samples,) - optional for unsupervised
             
         Returns:
@@ -130,6 +147,39 @@ class ModelTrainer:
         
         return X_train, X_val, X_test, y_train, y_val, y_test
     
+    def fit_feature_pipeline(self,
+                             feature_pipeline: Optional[FeaturePipeline] = None,
+                             exclude_columns: Optional[List[str]] = None) -> FeaturePipeline:
+        """
+        Fit the feature pipeline on the training split and scale all splits
+        
+        The pipeline is fitted on the training rows only and saved with the
+        models, so inference scales features exactly like training did.
+        
+        Args:
+            feature_pipeline: Pipeline to use (default: a new standard-scaled
+                pipeline); fitted on the training split unless already fitted
+            exclude_columns: Columns to exclude (e.g., identifiers)
+        
+        Returns:
+            Fitted FeaturePipeline
+        """
+        if not isinstance(self.X_train, pd.DataFrame):
+            raise ValueError("Feature pipeline needs feature DataFrames. Call split_data with a DataFrame first.")
+        
+        pipeline = feature_pipeline or FeaturePipeline()
+        if not pipeline.is_fitted:
+            pipeline.fit(self.X_train, exclude_columns=exclude_columns)
+        
+        self.X_train = pipeline.transform(self.X_train)
+        self.X_val = pipeline.transform(self.X_val)
+        self.X_test = pipeline.transform(self.X_test)
+        self.feature_pipeline = pipeline
+        
+        self.logger.info(f"Scaled splits with feature pipeline {pipeline.version}")
+        
+        return pipeline
+    
     def train_isolation_forest(self,
                                X_train: Optional[np.ndarray] = None,
                                **model_params) -> IsolationForestModel:
@@ -233,20 +283,31 @@ class ModelTrainer:
         return model
     
     def train_all_models(self,
-                        X: np.ndarray,
+                        X: Union[np.ndarray, pd.DataFrame],
                         y: Optional[np.ndarray] = None,
                         isolation_forest_params: Optional[Dict] = None,
                         autoencoder_params: Optional[Dict] = None,
-                        random_forest_params: Optional[Dict] = None) -> Dict[str, Any]:
+                        random_forest_params: Optional[Dict] = None,
+                        parallel: bool = True,
+                        feature_pipeline: Optional[FeaturePipeline] = None) -> Dict[str, Any]:
         """
         Train all three model types
         
+        Forest hyperparameters default to the results of tune_models, if run.
+        A DataFrame of extracted features is scaled with a feature pipeline
+        fitted on the training split, which save_models stores with the models.
+        
         Args:
-            X: Features
+            X: Features, or a DataFrame of unscaled extracted features
             y: Labels (optional, required for Random Forest)
             isolation_forest_params: Isolation Forest hyperparameters
             autoencoder_params: Autoencoder hyperparameters
             random_forest_params: Random Forest hyperparameters
+            parallel: Train the forests in worker threads while the
+                Autoencoder trains
+            feature_pipeline: Pipeline for a DataFrame X (fitted on the
+                training split unless already fitted), or the fitted pipeline
+                an array X was built with
             
         Returns:
             Dictionary of trained models
@@ -255,26 +316,108 @@ class ModelTrainer:
         
         # Split data
         self.split_data(X, y)
+        if isinstance(X, pd.DataFrame):
+            self.fit_feature_pipeline(feature_pipeline)
+        elif feature_pipeline is not None:
+            if not feature_pipeline.is_fitted:
+                raise ValueError("Feature pipeline for an array X must already be fitted")
+            self.feature_pipeline = feature_pipeline
+        else:
+            self.logger.warning(
+                "Training without a feature pipeline; inference will scale each batch on its own"
+            )
         
-        # Train Isolation Forest
-        if_params = isolation_forest_params or {}
-        self.train_isolation_forest(**if_params)
-        
-        # Train Autoencoder
+        if_params = isolation_forest_params or self._tuned_params('isolation_forest')
         ae_params = autoencoder_params or {}
-        self.train_autoencoder(**ae_params)
+        rf_params = random_forest_params or self._tuned_params('random_forest')
         
-        # Train Random Forest (if labels provided)
-        if y is not None:
-            rf_params = random_forest_params or {}
-            self.train_random_forest(**rf_params)
-        else:
+        if y is None:
             self.logger.info("Skipping Random Forest (no labels provided)")
         
+        if parallel:
+            # Scikit-learn releases the GIL while fitting trees, so the forests
+            # train alongside the Autoencoder
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = [executor.submit(self.train_isolation_forest, **if_params)]
+                if y is not None:
+                    futures.append(executor.submit(self.train_random_forest, **rf_params))
+                
+                self.train_autoencoder(**ae_params)
+                
+                for future in futures:
+                    future.result()
+        else:
+            self.train_isolation_forest(**if_params)
+            self.train_autoencoder(**ae_params)
+            if y is not None:
+                self.train_random_forest(**rf_params)
+        
         self.logger.info(f"Trained {len(self.models)} models")
         
         return self.models
     
+    def tune_models(self,
+                    X: Optional[np.ndarray] = None,
+                    y: Optional[np.ndarray] = None,
+                    model_types: Optional[List[str]] = None,
+                    method: str = 'halving',
+                    param_grids: Optional[Dict[str, Dict[str, list]]] = None,
+                    cv: int = 5,
+                    trial_store_path: Optional[str] = None,
+                    n_jobs: int = -1) -> Dict[str, TuningResult]:
+        """
+        Tune forest hyperparameters with successive halving or Hyperband
+        
+        All model types are searched on one set of cached, memory-mapped
+        folds. The best parameters are used by train_all_models.
+        
+        Args:
+            X: Features (uses stored training split if None)
+            y: Labels (uses stored training labels if None)
+            model_types: Models to tune (default: isolation_forest, random_forest)
+            method: 'halving' or 'hyperband'
+            param_grids: Parameter grid per model type (default: models.tuning.DEFAULT_PARAM_GRIDS)
+            cv: Number of folds
+            trial_store_path: SQLite trial store; finished trials are reused
+                when tuning is repeated on the same data
+            n_jobs: Parallel joblib workers
+        
+        Returns:
+            Dictionary of TuningResult per model type
+        """
+        if method not in ('halving', 'hyperband'):
+            raise ValueError(f"Unknown tuning method: {method}")
+        
+        X = X if X is not None else self.X_train
+        y = y if y is not None else self.y_train
+        
+        if X is None or y is None:
+            raise ValueError("Tuning needs labeled training data. Call split_data first with labels.")
+        
+        model_types = model_types or ['isolation_forest', 'random_forest']
+        param_grids = param_grids or {}
+        trial_store = TrialStore(trial_store_path) if trial_store_path else None
+        
+        self.logger.info(f"Tuning {', '.join(model_types)} with {method} on {X.shape[0]} samples")
+        
+        folds = CachedFolds(X, y, cv=cv, random_state=self.random_state)
+        try:
+            tuner = HyperparameterTuner(folds, trial_store=trial_store, n_jobs=n_jobs,
+                                        random_state=self.random_state)
+            search = tuner.hyperband if method == 'hyperband' else tuner.successive_halving
+            
+            for model_type in model_types:
+                self.tuning_results[model_type] = search(model_type, param_grids.get(model_type))
+        finally:
+            folds.cleanup()
+        
+        return {model_type: self.tuning_results[model_type] for model_type in model_types}
+    
+    def _tuned_params(self, model_type: str) -> Dict[str, Any]:
+        """Best parameters from tune_models (empty if not tuned)"""
+        result = self.tuning_results.get(model_type)
+        return dict(result.best_params) if result is not None else {}
+    
     def evaluate_model(self,
                       model_name: str,
                       X_test: Optional[np.ndarray] = None,
@@ -416,12 +559,15 @@ class ModelTrainer:
         
         return best_model_name, best_model
     
-    def save_models(self, output_dir: str) -> None:
+    def save_models(self, output_dir: str,
+                    feature_pipeline: Optional[FeaturePipeline] = None) -> None:
         """
         Save all trained models with metadata
         
         Args:
             output_dir: Output directory path
+            feature_pipeline: Fitted feature pipeline to save alongside the
+                models (defaults to self.feature_pipeline)
         """
         self.logger.info(f"Saving models to {output_dir}")
         
@@ -433,8 +579,32 @@ class ModelTrainer:
             model_path = output_path / f"{model_name}"
             model.save(str(model_path))
             
+            # TensorFlow-free copy for serving (loaded by DetectionEngine)
+            if isinstance(model, AutoencoderModel):
+                model.export_numpy(str(output_path / AUTOENCODER_NUMPY_FILE))
+            
+            # Memory-mapped flat forest, shared by all serving processes
+            if isinstance(model, (IsolationForestModel, RandomForestModel)):
+                model.export_artifact(str(artifact_ref_path(output_path, model_name)))
+            
             self.logger.info(f"Saved {model_name}")
         
+        # Save feature pipeline
+        feature_pipeline = feature_pipeline or self.feature_pipeline
+        if feature_pipeline is not None:
+            feature_pipeline.save(str(output_path / FEATURE_PIPELINE_FILE))
+            self.feature_pipeline = feature_pipeline
+            self.logger.info(f"Saved feature pipeline {feature_pipeline.version}")
+        
+        # Save training distribution for drift monitoring
+        if self.X_train is not None:
+            feature_names = None
+            if feature_pipeline is not None and len(feature_pipeline.feature_columns) == self.X_train.shape[1]:
+                feature_names = feature_pipeline.feature_columns
+            DriftBaseline.fit(self.X_train, feature_names, reference=self.X_val).save(
+                str(output_path / DRIFT_BASELINE_FILE)
+            )
+        
         # Save evaluation results
         results_path = output_path / "evaluation_results.json"
         with open(results_path, 'w') as f:
@@ -447,6 +617,10 @@ class ModelTrainer:
             'test_split': self.test_split,
             'random_state': self.random_state,
             'models_trained': list(self.models.keys()),
+            'feature_version': feature_pipeline.version if feature_pipeline is not None else None,
+            'tuning_results': {
+                model_type: result.to_dict() for model_type, result in self.tuning_results.items()
+            },
             'saved_at': datetime.now().isoformat()
         }
         
@@ -507,6 +681,12 @@ class ModelTrainer:
             self.models['random_forest'] = model
             self.logger.info("Loaded Random Forest")
         
+        # Load feature pipeline
+        pipeline_path = input_path / FEATURE_PIPELINE_FILE
+        if pipeline_path.exists():
+            self.feature_pipeline = FeaturePipeline.load(str(pipeline_path))
+            self.logger.info(f"Loaded feature pipeline {self.feature_pipeline.version}")
+        
         # Load evaluation results
         results_path = input_path / "evaluation_results.json"
         if results_path.exists():
@@ -0,0 +1,593 @@
+"""
+Hyperparameter Tuning
+
+Successive-halving and Hyperband search over cached cross-validation folds.
+The feature matrix is dumped once to a memory-mapped file and the fold
+indices are computed once, so every trial (and every model type) reads the
+same data and parallel joblib workers map the file instead of receiving
+copies. Trial results are kept in a SQLite trial store: repeating a search
+on the same data reuses finished trials instead of refitting them.
+"""
+
+import hashlib
+import json
+import math
+import shutil
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple, Iterator
+
+import numpy as np
+import joblib
+from joblib import Parallel, delayed
+from sklearn.ensemble import IsolationForest as SklearnIsolationForest
+from sklearn.ensemble import RandomForestClassifier as SklearnRandomForest
+from sklearn.metrics import f1_score, roc_auc_score
+from sklearn.model_selection import KFold, StratifiedKFold, ParameterGrid
+
+from trade_risk_analyzer.core.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Default search spaces (contamination only moves the decision threshold,
+# not the anomaly scores the Isolation Forest is ranked by, so it is not searched)
+DEFAULT_PARAM_GRIDS: Dict[str, Dict[str, list]] = {
+    'random_forest': {
+        'n_estimators': [50, 100, 200],
+        'max_depth': [None, 10, 20, 30],
+        'min_samples_split': [2, 5, 10],
+        'min_samples_leaf': [1, 2, 4],
+        'max_features': ['sqrt', 'log2']
+    },
+    'isolation_forest': {
+        'n_estimators': [50, 100, 200],
+        'max_samples': ['auto', 256, 512],
+        'max_features': [0.5, 0.75, 1.0]
+    }
+}
+
+# Fewest training rows a trial is fitted on
+MIN_RESOURCE = 30
+
+
+def data_fingerprint(X: np.ndarray, y: Optional[np.ndarray] = None) -> str:
+    """
+    Fingerprint a feature matrix and labels
+    
+    Args:
+        X: Features
+        y: Labels
+    
+    Returns:
+        Hex digest identifying the data
+    """
+    digest = hashlib.sha1()
+    X = np.ascontiguousarray(X)
+    digest.update(f"{X.shape}{X.dtype}".encode())
+    digest.update(X.data)
+    if y is not None:
+        digest.update(np.ascontiguousarray(y).data)
+    return digest.hexdigest()[:16]
+
+
+def _params_key(params: Dict[str, Any]) -> str:
+    """Canonical JSON of a parameter set"""
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+class CachedFolds:
+    """
+    Feature matrix and cross-validation folds shared by all trials
+    """
+    
+    def __init__(self,
+                 X: np.ndarray,
+                 y: Optional[np.ndarray] = None,
+                 cv: int = 5,
+                 random_state: int = 42,
+                 cache_dir: Optional[str] = None):
+        """
+        Dump the data to a memory-mapped cache and compute the folds
+        
+        Args:
+            X: Features (n_samples, n_features)
+            y: Labels (stratifies the folds if given)
+            cv: Number of folds
+            random_state: Random seed for fold assignment
+            cache_dir: Directory for the memory-mapped arrays (default: a
+                temporary directory removed by cleanup())
+        """
+        self.cv = cv
+        self.random_state = random_state
+        self.fingerprint = data_fingerprint(X, y)
+        self.logger = logger
+        
+        self._owns_dir = cache_dir is None
+        self.cache_dir = Path(cache_dir or tempfile.mkdtemp(prefix='trade_risk_folds_'))
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        
+        self.X = self._memmap('X', np.asarray(X, dtype=np.float64))
+        self.y = self._memmap('y', np.asarray(y)) if y is not None else None
+        
+        splitter = (
+            StratifiedKFold(n_splits=cv, shuffle=True, random_state=random_state)
+            if y is not None else
+            KFold(n_splits=cv, shuffle=True, random_state=random_state)
+        )
+        self.folds: List[Tuple[np.ndarray, np.ndarray]] = list(splitter.split(self.X, self.y))
+        
+        self.logger.info(
+            f"Cached {cv} folds of {self.X.shape} features in {self.cache_dir} "
+            f"(data {self.fingerprint})"
+        )
+    
+    def _memmap(self, name: str, array: np.ndarray) -> np.ndarray:
+        """Dump an array once and load it memory-mapped"""
+        path = self.cache_dir / f"{name}_{self.fingerprint}.joblib"
+        if not path.exists():
+            joblib.dump(array, path)
+        return joblib.load(path, mmap_mode='r')
+    
+    @property
+    def max_resource(self) -> int:
+        """Training rows of the smallest fold"""
+        return min(len(train_idx) for train_idx, _ in self.folds)
+    
+    def cleanup(self) -> None:
+        """Remove the cache directory if it was created here"""
+        if self._owns_dir:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+_TRIAL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tuning_trials (
+    study TEXT NOT NULL,
+    params TEXT NOT NULL,
+    budget INTEGER NOT NULL,
+    score REAL,
+    fold_scores TEXT NOT NULL,
+    fit_time REAL NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (study, params, budget)
+);
+"""
+
+
+class TrialStore:
+    """
+    Persistent store of tuning trial results in a SQLite file
+    """
+    
+    def __init__(self, path: str = "tuning_trials.db", timeout: float = 30.0):
+        """
+        Initialize trial store (creates the database file if needed)
+        
+        Args:
+            path: SQLite database file
+            timeout: Seconds to wait for another process's write lock
+        """
+        self.path = str(path)
+        self.timeout = timeout
+        self.logger = logger
+        
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_TRIAL_SCHEMA)
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection in autocommit mode"""
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    def get(self, study: str, params: Dict[str, Any], budget: int) -> Optional[Dict[str, Any]]:
+        """
+        Look up a finished trial
+        
+        Args:
+            study: Study name (model type, data and folds)
+            params: Hyperparameters
+            budget: Training rows per fold
+        
+        Returns:
+            Trial dictionary, or None if the trial has not run
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM tuning_trials WHERE study = ? AND params = ? AND budget = ?",
+                (study, _params_key(params), budget)
+            ).fetchone()
+        
+        return self._row_to_trial(row) if row else None
+    
+    def put(self, study: str, params: Dict[str, Any], budget: int,
+            fold_scores: List[float], fit_time: float) -> None:
+        """
+        Record a finished trial
+        
+        Args:
+            study: Study name
+            params: Hyperparameters
+            budget: Training rows per fold
+            fold_scores: Validation score of each fold
+            fit_time: Total fit time in seconds
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO tuning_trials (study, params, budget, score, "
+                "fold_scores, fit_time, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (study, _params_key(params), budget, _mean_score(fold_scores),
+                 json.dumps(fold_scores), fit_time, datetime.now().isoformat())
+            )
+    
+    def list_trials(self, study: str) -> List[Dict[str, Any]]:
+        """
+        List the trials of a study, best first
+        
+        Args:
+            study: Study name
+        
+        Returns:
+            List of trial dictionaries
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM tuning_trials WHERE study = ? "
+                "ORDER BY budget DESC, score DESC",
+                (study,)
+            ).fetchall()
+        
+        return [self._row_to_trial(row) for row in rows]
+    
+    def _row_to_trial(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert a database row to a trial dictionary"""
+        return {
+            'study': row['study'],
+            'params': json.loads(row['params']),
+            'budget': row['budget'],
+            'score': row['score'],
+            'fold_scores': json.loads(row['fold_scores']),
+            'fit_time': row['fit_time'],
+            'created_at': row['created_at']
+        }
+
+
+def _mean_score(fold_scores: List[float]) -> Optional[float]:
+    """Mean of the finite fold scores (None if there are none)"""
+    finite = [s for s in fold_scores if s is not None and np.isfinite(s)]
+    return float(np.mean(finite)) if finite else None
+
+
+def _subsample(train_idx: np.ndarray, y: Optional[np.ndarray], n_samples: int,
+               seed: int) -> np.ndarray:
+    """Draw n_samples training rows, keeping the class proportions"""
+    if n_samples >= len(train_idx):
+        return train_idx
+    
+    rng = np.random.default_rng(seed)
+    if y is None:
+        return np.sort(rng.choice(train_idx, n_samples, replace=False))
+    
+    labels = np.asarray(y[train_idx])
+    chosen = []
+    for label in np.unique(labels):
+        members = train_idx[labels == label]
+        n = max(1, int(round(n_samples * len(members) / len(train_idx))))
+        chosen.append(rng.choice(members, min(n, len(members)), replace=False))
+    return np.sort(np.concatenate(chosen))
+
+
+def _fit_and_score(model_type: str, params: Dict[str, Any], X: np.ndarray,
+                   y: Optional[np.ndarray], train_idx: np.ndarray, val_idx: np.ndarray,
+                   budget: int, random_state: int) -> Tuple[float, float]:
+    """
+    Fit one candidate on one fold and score it on the fold's validation rows
+    
+    Random Forest is scored by F1; Isolation Forest by ROC-AUC of its anomaly
+    scores against the labels.
+    
+    Returns:
+        Tuple of (score, fit_time); score is NaN if undefined for the fold
+    """
+    rows = _subsample(train_idx, y, budget, random_state)
+    start = time.perf_counter()
+    
+    if model_type == 'random_forest':
+        model = SklearnRandomForest(class_weight='balanced', random_state=random_state,
+                                    n_jobs=1, **params)
+        model.fit(X[rows], y[rows])
+        fit_time = time.perf_counter() - start
+        score = f1_score(y[val_idx], model.predict(X[val_idx]), zero_division=0)
+    
+    elif model_type == 'isolation_forest':
+        model = SklearnIsolationForest(random_state=random_state, n_jobs=1, **params)
+        model.fit(X[rows])
+        fit_time = time.perf_counter() - start
+        y_val = y[val_idx]
+        if len(np.unique(y_val)) < 2:
+            return float('nan'), fit_time
+        score = roc_auc_score(y_val, -model.score_samples(X[val_idx]))
+    
+    else:
+        raise ValueError(f"Unsupported model type for tuning: {model_type}")
+    
+    return float(score), fit_time
+
+
+@dataclass
+class TuningResult:
+    """
+    Result of a hyperparameter search
+    """
+    model_type: str
+    best_params: Dict[str, Any]
+    best_score: float
+    cv_scores: List[float]  # Fold scores of the best candidate at full budget
+    n_trials: int = 0
+    n_cached_trials: int = 0
+    rungs: List[Dict[str, Any]] = field(default_factory=list)
+    search_time: float = 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return {
+            'model_type': self.model_type,
+            'best_params': dict(self.best_params),
+            'best_score': self.best_score,
+            'cv_scores': list(self.cv_scores),
+            'n_trials': self.n_trials,
+            'n_cached_trials': self.n_cached_trials,
+            'rungs': list(self.rungs),
+            'search_time': self.search_time
+        }
+
+
+class HyperparameterTuner:
+    """
+    Successive-halving and Hyperband search for the forest models
+    """
+    
+    def __init__(self,
+                 folds: CachedFolds,
+                 trial_store: Optional[TrialStore] = None,
+                 eta: int = 3,
+                 min_resource: Optional[int] = None,
+                 n_jobs: int = -1,
+                 random_state: int = 42):
+        """
+        Initialize tuner
+        
+        Args:
+            folds: Cached data and folds (may be shared between model types)
+            trial_store: Store to resume from and record trials in
+            eta: Halving factor (keep 1/eta of the candidates per rung)
+            min_resource: Training rows per fold in the first rung (default:
+                chosen so the last rung uses the full folds)
+            n_jobs: Parallel joblib workers for (candidate, fold) fits
+            random_state: Random seed for models and subsampling
+        """
+        if eta < 2:
+            raise ValueError("eta must be at least 2")
+        
+        self.folds = folds
+        self.trial_store = trial_store
+        self.eta = eta
+        self.min_resource = min_resource
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.logger = logger
+    
+    def _study(self, model_type: str) -> str:
+        """Study name: trials are only reused for the same data and folds"""
+        return f"{model_type}-{self.folds.fingerprint}-cv{self.folds.cv}-seed{self.random_state}"
+    
+    def successive_halving(self, model_type: str,
+                           param_grid: Optional[Dict[str, list]] = None) -> TuningResult:
+        """
+        Search a parameter grid with successive halving
+        
+        All candidates are fitted on small subsamples of the training folds;
+        the best 1/eta advance to the next rung with eta times more rows,
+        until the last rung uses the full folds.
+        
+        Args:
+            model_type: 'random_forest' or 'isolation_forest'
+            param_grid: Parameter grid (default: DEFAULT_PARAM_GRIDS)
+        
+        Returns:
+            TuningResult
+        """
+        candidates = self._candidates(model_type, param_grid)
+        max_resource = self.folds.max_resource
+        n_rungs = 1 + math.ceil(math.log(len(candidates), self.eta)) if len(candidates) > 1 else 1
+        
+        min_resource = self.min_resource or max(MIN_RESOURCE, max_resource // self.eta ** (n_rungs - 1))
+        n_rungs = min(n_rungs, 1 + int(math.log(max(max_resource / min_resource, 1), self.eta)))
+        
+        return self._search(model_type, [(candidates, min_resource, n_rungs)])
+    
+    def hyperband(self, model_type: str,
+                  param_grid: Optional[Dict[str, list]] = None) -> TuningResult:
+        """
+        Search a parameter grid with Hyperband
+        
+        Runs successive-halving brackets from aggressive (many candidates on
+        few rows) to conservative (few candidates on all rows), each with
+        its own random sample of the grid.
+        
+        Args:
+            model_type: 'random_forest' or 'isolation_forest'
+            param_grid: Parameter grid (default: DEFAULT_PARAM_GRIDS)
+        
+        Returns:
+            TuningResult
+        """
+        candidates = self._candidates(model_type, param_grid)
+        max_resource = self.folds.max_resource
+        min_resource = self.min_resource or MIN_RESOURCE
+        s_max = int(math.log(max(max_resource / min_resource, 1), self.eta))
+        
+        rng = np.random.default_rng(self.random_state)
+        brackets = []
+        for s in range(s_max, -1, -1):
+            n = min(len(candidates), math.ceil((s_max + 1) / (s + 1) * self.eta ** s))
+            chosen = rng.choice(len(candidates), n, replace=False)
+            brackets.append((
+                [candidates[i] for i in chosen],
+                max(min_resource, max_resource // self.eta ** s),
+                s + 1
+            ))
+        
+        return self._search(model_type, brackets)
+    
+    def _candidates(self, model_type: str,
+                    param_grid: Optional[Dict[str, list]]) -> List[Dict[str, Any]]:
+        """Expand a parameter grid"""
+        if model_type not in DEFAULT_PARAM_GRIDS:
+            raise ValueError(f"Unsupported model type for tuning: {model_type}")
+        if model_type == 'isolation_forest' and self.folds.y is None:
+            raise ValueError("Isolation Forest tuning needs labels to score anomaly rankings")
+        if model_type == 'random_forest' and self.folds.y is None:
+            raise ValueError("Random Forest tuning needs labels")
+        
+        return list(ParameterGrid(param_grid or DEFAULT_PARAM_GRIDS[model_type]))
+    
+    def _search(self, model_type: str,
+                brackets: List[Tuple[List[Dict[str, Any]], int, int]]) -> TuningResult:
+        """Run successive-halving brackets of (candidates, min_resource, n_rungs)"""
+        start = time.perf_counter()
+        max_resource = self.folds.max_resource
+        result = TuningResult(model_type=model_type, best_params={}, best_score=-np.inf, cv_scores=[])
+        
+        for candidates, min_resource, n_rungs in brackets:
+            for rung in range(n_rungs):
+                last = rung == n_rungs - 1
+                budget = max_resource if last else min(max_resource, min_resource * self.eta ** rung)
+                
+                scores, fold_scores = self._evaluate(model_type, candidates, budget, result)
+                order = np.argsort([-s if s is not None else np.inf for s in scores], kind='stable')
+                
+                result.rungs.append({
+                    'budget': budget,
+                    'n_candidates': len(candidates),
+                    'best_score': scores[order[0]]
+                })
+                self.logger.info(
+                    f"Tuning {model_type}: {len(candidates)} candidates on {budget} rows, "
+                    f"best score {scores[order[0]]}"
+                )
+                
+                if last:
+                    best = order[0]
+                    if scores[best] is not None and scores[best] > result.best_score:
+                        result.best_score = scores[best]
+                        result.best_params = candidates[best]
+                        result.cv_scores = fold_scores[best]
+                    break
+                
+                n_keep = max(1, math.ceil(len(candidates) / self.eta))
+                candidates = [candidates[i] for i in order[:n_keep]]
+        
+        result.search_time = time.perf_counter() - start
+        self.logger.info(
+            f"Tuned {model_type} in {result.search_time:.1f}s: {result.best_params} "
+            f"(score {result.best_score:.4f}, {result.n_trials} trials, "
+            f"{result.n_cached_trials} from the trial store)"
+        )
+        
+        return result
+    
+    def _evaluate(self, model_type: str, candidates: List[Dict[str, Any]], budget: int,
+                  result: TuningResult) -> Tuple[List[Optional[float]], List[List[float]]]:
+        """Score candidates at a budget, reusing stored trials and fitting the rest in parallel"""
+        study = self._study(model_type)
+        scores: List[Optional[float]] = [None] * len(candidates)
+        fold_scores: List[List[float]] = [[] for _ in candidates]
+        pending = []
+        
+        for i, params in enumerate(candidates):
+            trial = self.trial_store.get(study, params, budget) if self.trial_store else None
+            if trial is not None:
+                scores[i], fold_scores[i] = trial['score'], trial['fold_scores']
+                result.n_cached_trials += 1
+            else:
+                pending.append(i)
+        
+        if pending:
+            tasks = [
+                (i, fold) for i in pending for fold in range(len(self.folds.folds))
+            ]
+            outputs = Parallel(n_jobs=self.n_jobs)(
+                delayed(_fit_and_score)(
+                    model_type, candidates[i], self.folds.X, self.folds.y,
+                    *self.folds.folds[fold], budget, self.random_state
+                )
+                for i, fold in tasks
+            )
+            
+            fit_times = {i: 0.0 for i in pending}
+            for (i, fold), (score, fit_time) in zip(tasks, outputs):
+                fold_scores[i].append(score)
+                fit_times[i] += fit_time
+            
+            for i in pending:
+                scores[i] = _mean_score(fold_scores[i])
+                if self.trial_store:
+                    self.trial_store.put(study, candidates[i], budget, fold_scores[i], fit_times[i])
+            
+            result.n_trials += len(pending)
+        
+        return scores, fold_scores
+
+
+def tune(model_type: str,
+         X: np.ndarray,
+         y: Optional[np.ndarray],
+         method: str = 'halving',
+         param_grid: Optional[Dict[str, list]] = None,
+         cv: int = 5,
+         trial_store: Optional[TrialStore] = None,
+         n_jobs: int = -1,
+         random_state: int = 42) -> TuningResult:
+    """
+    Tune one model type on its own cached folds
+    
+    Args:
+        model_type: 'random_forest' or 'isolation_forest'
+        X: Features
+        y: Labels
+        method: 'halving' or 'hyperband'
+        param_grid: Parameter grid (default: DEFAULT_PARAM_GRIDS)
+        cv: Number of folds
+        trial_store: Store to resume from and record trials in
+        n_jobs: Parallel joblib workers
+        random_state: Random seed
+    
+    Returns:
+        TuningResult
+    """
+    if method not in ('halving', 'hyperband'):
+        raise ValueError(f"Unknown tuning method: {method}")
+    
+    folds = CachedFolds(X, y, cv=cv, random_state=random_state)
+    try:
+        tuner = HyperparameterTuner(folds, trial_store=trial_store, n_jobs=n_jobs,
+                                    random_state=random_state)
+        if method == 'hyperband':
+            return tuner.hyperband(model_type, param_grid)
+        return tuner.successive_halving(model_type, param_grid)
+    finally:
+        folds.cleanup()
@@ -12,9 +12,8 @@ from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 from collections import defaultdict
 
-from trade_risk_analyzer.core.base import Alert, RiskLevel, PatternType
+from trade_risk_analyzer.core.base import Alert, RiskLevel, PatternType, BaseStorage
 from trade_risk_analyzer.core.logger import get_logger
-from trade_risk_analyzer.data_ingestion.storage import DatabaseStorage
 
 
 logger = get_logger(__name__)
@@ -175,12 +174,12 @@ class ReportGenerator:
     Main report generator class for creating various types of reports
     """
     
-    def __init__(self, storage: Optional[DatabaseStorage] = None):
+    def __init__(self, storage: Optional[BaseStorage] = None):
         """
         Initialize report generator
         
         Args:
-            storage: Database storage instance for retrieving data
+            storage: Trade storage (DatabaseStorage or ParquetStorage) for retrieving data
         """
         self.storage = storage
         self.logger = logger